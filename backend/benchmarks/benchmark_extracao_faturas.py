@@ -0,0 +1,73 @@
+"""
+Benchmark - Extração de dados das faturas PDF em pool de processos
+Gera faturas sintéticas e mede a vazão da extração com 1 e N processos
+e a segunda passada servida pelo cache por hash
+
+Uso:
+    python backend/benchmarks/benchmark_extracao_faturas.py --faturas 200 --processos 4 --tamanho-pdf-kb 300
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.benchmarks.simulador_portais import gerar_pdf
+from backend.services import extracao_faturas
+from backend.services.extracao_faturas import ExtratorFaturas
+
+OPERADORAS = ("EMB", "DIG", "VIV", "OI", "AZU")
+
+
+def gerar_faturas(diretorio: str, quantidade: int, tamanho_kb: int) -> list:
+    """Faturas com valor, vencimento e linha digitável na camada de texto"""
+    itens = []
+    for indice in range(quantidade):
+        texto = (
+            f"Fatura {indice} Total a pagar R$ 1.{indice % 1000:03d},{indice % 100:02d} "
+            f"Vencimento: {1 + indice % 28:02d}/06/2025 "
+            f"23790.12345 60000.123456 78901.234567 8 {90000000000000 + indice}"
+        )
+        caminho = os.path.join(diretorio, f"fatura_{indice}.pdf")
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(gerar_pdf(texto, tamanho_kb))
+        itens.append((caminho, OPERADORAS[indice % len(OPERADORAS)]))
+    return itens
+
+
+def relatar(nome: str, estatisticas):
+    dados = estatisticas.como_dict()
+    print(
+        f"{nome:<14} processos={dados['processos']:<3} arquivos={dados['arquivos']:<5} "
+        f"tempo={dados['segundos']:8.3f}s vazão={dados['arquivos_por_segundo']:8.1f}/s "
+        f"cache={dados['cache']:<5} falhas={dados['falhas']:<3} campos={dados['campos_encontrados']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extração de faturas PDF")
+    parser.add_argument("--faturas", type=int, default=200)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--tamanho-pdf-kb", type=int, default=300)
+    args = parser.parse_args()
+
+    # Cache apenas em memória: cada extrator começa vazio
+    extracao_faturas.obter_cliente_redis = lambda: None
+
+    with tempfile.TemporaryDirectory(prefix="bench_extracao_") as diretorio:
+        itens = gerar_faturas(diretorio, args.faturas, args.tamanho_pdf_kb)
+
+        for processos in sorted({1, args.processos}):
+            extrator = ExtratorFaturas(max_processos=processos)
+            try:
+                _, estatisticas = extrator.extrair_lote(itens)
+                relatar("extração", estatisticas)
+                _, estatisticas = extrator.extrair_lote(itens)
+                relatar("cache", estatisticas)
+            finally:
+                extrator.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark - Tempo de importação e inicialização dos módulos de RPA
+Cada medição roda em um subprocesso novo (cache de imports vazio)
+
+Uso:
+    python backend/benchmarks/benchmark_importacao.py --repeticoes 5
+    python backend/benchmarks/benchmark_importacao.py --detalhar backend.rpa.rpa_base
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+ALVOS_PADRAO = [
+    "backend.rpa.rpa_base",
+    "backend.rpa",
+    "backend.utils",
+    "backend.services.orquestrador_celery",
+    "backend.main",  # Entrada da API (cold start do servidor)
+]
+
+SCRIPT_MEDICAO = (
+    "import importlib, time, sys\n"
+    "inicio = time.perf_counter()\n"
+    "modulo = importlib.import_module(sys.argv[1])\n"
+    "if sys.argv[2] == '1':\n"
+    "    modulo.ConcentradorRPA()\n"
+    "print(time.perf_counter() - inicio)\n"
+)
+
+
+def medir(alvo: str, instanciar: bool) -> float:
+    """Importa o módulo em um interpretador limpo e retorna o tempo em segundos"""
+    resultado = subprocess.run(
+        [sys.executable, "-c", SCRIPT_MEDICAO, alvo, "1" if instanciar else "0"],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    return float(resultado.stdout.strip().splitlines()[-1])
+
+
+def detalhar(alvo: str, limite: int):
+    """Lista os módulos mais lentos segundo python -X importtime"""
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {alvo}"],
+        cwd=RAIZ, capture_output=True, text=True
+    )
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        # Formato: "import time:   <próprio> | <acumulado> | <módulo>"
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        proprio, acumulado, nome = linha[len("import time:"):].split("|", 2)
+        linhas.append((int(acumulado), int(proprio), nome.strip()))
+
+    print(f"\nMódulos mais lentos ao importar {alvo} (µs acumulado / próprio):")
+    for acumulado, proprio, nome in sorted(linhas, reverse=True)[:limite]:
+        print(f"{acumulado:>10} {proprio:>10}  {nome}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de importação dos RPAs")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--alvos", nargs="*", default=ALVOS_PADRAO)
+    parser.add_argument("--detalhar", help="Módulo para análise com -X importtime")
+    parser.add_argument("--limite", type=int, default=15)
+    args = parser.parse_args()
+
+    print("=== BENCHMARK IMPORTAÇÃO ===")
+    for alvo in args.alvos:
+        instanciar = alvo == "backend.rpa.rpa_base"
+        try:
+            tempos = [medir(alvo, instanciar) for _ in range(args.repeticoes)]
+        except RuntimeError as e:
+            print(f"{alvo:<40} falhou: {e}")
+            continue
+        sufixo = " + ConcentradorRPA()" if instanciar else ""
+        print(
+            f"{alvo + sufixo:<60} média={statistics.mean(tempos) * 1000:8.1f}ms "
+            f"mín={min(tempos) * 1000:8.1f}ms"
+        )
+
+    if args.detalhar:
+        detalhar(args.detalhar, args.limite)
+
+
+if __name__ == "__main__":
+    main()
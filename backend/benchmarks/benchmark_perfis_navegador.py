@@ -0,0 +1,60 @@
+"""
+Benchmark - Navegação com perfil padrão vs perfil da operadora
+Mede o tempo de carregamento da página e a memória (RSS) do navegador
+
+Uso:
+    python backend/benchmarks/benchmark_perfis_navegador.py --operadora EMB \
+        --url https://webebt01.embratel.com.br/embratelonline/index.asp
+"""
+
+import argparse
+import statistics
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.selenium_driver import SeleniumDriver
+from backend.utils.perfis_navegador import obter_perfil, PERFIL_PADRAO
+
+
+def medir(perfil, url: str, iteracoes: int, browser: str) -> tuple:
+    """Navega repetidamente para a URL e retorna (tempos, rss_mb)"""
+    navegador = SeleniumDriver(browser=browser, usar_pool=False, perfil=perfil)
+    navegador.inicializar()
+    tempos = []
+    try:
+        for _ in range(iteracoes):
+            navegador.get("about:blank")
+            inicio = time.perf_counter()
+            navegador.get(url)
+            tempos.append(time.perf_counter() - inicio)
+        return tempos, navegador.obter_rss_mb()
+    finally:
+        navegador.finalizar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de navegador")
+    parser.add_argument("--operadora", default="EMB")
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--iteracoes", type=int, default=5)
+    parser.add_argument("--browser", default="firefox", choices=["firefox", "chrome"])
+    parser.add_argument("--configuracao", help="JSON no formato de Operadora.configuracao_navegador")
+    args = parser.parse_args()
+
+    perfil = obter_perfil(args.operadora, args.configuracao)
+
+    print("=== BENCHMARK PERFIS DE NAVEGADOR ===")
+    print(f"URL: {args.url} | Perfil: {perfil.to_dict()}")
+
+    for nome, perfil_medido in (("padrao", PERFIL_PADRAO), (perfil.nome, perfil)):
+        tempos, rss = medir(perfil_medido, args.url, args.iteracoes, args.browser)
+        print(
+            f"{nome:<8} média={statistics.mean(tempos):7.3f}s p50={statistics.median(tempos):7.3f}s "
+            f"máx={max(tempos):7.3f}s rss={rss:8.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark - Aquisição de navegador a frio vs pool pré-aquecido
+Mede a latência de obter um navegador pronto para navegação
+
+Uso:
+    python backend/benchmarks/benchmark_pool_navegadores.py --iteracoes 10 --browser firefox
+"""
+
+import argparse
+import statistics
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.selenium_driver import SeleniumDriver
+from backend.utils.pool_navegadores import PoolNavegadores, ConfiguracaoPool
+
+
+def medir_frio(iteracoes: int, browser: str, headless: bool) -> list:
+    """Inicializa e finaliza um navegador novo a cada iteração"""
+    tempos = []
+    for _ in range(iteracoes):
+        navegador = SeleniumDriver(headless=headless, browser=browser, usar_pool=False)
+        inicio = time.perf_counter()
+        navegador.inicializar()
+        navegador.get("about:blank")
+        tempos.append(time.perf_counter() - inicio)
+        navegador.finalizar()
+    return tempos
+
+
+def medir_pool(iteracoes: int, browser: str, headless: bool) -> list:
+    """Empresta e devolve navegadores de um pool já aquecido"""
+    pool = PoolNavegadores(ConfiguracaoPool(tamanho=1, browser=browser, headless=headless))
+    pool.aquecer()
+    tempos = []
+    try:
+        for _ in range(iteracoes):
+            inicio = time.perf_counter()
+            navegador = pool.adquirir()
+            navegador.get("about:blank")
+            tempos.append(time.perf_counter() - inicio)
+            pool.devolver(navegador)
+    finally:
+        pool.encerrar()
+    return tempos
+
+
+def resumir(nome: str, tempos: list):
+    """Imprime estatísticas de latência"""
+    ordenados = sorted(tempos)
+    p95 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))]
+    print(
+        f"{nome:<8} n={len(tempos):<4} média={statistics.mean(tempos):7.3f}s "
+        f"p50={statistics.median(tempos):7.3f}s p95={p95:7.3f}s máx={max(tempos):7.3f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pool de navegadores")
+    parser.add_argument("--iteracoes", type=int, default=5)
+    parser.add_argument("--browser", default="firefox", choices=["firefox", "chrome"])
+    parser.add_argument("--com-interface", action="store_true", help="Executa sem headless")
+    args = parser.parse_args()
+
+    headless = not args.com_interface
+
+    print("=== BENCHMARK POOL DE NAVEGADORES ===")
+    print(f"Browser: {args.browser} | Headless: {headless} | Iterações: {args.iteracoes}")
+
+    tempos_frio = medir_frio(args.iteracoes, args.browser, headless)
+    tempos_pool = medir_pool(args.iteracoes, args.browser, headless)
+
+    resumir("frio", tempos_frio)
+    resumir("pool", tempos_pool)
+    print(f"Ganho médio por aquisição: {statistics.mean(tempos_frio) - statistics.mean(tempos_pool):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark - Vazão da camada RPA contra os portais simulados
+Executa N operações simultâneas por concentrador_rpa.executar_operacao contra
+o simulador local e relata faturas/minuto, p50/p95 por etapa (metricas_etapas) e memória dos
+navegadores
+
+Uso:
+    python backend/benchmarks/benchmark_throughput_rpa.py --operadoras EMB,DIG --execucoes 40 --concorrencia 8 --latencia-ms 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.benchmarks.simulador_portais import (
+    PORTAIS_SIMULADOS,
+    ConfiguracaoSimulador,
+    ambiente_simulado,
+    gerar_pdf,
+    iniciar_simuladores,
+)
+
+# RPAs que implementam o contrato RPABase e podem ser medidos ponta a ponta
+OPERADORAS_SUPORTADAS = ("EMB", "DIG", "SAT")
+
+
+class AmostradorMemoria(threading.Thread):
+    """Amostra o RSS somado dos processos filhos (geckodriver/chromedriver e navegadores)"""
+
+    def __init__(self, intervalo: float = 0.5):
+        super().__init__(name="amostrador-memoria", daemon=True)
+        self.intervalo = intervalo
+        self.amostras_mb: List[float] = []
+        self._parar = threading.Event()
+        try:
+            import psutil
+            self._processo = psutil.Process()
+        except ImportError:
+            self._processo = None
+
+    def run(self):
+        if self._processo is None:
+            return
+        while not self._parar.wait(self.intervalo):
+            total = 0
+            for filho in self._processo.children(recursive=True):
+                try:
+                    total += filho.memory_info().rss
+                except Exception:
+                    # Processo encerrado entre a listagem e a leitura
+                    continue
+            self.amostras_mb.append(total / (1024 * 1024))
+
+    def parar(self):
+        self._parar.set()
+        self.join(timeout=self.intervalo * 2)
+
+
+def percentil(valores: List[float], fracao: float) -> float:
+    """Percentil por interpolação linear"""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * fracao
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def montar_parametros(codigo: str, portal, indice: int):
+    """ParametrosEntradaPadrao de uma execução contra o portal simulado"""
+    from backend.rpa.rpa_base import ParametrosEntradaPadrao
+
+    id_cliente = f"bench{indice}"
+    if codigo == "SAT":
+        # O RPA SAT envia o arquivo local do cliente (ver SatRPA._obter_caminho_arquivo)
+        with open(f"/tmp/{id_cliente}_fatura.pdf", "wb") as arquivo:
+            arquivo.write(gerar_pdf(f"Fatura de benchmark {indice}"))
+
+    return ParametrosEntradaPadrao(
+        id_processo=f"bench-{codigo}-{indice}",
+        id_cliente=id_cliente,
+        operadora_codigo="EMB" if codigo == "SAT" else codigo,
+        url_portal=portal.url_portal(),
+        usuario="00000000000100",
+        senha="simulador",
+        filtro=portal.filtro(indice),
+        nome_sat=f"Cliente {indice}",
+        dados_sat=f"Linha {indice}",
+        unidade="MATRIZ",
+    )
+
+
+def executar(codigo: str, portal, indice: int) -> Dict:
+    """Executa uma operação e devolve o resultado com o tempo total"""
+    from backend.rpa.rpa_base import TipoOperacao, concentrador_rpa
+
+    operacao = TipoOperacao.UPLOAD_SAT if codigo == "SAT" else TipoOperacao.DOWNLOAD_FATURA
+    parametros = montar_parametros(codigo, portal, indice)
+    inicio = time.perf_counter()
+    resultado = concentrador_rpa.executar_operacao(operacao, parametros)
+    return {"operadora": codigo, "resultado": resultado, "duracao": time.perf_counter() - inicio}
+
+
+def relatar(execucoes: List[Dict], duracao_total: float, simuladores, memoria: AmostradorMemoria):
+    """Imprime vazão, falhas, percentis por etapa e memória"""
+    from backend.rpa.limitador_concorrencia import obter_limitador_concorrencia
+    from backend.rpa.metricas_etapas import agregar_metricas_por_operadora
+
+    print("\n=== RESULTADO ===")
+    print(f"Duração total: {duracao_total:.1f}s")
+
+    for codigo in sorted({execucao["operadora"] for execucao in execucoes}):
+        da_operadora = [execucao for execucao in execucoes if execucao["operadora"] == codigo]
+        sucessos = [execucao for execucao in da_operadora if execucao["resultado"].sucesso]
+        status = Counter(
+            execucao["resultado"].classe_falha or execucao["resultado"].status.value
+            for execucao in da_operadora if not execucao["resultado"].sucesso
+        )
+        duracoes = [execucao["duracao"] for execucao in sucessos]
+
+        print(f"\n[{codigo}] {len(sucessos)}/{len(da_operadora)} sucesso(s) - "
+              f"{len(sucessos) / duracao_total * 60:.1f} faturas/min")
+        if status:
+            print("  Falhas: " + ", ".join(f"{chave}={quantidade}" for chave, quantidade in status.most_common()))
+        if duracoes:
+            print(f"  Total          p50={percentil(duracoes, 0.5):7.2f}s p95={percentil(duracoes, 0.95):7.2f}s")
+
+        agregado = agregar_metricas_por_operadora(
+            (codigo, execucao["resultado"].metricas_etapas) for execucao in sucessos
+        ).get(codigo, {})
+        for etapa, resumo in agregado.get("etapas", {}).items():
+            print(
+                f"  {etapa:<14} p50={resumo['p50_segundos']:7.2f}s p95={resumo['p95_segundos']:7.2f}s "
+                f"sleep={resumo['sleep_segundos']:.1f}s espera={resumo['espera_segundos']:.1f}s "
+                f"({resumo['participacao_percentual']:.0f}%)"
+            )
+
+        portal = simuladores[codigo]
+        print(f"  Simulador: {portal.estatisticas}")
+        print(f"  Limite de concorrência final: {obter_limitador_concorrencia().limite_atual(codigo):.2f}")
+
+    if memoria.amostras_mb:
+        media = sum(memoria.amostras_mb) / len(memoria.amostras_mb)
+        print(f"\nMemória dos navegadores: pico={max(memoria.amostras_mb):.0f} MB média={media:.0f} MB")
+    else:
+        print("\nMemória dos navegadores: n/d (psutil não instalado)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão da camada RPA contra portais simulados")
+    parser.add_argument("--operadoras", default="EMB,DIG", help="Códigos separados por vírgula")
+    parser.add_argument("--execucoes", type=int, default=20, help="Execuções por operadora")
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--latencia-ms", type=float, default=100)
+    parser.add_argument("--variacao-ms", type=float, default=50)
+    parser.add_argument("--taxa-erro", type=float, default=0)
+    parser.add_argument("--taxa-travamento", type=float, default=0)
+    parser.add_argument("--tamanho-pdf-kb", type=int, default=200)
+    parser.add_argument("--modo-api", action="store_true", help="Usa a listagem da API DigitalNet")
+    parser.add_argument("--browser", default="firefox", choices=["firefox", "chrome"])
+    parser.add_argument("--com-interface", action="store_true", help="Desativa o modo headless")
+    args = parser.parse_args()
+
+    codigos = [codigo.strip().upper() for codigo in args.operadoras.split(",") if codigo.strip()]
+    for codigo in codigos:
+        if codigo not in PORTAIS_SIMULADOS:
+            parser.error(f"Operadora sem simulador: {codigo}")
+        if codigo not in OPERADORAS_SUPORTADAS:
+            print(f"Aviso: o RPA {codigo} não implementa o contrato RPABase; "
+                  f"o portal é simulado mas a operadora fica fora da medição")
+    codigos = [codigo for codigo in codigos if codigo in OPERADORAS_SUPORTADAS]
+    if not codigos:
+        parser.error("Nenhuma operadora mensurável informada")
+
+    configuracao = ConfiguracaoSimulador(
+        latencia_ms=args.latencia_ms,
+        variacao_ms=args.variacao_ms,
+        taxa_erro=args.taxa_erro,
+        taxa_travamento=args.taxa_travamento,
+        travamento_segundos=90,
+        contas=max(3, args.execucoes),
+        tamanho_pdf_kb=args.tamanho_pdf_kb,
+    )
+    simuladores = iniciar_simuladores(codigos, configuracao, args.modo_api)
+
+    # Configuração lida na importação dos RPAs: precisa anteceder o import do concentrador
+    os.environ.update(ambiente_simulado(simuladores))
+    os.environ.setdefault("RPA_DOWNLOAD_DIR", tempfile.mkdtemp(prefix="bench_rpa_"))
+    os.environ["RPA_BROWSER"] = args.browser
+    os.environ["RPA_HEADLESS"] = "false" if args.com_interface else "true"
+
+    print("=== BENCHMARK DE VAZÃO RPA ===")
+    print(f"Operadoras: {', '.join(codigos)} | execuções/operadora: {args.execucoes} | "
+          f"concorrência: {args.concorrencia} | latência: {args.latencia_ms:.0f}±{args.variacao_ms:.0f}ms | "
+          f"erros: {args.taxa_erro:.0%} | travamentos: {args.taxa_travamento:.0%}")
+    print("Obs.: o limitador de concorrência por operadora continua ativo "
+          "(ajuste com RPA_LIMITES_OPERADORAS para medir outros limites)")
+
+    memoria = AmostradorMemoria()
+    memoria.start()
+    inicio = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+            futuros = [
+                executor.submit(executar, codigo, simuladores[codigo], indice)
+                for indice in range(args.execucoes)
+                for codigo in codigos
+            ]
+            execucoes = [futuro.result() for futuro in futuros]
+    finally:
+        duracao_total = time.perf_counter() - inicio
+        memoria.parar()
+        for portal in simuladores.values():
+            portal.parar()
+
+    relatar(execucoes, duracao_total, simuladores, memoria)
+
+
+if __name__ == "__main__":
+    main()
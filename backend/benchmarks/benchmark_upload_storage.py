@@ -0,0 +1,64 @@
+"""
+Benchmark - Vazão de upload das faturas para o object store
+Compara uploads sequenciais com uploads paralelos sobre o pool de conexões.
+Por padrão usa o object store em memória com latência simulada; com --minio
+usa o MinIO configurado por MINIO_ENDPOINT/BUCKET_NAME
+
+Uso:
+    python backend/benchmarks/benchmark_upload_storage.py --faturas 200 --paralelos 8 --latencia-ms 40
+    python backend/benchmarks/benchmark_upload_storage.py --minio --faturas 500 --tamanho-pdf-kb 800
+"""
+
+import argparse
+import os
+import sys
+import time
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.benchmarks.simulador_portais import gerar_pdf
+from backend.utils.cliente_storage import ClienteStorageMemoria, ClienteStorageMinio, ConfiguracaoStorage
+
+
+def criar_cliente(args, paralelos: int):
+    configuracao = ConfiguracaoStorage(uploads_paralelos=paralelos, conexoes=max(paralelos, 1))
+    if args.minio:
+        return ClienteStorageMinio(configuracao)
+    return ClienteStorageMemoria(configuracao, latencia_segundos=args.latencia_ms / 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de upload para o object store")
+    parser.add_argument("--faturas", type=int, default=200)
+    parser.add_argument("--paralelos", type=int, default=8)
+    parser.add_argument("--tamanho-pdf-kb", type=int, default=300)
+    parser.add_argument("--latencia-ms", type=float, default=40, help="Latência simulada por PUT (sem --minio)")
+    parser.add_argument("--minio", action="store_true", help="Usa o MinIO configurado em vez do object store em memória")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_upload_") as diretorio:
+        itens = []
+        for indice in range(args.faturas):
+            caminho = os.path.join(diretorio, f"fatura_{indice}.pdf")
+            with open(caminho, "wb") as arquivo:
+                arquivo.write(gerar_pdf(f"Fatura {indice}", args.tamanho_pdf_kb))
+            itens.append((caminho, f"benchmark/{int(time.time())}/fatura_{indice}.pdf"))
+
+        for paralelos in sorted({1, args.paralelos}):
+            cliente = criar_cliente(args, paralelos)
+            inicio = time.perf_counter()
+            try:
+                resultados = cliente.enviar_varios(itens)
+            finally:
+                cliente.encerrar()
+            segundos = time.perf_counter() - inicio
+            falhas = sum(1 for resultado in resultados if isinstance(resultado, Exception))
+            megabytes = sum(os.path.getsize(caminho) for caminho, _ in itens) / 1024 / 1024
+            print(
+                f"paralelos={paralelos:<3} faturas={len(itens):<5} tempo={segundos:8.3f}s "
+                f"vazão={len(itens) / segundos:8.1f}/s ({megabytes / segundos:7.1f} MB/s) falhas={falhas}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,800 @@
+"""
+Simulador local dos portais das operadoras
+Servidores HTTP com páginas sintéticas (login, listagem de faturas e PDFs) no
+formato esperado pelos localizadores dos RPAs, com latência e falhas
+configuráveis, para medir o desempenho da camada RPA sem os portais reais
+
+Uso isolado (mantém os servidores ativos até Ctrl+C):
+    python backend/benchmarks/simulador_portais.py --operadoras EMB,DIG,SAT --latencia-ms 150
+"""
+
+import argparse
+import base64
+import html
+import json
+import logging
+import random
+import re
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+logger = logging.getLogger(__name__)
+
+COOKIE_SESSAO = "sessao_simulador"
+
+# GIF 1x1 transparente (logo do portal Embratel / ícones do SAT)
+IMAGEM_VAZIA = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+
+@dataclass
+class ConfiguracaoSimulador:
+    """Latência e injeção de falhas aplicadas a cada requisição"""
+    latencia_ms: float = 0.0
+    variacao_ms: float = 0.0
+    taxa_erro: float = 0.0  # Respostas 503
+    taxa_travamento: float = 0.0  # Requisições que só respondem após travamento_segundos
+    travamento_segundos: float = 60.0
+    contas: int = 3  # Contas/faturas listadas por portal
+    tamanho_pdf_kb: int = 0  # Completa os PDFs até o tamanho informado
+    semente: Optional[int] = None
+
+
+@dataclass
+class Requisicao:
+    metodo: str
+    caminho: str
+    parametros: Dict[str, str]
+    consulta: Dict[str, str]
+    formulario: Dict[str, str]
+    cabecalhos: Dict[str, str]
+    sessao: Optional[str] = None
+
+
+@dataclass
+class Resposta:
+    status: int = 200
+    corpo: bytes = b""
+    tipo: str = "text/html; charset=utf-8"
+    cabecalhos: Dict[str, str] = field(default_factory=dict)
+
+
+def pagina(titulo: str, corpo: str, script: str = "") -> Resposta:
+    """Resposta HTML com título, corpo e script opcional"""
+    documento = (
+        "<!DOCTYPE html><html><head><meta charset=\"UTF-8\">"
+        f"<title>{html.escape(titulo)}</title></head><body>{corpo}"
+        f"{f'<script>{script}</script>' if script else ''}</body></html>"
+    )
+    return Resposta(corpo=documento.encode("utf-8"))
+
+
+def redirecionar(destino: str, cookie: Optional[str] = None) -> Resposta:
+    cabecalhos = {"Location": destino}
+    if cookie:
+        cabecalhos["Set-Cookie"] = f"{COOKIE_SESSAO}={cookie}; Path=/; HttpOnly"
+    return Resposta(status=302, cabecalhos=cabecalhos)
+
+
+def json_resposta(dados, status: int = 200) -> Resposta:
+    return Resposta(status=status, corpo=json.dumps(dados).encode("utf-8"), tipo="application/json")
+
+
+def gerar_pdf(texto: str, tamanho_kb: int = 0) -> bytes:
+    """PDF mínimo de uma página com o texto informado (sem dependências)"""
+    texto = texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    conteudo = f"BT /F1 12 Tf 72 770 Td ({texto}) Tj ET\n".encode("latin-1", "replace")
+    if tamanho_kb:
+        # Comentários no fluxo de conteúdo aproximam o tamanho de faturas reais
+        linha = b"%" + b"0" * 78 + b"\n"
+        conteudo += linha * max(0, (tamanho_kb * 1024) // len(linha))
+
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream",
+    ]
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for numero, objeto in enumerate(objetos, 1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n" % numero + objeto + b"\nendobj\n"
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicao in posicoes:
+        saida += b"%010d 00000 n \n" % posicao
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
+
+
+def gerar_pdf_protegido(texto: str, senha: str, tamanho_kb: int = 0) -> bytes:
+    """
+    PDF criptografado com a senha informada (fatura DigitalNet)
+
+    Requer PyPDF2, a mesma dependência usada pelos RPAs para mesclar os PDFs;
+    sem ela o PDF é servido sem proteção.
+    """
+    conteudo = gerar_pdf(texto, tamanho_kb)
+    try:
+        from PyPDF2 import PdfReader, PdfWriter
+    except ImportError:
+        logger.warning("PyPDF2 não instalado: PDF protegido servido sem senha")
+        return conteudo
+
+    escritor = PdfWriter()
+    for pagina_pdf in PdfReader(BytesIO(conteudo)).pages:
+        escritor.add_page(pagina_pdf)
+    escritor.encrypt(senha)
+    saida = BytesIO()
+    escritor.write(saida)
+    return saida.getvalue()
+
+
+def gerar_token(assunto: str, validade_segundos: int = 3600) -> str:
+    """Token no formato JWT (não assinado) reconhecido pelo cache de sessões"""
+    def _codificar(dados) -> str:
+        return base64.urlsafe_b64encode(json.dumps(dados).encode()).rstrip(b"=").decode()
+
+    cabecalho = _codificar({"alg": "HS256", "typ": "JWT"})
+    carga = _codificar({"sub": assunto, "exp": int(time.time()) + validade_segundos})
+    return f"{cabecalho}.{carga}.{secrets.token_urlsafe(16)}"
+
+
+def data_vencimento() -> date:
+    """Vencimento das faturas simuladas: dia 10 do mês corrente"""
+    return date.today().replace(day=10)
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """Encaminha as requisições para o portal simulado do servidor"""
+
+    protocol_version = "HTTP/1.1"
+    portal: "PortalSimulado" = None
+
+    def do_GET(self):
+        self.portal._atender(self)
+
+    def do_POST(self):
+        self.portal._atender(self)
+
+    def log_message(self, formato, *args):
+        logger.debug(f"[{self.portal.codigo}] {formato % args}")
+
+
+class PortalSimulado:
+    """
+    Servidor HTTP de um portal sintético
+
+    Subclasses declaram as rotas como (método, padrão do caminho, função,
+    exige sessão). A latência e as falhas configuradas são aplicadas a
+    todas as requisições.
+    """
+
+    codigo = ""
+    nome = ""
+
+    def __init__(self, configuracao: Optional[ConfiguracaoSimulador] = None):
+        self.configuracao = configuracao or ConfiguracaoSimulador()
+        self._aleatorio = random.Random(self.configuracao.semente)
+        self._sessoes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._servidor: Optional[ThreadingHTTPServer] = None
+        self._rotas = [
+            (metodo, re.compile(padrao), funcao, exige_sessao)
+            for metodo, padrao, funcao, exige_sessao in self.rotas()
+        ]
+        self.estatisticas = {
+            "requisicoes": 0, "erros_injetados": 0, "travamentos": 0,
+            "logins": 0, "documentos": 0, "uploads": 0,
+        }
+
+    # ---- Ciclo de vida ----
+
+    def iniciar(self, porta: int = 0) -> "PortalSimulado":
+        """Inicia o servidor em 127.0.0.1 (porta 0 = livre) em thread própria"""
+        manipulador = type(f"Manipulador{self.codigo}", (_Manipulador,), {"portal": self})
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), manipulador)
+        self._servidor.daemon_threads = True
+        threading.Thread(
+            target=self._servidor.serve_forever, name=f"simulador-{self.codigo}", daemon=True
+        ).start()
+        logger.info(f"Portal simulado {self.nome} em {self.url}")
+        return self
+
+    def parar(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    # ---- Integração com os RPAs ----
+
+    def ambiente(self) -> Dict[str, str]:
+        """Variáveis de ambiente que apontam o RPA para o simulador"""
+        return {}
+
+    def url_portal(self) -> str:
+        """Valor de ParametrosEntradaPadrao.url_portal"""
+        return f"{self.url}/"
+
+    def contas(self) -> List[str]:
+        return [f"{self.codigo}{1000001 + indice}" for indice in range(self.configuracao.contas)]
+
+    def filtro(self, indice: int) -> str:
+        """Filtro de ParametrosEntradaPadrao que seleciona uma das faturas listadas"""
+        return self.contas()[indice % len(self.contas())]
+
+    def rotas(self) -> List[Tuple[str, str, Callable[[Requisicao], Resposta], bool]]:
+        raise NotImplementedError
+
+    # ---- Sessões ----
+
+    def abrir_sessao(self, usuario: str) -> str:
+        sessao = secrets.token_hex(16)
+        with self._lock:
+            self._sessoes[sessao] = gerar_token(usuario)
+            self.estatisticas["logins"] += 1
+        return sessao
+
+    def token_da_sessao(self, sessao: Optional[str]) -> Optional[str]:
+        with self._lock:
+            return self._sessoes.get(sessao or "")
+
+    def token_valido(self, cabecalhos: Dict[str, str]) -> bool:
+        autorizacao = cabecalhos.get("authorization", "")
+        token = autorizacao[7:] if autorizacao.lower().startswith("bearer ") else ""
+        with self._lock:
+            return bool(token) and token in self._sessoes.values()
+
+    def sem_sessao(self, requisicao: Requisicao) -> Resposta:
+        return redirecionar("/")
+
+    # ---- Atendimento ----
+
+    def _contar(self, chave: str):
+        with self._lock:
+            self.estatisticas[chave] += 1
+
+    def _injetar_falha(self) -> Optional[Resposta]:
+        configuracao = self.configuracao
+        if configuracao.latencia_ms or configuracao.variacao_ms:
+            atraso = configuracao.latencia_ms + self._aleatorio.uniform(
+                -configuracao.variacao_ms, configuracao.variacao_ms
+            )
+            time.sleep(max(0.0, atraso) / 1000)
+
+        sorteio = self._aleatorio.random()
+        if sorteio < configuracao.taxa_travamento:
+            self._contar("travamentos")
+            time.sleep(configuracao.travamento_segundos)
+            return Resposta(status=504, corpo=b"Gateway Timeout", tipo="text/plain")
+        if sorteio < configuracao.taxa_travamento + configuracao.taxa_erro:
+            self._contar("erros_injetados")
+            return Resposta(status=503, corpo=b"Service Unavailable", tipo="text/plain")
+        return None
+
+    def _ler_requisicao(self, manipulador: _Manipulador) -> Requisicao:
+        endereco = urlparse(manipulador.path)
+        cabecalhos = {chave.lower(): valor for chave, valor in manipulador.headers.items()}
+        corpo = b""
+        if cabecalhos.get("content-length"):
+            corpo = manipulador.rfile.read(int(cabecalhos["content-length"]))
+
+        formulario = {}
+        if cabecalhos.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+            formulario = {chave: valores[0] for chave, valores in parse_qs(corpo.decode("utf-8")).items()}
+
+        sessao = None
+        for cookie in cabecalhos.get("cookie", "").split(";"):
+            nome, _, valor = cookie.strip().partition("=")
+            if nome == COOKIE_SESSAO:
+                sessao = valor
+
+        return Requisicao(
+            metodo=manipulador.command,
+            caminho=endereco.path,
+            parametros={},
+            consulta={chave: valores[0] for chave, valores in parse_qs(endereco.query).items()},
+            formulario=formulario,
+            cabecalhos=cabecalhos,
+            sessao=sessao if self.token_da_sessao(sessao) else None,
+        )
+
+    def _atender(self, manipulador: _Manipulador):
+        self._contar("requisicoes")
+        requisicao = self._ler_requisicao(manipulador)
+        resposta = self._injetar_falha()
+
+        if resposta is None:
+            resposta = Resposta(status=404, corpo=b"Not Found", tipo="text/plain")
+            for metodo, padrao, funcao, exige_sessao in self._rotas:
+                encontrado = padrao.fullmatch(requisicao.caminho)
+                if metodo == requisicao.metodo and encontrado:
+                    requisicao.parametros = encontrado.groupdict()
+                    if exige_sessao and not requisicao.sessao:
+                        resposta = self.sem_sessao(requisicao)
+                    else:
+                        resposta = funcao(requisicao)
+                    break
+
+        try:
+            manipulador.send_response(resposta.status)
+            manipulador.send_header("Content-Type", resposta.tipo)
+            manipulador.send_header("Content-Length", str(len(resposta.corpo)))
+            manipulador.send_header("Cache-Control", "no-store")
+            for chave, valor in resposta.cabecalhos.items():
+                manipulador.send_header(chave, valor)
+            manipulador.end_headers()
+            manipulador.wfile.write(resposta.corpo)
+        except (BrokenPipeError, ConnectionResetError):
+            # Navegador abandonou a requisição (ex.: timeout do RPA)
+            pass
+
+    def _pdf(self, texto: str, nome: str, protegido_com: Optional[str] = None) -> Resposta:
+        self._contar("documentos")
+        if protegido_com:
+            conteudo = gerar_pdf_protegido(texto, protegido_com, self.configuracao.tamanho_pdf_kb)
+        else:
+            conteudo = gerar_pdf(texto, self.configuracao.tamanho_pdf_kb)
+        return Resposta(
+            corpo=conteudo,
+            tipo="application/pdf",
+            cabecalhos={"Content-Disposition": f'attachment; filename="{nome}"'},
+        )
+
+
+class PortalEmbratel(PortalSimulado):
+    """
+    Portal EBPP da Embratel: login ASP, tabela de faturas e documentos
+    abertos em novas abas por chamaFatura() (capturados como HTML pelo RPA)
+    """
+
+    codigo = "EMB"
+    nome = "Embratel"
+
+    def ambiente(self) -> Dict[str, str]:
+        return {"EMBRATEL_RECURSOS_URL": self.url}
+
+    def filtro(self, indice: int) -> str:
+        return f"{super().filtro(indice)}_{data_vencimento():%d}"
+
+    def rotas(self):
+        return [
+            ("GET", "/", self._login, False),
+            ("POST", "/login", self._autenticar, False),
+            ("GET", "/home", self._home, True),
+            ("GET", "/fatura", self._selecao_mes, True),
+            ("GET", "/faturas", self._faturas, True),
+            ("GET", "/detalhe", self._detalhe, True),
+            ("GET", r"/documento/(?P<documento>\w+)", self._documento, True),
+            ("GET", "/EbppCorporativo/scriptcss/styles.css", self._css, False),
+            ("GET", r"/EbppCorporativo/imagens/(?P<imagem>[\w.-]+)", self._imagem, False),
+        ]
+
+    def _login(self, requisicao):
+        return pagina("Embratel Online", (
+            "<form method='post' action='/login'>"
+            "<input id='login' name='login' type='text'>"
+            "<input id='MainContent_password' name='senha' type='password'>"
+            "<input type='submit' value='Entrar'>"
+            "</form>"
+        ))
+
+    def _autenticar(self, requisicao):
+        return redirecionar("/home", self.abrir_sessao(requisicao.formulario.get("login", "")))
+
+    def _home(self, requisicao):
+        return pagina("Embratel Online", "<a href='/fatura'>Fatura On Line</a>")
+
+    def _selecao_mes(self, requisicao):
+        hoje = date.today()
+        opcoes = "".join(
+            f"<option value='{hoje.year}{mes:02d}'>{mes:02d}/{hoje.year}</option>"
+            for mes in range(hoje.month, 0, -1)
+        )
+        return pagina("Fatura On Line", (
+            "<form method='get' action='/faturas'>"
+            f"<select name='mes'>{opcoes}</select>"
+            "<input type='submit' id='submit' value='Ok'>"
+            "</form>"
+        ))
+
+    def _faturas(self, requisicao):
+        vencimento = data_vencimento().strftime("%d/%m/%Y")
+        linhas = "".join(
+            f"<tr onclick=\"location.href='/detalhe?conta={conta}'\">"
+            f"<td>Cliente</td><td>{conta}</td><td>Serviços</td><td>R$ 1.234,56</td><td>{vencimento}</td></tr>"
+            for conta in self.contas()
+        )
+        return pagina("Faturas", (
+            "<table class='txtCinzaHand tabela'><thead><tr><th>Cliente</th><th>Conta</th>"
+            f"<th>Tipo</th><th>Valor</th><th>Vencimento</th></tr></thead><tbody>{linhas}</tbody></table>"
+        ))
+
+    def _detalhe(self, requisicao):
+        conta = html.escape(requisicao.consulta.get("conta", ""))
+        documentos = "".join(
+            f"<tr onclick=\"return chamaFatura('{documento}')\"><td>{titulo}</td></tr>"
+            for documento, titulo in (
+                ("imprimirFatura", "Imprimir Fatura"),
+                ("imprimirBoleto", "Imprimir Boleto"),
+                ("notaFiscal", "Nota Fiscal"),
+            )
+        )
+        script = (
+            "function chamaFatura(documento) {"
+            f" window.open('/documento/' + documento + '?conta={quote(conta)}', '_blank');"
+            " return false; }"
+        )
+        return pagina(f"Conta {conta}", f"<table>{documentos}</table>", script)
+
+    def _documento(self, requisicao):
+        documento = requisicao.parametros["documento"]
+        conta = html.escape(requisicao.consulta.get("conta", ""))
+        self._contar("documentos")
+
+        if documento == "imprimirBoleto":
+            return pagina("Boleto", (
+                f"<div>Boleto da conta {conta}</div>"
+                "<div>Data de Vencimento</div>"
+                f"<div class='txtPretoBold12'>{data_vencimento():%d/%m/%Y}</div>"
+            ))
+        if documento == "notaFiscal":
+            return pagina("Notas Fiscais", (
+                "<table><tr>"
+                f"<td align='left' onclick=\"window.open('/documento/nfIcms?conta={quote(conta)}')\">NF ICMS</td>"
+                f"<td align='left' onclick=\"window.open('/documento/nfIss?conta={quote(conta)}')\">NF ISS</td>"
+                "</tr></table>"
+            ))
+        itens = "".join(
+            f"<tr><td>Serviço {indice}</td><td>R$ {indice * 100},00</td></tr>" for indice in range(1, 31)
+        )
+        return pagina(documento, (
+            "<img src='/EbppCorporativo/imagens/RH-logo-verde-amarelo-transparente.gif'>"
+            f"<h1>{documento} - Conta {conta}</h1><table>{itens}</table>"
+        ))
+
+    def _css(self, requisicao):
+        return Resposta(corpo=b".txtPretoBold12 { font-weight: bold; }", tipo="text/css")
+
+    def _imagem(self, requisicao):
+        return Resposta(corpo=IMAGEM_VAZIA, tipo="image/gif")
+
+
+class PortalDigitalnet(PortalSimulado):
+    """
+    Portal SPA da DigitalNet e a API de faturas usada no download dos PDFs
+    (bearer token gravado no localStorage após o login)
+    """
+
+    codigo = "DIG"
+    nome = "DigitalNet"
+
+    # Senha dos PDFs de fatura: três primeiros dígitos do CNPJ usado pelo RPA
+    SENHA_PDF = "000"
+
+    def __init__(self, configuracao: Optional[ConfiguracaoSimulador] = None, modo_api: bool = False):
+        super().__init__(configuracao)
+        self.modo_api = modo_api
+
+    def ambiente(self) -> Dict[str, str]:
+        ambiente = {"DIGITALNET_API_URL": self.url, "DIGITALNET_ORIGIN": self.url}
+        if self.modo_api:
+            ambiente["DIGITALNET_API_FATURAS_PENDENTES"] = "/invoices/pending"
+        return ambiente
+
+    def _codigo_fatura(self, conta: str) -> str:
+        return conta[len(self.codigo):]
+
+    def rotas(self):
+        return [
+            ("GET", "/", self._login, False),
+            ("POST", "/login", self._autenticar, False),
+            ("GET", "/app", self._app, True),
+            ("GET", r"/fatura/(?P<codigo>\d+)", self._fatura, True),
+            ("GET", "/invoices/pending", self._api_pendentes, False),
+            ("GET", r"/invoices/(?P<codigo>\d+)/pdf", self._api_pdf_fatura, False),
+            ("GET", r"/invoices/fiscal-documents/(?P<codigo>\d+)", self._api_pdf_nf, False),
+        ]
+
+    def _login(self, requisicao):
+        return pagina("DigitalNet - Entrar", (
+            "<form method='post' action='/login'>"
+            "<input id='cpfcnpj' name='cpfcnpj' type='text'>"
+            "<button type='button'>Fazer login</button>"
+            "<input id='passwd' name='passwd' type='password'>"
+            "<button id='loginButton' type='submit'>Entrar</button>"
+            "</form>"
+        ))
+
+    def _autenticar(self, requisicao):
+        return redirecionar("/app", self.abrir_sessao(requisicao.formulario.get("cpfcnpj", "")))
+
+    def _app(self, requisicao):
+        conta = self.contas()[0]
+        token = self.token_da_sessao(requisicao.sessao)
+        # Detalhes da fatura renderizados após "Pagar agora" com atraso de XHR
+        script = (
+            f"localStorage.setItem('access_token', {json.dumps(token)});"
+            "document.getElementById('pagar').addEventListener('click', function () {"
+            " setTimeout(function () {"
+            "  document.getElementById('detalhes').innerHTML ="
+            f"   '<span>Vencimento:</span><span>{data_vencimento():%d/%m/%Y}</span>';"
+            " }, 150); });"
+        )
+        return pagina("DigitalNet - Faturas", (
+            f"<div class='flex items-center justify-between cursor-pointer' "
+            f"onclick=\"location.href='/fatura/{self._codigo_fatura(conta)}'\">Fatura {conta}</div>"
+            "<button id='pagar' type='button'>Pagar agora</button>"
+            "<div id='detalhes'></div>"
+        ), script)
+
+    def _fatura(self, requisicao):
+        return pagina(f"Fatura | {requisicao.parametros['codigo']}", "<div>Detalhes da fatura</div>")
+
+    def _api_pendentes(self, requisicao):
+        if not self.token_valido(requisicao.cabecalhos):
+            return json_resposta({"erro": "não autorizado"}, 401)
+        vencimento = data_vencimento().isoformat()
+        return json_resposta({"data": [
+            {"id": self._codigo_fatura(conta), "dueDate": vencimento, "contrato": conta}
+            for conta in self.contas()
+        ]})
+
+    def _api_pdf_fatura(self, requisicao):
+        if not self.token_valido(requisicao.cabecalhos):
+            return json_resposta({"erro": "não autorizado"}, 401)
+        codigo = requisicao.parametros["codigo"]
+        return self._pdf(f"Fatura DigitalNet {codigo}", f"fatura_{codigo}.pdf", protegido_com=self.SENHA_PDF)
+
+    def _api_pdf_nf(self, requisicao):
+        if not self.token_valido(requisicao.cabecalhos):
+            return json_resposta({"erro": "não autorizado"}, 401)
+        codigo = requisicao.parametros["codigo"]
+        return self._pdf(f"Nota fiscal DigitalNet {codigo}", f"nf_{codigo}.pdf")
+
+
+class PortalVivo(PortalSimulado):
+    """Portal Vivo Empresas: login, busca de faturas por período e download do PDF"""
+
+    codigo = "VIV"
+    nome = "Vivo"
+    variavel_url = "VIVO_PORTAL_URL"
+
+    def ambiente(self) -> Dict[str, str]:
+        return {self.variavel_url: self.url}
+
+    def url_portal(self) -> str:
+        return f"{self.url}/login"
+
+    def sem_sessao(self, requisicao):
+        return redirecionar("/login")
+
+    def rotas(self):
+        return [
+            ("GET", "/login", self._login, False),
+            ("POST", "/login", self._autenticar, False),
+            ("GET", "/dashboard", self._dashboard, True),
+            ("GET", "/faturas", self._faturas, True),
+            ("GET", r"/download/(?P<numero>[\w-]+)\.pdf", self._download, True),
+        ]
+
+    def _login(self, requisicao):
+        return pagina(f"{self.nome} - Login", (
+            "<form method='post' action='/login'>"
+            "<input id='username' name='username' type='text'>"
+            "<input id='password' name='password' type='password'>"
+            "<button type='submit'>Entrar</button>"
+            "</form>"
+        ))
+
+    def _autenticar(self, requisicao):
+        return redirecionar("/dashboard", self.abrir_sessao(requisicao.formulario.get("username", "")))
+
+    def _dashboard(self, requisicao):
+        return pagina(f"{self.nome} - Início", "<a href='/faturas'>Faturas</a>")
+
+    def _faturas(self, requisicao):
+        periodo = html.escape(requisicao.consulta.get("periodo", ""))
+        itens = ""
+        if periodo:
+            vencimento = data_vencimento().strftime("%d/%m/%Y")
+            itens = "".join(
+                "<div class='fatura-item'>"
+                f"<span class='numero-fatura'>{conta}</span>"
+                "<span class='valor-fatura'>R$ 1.234,56</span>"
+                f"<span class='data-vencimento'>Vencimento {vencimento}</span>"
+                f"<a class='link-download' href='/download/{conta}.pdf'>Baixar</a>"
+                "</div>"
+                for conta in self.contas()
+            )
+        return pagina(f"{self.nome} - Faturas", (
+            "<form method='get' action='/faturas'>"
+            "<input name='filtro' type='text'>"
+            f"<input name='periodo' type='text' value='{periodo}'>"
+            "<button type='submit'>Buscar</button>"
+            f"</form><div class='lista-faturas'>{itens}</div>"
+        ))
+
+    def _download(self, requisicao):
+        numero = requisicao.parametros["numero"]
+        return self._pdf(f"Fatura {self.nome} {numero}", f"{numero}.pdf")
+
+
+class PortalOi(PortalVivo):
+    """Portal Oi (mesma estrutura sintética do portal Vivo)"""
+    codigo = "OI"
+    nome = "Oi"
+    variavel_url = "OI_PORTAL_URL"
+
+
+class PortalAzuton(PortalVivo):
+    """Portal Azuton (mesma estrutura sintética do portal Vivo)"""
+    codigo = "AZU"
+    nome = "Azuton"
+    variavel_url = "AZUTON_PORTAL_URL"
+
+
+class PortalSat(PortalSimulado):
+    """Sistema SAT: login, busca de cliente e formulário de cadastro de fatura"""
+
+    codigo = "SAT"
+    nome = "SAT"
+    USUARIO = "simulador"
+
+    def ambiente(self) -> Dict[str, str]:
+        return {"URLSAT": self.url_portal(), "LOGINSAT": self.USUARIO, "SENHASAT": self.USUARIO}
+
+    def rotas(self):
+        return [
+            ("GET", "/", self._login, False),
+            ("POST", "/login", self._autenticar, False),
+            ("GET", "/inicio", self._inicio, True),
+            ("GET", "/clientes", self._clientes, True),
+            ("GET", "/fatura", self._faturas, True),
+            ("GET", "/fatura/nova", self._formulario, True),
+            ("POST", "/fatura/nova", self._cadastrar, True),
+            ("GET", r"/imagens/(?P<imagem>[\w.-]+)", self._imagem, False),
+        ]
+
+    def _login(self, requisicao):
+        return pagina("SAT", (
+            "<form method='post' action='/login'>"
+            "<input name='login' type='text'><input name='senha' type='password'>"
+            "<input type='submit' value='Entrar'>"
+            "</form>"
+        ))
+
+    def _autenticar(self, requisicao):
+        return redirecionar("/inicio", self.abrir_sessao(requisicao.formulario.get("login", "")))
+
+    def _inicio(self, requisicao):
+        return pagina("SAT - Início", "<nav><a href='/clientes'>Clientes</a></nav>")
+
+    def _clientes(self, requisicao):
+        busca = requisicao.consulta.get("busca", "")
+        if not busca:
+            resultado = ""
+        elif busca.lower().startswith("inexistente"):
+            resultado = "<table><tr><td>Sua busca não trouxe nenhum resultado</td></tr></table>"
+        else:
+            resultado = (
+                f"<table><tr><td>{html.escape(busca)}</td>"
+                f"<td><a href='/fatura?cliente={quote(busca)}'><img src='/imagens/ref.png'></a></td></tr></table>"
+            )
+        return pagina("SAT - Clientes", (
+            "<form method='get' action='/clientes'>"
+            "<input name='busca' type='text' placeholder='Buscando algo ?'>"
+            f"</form>{resultado}"
+        ))
+
+    def _faturas(self, requisicao):
+        return pagina("SAT - Faturas", (
+            "<a href='/fatura/nova'>Adicionar</a> <a href='/fatura/excel'>Adicionar via Excel</a>"
+        ))
+
+    def _formulario(self, requisicao):
+        return pagina("SAT - Nova fatura", (
+            "<form method='post' action='/fatura/nova' enctype='multipart/form-data'>"
+            "<input name='input[operadora]' type='text'>"
+            "<input name='input[telefone]' type='text'>"
+            "<input class='file' style='display: inline; width: 250px;' type='text' name='arquivo_nome'>"
+            "<input type='file' name='file[]'>"
+            "<input name='input[data_competencia]' type='text'>"
+            "<select id='categorias' name='input[id_categoria]'><option>PAGAR</option><option>RECEBER</option></select>"
+            "<select id='categorias' name='input[id_filial]'><option>MATRIZ</option><option>FILIAL</option></select>"
+            "<input class='envia' name='cadastar' type='submit' value='Cadastrar'>"
+            "</form>"
+        ))
+
+    def _cadastrar(self, requisicao):
+        self._contar("uploads")
+        return pagina("SAT - Nova fatura", "<div>Fatura cadastrada com sucesso</div>")
+
+    def _imagem(self, requisicao):
+        return Resposta(corpo=IMAGEM_VAZIA, tipo="image/png")
+
+
+PORTAIS_SIMULADOS = {
+    portal.codigo: portal
+    for portal in (PortalEmbratel, PortalDigitalnet, PortalVivo, PortalOi, PortalAzuton, PortalSat)
+}
+
+
+def iniciar_simuladores(
+    codigos: List[str],
+    configuracao: Optional[ConfiguracaoSimulador] = None,
+    modo_api: bool = False
+) -> Dict[str, PortalSimulado]:
+    """
+    Inicia um servidor por operadora
+
+    Returns:
+        Dicionário código -> portal simulado em execução
+    """
+    simuladores = {}
+    for codigo in codigos:
+        classe = PORTAIS_SIMULADOS[codigo.upper()]
+        portal = classe(configuracao, modo_api=modo_api) if classe is PortalDigitalnet else classe(configuracao)
+        simuladores[classe.codigo] = portal.iniciar()
+    return simuladores
+
+
+def ambiente_simulado(simuladores: Dict[str, PortalSimulado]) -> Dict[str, str]:
+    """Variáveis de ambiente de todos os simuladores"""
+    ambiente = {}
+    for portal in simuladores.values():
+        ambiente.update(portal.ambiente())
+    return ambiente
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local dos portais das operadoras")
+    parser.add_argument("--operadoras", default=",".join(PORTAIS_SIMULADOS))
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--variacao-ms", type=float, default=0)
+    parser.add_argument("--taxa-erro", type=float, default=0)
+    parser.add_argument("--taxa-travamento", type=float, default=0)
+    parser.add_argument("--modo-api", action="store_true", help="Habilita a listagem da API DigitalNet")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    configuracao = ConfiguracaoSimulador(
+        latencia_ms=args.latencia_ms,
+        variacao_ms=args.variacao_ms,
+        taxa_erro=args.taxa_erro,
+        taxa_travamento=args.taxa_travamento,
+    )
+    simuladores = iniciar_simuladores(args.operadoras.split(","), configuracao, args.modo_api)
+
+    print("=== PORTAIS SIMULADOS ===")
+    for codigo, portal in simuladores.items():
+        print(f"{codigo:<4} {portal.url_portal()}")
+    print("\nVariáveis de ambiente para os RPAs:")
+    for chave, valor in ambiente_simulado(simuladores).items():
+        print(f"export {chave}={valor}")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for portal in simuladores.values():
+            portal.parar()
+
+
+if __name__ == "__main__":
+    main()
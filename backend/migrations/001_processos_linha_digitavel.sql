@@ -0,0 +1,3 @@
+-- Linha digitável extraída do PDF da fatura (services/extracao_faturas.py)
+-- Bancos existentes: aplicar uma vez antes de subir a versão (PostgreSQL e SQLite)
+ALTER TABLE processos ADD COLUMN linha_digitavel VARCHAR;
@@ -0,0 +1,3 @@
+-- Tempos por etapa das execuções de RPA, em JSON (rpa/metricas_etapas.py)
+-- Bancos existentes: aplicar uma vez antes de subir a versão (PostgreSQL e SQLite)
+ALTER TABLE execucoes ADD COLUMN metricas_etapas TEXT;
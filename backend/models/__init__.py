@@ -12,6 +12,7 @@ from .cliente import Cliente
 from .processo import Processo
 from .execucao import Execucao
 from .fatura import Fatura
+from .artefato import ArtefatoFatura
 
 # Exportar modelos
 __all__ = [
@@ -21,5 +22,6 @@ __all__ = [
     "Cliente",
     "Processo", 
     "Execucao",
-    "Fatura"
+    "Fatura",
+    "ArtefatoFatura"
 ]
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""
+Modelo de Artefato de Fatura
+Índice (processo, tipo de documento) -> digest SHA-256 do arquivo no object store
+"""
+
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from datetime import datetime
+
+from config.database import Base
+
+class ArtefatoFatura(Base):
+    """
+    Documento de um processo armazenado por conteúdo (ver utils/artefatos.py)
+    Comparar o digest basta para saber se a fatura mudou entre downloads
+    """
+    __tablename__ = "artefatos_fatura"
+    
+    processo_id = Column(String, ForeignKey("processos.id"), primary_key=True)
+    tipo_documento = Column(String, primary_key=True, default="fatura")
+    
+    # Objeto no bucket: artefatos/sha256/<2 primeiros>/<digest>.<ext>
+    digest = Column(String(64), nullable=False, index=True)
+    chave = Column(String, nullable=False)
+    tamanho = Column(Integer, default=0)
+    
+    # Timestamps
+    data_criacao = Column(DateTime, default=datetime.now)
+    data_atualizacao = Column(DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f"<ArtefatoFatura(processo_id='{self.processo_id}', tipo='{self.tipo_documento}', digest='{self.digest[:12]}')>"
@@ -21,6 +21,7 @@ class Operadora(Base):
     status_ativo = Column(Boolean, default=True)
     url_portal = Column(String(500))
     instrucoes_acesso = Column(Text)
+    configuracao_navegador = Column(Text)  # JSON string (ver utils/perfis_navegador.py)
     created_at = Column(DateTime, default=func.now())
     
     # Relacionamentos
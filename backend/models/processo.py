@@ -14,6 +14,7 @@ class StatusProcesso(Enum):
     """Status possíveis para um processo"""
     AGUARDANDO_DOWNLOAD = "aguardando_download"
     EXECUTANDO = "executando"
+    UPLOAD_PENDENTE = "upload_pendente"  # PDF baixado, aguardando a fila de storage
     FATURA_BAIXADA = "fatura_baixada"
     PENDENTE_APROVACAO = "pendente_aprovacao"
     AGUARDANDO_APROVACAO = "aguardando_aprovacao"
@@ -62,6 +63,7 @@ class Processo(Base):
     # Dados da fatura
     data_vencimento = Column(DateTime)
     valor_fatura = Column(Numeric(10, 2))
+    linha_digitavel = Column(String)  # Preenchida pela extração do PDF (services/extracao_faturas.py)
     
     # Aprovação
     aprovado_por_usuario_id = Column(String, ForeignKey("usuarios.id"))
@@ -107,6 +109,7 @@ class Execucao(Base):
     # Logs e detalhes
     logs_detalhes = Column(Text)
     mensagem_erro = Column(Text)
+    metricas_etapas = Column(Text)  # JSON string (ver rpa/metricas_etapas.py)
     
     # Relacionamentos
     processo = relationship("Processo", back_populates="execucoes")
@@ -1,14 +1,20 @@
 """
 Módulo de RPAs do sistema
+Os RPAs são importados sob demanda para não carregar selenium/bs4/PyPDF2
+em processos que só precisam do concentrador (API, beat)
 """
 
-from .rpa_base import RPABase
-from .vivo_rpa import VivoRPA
-from .oi_rpa import OiRPA
-from .embratel_rpa import EmbratelRPA
-from .sat_rpa import SatRPA
-from .azuton_rpa import AzutonRPA
-from .digitalnet_rpa import DigitalnetRPA
+import importlib
+
+_MODULOS = {
+    "RPABase": ".rpa_base",
+    "VivoRPA": ".vivo_rpa",
+    "OiRPA": ".oi_rpa",
+    "EmbratelRPA": ".embratel_rpa",
+    "SatRPA": ".sat_rpa",
+    "AzutonRPA": ".azuton_rpa",
+    "DigitalnetRPA": ".digitalnet_rpa",
+}
 
 __all__ = [
     "RPABase",
@@ -18,4 +24,12 @@ __all__ = [
     "SatRPA",
     "AzutonRPA",
     "DigitalnetRPA"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(nome):
+    if nome in _MODULOS:
+        valor = getattr(importlib.import_module(_MODULOS[nome], __name__), nome)
+        globals()[nome] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
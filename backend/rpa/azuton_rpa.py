@@ -27,7 +27,7 @@ class AzutonRPA:
         self.logger = logger
         
         # Configurações específicas do Azuton
-        self.url_portal = "https://portal.azuton.com.br"
+        self.url_portal = os.getenv("AZUTON_PORTAL_URL", "https://portal.azuton.com.br")
         self.timeout_download = 120
         
     def executar_download(self, mes_ano: str) -> dict:
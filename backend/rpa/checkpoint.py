@@ -0,0 +1,177 @@
+"""
+Checkpoints de etapas das execuções RPA
+Permitem que uma nova tentativa retome a partir da última etapa concluída
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from ..utils.downloads import caminho_diretorio_execucao, criar_diretorio_execucao
+from ..utils.redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "rpa:checkpoint:"
+NOME_ARQUIVO = "checkpoint.json"
+
+
+class EtapaCheckpoint(Enum):
+    """Etapas do download de fatura, em ordem de execução"""
+    LOGIN = "login"
+    FATURA_LOCALIZADA = "fatura_localizada"
+    ARQUIVOS_BAIXADOS = "arquivos_baixados"
+    PDF_MESCLADO = "pdf_mesclado"
+    UPLOAD_CONCLUIDO = "upload_concluido"
+
+    @property
+    def ordem(self) -> int:
+        return list(EtapaCheckpoint).index(self)
+
+
+@dataclass
+class Checkpoint:
+    """Última etapa concluída e artefatos produzidos até ela"""
+    id_processo: str
+    etapa: str
+    dados: Dict[str, Any] = field(default_factory=dict)
+    atualizado_em: float = field(default_factory=time.time)
+
+    @property
+    def etapa_concluida(self) -> EtapaCheckpoint:
+        return EtapaCheckpoint(self.etapa)
+
+    def concluiu(self, etapa: EtapaCheckpoint) -> bool:
+        """Indica se a etapa informada já foi concluída"""
+        return self.etapa_concluida.ordem >= etapa.ordem
+
+
+def _arquivos_existem(caminhos: List[str]) -> bool:
+    return bool(caminhos) and all(caminho and os.path.exists(caminho) for caminho in caminhos)
+
+
+class RepositorioCheckpoints:
+    """
+    Persiste checkpoints no diretório da execução (junto dos artefatos)
+    e no Redis, para que o estado sobreviva à troca de worker
+    """
+
+    def __init__(self, ttl_segundos: Optional[int] = None):
+        self.ttl_segundos = ttl_segundos or int(os.getenv("RPA_CHECKPOINT_TTL_SEGUNDOS", "86400"))
+        self._lock = threading.Lock()
+
+    def _caminho(self, id_processo: str) -> str:
+        return str(caminho_diretorio_execucao(id_processo) / NOME_ARQUIVO)
+
+    def salvar(self, id_processo: str, etapa: EtapaCheckpoint, **dados) -> Checkpoint:
+        """Registra a conclusão da etapa, acumulando os dados das etapas anteriores"""
+        with self._lock:
+            anterior = self._ler(id_processo)
+            checkpoint = Checkpoint(
+                id_processo=str(id_processo),
+                etapa=etapa.value,
+                dados={**(anterior.dados if anterior else {}), **dados}
+            )
+            conteudo = json.dumps(asdict(checkpoint), default=str)
+
+            caminho = os.path.join(criar_diretorio_execucao(id_processo), NOME_ARQUIVO)
+            temporario = f"{caminho}.tmp"
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                arquivo.write(conteudo)
+            os.replace(temporario, caminho)
+
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                redis_cliente.setex(PREFIXO_CHAVE + str(id_processo), self.ttl_segundos, conteudo)
+            except Exception as e:
+                logger.warning(f"Erro ao gravar checkpoint no Redis: {e}")
+
+        logger.info(f"Checkpoint {etapa.value} registrado - Processo: {id_processo}")
+        return checkpoint
+
+    def _ler(self, id_processo: str) -> Optional[Checkpoint]:
+        """Lê o checkpoint local ou, na ausência, o do Redis"""
+        conteudo = None
+        caminho = self._caminho(id_processo)
+        if os.path.exists(caminho):
+            try:
+                with open(caminho, encoding="utf-8") as arquivo:
+                    conteudo = arquivo.read()
+            except OSError as e:
+                logger.warning(f"Erro ao ler checkpoint local: {e}")
+
+        if conteudo is None:
+            redis_cliente = obter_cliente_redis()
+            if redis_cliente is not None:
+                try:
+                    conteudo = redis_cliente.get(PREFIXO_CHAVE + str(id_processo))
+                except Exception as e:
+                    logger.warning(f"Erro ao ler checkpoint do Redis: {e}")
+
+        if not conteudo:
+            return None
+        try:
+            return Checkpoint(**json.loads(conteudo))
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Checkpoint inválido para o processo {id_processo}: {e}")
+            return None
+
+    def obter(self, id_processo: str) -> Optional[Checkpoint]:
+        """
+        Retorna o checkpoint cujos artefatos ainda estão disponíveis
+
+        Se os arquivos de uma etapa não existem neste worker (ex.: retry em
+        outra máquina), recua para a última etapa que pode ser retomada.
+        """
+        checkpoint = self._ler(id_processo)
+        if checkpoint is None:
+            return None
+
+        if time.time() - checkpoint.atualizado_em > self.ttl_segundos:
+            self.remover(id_processo)
+            return None
+
+        dados = checkpoint.dados
+        if checkpoint.concluiu(EtapaCheckpoint.UPLOAD_CONCLUIDO) and dados.get("url_s3"):
+            return checkpoint
+        if checkpoint.concluiu(EtapaCheckpoint.PDF_MESCLADO) and _arquivos_existem([dados.get("arquivo_fatura")]):
+            checkpoint.etapa = EtapaCheckpoint.PDF_MESCLADO.value
+            return checkpoint
+        if checkpoint.concluiu(EtapaCheckpoint.ARQUIVOS_BAIXADOS) and _arquivos_existem(dados.get("arquivos") or []):
+            checkpoint.etapa = EtapaCheckpoint.ARQUIVOS_BAIXADOS.value
+            return checkpoint
+
+        # Etapas de navegação não são retomáveis sem os artefatos
+        return None
+
+    def remover(self, id_processo: str):
+        """Descarta o checkpoint (processo concluído e registrado)"""
+        try:
+            os.remove(self._caminho(id_processo))
+        except OSError:
+            pass
+
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                redis_cliente.delete(PREFIXO_CHAVE + str(id_processo))
+            except Exception as e:
+                logger.warning(f"Erro ao remover checkpoint do Redis: {e}")
+
+
+# Instância do processo
+_repositorio: Optional[RepositorioCheckpoints] = None
+
+
+def obter_repositorio_checkpoints() -> RepositorioCheckpoints:
+    """Retorna o repositório de checkpoints do processo"""
+    global _repositorio
+    if _repositorio is None:
+        _repositorio = RepositorioCheckpoints()
+    return _repositorio
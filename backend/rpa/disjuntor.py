@@ -0,0 +1,306 @@
+"""
+Disjuntor (circuit breaker) por operadora
+Evita abrir navegadores contra portais fora do ar: após falhas seguidas de
+indisponibilidade, novas execuções são adiadas até uma tentativa de sondagem
+"""
+
+import os
+import time
+import logging
+import threading
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from ..utils.redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "rpa:disjuntor:"
+
+
+class ClasseFalha(Enum):
+    """Classificação das falhas de execução"""
+    PORTAL_INDISPONIVEL = "portal_indisponivel"
+    TIMEOUT = "timeout"
+    CAPTCHA = "captcha"  # Portal exigiu desafio anti-robô (sinal de excesso de sessões)
+    AUTENTICACAO = "autenticacao"
+    SEM_FATURA = "sem_fatura"
+    INTERNA = "interna"
+
+
+class EstadoDisjuntor(Enum):
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    SEMI_ABERTO = "semi_aberto"
+
+
+# Apenas falhas atribuíveis ao portal abrem o disjuntor
+FALHAS_DO_PORTAL = (ClasseFalha.PORTAL_INDISPONIVEL, ClasseFalha.TIMEOUT)
+
+# Trechos de mensagem que indicam portal fora do ar (resultados sem classe_falha)
+INDICIOS_INDISPONIBILIDADE = (
+    "net::err_", "reached error page", "connection refused", "connection reset",
+    "max retries exceeded", "service unavailable", "bad gateway", "gateway timeout",
+    "name or service not known", "temporarily unavailable",
+)
+INDICIOS_TIMEOUT = ("timeout", "timed out", "tempo esgotado")
+INDICIOS_AUTENTICACAO = ("login", "credencia", "senha")
+
+
+def classificar_excecao(erro: BaseException) -> ClasseFalha:
+    """Classe de falha de uma exceção levantada durante a execução"""
+    mensagem = str(erro).lower()
+    if "captcha" in mensagem:
+        return ClasseFalha.CAPTCHA
+
+    try:
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        if isinstance(erro, TimeoutException):
+            return ClasseFalha.TIMEOUT
+        if isinstance(erro, WebDriverException):
+            # Erros do navegador só contam quando a página do portal não carregou
+            if any(indicio in mensagem for indicio in INDICIOS_INDISPONIBILIDADE):
+                return ClasseFalha.PORTAL_INDISPONIVEL
+            return ClasseFalha.INTERNA
+    except ImportError:
+        pass
+
+    try:
+        import requests
+        if isinstance(erro, requests.Timeout):
+            return ClasseFalha.TIMEOUT
+        if isinstance(erro, requests.ConnectionError):
+            return ClasseFalha.PORTAL_INDISPONIVEL
+        if isinstance(erro, requests.HTTPError) and erro.response is not None:
+            if erro.response.status_code >= 500 or erro.response.status_code == 429:
+                return ClasseFalha.PORTAL_INDISPONIVEL
+            if erro.response.status_code in (401, 403):
+                return ClasseFalha.AUTENTICACAO
+    except ImportError:
+        pass
+
+    if isinstance(erro, TimeoutError):
+        return ClasseFalha.TIMEOUT
+    if isinstance(erro, ConnectionError):
+        return ClasseFalha.PORTAL_INDISPONIVEL
+    return ClasseFalha.INTERNA
+
+
+def classificar_falha(resultado) -> Optional[ClasseFalha]:
+    """
+    Classe de falha de um ResultadoSaidaPadrao
+
+    Usa resultado.classe_falha quando o RPA a informou; caso contrário,
+    infere pelo status e pela mensagem.
+
+    Returns:
+        ClasseFalha ou None para resultados de sucesso
+    """
+    if resultado.sucesso:
+        return None
+    if resultado.classe_falha:
+        try:
+            return ClasseFalha(resultado.classe_falha)
+        except ValueError:
+            logger.warning(f"Classe de falha desconhecida: {resultado.classe_falha}")
+
+    if resultado.status.value == "timeout":
+        return ClasseFalha.TIMEOUT
+
+    mensagem = (resultado.mensagem or "").lower()
+    if "captcha" in mensagem:
+        return ClasseFalha.CAPTCHA
+    if any(indicio in mensagem for indicio in INDICIOS_INDISPONIBILIDADE):
+        return ClasseFalha.PORTAL_INDISPONIVEL
+    if any(indicio in mensagem for indicio in INDICIOS_TIMEOUT):
+        return ClasseFalha.TIMEOUT
+    if any(indicio in mensagem for indicio in INDICIOS_AUTENTICACAO):
+        return ClasseFalha.AUTENTICACAO
+    if "não existe fatura" in mensagem or "nenhuma fatura" in mensagem:
+        return ClasseFalha.SEM_FATURA
+    return ClasseFalha.INTERNA
+
+
+class _EstadoLocal:
+    """Subconjunto dos comandos Redis usados pelo disjuntor, em memória (fallback)"""
+
+    def __init__(self):
+        self._valores: Dict[str, Any] = {}
+        self._expiracoes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _expirar(self, chave: str):
+        if chave in self._expiracoes and self._expiracoes[chave] <= time.time():
+            self._valores.pop(chave, None)
+            self._expiracoes.pop(chave, None)
+
+    def get(self, chave: str):
+        with self._lock:
+            self._expirar(chave)
+            valor = self._valores.get(chave)
+            return None if valor is None else str(valor)
+
+    def set(self, chave: str, valor, ex: Optional[int] = None, nx: bool = False):
+        with self._lock:
+            self._expirar(chave)
+            if nx and chave in self._valores:
+                return None
+            self._valores[chave] = valor
+            if ex:
+                self._expiracoes[chave] = time.time() + ex
+            else:
+                self._expiracoes.pop(chave, None)
+            return True
+
+    def incr(self, chave: str) -> int:
+        with self._lock:
+            self._expirar(chave)
+            self._valores[chave] = int(self._valores.get(chave, 0)) + 1
+            return self._valores[chave]
+
+    def expire(self, chave: str, segundos: int):
+        with self._lock:
+            if chave in self._valores:
+                self._expiracoes[chave] = time.time() + segundos
+
+    def delete(self, *chaves: str):
+        with self._lock:
+            for chave in chaves:
+                self._valores.pop(chave, None)
+                self._expiracoes.pop(chave, None)
+
+
+class DisjuntorOperadoras:
+    """
+    Disjuntor por código de operadora com estado compartilhado no Redis
+
+    - Fechado: execuções normais; falhas do portal são contadas na janela
+    - Aberto: após `limiar_falhas` falhas, execuções são adiadas por `tempo_aberto`
+    - Semi-aberto: vencido o tempo, uma única execução (sondagem) é liberada;
+      sucesso fecha o disjuntor e falha o reabre
+    """
+
+    def __init__(
+        self,
+        limiar_falhas: Optional[int] = None,
+        janela_segundos: Optional[int] = None,
+        tempo_aberto_segundos: Optional[int] = None,
+        timeout_sondagem_segundos: Optional[int] = None
+    ):
+        self.limiar_falhas = limiar_falhas or int(os.getenv("RPA_DISJUNTOR_LIMIAR_FALHAS", "5"))
+        self.janela_segundos = janela_segundos or int(os.getenv("RPA_DISJUNTOR_JANELA_SEGUNDOS", "600"))
+        self.tempo_aberto_segundos = tempo_aberto_segundos or int(os.getenv("RPA_DISJUNTOR_TEMPO_ABERTO_SEGUNDOS", "300"))
+        # Sondagem sem resultado (worker morto) libera nova sondagem após este tempo
+        self.timeout_sondagem_segundos = timeout_sondagem_segundos or int(
+            os.getenv("RPA_DISJUNTOR_TIMEOUT_SONDAGEM_SEGUNDOS", "1800")
+        )
+        self._local = _EstadoLocal()
+
+    def _estado_compartilhado(self):
+        return obter_cliente_redis() or self._local
+
+    def _executar(self, comando: str, *args, **kwargs):
+        """Executa o comando no Redis e, se ele falhar, no estado local"""
+        armazenamento = self._estado_compartilhado()
+        try:
+            return getattr(armazenamento, comando)(*args, **kwargs)
+        except Exception as e:
+            if armazenamento is self._local:
+                raise
+            logger.warning(f"Erro no Redis do disjuntor, usando estado local: {e}")
+            return getattr(self._local, comando)(*args, **kwargs)
+
+    @staticmethod
+    def _chaves(operadora: str) -> Dict[str, str]:
+        base = PREFIXO_CHAVE + operadora.upper()
+        return {"falhas": f"{base}:falhas", "aberto_ate": f"{base}:aberto_ate", "sondagem": f"{base}:sondagem"}
+
+    def estado(self, operadora: str) -> EstadoDisjuntor:
+        """Estado atual do disjuntor da operadora"""
+        aberto_ate = self._executar("get", self._chaves(operadora)["aberto_ate"])
+        if aberto_ate is None:
+            return EstadoDisjuntor.FECHADO
+        if time.time() < float(aberto_ate):
+            return EstadoDisjuntor.ABERTO
+        return EstadoDisjuntor.SEMI_ABERTO
+
+    def segundos_para_sondagem(self, operadora: str) -> float:
+        """Tempo até o disjuntor aceitar a próxima sondagem"""
+        aberto_ate = self._executar("get", self._chaves(operadora)["aberto_ate"])
+        return max(0.0, float(aberto_ate) - time.time()) if aberto_ate else 0.0
+
+    def permitir(self, operadora: str) -> bool:
+        """
+        Indica se uma nova execução pode abrir o navegador
+
+        No estado semi-aberto apenas o primeiro chamador (entre todos os workers)
+        recebe True; os demais continuam adiados até o resultado da sondagem.
+        """
+        estado = self.estado(operadora)
+        if estado == EstadoDisjuntor.FECHADO:
+            return True
+        if estado == EstadoDisjuntor.ABERTO:
+            return False
+
+        sondagem = self._executar(
+            "set", self._chaves(operadora)["sondagem"], "1", ex=self.timeout_sondagem_segundos, nx=True
+        )
+        if sondagem:
+            logger.info(f"Disjuntor {operadora}: liberando execução de sondagem")
+        return bool(sondagem)
+
+    def registrar_resultado(self, operadora: str, resultado) -> Optional[ClasseFalha]:
+        """Atualiza o disjuntor com o resultado de uma execução e retorna a classe da falha"""
+        classe = classificar_falha(resultado)
+        if classe is None:
+            self.registrar_sucesso(operadora)
+        elif classe in FALHAS_DO_PORTAL:
+            self.registrar_falha(operadora, classe)
+        elif classe == ClasseFalha.CAPTCHA:
+            # Sinal de sobrecarga (tratado pelo limitador de concorrência): não zera a
+            # sequência de falhas; apenas libera nova sondagem se esta era uma
+            self._executar("delete", self._chaves(operadora)["sondagem"])
+        else:
+            # Falha não atribuível ao portal: a sondagem respondeu, portal acessível
+            self.registrar_sucesso(operadora)
+        return classe
+
+    def registrar_sucesso(self, operadora: str):
+        chaves = self._chaves(operadora)
+        if self.estado(operadora) != EstadoDisjuntor.FECHADO:
+            logger.info(f"Disjuntor {operadora} fechado: portal respondeu")
+        self._executar("delete", chaves["falhas"], chaves["aberto_ate"], chaves["sondagem"])
+
+    def registrar_falha(self, operadora: str, classe: ClasseFalha):
+        chaves = self._chaves(operadora)
+        if self.estado(operadora) == EstadoDisjuntor.SEMI_ABERTO:
+            self._abrir(operadora, f"sondagem falhou ({classe.value})")
+            return
+
+        falhas = self._executar("incr", chaves["falhas"])
+        if falhas == 1:
+            self._executar("expire", chaves["falhas"], self.janela_segundos)
+        if falhas >= self.limiar_falhas:
+            self._abrir(operadora, f"{falhas} falhas ({classe.value}) em {self.janela_segundos}s")
+
+    def _abrir(self, operadora: str, motivo: str):
+        chaves = self._chaves(operadora)
+        # A chave sobrevive ao período aberto para sinalizar o estado semi-aberto
+        self._executar(
+            "set", chaves["aberto_ate"], str(time.time() + self.tempo_aberto_segundos),
+            ex=self.tempo_aberto_segundos + self.janela_segundos
+        )
+        self._executar("delete", chaves["falhas"], chaves["sondagem"])
+        logger.warning(f"Disjuntor {operadora} aberto por {self.tempo_aberto_segundos}s: {motivo}")
+
+
+# Instância do processo
+_disjuntor: Optional[DisjuntorOperadoras] = None
+
+
+def obter_disjuntor() -> DisjuntorOperadoras:
+    """Retorna o disjuntor de operadoras do processo"""
+    global _disjuntor
+    if _disjuntor is None:
+        _disjuntor = DisjuntorOperadoras()
+    return _disjuntor
@@ -7,24 +7,83 @@ Data: 29/05/2025
 
 import base64
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from time import sleep
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 import requests
 from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 
 from .rpa_base import (
     RPABase, 
     ParametrosEntradaPadrao, 
     ResultadoSaidaPadrao, 
     StatusExecucao, 
-    TipoOperacao
+    TipoOperacao,
+    EstadoExecucao,
+    etapa_rpa
 )
+from .checkpoint import EtapaCheckpoint
+from .disjuntor import classificar_excecao
 from ..utils.selenium_driver import SeleniumDriver
 from ..utils.file_manager import FileManager
+from ..utils.cancelamento import ExecucaoCancelada, SoftTimeLimitExceeded
+from ..utils.montagem_pdf import montar_pdf
+from ..utils import esperas
+from ..utils.extracao_dom import (
+    CampoExtracao,
+    EspecificacaoExtracao,
+    extrair_do_driver,
+    extrair_valor_de_html
+)
+
+# Tabela de faturas: conta na 2ª coluna, data na 5ª (linhas incompletas são descartadas)
+ESPEC_FATURAS_EMBRATEL = EspecificacaoExtracao(
+    linhas="//table[contains(@class, 'txtCinzaHand')]/tbody/tr",
+    campos=(
+        CampoExtracao("conta", "./td[2]"),
+        CampoExtracao("data", "./td[5]", obrigatorio=True),
+    )
+)
+
+XPATH_VENCIMENTO_BOLETO = (
+    "//div[normalize-space(.)='Data de Vencimento']"
+    "/following::div[contains(@class, 'txtPretoBold12')][1]"
+)
+
+# Documentos da fatura: (arquivo, xpath, aplica CSS do portal)
+DOCUMENTOS_FATURA = (
+    ("Fatura.pdf", "//tr[@onclick=\"return chamaFatura('imprimirFatura')\"]", True),
+    ("Boleto.pdf", "//tr[@onclick=\"return chamaFatura('imprimirBoleto')\"]", False),
+)
+XPATH_AREA_NF = "//tr[@onclick=\"return chamaFatura('notaFiscal')\"]"
+DOCUMENTOS_NF = (
+    ("NF_ICMS.pdf", "ICMS", "//td[contains(text(), 'ICMS') and @align='left']"),
+    ("NF_ISS.pdf", "ISS", "//td[contains(text(), 'ISS') and @align='left']"),
+)
+
+# Conversões HTML -> PDF simultâneas (cada uma é um processo wkhtmltopdf)
+MAX_RENDERIZACOES_PARALELAS = int(os.getenv("EMBRATEL_MAX_RENDERIZACOES", "4"))
+
+MENSAGEM_SUCESSO = "Download da fatura Embratel realizado com sucesso"
+
+URL_RECURSOS_PORTAL = os.getenv("EMBRATEL_RECURSOS_URL", "https://www2.embratel.com.br:9442")
+URL_CSS_PORTAL = f"{URL_RECURSOS_PORTAL}/EbppCorporativo/scriptcss/styles.css"
+URL_LOGO_PORTAL = f"{URL_RECURSOS_PORTAL}/EbppCorporativo/imagens/RH-logo-verde-amarelo-transparente.gif"
+
+
+@lru_cache(maxsize=1)
+def _obter_recursos_portal() -> Tuple[str, str]:
+    """CSS e logo (base64) do portal, baixados uma vez por processo"""
+    css_content = requests.get(URL_CSS_PORTAL, verify=False).text
+    logo_response = requests.get(URL_LOGO_PORTAL, verify=False)
+    return css_content, base64.b64encode(logo_response.content).decode("utf-8")
+
 
 class EmbratelRPA(RPABase):
     """
@@ -32,15 +91,17 @@ class EmbratelRPA(RPABase):
     Preserva 100% da lógica legada de scraping conforme manual
     """
     
+    # Estado da execução corrente (isolado por thread)
+    window_id = EstadoExecucao()
+    vencimento = EstadoExecucao()
+    lista_docs = EstadoExecucao()
+    
     def __init__(self):
         super().__init__()
-        self.driver_manager = SeleniumDriver()
         self.file_manager = FileManager()
-        self.driver = None
-        self.wait = None
-        self.window_id = None
-        self.vencimento = None
-        self.lista_docs = []
+    
+    def _criar_driver_manager(self):
+        return SeleniumDriver(perfil=self._perfil_navegador())
     
     def executar_download(self, parametros: ParametrosEntradaPadrao) -> ResultadoSaidaPadrao:
         """
@@ -48,57 +109,178 @@ class EmbratelRPA(RPABase):
         """
         timestamp_inicio = datetime.now()
         
-        try:
-            self.logger.info(f"Iniciando download Embratel para cliente {parametros.id_cliente}")
-            
-            # Inicializa driver
-            self.driver = self.driver_manager.obter_driver()
-            self.wait = self.driver_manager.obter_wait(self.driver)
-            
-            # Execução da lógica legada preservada
-            self._realizar_login(parametros)
-            self._acessar_area_download(parametros)
-            self._escolha_da_fatura(parametros)
-            lista_docs = self._baixando_all_docs()
-            arquivo_fatura = self._merge_pdfs(lista_docs, parametros)
-            
-            if arquivo_fatura:
-                # Upload para S3
-                url_s3 = self.file_manager.upload_arquivo(arquivo_fatura)
+        with self.contexto_execucao(parametros):
+            try:
+                self.logger.info(f"Iniciando download Embratel para cliente {parametros.id_cliente}")
                 
-                return ResultadoSaidaPadrao(
-                    sucesso=True,
-                    status=StatusExecucao.SUCESSO,
-                    mensagem="Download da fatura Embratel realizado com sucesso",
-                    arquivo_baixado=arquivo_fatura,
-                    url_s3=url_s3,
-                    dados_extraidos={"vencimento": self.vencimento},
-                    tempo_execucao_segundos=(datetime.now() - timestamp_inicio).total_seconds(),
-                    timestamp_inicio=timestamp_inicio,
-                    timestamp_fim=datetime.now(),
-                    logs_execucao=[f"Fatura baixada: {arquivo_fatura}"]
-                )
-            else:
-                return ResultadoSaidaPadrao(
-                    sucesso=False,
-                    status=StatusExecucao.ERRO,
-                    mensagem="Falha no download da fatura Embratel",
-                    timestamp_inicio=timestamp_inicio,
-                    timestamp_fim=datetime.now()
+                # Nova tentativa: documentos já baixados dispensam o portal
+                resultado = self._retomar_download(
+                    parametros, timestamp_inicio,
+                    mesclar=lambda arquivos, dados: self._mesclar_documentos(arquivos, dados, parametros),
+                    mensagem=MENSAGEM_SUCESSO
                 )
+                if resultado:
+                    return self.contexto.anexar_metricas(resultado)
+                
+                self._iniciar_navegador()
+                self._autenticar(parametros)
+                self._registrar_checkpoint(parametros, EtapaCheckpoint.LOGIN)
+                resultado = self._baixar_fatura_autenticado(parametros, timestamp_inicio)
+                    
+            except Exception as e:
+                resultado = self._resultado_erro(e, timestamp_inicio)
+            
+            return self.contexto.anexar_metricas(resultado)
+    
+    def executar_download_lote(self, lista_parametros: List[ParametrosEntradaPadrao]) -> List[ResultadoSaidaPadrao]:
+        """
+        Baixa as faturas de vários processos da mesma credencial
+        em uma única sessão do portal (um login, um navegador)
+        """
+        resultados: List[Optional[ResultadoSaidaPadrao]] = [None] * len(lista_parametros)
+        
+        with self.contexto_execucao(lista_parametros[0]):
+            try:
+                # Nova tentativa do lote: itens com checkpoint dispensam o portal
+                for indice, parametros in enumerate(lista_parametros):
+                    self.contexto.iniciar_processo(parametros)
+                    resultado = self._retomar_item(parametros)
+                    if resultado:
+                        resultados[indice] = self.contexto.anexar_metricas(resultado)
                 
+                pendentes = [indice for indice, resultado in enumerate(resultados) if resultado is None]
+                if pendentes:
+                    self._baixar_pendentes_no_portal(lista_parametros, pendentes, resultados)
+            except (ExecucaoCancelada, SoftTimeLimitExceeded) as e:
+                # Faturas já baixadas seguem para o upload; as demais ficam canceladas
+                return self._completar_lote_cancelado(resultados, lista_parametros, self._motivo_interrupcao(e))
+        
+        return resultados
+    
+    def _baixar_pendentes_no_portal(
+        self,
+        lista_parametros: List[ParametrosEntradaPadrao],
+        pendentes: List[int],
+        resultados: List[Optional[ResultadoSaidaPadrao]]
+    ):
+        """Baixa os processos sem checkpoint retomável em uma única sessão do portal"""
+        timestamp_inicio = datetime.now()
+        try:
+            self.logger.info(
+                f"Iniciando lote Embratel com {len(pendentes)} de {len(lista_parametros)} processos no portal"
+            )
+            # Login e navegador entram nas métricas do primeiro processo do portal
+            self.contexto.iniciar_processo(lista_parametros[pendentes[0]])
+            self._iniciar_navegador()
+            self._autenticar(lista_parametros[pendentes[0]])
+            url_area_logada = self.driver.current_url
+            
+            for posicao, indice in enumerate(pendentes):
+                parametros = lista_parametros[indice]
+                timestamp_item = datetime.now()
+                if posicao:
+                    self.contexto.iniciar_processo(parametros)
+                try:
+                    self._registrar_checkpoint(parametros, EtapaCheckpoint.LOGIN)
+                    self._fechar_abas_extras()
+                    self.driver.get(url_area_logada)
+                    resultado = self._baixar_fatura_autenticado(parametros, timestamp_item)
+                except SoftTimeLimitExceeded:
+                    # Encerra o lote: os itens concluídos precisam ser registrados antes do hard limit
+                    raise
+                except Exception as e:
+                    resultado = self._resultado_erro(e, timestamp_item)
+                resultados[indice] = self.contexto.anexar_metricas(resultado)
+                    
+        except SoftTimeLimitExceeded:
+            raise
         except Exception as e:
-            self.logger.error(f"Erro no download Embratel: {e}")
-            return ResultadoSaidaPadrao(
-                sucesso=False,
-                status=StatusExecucao.ERRO,
-                mensagem=f"Erro interno: {str(e)}",
-                timestamp_inicio=timestamp_inicio,
-                timestamp_fim=datetime.now()
+            # Falha de login/navegador: processos restantes recebem o mesmo erro
+            for indice in pendentes:
+                if resultados[indice] is None:
+                    resultados[indice] = self._resultado_erro(e, timestamp_inicio)
+    
+    def _retomar_item(self, parametros: ParametrosEntradaPadrao) -> Optional[ResultadoSaidaPadrao]:
+        """Retoma um processo do lote pelo checkpoint (None quando precisa do portal)"""
+        timestamp_item = datetime.now()
+        try:
+            return self._retomar_download(
+                parametros, timestamp_item,
+                mesclar=lambda arquivos, dados: self._mesclar_documentos(arquivos, dados, parametros),
+                mensagem=MENSAGEM_SUCESSO
             )
-        finally:
-            if self.driver:
-                self.driver.quit()
+        except Exception as e:
+            return self._resultado_erro(e, timestamp_item)
+    
+    @etapa_rpa("navegador")
+    def _iniciar_navegador(self):
+        """Obtém navegador do pool para a execução (devolvido ao sair do contexto)"""
+        self.driver = self.driver_manager.obter_driver()
+        self.wait = self.driver_manager.obter_wait(self.driver)
+    
+    @etapa_rpa("login")
+    def _autenticar(self, parametros: ParametrosEntradaPadrao):
+        """Login no portal reaproveitando sessão em cache"""
+        if not self._login_com_sessao(
+            self.driver,
+            parametros,
+            lambda: self._realizar_login(parametros),
+            self._sessao_autenticada
+        ):
+            raise Exception("Falha no login do portal Embratel")
+        self.window_id = self.driver.current_window_handle
+    
+    def _baixar_fatura_autenticado(self, parametros: ParametrosEntradaPadrao, timestamp_inicio: datetime) -> ResultadoSaidaPadrao:
+        """Fluxo de download de uma fatura a partir da área logada"""
+        self.vencimento = None
+        
+        # Diretório exclusivo da execução para documentos gerados
+        self.diretorio_execucao = self.file_manager.preparar_diretorio_execucao(parametros.id_processo)
+        self.driver_manager.definir_diretorio_download(self.diretorio_execucao)
+        
+        # Execução da lógica legada preservada
+        with self.medir_etapa("area_download"):
+            self._acessar_area_download(parametros)
+            self._escolha_da_fatura(parametros)
+        self._registrar_checkpoint(parametros, EtapaCheckpoint.FATURA_LOCALIZADA)
+        with self.medir_etapa("documentos"):
+            lista_docs = self._baixando_all_docs()
+        
+        # Mesclagem e upload (com checkpoints para retomada)
+        return self._finalizar_download(
+            parametros,
+            timestamp_inicio,
+            {"vencimento": self.vencimento},
+            arquivos=lista_docs,
+            mesclar=lambda arquivos, dados: self._mesclar_documentos(arquivos, dados, parametros),
+            mensagem=MENSAGEM_SUCESSO,
+            mensagem_erro="Falha no download da fatura Embratel"
+        )
+    
+    def _mesclar_documentos(self, arquivos: List[str], dados_extraidos: dict, parametros: ParametrosEntradaPadrao):
+        """Mescla os documentos baixados (também na retomada, sem o estado do portal)"""
+        self.vencimento = dados_extraidos.get("vencimento")
+        return self._merge_pdfs(arquivos, parametros)
+    
+    def _resultado_erro(self, erro: Exception, timestamp_inicio: datetime) -> ResultadoSaidaPadrao:
+        """Resultado padronizado para exceções no fluxo"""
+        self.logger.error(f"Erro no download Embratel: {erro}")
+        return ResultadoSaidaPadrao(
+            sucesso=False,
+            status=StatusExecucao.ERRO,
+            mensagem=f"Erro interno: {str(erro)}",
+            timestamp_inicio=timestamp_inicio,
+            timestamp_fim=datetime.now(),
+            classe_falha=classificar_excecao(erro).value
+        )
+    
+    def _fechar_abas_extras(self):
+        """Fecha abas abertas por documentos anteriores do lote"""
+        for handle in self.driver.window_handles:
+            if handle != self.window_id:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        self.driver.switch_to.window(self.window_id)
     
     def executar_upload_sat(self, parametros: ParametrosEntradaPadrao) -> ResultadoSaidaPadrao:
         """
@@ -137,46 +319,45 @@ class EmbratelRPA(RPABase):
         )
         login_button.click()
 
+    def _sessao_autenticada(self) -> bool:
+        """Verifica se a página atual é a área logada do portal"""
+        try:
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located(
+                    (By.XPATH, "//a[contains(normalize-space(.), 'Fatura On Line')]")
+                )
+            )
+            return True
+        except TimeoutException:
+            return False
+
     def _merge_pdfs(self, pdf_list, parametros: ParametrosEntradaPadrao):
-        """Lógica de merge de PDFs preservada do código legado"""
+        """Mescla os documentos baixados direto no arquivo final da fatura"""
         try:
-            import PyPDF2
-            
             vencimento_formatado = self.vencimento.replace("/", "-") if self.vencimento else "sem-data"
             self.logger.info(f"Data de vencimento da fatura: {vencimento_formatado}")
 
             new_name_file = f"{parametros.id_cliente}_{vencimento_formatado}.pdf"
             new_name_file = self._sanitize_filename(new_name_file)
+            new_name_file = os.path.join(self.diretorio_execucao, new_name_file)
             self.logger.info(f"Salvando fatura como: {new_name_file}")
 
-            pdf_writer = PyPDF2.PdfWriter()
-
-            for pdf in pdf_list:
-                if os.path.exists(pdf):
-                    pdf_reader = PyPDF2.PdfReader(pdf)
-                    for page in range(len(pdf_reader.pages)):
-                        pdf_writer.add_page(pdf_reader.pages[page])
-
-            with open(new_name_file, "wb") as output_pdf:
-                pdf_writer.write(output_pdf)
-
-            # Verifica se o PDF foi criado com sucesso
-            if os.path.exists(new_name_file):
-                self.logger.info(f"PDFs merged successfully into {new_name_file}")
-
-                # Remove PDFs originais
-                for pdf in pdf_list:
-                    try:
-                        if os.path.exists(pdf):
-                            os.remove(pdf)
-                            self.logger.info(f"Removed original PDF: {pdf}")
-                    except Exception as e:
-                        self.logger.error(f"Error removing {pdf}: {e}")
-                
-                return new_name_file
-            else:
+            existentes = [pdf for pdf in pdf_list if os.path.exists(pdf)]
+            if not existentes:
                 self.logger.error("Failed to create the merged PDF.")
                 return None
+            montar_pdf(existentes, new_name_file)
+            self.logger.info(f"PDFs merged successfully into {new_name_file}")
+
+            # Remove PDFs originais
+            for pdf in existentes:
+                try:
+                    os.remove(pdf)
+                    self.logger.info(f"Removed original PDF: {pdf}")
+                except Exception as e:
+                    self.logger.error(f"Error removing {pdf}: {e}")
+            
+            return new_name_file
                 
         except Exception as e:
             self.logger.error(f"Erro no merge de PDFs: {e}")
@@ -184,6 +365,14 @@ class EmbratelRPA(RPABase):
 
     def _extrair_data_vencimento(self, html_content):
         """Lógica de extração de vencimento preservada do código legado"""
+        try:
+            vencimento = extrair_valor_de_html(html_content, XPATH_VENCIMENTO_BOLETO)
+            if vencimento:
+                return vencimento
+        except ImportError:
+            # Sem lxml: mantém o parser legado
+            pass
+        
         soup = BeautifulSoup(html_content, "html.parser")
 
         # Encontrar a div que contém a Data de Vencimento
@@ -209,17 +398,7 @@ class EmbratelRPA(RPABase):
                 html_content = f'<!DOCTYPE html><html><head><meta charset="UTF-8"></head><body>{html_content}</body></html>'
 
             if css:
-                css_response = requests.get(
-                    "https://www2.embratel.com.br:9442/EbppCorporativo/scriptcss/styles.css",
-                    verify=False,
-                )
-                css_content = css_response.text
-
-                logo_response = requests.get(
-                    "https://www2.embratel.com.br:9442/EbppCorporativo/imagens/RH-logo-verde-amarelo-transparente.gif",
-                    verify=False,
-                )
-                encoded_logo = base64.b64encode(logo_response.content).decode("utf-8")
+                css_content, encoded_logo = _obter_recursos_portal()
 
                 html_content = html_content.replace(
                     "/EbppCorporativo/imagens/RH-logo-verde-amarelo-transparente.gif",
@@ -269,16 +448,16 @@ class EmbratelRPA(RPABase):
             raise Exception("Tabela de faturas não encontrada")
 
     def _escolha_da_fatura(self, parametros: ParametrosEntradaPadrao):
-        """Lógica de escolha da fatura preservada do código legado"""
+        """
+        Lógica de escolha da fatura preservada do código legado
+        Todas as linhas são lidas em um único execute_script (antes 3 chamadas por linha)
+        """
         try:
-            fatura_table = self.driver.find_element(
-                By.XPATH, "//table[contains(@class, 'txtCinzaHand')]/tbody"
-            )
+            linhas = extrair_do_driver(self.driver, ESPEC_FATURAS_EMBRATEL)
         except Exception as e:
             self.logger.error(f"Erro ao localizar a tabela de faturas: {e}")
             return
 
-        linhas = fatura_table.find_elements(By.XPATH, ".//tr")
         encontrou = False
 
         # Tenta extrair conta e dia, se possível
@@ -295,13 +474,8 @@ class EmbratelRPA(RPABase):
             )
 
         for linha in linhas:
-            colunas = linha.find_elements(By.TAG_NAME, "td")
-
-            if len(colunas) < 5:
-                continue  # Linha incompleta, ignora
-
-            conta_texto = colunas[1].text.strip()
-            data_texto = colunas[4].text.strip()
+            conta_texto = (linha["conta"] or "").strip()
+            data_texto = linha["data"].strip()
 
             # Proteção contra formatos inválidos de data
             if not data_texto or len(data_texto) < 2:
@@ -310,7 +484,9 @@ class EmbratelRPA(RPABase):
             if conta_texto == conta_alvo:
                 if dia_alvo is None or data_texto[:2] == dia_alvo:
                     try:
-                        linha.click()
+                        self.driver.find_element(
+                            By.XPATH, ESPEC_FATURAS_EMBRATEL.xpath_linha(linha["_indice"])
+                        ).click()
                         self.logger.info(
                             f"Selecionando a fatura - Conta: {conta_texto} | Data: {data_texto}"
                         )
@@ -330,83 +506,86 @@ class EmbratelRPA(RPABase):
 
         self.window_id = self.driver.current_window_handle
 
-    def _mudar_para_ultima_aba(self):
-        """Lógica preservada do código legado"""
-        todas_as_janelas = self.driver.window_handles
-        if len(todas_as_janelas) > 1:
-            self.driver.switch_to.window(todas_as_janelas[-1])
-        else:
-            raise Exception("Não há janelas suficientes abertas para mudar.")
-
-    def _fechar_aba_atual_e_voltar(self):
-        """Lógica preservada do código legado"""
-        todas_as_janelas = self.driver.window_handles
-        for indice, janela in enumerate(todas_as_janelas):
-            if self.window_id in janela:
-                self.driver.switch_to.window(todas_as_janelas[indice])
-                break
-
-    def _baixar_documento(self, xpath, documento, css):
-        """Lógica de download de documento preservada do código legado"""
+    def _abrir_documento(self, xpath, documento) -> Optional[str]:
+        """Clica no documento e retorna a aba aberta, sem aguardar o carregamento"""
+        abas_abertas = self.driver.window_handles
         self._clicar_elemento_por_xpath(xpath, documento)
-        self._mudar_para_ultima_aba()
-        sleep(5)
-        html_pagina = self.driver.page_source
-        if documento == "Boleto.pdf":
-            self.vencimento = self._extrair_data_vencimento(html_pagina)
-        self._html_para_pdf(html_pagina, documento, css)
-        self._fechar_aba_atual_e_voltar()
-        return documento
-
-    def _acessar_area_nf(self, recorrente: bool = False):
-        """Lógica preservada do código legado"""
-        if recorrente:
-            self._fechar_aba_atual_e_voltar()
-        self._clicar_elemento_por_xpath(
-            "//tr[@onclick=\"return chamaFatura('notaFiscal')\"]",
-            "Nota Fiscal",
-        )
-        self._mudar_para_ultima_aba()
+        aba = esperas.aguardar_nova_aba(self.driver, abas_abertas)
+        if not aba:
+            self.logger.warning(f"Documento {documento} não abriu nova aba")
+        return aba
 
-    def _baixando_all_docs(self):
-        """Lógica de download de todos os documentos preservada do código legado"""
-        self.lista_docs = []
-
-        fatura = self._baixar_documento(
-            "//tr[@onclick=\"return chamaFatura('imprimirFatura')\"]",
-            "Fatura.pdf",
-            True,
-        )
-        if fatura:
-            self.lista_docs.append(fatura)
-            
-        boleto = self._baixar_documento(
-            "//tr[@onclick=\"return chamaFatura('imprimirBoleto')\"]",
-            "Boleto.pdf",
-            False,
-        )
-        if boleto:
-            self.lista_docs.append(boleto)
+    def _abrir_todos_documentos(self) -> List[tuple]:
+        """
+        Abre as abas de todos os documentos antes de ler qualquer uma
+        O navegador carrega as abas em paralelo
 
-        icms_xpath = "//td[contains(text(), 'ICMS') and @align='left']"
-        iss_xpath = "//td[contains(text(), 'ISS') and @align='left']"
-        
-        self._acessar_area_nf()
-        try:
-            if self.driver.find_element(By.XPATH, icms_xpath):
-                icms = self._baixar_documento(icms_xpath, "NF_ICMS.pdf", False)
-                self.lista_docs.append(icms)
-        except Exception:
-            self.logger.info("Não há NF do tipo ICMS")
-            
-        self._acessar_area_nf(True)
-        try:
-            if self.driver.find_element(By.XPATH, iss_xpath):
-                iss = self._baixar_documento(iss_xpath, "NF_ISS.pdf", False)
-                self.lista_docs.append(iss)
-        except Exception:
-            self.logger.info("Não há NF do tipo ISS")
+        Returns:
+            Lista (documento, aba, usa_css) na ordem do PDF final
+        """
+        abertos = []
+        for documento, xpath, css in DOCUMENTOS_FATURA:
+            aba = self._abrir_documento(xpath, documento)
+            if aba:
+                abertos.append((documento, aba, css))
+
+        aba_nf = self._abrir_documento(XPATH_AREA_NF, "Nota Fiscal")
+        if aba_nf:
+            self.driver.switch_to.window(aba_nf)
+            esperas.aguardar_rede_ociosa(self.driver)
+            for documento, tipo, xpath in DOCUMENTOS_NF:
+                if self.driver.find_elements(By.XPATH, xpath):
+                    aba = self._abrir_documento(xpath, documento)
+                    if aba:
+                        abertos.append((documento, aba, False))
+                else:
+                    self.logger.info(f"Não há NF do tipo {tipo}")
+            self.driver.close()
+
+        self.driver.switch_to.window(self.window_id)
+        return abertos
+
+    def _capturar_html_documentos(self, abertos: List[tuple]) -> List[tuple]:
+        """Lê o HTML de cada aba já carregada e fecha a aba"""
+        capturados = []
+        for documento, aba, css in abertos:
+            self.driver.switch_to.window(aba)
+            esperas.aguardar_rede_ociosa(self.driver)
+            html_pagina = self.driver.page_source
+            if documento == "Boleto.pdf":
+                self.vencimento = self._extrair_data_vencimento(html_pagina)
+            capturados.append((documento, html_pagina, css))
+            self.driver.close()
+
+        self.driver.switch_to.window(self.window_id)
+        return capturados
 
+    def _baixando_all_docs(self):
+        """
+        Lógica de download de todos os documentos
+        Captura o HTML de todas as abas e gera os PDFs em paralelo
+        """
+        capturados = self._capturar_html_documentos(self._abrir_todos_documentos())
+        if not capturados:
+            self.lista_docs = []
+            return self.lista_docs
+
+        caminhos = [os.path.join(self.diretorio_execucao, documento) for documento, _, _ in capturados]
+
+        def _renderizar(indice):
+            documento, html_pagina, css = capturados[indice]
+            try:
+                return self._html_para_pdf(html_pagina, caminhos[indice], css)
+            except Exception as e:
+                # Falha de um documento não descarta os gerados pelas outras threads
+                self.logger.error(f"Erro ao gerar PDF {documento}: {e}")
+                return False
+
+        max_workers = min(len(capturados), MAX_RENDERIZACOES_PARALELAS)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            gerados = list(executor.map(_renderizar, range(len(capturados))))
+
+        self.lista_docs = [caminho for caminho, gerado in zip(caminhos, gerados) if gerado]
         return self.lista_docs
 
     def _obter_data_atual(self):
@@ -0,0 +1,309 @@
+"""
+Limitador adaptativo de execuções simultâneas por operadora
+Cada portal tem um limite de sessões paralelas ajustado por AIMD: cresce
+aditivamente com execuções rápidas e bem-sucedidas e cai pela metade com
+timeouts, indisponibilidade, captcha ou latência acima do alvo
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, replace, fields
+from typing import Dict, Optional
+
+from .disjuntor import ClasseFalha, classificar_falha
+from ..utils.redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "rpa:limite:"
+
+# Sinais de sobrecarga do portal: reduzem o limite
+FALHAS_DE_SOBRECARGA = (ClasseFalha.PORTAL_INDISPONIVEL, ClasseFalha.TIMEOUT, ClasseFalha.CAPTCHA)
+
+# Remove reservas vencidas e ocupa uma vaga se houver espaço no limite atual
+SCRIPT_ADQUIRIR = """
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+local limite = tonumber(redis.call('HGET', KEYS[1], 'limite') or ARGV[4])
+if redis.call('ZCARD', KEYS[2]) < math.floor(limite) then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Aumento aditivo (+1 a cada `limite` sucessos) ou redução multiplicativa
+# (no máximo uma a cada intervalo, para falhas simultâneas não zerarem o limite)
+SCRIPT_AJUSTAR = """
+local limite = tonumber(redis.call('HGET', KEYS[1], 'limite') or ARGV[3])
+if ARGV[2] == 'reduzir' then
+    local reduzido_em = tonumber(redis.call('HGET', KEYS[1], 'reduzido_em') or '0')
+    if tonumber(ARGV[1]) - reduzido_em < tonumber(ARGV[7]) then
+        return tostring(limite)
+    end
+    limite = math.max(tonumber(ARGV[4]), limite * tonumber(ARGV[6]))
+    redis.call('HSET', KEYS[1], 'reduzido_em', ARGV[1])
+else
+    limite = math.min(tonumber(ARGV[5]), limite + 1 / limite)
+end
+redis.call('HSET', KEYS[1], 'limite', tostring(limite))
+return tostring(limite)
+"""
+
+
+@dataclass(frozen=True)
+class ConfiguracaoLimite:
+    """Faixa e parâmetros do AIMD de uma operadora"""
+    inicial: float = 2
+    minimo: float = 1
+    maximo: float = 6
+    latencia_alvo_segundos: float = 180
+    fator_reducao: float = 0.5
+    intervalo_reducao_segundos: float = 60
+
+
+CONFIGURACAO_PADRAO = ConfiguracaoLimite()
+
+# Limites por código de operadora (ajustáveis por RPA_LIMITES_OPERADORAS)
+LIMITES_OPERADORAS: Dict[str, ConfiguracaoLimite] = {
+    # Portal ASP sensível a sessões simultâneas da mesma rede
+    "EMB": ConfiguracaoLimite(inicial=2, maximo=4, latencia_alvo_segundos=240),
+    # Modo API tolera muitas requisições paralelas
+    "DIG": ConfiguracaoLimite(inicial=4, maximo=16, latencia_alvo_segundos=90),
+    "VIV": ConfiguracaoLimite(inicial=2, maximo=6),
+    "SAT": ConfiguracaoLimite(inicial=2, maximo=4),
+}
+
+
+def obter_configuracao_limite(operadora: str) -> ConfiguracaoLimite:
+    """
+    Configuração da operadora com os ajustes de RPA_LIMITES_OPERADORAS
+
+    Ex.: RPA_LIMITES_OPERADORAS='{"EMB": {"maximo": 3}}'
+    """
+    operadora = operadora.upper()
+    configuracao = LIMITES_OPERADORAS.get(operadora, CONFIGURACAO_PADRAO)
+
+    ajustes = os.getenv("RPA_LIMITES_OPERADORAS")
+    if ajustes:
+        try:
+            ajustes = json.loads(ajustes).get(operadora) or {}
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"RPA_LIMITES_OPERADORAS inválido: {e}")
+            ajustes = {}
+        validos = {campo.name for campo in fields(ConfiguracaoLimite)}
+        configuracao = replace(configuracao, **{
+            chave: float(valor) for chave, valor in ajustes.items() if chave in validos
+        })
+    return configuracao
+
+
+@dataclass
+class VagaExecucao:
+    """Vaga ocupada por uma execução (liberada com o resultado)"""
+    operadora: str
+    token: str
+    inicio: float
+
+
+class _LimitesLocais:
+    """Mesma lógica dos scripts Redis, em memória (fallback sem Redis)"""
+
+    def __init__(self):
+        self._limites: Dict[str, float] = {}
+        self._reduzido_em: Dict[str, float] = {}
+        self._vagas: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def adquirir(self, operadora: str, agora: float, expira_em: float, token: str, inicial: float) -> bool:
+        with self._lock:
+            vagas = self._vagas.setdefault(operadora, {})
+            for vencida in [t for t, expiracao in vagas.items() if expiracao <= agora]:
+                vagas.pop(vencida)
+            if len(vagas) < int(self._limites.get(operadora, inicial)):
+                vagas[token] = expira_em
+                return True
+            return False
+
+    def liberar(self, operadora: str, token: str):
+        with self._lock:
+            self._vagas.get(operadora, {}).pop(token, None)
+
+    def ajustar(self, operadora: str, agora: float, acao: str, configuracao: ConfiguracaoLimite) -> float:
+        with self._lock:
+            limite = self._limites.get(operadora, configuracao.inicial)
+            if acao == "reduzir":
+                if agora - self._reduzido_em.get(operadora, 0) < configuracao.intervalo_reducao_segundos:
+                    return limite
+                limite = max(configuracao.minimo, limite * configuracao.fator_reducao)
+                self._reduzido_em[operadora] = agora
+            else:
+                limite = min(configuracao.maximo, limite + 1 / limite)
+            self._limites[operadora] = limite
+            return limite
+
+    def limite(self, operadora: str, inicial: float) -> float:
+        with self._lock:
+            return self._limites.get(operadora, inicial)
+
+    def em_uso(self, operadora: str, agora: float) -> int:
+        with self._lock:
+            return sum(1 for expiracao in self._vagas.get(operadora, {}).values() if expiracao > agora)
+
+
+class LimitadorConcorrencia:
+    """
+    Controla quantas execuções de cada portal rodam ao mesmo tempo entre todos os workers
+
+    As vagas são reservas com validade (sorted set no Redis): se o worker
+    morrer sem liberar, a vaga volta ao portal quando a reserva vence.
+    """
+
+    def __init__(
+        self,
+        duracao_reserva_segundos: Optional[int] = None,
+        espera_maxima_segundos: Optional[float] = None,
+        intervalo_espera: float = 1.0
+    ):
+        # Acima do task_time_limit do Celery
+        self.duracao_reserva_segundos = duracao_reserva_segundos or int(
+            os.getenv("RPA_LIMITE_RESERVA_SEGUNDOS", str(45 * 60))
+        )
+        self.espera_maxima_segundos = (
+            espera_maxima_segundos if espera_maxima_segundos is not None
+            else float(os.getenv("RPA_LIMITE_ESPERA_SEGUNDOS", "30"))
+        )
+        self.intervalo_espera = intervalo_espera
+        self._local = _LimitesLocais()
+
+    @staticmethod
+    def _chaves(operadora: str):
+        base = PREFIXO_CHAVE + operadora.upper()
+        return base, f"{base}:vagas"
+
+    def tentar_adquirir(self, operadora: str) -> Optional[VagaExecucao]:
+        """Ocupa uma vaga se o limite atual permitir (sem esperar)"""
+        operadora = operadora.upper()
+        configuracao = obter_configuracao_limite(operadora)
+        token = uuid.uuid4().hex
+        agora = time.time()
+        expira_em = agora + self.duracao_reserva_segundos
+
+        adquiriu = None
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                adquiriu = bool(redis_cliente.eval(
+                    SCRIPT_ADQUIRIR, 2, *self._chaves(operadora),
+                    agora, expira_em, token, configuracao.inicial
+                ))
+            except Exception as e:
+                logger.warning(f"Erro no Redis do limitador, usando estado local: {e}")
+        if adquiriu is None:
+            adquiriu = self._local.adquirir(operadora, agora, expira_em, token, configuracao.inicial)
+
+        return VagaExecucao(operadora, token, time.monotonic()) if adquiriu else None
+
+    def adquirir(self, operadora: str, timeout: Optional[float] = None) -> Optional[VagaExecucao]:
+        """
+        Aguarda uma vaga da operadora
+
+        Returns:
+            VagaExecucao ou None se nenhuma vaga abriu dentro do timeout
+        """
+        timeout = self.espera_maxima_segundos if timeout is None else timeout
+        limite = time.monotonic() + timeout
+        while True:
+            vaga = self.tentar_adquirir(operadora)
+            if vaga is not None or time.monotonic() >= limite:
+                return vaga
+            time.sleep(self.intervalo_espera)
+
+    def liberar(self, vaga: VagaExecucao, resultado=None, execucoes: int = 1):
+        """
+        Devolve a vaga e ajusta o limite da operadora com o resultado observado
+
+        Args:
+            resultado: ResultadoSaidaPadrao (None libera sem ajustar o limite)
+            execucoes: Processos atendidos pela vaga (lote), para a latência média
+        """
+        base, vagas = self._chaves(vaga.operadora)
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                redis_cliente.zrem(vagas, vaga.token)
+            except Exception as e:
+                logger.warning(f"Erro ao liberar vaga no Redis: {e}")
+        self._local.liberar(vaga.operadora, vaga.token)
+
+        if resultado is None:
+            return
+
+        configuracao = obter_configuracao_limite(vaga.operadora)
+        latencia = (time.monotonic() - vaga.inicio) / max(1, execucoes)
+        classe = classificar_falha(resultado)
+        if classe in FALHAS_DE_SOBRECARGA or latencia > configuracao.latencia_alvo_segundos:
+            acao = "reduzir"
+        elif classe is None:
+            acao = "aumentar"
+        else:
+            # Falhas do cliente (credencial, sem fatura) não dizem nada sobre o portal
+            return
+
+        novo_limite = self._ajustar(vaga.operadora, acao, configuracao)
+        if acao == "reduzir":
+            motivo = classe.value if classe in FALHAS_DE_SOBRECARGA else f"latência {latencia:.0f}s"
+            logger.info(f"Limite de {vaga.operadora} ajustado para {novo_limite:.2f} ({motivo})")
+
+    def _ajustar(self, operadora: str, acao: str, configuracao: ConfiguracaoLimite) -> float:
+        agora = time.time()
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                return float(redis_cliente.eval(
+                    SCRIPT_AJUSTAR, 1, self._chaves(operadora)[0],
+                    agora, acao, configuracao.inicial, configuracao.minimo, configuracao.maximo,
+                    configuracao.fator_reducao, configuracao.intervalo_reducao_segundos
+                ))
+            except Exception as e:
+                logger.warning(f"Erro no Redis do limitador, usando estado local: {e}")
+        return self._local.ajustar(operadora, agora, acao, configuracao)
+
+    def limite_atual(self, operadora: str) -> float:
+        """Limite de execuções simultâneas em vigor para a operadora"""
+        operadora = operadora.upper()
+        inicial = obter_configuracao_limite(operadora).inicial
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                valor = redis_cliente.hget(self._chaves(operadora)[0], "limite")
+                return float(valor) if valor else inicial
+            except Exception as e:
+                logger.warning(f"Erro ao ler limite no Redis: {e}")
+        return self._local.limite(operadora, inicial)
+
+    def em_uso(self, operadora: str) -> int:
+        """Vagas ocupadas (reservas não vencidas) da operadora"""
+        operadora = operadora.upper()
+        redis_cliente = obter_cliente_redis()
+        if redis_cliente is not None:
+            try:
+                return int(redis_cliente.zcount(self._chaves(operadora)[1], time.time(), "+inf"))
+            except Exception as e:
+                logger.warning(f"Erro ao ler vagas no Redis: {e}")
+        return self._local.em_uso(operadora, time.time())
+
+
+# Instância do processo
+_limitador: Optional[LimitadorConcorrencia] = None
+
+
+def obter_limitador_concorrencia() -> LimitadorConcorrencia:
+    """Retorna o limitador de concorrência do processo"""
+    global _limitador
+    if _limitador is None:
+        _limitador = LimitadorConcorrencia()
+    return _limitador
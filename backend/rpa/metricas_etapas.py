@@ -0,0 +1,123 @@
+"""
+Métricas de tempo por etapa das execuções de RPA
+Estrutura gravada em ResultadoSaidaPadrao.metricas_etapas / Execucao.metricas_etapas
+e agregação por operadora para localizar onde as execuções gastam tempo
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Tempo da execução fora de qualquer etapa medida
+ETAPA_NAO_MEDIDA = "outros"
+
+
+def montar_metricas_etapas(
+    tempos: Dict[str, float],
+    chamadas: Dict[str, int],
+    total_segundos: float,
+    relatorio_esperas: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Estrutura das métricas de uma execução
+
+    Args:
+        tempos: Segundos acumulados por etapa
+        chamadas: Quantidade de vezes que cada etapa foi medida
+        total_segundos: Duração total da execução
+        relatorio_esperas: MedidorEsperas.relatorio() (sleeps x esperas por etapa)
+
+    Returns:
+        {"total_segundos", "sleep_total", "espera_total",
+         "etapas": {nome: {"segundos", "chamadas", "sleep", "espera", "timeouts"}}}
+    """
+    esperas_etapas = (relatorio_esperas or {}).get("etapas", {})
+    etapas = {}
+    for nome, segundos in tempos.items():
+        esperas = esperas_etapas.get(nome, {})
+        etapas[nome] = {
+            "segundos": round(segundos, 3),
+            "chamadas": chamadas.get(nome, 1),
+            "sleep": esperas.get("sleep", 0.0),
+            "espera": esperas.get("espera", 0.0),
+            "timeouts": esperas.get("timeouts", 0),
+        }
+
+    nao_medido = total_segundos - sum(tempos.values())
+    if nao_medido > 0.0005:
+        esperas = esperas_etapas.get("geral", {})
+        etapas[ETAPA_NAO_MEDIDA] = {
+            "segundos": round(nao_medido, 3),
+            "chamadas": 1,
+            "sleep": esperas.get("sleep", 0.0),
+            "espera": esperas.get("espera", 0.0),
+            "timeouts": esperas.get("timeouts", 0),
+        }
+
+    return {
+        "total_segundos": round(total_segundos, 3),
+        "sleep_total": (relatorio_esperas or {}).get("sleep_total", 0.0),
+        "espera_total": (relatorio_esperas or {}).get("espera_total", 0.0),
+        "etapas": etapas,
+    }
+
+
+def _percentil(valores: List[float], fracao: float) -> float:
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * fracao
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicao - inferior)
+
+
+def agregar_metricas_por_operadora(
+    registros: Iterable[Tuple[str, Optional[Dict[str, Any]]]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Agrega as métricas de várias execuções por operadora e etapa
+
+    Args:
+        registros: Pares (operadora_codigo, metricas_etapas)
+
+    Returns:
+        {operadora: {"execucoes", "total_segundos", "etapas": {nome: {
+            "execucoes", "total_segundos", "media_segundos", "p50_segundos",
+            "p95_segundos", "sleep_segundos", "espera_segundos", "participacao_percentual"}}}}
+        com as etapas ordenadas do maior para o menor tempo total
+    """
+    duracoes = defaultdict(lambda: defaultdict(list))
+    esperas = defaultdict(lambda: defaultdict(lambda: {"sleep": 0.0, "espera": 0.0}))
+    execucoes = defaultdict(int)
+    totais = defaultdict(float)
+
+    for operadora, metricas in registros:
+        if not metricas or not metricas.get("etapas"):
+            continue
+        execucoes[operadora] += 1
+        totais[operadora] += metricas.get("total_segundos", 0.0)
+        for nome, etapa in metricas["etapas"].items():
+            duracoes[operadora][nome].append(etapa.get("segundos", 0.0))
+            esperas[operadora][nome]["sleep"] += etapa.get("sleep", 0.0)
+            esperas[operadora][nome]["espera"] += etapa.get("espera", 0.0)
+
+    agregado = {}
+    for operadora, etapas in duracoes.items():
+        total_operadora = totais[operadora] or sum(sum(valores) for valores in etapas.values())
+        resumo = {}
+        for nome, valores in sorted(etapas.items(), key=lambda item: -sum(item[1])):
+            total_etapa = sum(valores)
+            resumo[nome] = {
+                "execucoes": len(valores),
+                "total_segundos": round(total_etapa, 3),
+                "media_segundos": round(total_etapa / len(valores), 3),
+                "p50_segundos": round(_percentil(valores, 0.5), 3),
+                "p95_segundos": round(_percentil(valores, 0.95), 3),
+                "sleep_segundos": round(esperas[operadora][nome]["sleep"], 3),
+                "espera_segundos": round(esperas[operadora][nome]["espera"], 3),
+                "participacao_percentual": round(total_etapa / total_operadora * 100, 2) if total_operadora else 0.0,
+            }
+        agregado[operadora] = {
+            "execucoes": execucoes[operadora],
+            "total_segundos": round(totais[operadora], 3),
+            "etapas": resumo,
+        }
+    return agregado
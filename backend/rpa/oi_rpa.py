@@ -27,7 +27,7 @@ class OiRPA:
         self.logger = logger
         
         # Configurações específicas da OI
-        self.url_portal = "https://minha.oi.com.br"
+        self.url_portal = os.getenv("OI_PORTAL_URL", "https://minha.oi.com.br")
         self.timeout_download = 180
         
     def executar_download(self, mes_ano: str) -> dict:
@@ -6,15 +6,31 @@ Data: 29/05/2025
 """
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, fields
+from typing import Dict, Any, Optional, List, Callable, Iterable, Tuple
 from enum import Enum
+from functools import wraps
+import importlib
 import logging
+import os
+import threading
+import time
 from datetime import datetime
 
+from .checkpoint import EtapaCheckpoint, obter_repositorio_checkpoints
+from .disjuntor import EstadoDisjuntor, classificar_excecao, obter_disjuntor
+from .limitador_concorrencia import obter_limitador_concorrencia
+from .metricas_etapas import montar_metricas_etapas
+from .timeouts_adaptativos import TIMEOUT_ESPERA_PADRAO, obter_timeouts_adaptativos
+from ..utils.artefatos import obter_armazem_artefatos
+from ..utils.cancelamento import ExecucaoCancelada, SoftTimeLimitExceeded, verificar_cancelamento
+
 class TipoOperacao(Enum):
     """Tipos de operação suportados pelo RPA Base"""
     DOWNLOAD_FATURA = "download_fatura"
+    DOWNLOAD_FATURA_LOTE = "download_fatura_lote"
     UPLOAD_SAT = "upload_sat"
 
 class StatusExecucao(Enum):
@@ -24,6 +40,8 @@ class StatusExecucao(Enum):
     SUCESSO = "sucesso"
     ERRO = "erro"
     TIMEOUT = "timeout"
+    ADIADO = "adiado"  # Portal com disjuntor aberto; reagendar
+    CANCELADO = "cancelado"  # Cancelamento solicitado pelo operador (utils/cancelamento)
 
 @dataclass(frozen=True)
 class ParametrosEntradaPadrao:
@@ -43,6 +61,12 @@ class ParametrosEntradaPadrao:
     dados_sat: str = ""
     unidade: str = ""
     servico: str = ""
+    configuracao_navegador: str = ""  # JSON de Operadora.configuracao_navegador
+    upload_assincrono: bool = False  # Upload feito pela fila de storage, após liberar o navegador
+
+# Componentes que adiam uma execução (ResultadoSaidaPadrao.adiado_por)
+ADIADO_DISJUNTOR = "disjuntor"
+ADIADO_LIMITADOR = "limitador"
 
 @dataclass
 class ResultadoSaidaPadrao:
@@ -63,6 +87,190 @@ class ResultadoSaidaPadrao:
     logs_execucao: List[str] = field(default_factory=list)
     screenshots_debug: List[str] = field(default_factory=list)
     dados_especificos: Dict[str, Any] = field(default_factory=dict)
+    classe_falha: Optional[str] = None  # ClasseFalha.value (alimenta o disjuntor)
+    metricas_etapas: Dict[str, Any] = field(default_factory=dict)  # Ver rpa/metricas_etapas.py
+    adiado_por: Optional[str] = None  # ADIADO_DISJUNTOR ou ADIADO_LIMITADOR quando status == ADIADO
+
+@dataclass
+class ContextoExecucao:
+    """
+    Estado de uma execução de RPA
+    
+    Cada execução tem o seu contexto, permitindo que a mesma instância de
+    RPA atenda várias execuções simultâneas em threads diferentes.
+    """
+    parametros: Optional[ParametrosEntradaPadrao] = None
+    operadora: Optional[str] = None  # Código canônico usado nos timeouts adaptativos
+    driver_manager: Any = None
+    driver: Any = None
+    wait: Any = None
+    diretorio_execucao: Optional[str] = None
+    dados: Dict[str, Any] = field(default_factory=dict)
+    tempos_etapas: Dict[str, float] = field(default_factory=dict)
+    chamadas_etapas: Dict[str, int] = field(default_factory=dict)
+    esperas: Any = None  # MedidorEsperas (sleeps fixos x esperas condicionais)
+    inicio_metricas: float = field(default_factory=time.perf_counter)
+    capturas_debug: List[str] = field(default_factory=list)  # Ver utils/captura_debug.py
+    
+    @contextmanager
+    def medir_etapa(self, nome: str):
+        """
+        Acumula o tempo gasto na etapa informada
+        
+        Com histórico suficiente da etapa, as esperas dentro dela usam o
+        timeout adaptativo no lugar dos timeouts fixos (ver timeouts_adaptativos).
+        """
+        verificar_cancelamento()
+        etapa_anterior = self.esperas.etapa_atual if self.esperas else None
+        escala_anterior = self.esperas.escala_timeout if self.esperas else None
+        timeout_wait_anterior = getattr(self.wait, "_timeout", None)
+        if self.esperas:
+            self.esperas.etapa_atual = nome
+        timeout_etapa = self._timeout_adaptativo(nome)
+        if timeout_etapa is not None:
+            if self.esperas:
+                self.esperas.escala_timeout = timeout_etapa / TIMEOUT_ESPERA_PADRAO
+            if timeout_wait_anterior is not None:
+                self.wait._timeout = timeout_etapa
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.capturar_debug(nome, e)
+            raise
+        finally:
+            self.tempos_etapas[nome] = self.tempos_etapas.get(nome, 0.0) + time.perf_counter() - inicio
+            self.chamadas_etapas[nome] = self.chamadas_etapas.get(nome, 0) + 1
+            if self.esperas:
+                self.esperas.etapa_atual = etapa_anterior
+                self.esperas.escala_timeout = escala_anterior
+            if timeout_etapa is not None and timeout_wait_anterior is not None:
+                self.wait._timeout = timeout_wait_anterior
+    
+    def _timeout_adaptativo(self, etapa: str) -> Optional[float]:
+        if not self.operadora:
+            return None
+        try:
+            timeouts = obter_timeouts_adaptativos()
+            timeout = timeouts.timeout_espera(self.operadora, etapa)
+            if timeout is not None and self.esperas:
+                configuracao = timeouts.configuracao
+                self.esperas.limites_timeout = (configuracao.espera_minima, configuracao.espera_maxima)
+            return timeout
+        except Exception as e:
+            logging.getLogger("RPA.Timeouts").warning(f"Erro ao obter timeout adaptativo: {e}")
+            return None
+    
+    def capturar_debug(self, etapa: Optional[str] = None, erro: Optional[BaseException] = None):
+        """
+        Captura screenshot/DOM/console da falha (uma vez por execução)
+        
+        Chamado apenas em caminhos de falha; o processamento é assíncrono.
+        """
+        from ..utils.captura_debug import captura_habilitada, obter_captura_debug
+        
+        if self.driver is None or self.capturas_debug or not captura_habilitada():
+            return
+        parametros = self.parametros
+        identificacao = f"{parametros.operadora_codigo}_{parametros.id_processo}" if parametros else "execucao"
+        try:
+            self.capturas_debug = obter_captura_debug().capturar(self.driver, identificacao, etapa, erro)
+        except Exception as e:
+            logging.getLogger("RPA.Debug").warning(f"Erro na captura de debug: {e}")
+    
+    def reiniciar_metricas(self):
+        """Zera tempos e esperas (ex.: a cada processo de um lote)"""
+        self.capturas_debug = []
+        self.tempos_etapas = {}
+        self.chamadas_etapas = {}
+        self.inicio_metricas = time.perf_counter()
+        if self.esperas:
+            self.esperas.reiniciar()
+    
+    def iniciar_processo(self, parametros: ParametrosEntradaPadrao):
+        """Passa para o próximo processo de um lote: capturas e métricas ficam com ele"""
+        self.parametros = parametros
+        self.reiniciar_metricas()
+    
+    def anexar_metricas(self, resultado: "ResultadoSaidaPadrao") -> "ResultadoSaidaPadrao":
+        """Inclui tempos das etapas, o relatório de esperas e as capturas de falha no resultado"""
+        resultado.dados_especificos["tempos_etapas"] = {
+            etapa: round(segundos, 3) for etapa, segundos in self.tempos_etapas.items()
+        }
+        relatorio = None
+        if self.esperas:
+            relatorio = self.esperas.relatorio()
+            resultado.dados_especificos["esperas"] = relatorio
+            logging.getLogger("RPA.Esperas").info(
+                f"Processo {self.parametros.id_processo if self.parametros else '-'}: "
+                f"sleep fixo {relatorio['sleep_total']}s, espera condicional {relatorio['espera_total']}s"
+            )
+        resultado.metricas_etapas = montar_metricas_etapas(
+            self.tempos_etapas,
+            self.chamadas_etapas,
+            time.perf_counter() - self.inicio_metricas,
+            relatorio
+        )
+        if not resultado.sucesso:
+            # Falhas devolvidas sem exceção também geram captura
+            self.capturar_debug(self.esperas.etapa_atual if self.esperas else None)
+            resultado.screenshots_debug = resultado.screenshots_debug or list(self.capturas_debug)
+        elif self.operadora:
+            try:
+                obter_timeouts_adaptativos().registrar_metricas(self.operadora, resultado.metricas_etapas)
+            except Exception as e:
+                logging.getLogger("RPA.Timeouts").warning(f"Erro ao registrar latências: {e}")
+        return resultado
+
+_CAMPOS_CONTEXTO = {campo.name for campo in fields(ContextoExecucao)}
+
+def etapa_rpa(nome: str):
+    """
+    Decorator que mede o método do RPA como etapa da execução corrente
+    
+    Equivale a envolver o corpo do método em `with self.medir_etapa(nome)`.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def medido(self, *args, **kwargs):
+            with self.medir_etapa(nome):
+                return metodo(self, *args, **kwargs)
+        return medido
+    return decorador
+
+class EstadoExecucao:
+    """
+    Atributo de RPA armazenado no contexto da execução corrente
+    
+    Permite que o código legado continue usando self.driver, self.vencimento
+    etc. sem compartilhar estado entre execuções concorrentes.
+    """
+    
+    def __init__(self, padrao: Any = None):
+        self.padrao = padrao
+        self.nome = None
+    
+    def __set_name__(self, dono, nome):
+        self.nome = nome
+    
+    def __get__(self, instancia, dono):
+        if instancia is None:
+            return self
+        contexto = instancia.contexto
+        if contexto is None:
+            return self.padrao
+        if self.nome in _CAMPOS_CONTEXTO:
+            return getattr(contexto, self.nome)
+        return contexto.dados.get(self.nome, self.padrao)
+    
+    def __set__(self, instancia, valor):
+        contexto = instancia.contexto
+        if contexto is None:
+            raise RuntimeError(f"'{self.nome}' só pode ser definido durante uma execução")
+        if self.nome in _CAMPOS_CONTEXTO:
+            setattr(contexto, self.nome, valor)
+        else:
+            contexto.dados[self.nome] = valor
 
 class RPABase(ABC):
     """
@@ -70,8 +278,70 @@ class RPABase(ABC):
     Padrão imutável conforme manual da BGTELECOM
     """
     
+    # RPAs cujos portais expõem endpoints JSON/PDF podem baixar sem navegador
+    suporta_modo_api: bool = False
+    
+    # Estado da execução corrente (ver ContextoExecucao)
+    driver_manager = EstadoExecucao()
+    driver = EstadoExecucao()
+    wait = EstadoExecucao()
+    diretorio_execucao = EstadoExecucao()
+    
     def __init__(self):
         self.logger = logging.getLogger(f"RPA.{self.__class__.__name__}")
+        self._contextos = threading.local()
+    
+    @property
+    def contexto(self) -> Optional[ContextoExecucao]:
+        """Contexto da execução em andamento na thread atual"""
+        return getattr(self._contextos, "atual", None)
+    
+    def _criar_driver_manager(self):
+        """Gerenciador de navegador de cada execução (None para RPAs sem navegador)"""
+        return None
+    
+    def _perfil_navegador(self):
+        """Perfil de navegador da operadora da execução corrente"""
+        from ..utils.perfis_navegador import obter_perfil
+        
+        parametros = self.contexto.parametros if self.contexto else None
+        if parametros is None:
+            return obter_perfil()
+        return obter_perfil(parametros.operadora_codigo, parametros.configuracao_navegador)
+    
+    def operadora_metricas(self, parametros: ParametrosEntradaPadrao) -> str:
+        """Código canônico sob o qual as latências da execução são registradas"""
+        codigo = parametros.operadora_codigo.strip().upper()
+        return ALIASES_RPA.get(codigo, codigo)
+    
+    @contextmanager
+    def contexto_execucao(self, parametros: Optional[ParametrosEntradaPadrao] = None):
+        """
+        Abre um contexto de execução na thread atual
+        
+        O navegador obtido durante o contexto é devolvido ao pool na saída.
+        """
+        from ..utils.esperas import MedidorEsperas, ativar_medidor
+        
+        anterior = self.contexto
+        contexto = ContextoExecucao(
+            parametros=parametros,
+            operadora=self.operadora_metricas(parametros) if parametros else None,
+            esperas=MedidorEsperas()
+        )
+        self._contextos.atual = contexto
+        try:
+            contexto.driver_manager = self._criar_driver_manager()
+            with ativar_medidor(contexto.esperas):
+                yield contexto
+        finally:
+            try:
+                if contexto.driver_manager is not None and contexto.driver is not None:
+                    contexto.driver_manager.liberar_driver()
+            except Exception as e:
+                self.logger.warning(f"Erro ao liberar navegador da execução: {e}")
+            finally:
+                self._contextos.atual = anterior
     
     @abstractmethod
     def executar_download(self, parametros: ParametrosEntradaPadrao) -> ResultadoSaidaPadrao:
@@ -99,6 +369,290 @@ class RPABase(ABC):
         """
         pass
     
+    def executar_download_lote(self, lista_parametros: List[ParametrosEntradaPadrao]) -> List[ResultadoSaidaPadrao]:
+        """
+        Executa download de faturas de vários processos da mesma credencial
+        
+        Implementação padrão sequencial: o navegador do pool e a sessão em
+        cache são reaproveitados entre os processos. RPAs podem sobrescrever
+        para manter uma única sessão de portal durante todo o lote.
+        
+        Args:
+            lista_parametros: Parâmetros de cada processo do lote
+            
+        Returns:
+            List[ResultadoSaidaPadrao]: Um resultado por processo, na mesma ordem
+        """
+        resultados = []
+        try:
+            for parametros in lista_parametros:
+                resultados.append(self.executar_download(parametros))
+        except (ExecucaoCancelada, SoftTimeLimitExceeded) as e:
+            return self._completar_lote_cancelado(resultados, lista_parametros, self._motivo_interrupcao(e))
+        return resultados
+    
+    @staticmethod
+    def _motivo_interrupcao(erro: BaseException) -> str:
+        """Mensagem do lote interrompido (cancelamento, prazo ou soft_time_limit da task)"""
+        if isinstance(erro, SoftTimeLimitExceeded):
+            return "Lote interrompido: soft_time_limit da task atingido"
+        return str(erro)
+    
+    def _completar_lote_cancelado(
+        self,
+        resultados: List[Optional["ResultadoSaidaPadrao"]],
+        lista_parametros: List[ParametrosEntradaPadrao],
+        mensagem: str
+    ) -> List["ResultadoSaidaPadrao"]:
+        """
+        Resultados de um lote interrompido por cancelamento ou limite de tempo
+        
+        Processos já concluídos mantêm o próprio resultado (o PDF baixado segue
+        para o upload); os que faltavam recebem CANCELADO.
+        """
+        concluidos = sum(1 for resultado in resultados if resultado is not None)
+        self.logger.info(f"{mensagem} ({concluidos} de {len(lista_parametros)} processos do lote concluídos)")
+        completos = list(resultados) + [None] * (len(lista_parametros) - len(resultados))
+        return [
+            resultado or ResultadoSaidaPadrao(
+                sucesso=False,
+                status=StatusExecucao.CANCELADO,
+                mensagem=mensagem,
+                timestamp_fim=datetime.now()
+            )
+            for resultado in completos
+        ]
+    
+    def _tentar_modo_api(self, parametros: ParametrosEntradaPadrao) -> Optional[ResultadoSaidaPadrao]:
+        """
+        Executa o download somente via HTTP quando há token válido em cache
+        
+        Returns:
+            ResultadoSaidaPadrao do modo API ou None quando o navegador é necessário
+        """
+        if not self.suporta_modo_api or os.getenv("RPA_MODO_API", "true").lower() != "true":
+            return None
+        
+        from ..utils.sessao_portal import obter_cache_sessoes
+        
+        cache = obter_cache_sessoes()
+        operadora = parametros.operadora_codigo.upper()
+        sessao = cache.obter(operadora, parametros.usuario, parametros.senha)
+        if sessao is None or not sessao.token:
+            return None
+        
+        try:
+            return self._executar_download_api(parametros, sessao)
+        except Exception as e:
+            self.logger.warning(f"Modo API indisponível, seguindo pelo navegador: {e}")
+            status_http = getattr(getattr(e, "response", None), "status_code", None)
+            if status_http in (401, 403):
+                cache.invalidar(operadora, parametros.usuario, parametros.senha)
+            return None
+    
+    def _executar_download_api(self, parametros: ParametrosEntradaPadrao, sessao) -> Optional[ResultadoSaidaPadrao]:
+        """
+        Download pelo modo API, sobrescrito pelos RPAs com suporte
+        
+        Args:
+            parametros: Parâmetros padronizados de entrada
+            sessao: SessaoPortal em cache com bearer token
+            
+        Returns:
+            ResultadoSaidaPadrao ou None para seguir pelo navegador
+        """
+        return None
+    
+    def _login_com_sessao(
+        self,
+        driver,
+        parametros: ParametrosEntradaPadrao,
+        realizar_login: Callable[[], Any],
+        sessao_valida: Callable[[], bool],
+        chave_token: Optional[str] = None
+    ) -> bool:
+        """
+        Reaproveita sessão em cache da credencial ou executa o login
+        
+        Args:
+            driver: WebDriver da execução
+            parametros: Parâmetros padronizados de entrada
+            realizar_login: Executa o login completo no portal
+            sessao_valida: Verifica rapidamente se a página atual está autenticada
+            chave_token: Chave do localStorage que guarda o bearer token
+            
+        Returns:
+            bool: True se o navegador terminou autenticado
+        """
+        from ..utils.sessao_portal import obter_cache_sessoes
+        
+        cache = obter_cache_sessoes()
+        operadora = parametros.operadora_codigo.upper()
+        
+        sessao = cache.obter(operadora, parametros.usuario, parametros.senha)
+        if sessao:
+            try:
+                cache.aplicar_no_driver(driver, sessao, parametros.url_portal)
+                if sessao_valida():
+                    self.logger.info("Sessão do portal reaproveitada, login ignorado")
+                    return True
+            except Exception as e:
+                self.logger.warning(f"Falha ao reaproveitar sessão do portal: {e}")
+            cache.invalidar(operadora, parametros.usuario, parametros.senha)
+        
+        if realizar_login() is False or not sessao_valida():
+            return False
+        
+        try:
+            cache.salvar(
+                cache.capturar_do_driver(driver, operadora, chave_token),
+                parametros.usuario,
+                parametros.senha
+            )
+        except Exception as e:
+            self.logger.warning(f"Não foi possível capturar a sessão do portal: {e}")
+        return True
+    
+    def _registrar_checkpoint(self, parametros: ParametrosEntradaPadrao, etapa, **dados):
+        """Registra a conclusão da etapa (falhas no registro não interrompem o fluxo)"""
+        try:
+            obter_repositorio_checkpoints().salvar(parametros.id_processo, etapa, **dados)
+        except Exception as e:
+            self.logger.warning(f"Não foi possível registrar checkpoint {etapa.value}: {e}")
+    
+    def medir_etapa(self, nome: str):
+        """
+        Mede a etapa no contexto ativo (sem contexto, não mede)
+        
+        Tempos, quantidade de chamadas e sleeps/esperas da etapa são
+        anexados ao resultado por ContextoExecucao.anexar_metricas.
+        """
+        return self.contexto.medir_etapa(nome) if self.contexto else nullcontext()
+    
+    def _finalizar_download(
+        self,
+        parametros: ParametrosEntradaPadrao,
+        timestamp_inicio: datetime,
+        dados_extraidos: Dict[str, Any],
+        arquivos: Optional[List[str]] = None,
+        arquivo_fatura: Optional[str] = None,
+        mesclar: Optional[Callable[[List[str], Dict[str, Any]], Optional[str]]] = None,
+        mensagem: str = "Download da fatura realizado com sucesso",
+        mensagem_erro: str = "Falha no download da fatura"
+    ) -> ResultadoSaidaPadrao:
+        """
+        Etapas finais do download (mesclagem e upload) com checkpoints
+        
+        Args:
+            dados_extraidos: Dados da fatura guardados no checkpoint e no resultado
+            arquivos: Documentos baixados a mesclar (quando arquivo_fatura não informado)
+            arquivo_fatura: PDF final já gerado
+            mesclar: Gera o PDF final a partir de (arquivos, dados_extraidos)
+        """
+        if arquivo_fatura is None and arquivos and mesclar:
+            self._registrar_checkpoint(
+                parametros, EtapaCheckpoint.ARQUIVOS_BAIXADOS,
+                arquivos=arquivos, dados_extraidos=dados_extraidos
+            )
+            with self.medir_etapa("merge"):
+                arquivo_fatura = mesclar(arquivos, dados_extraidos)
+        
+        if not arquivo_fatura:
+            return ResultadoSaidaPadrao(
+                sucesso=False,
+                status=StatusExecucao.ERRO,
+                mensagem=mensagem_erro,
+                timestamp_inicio=timestamp_inicio,
+                timestamp_fim=datetime.now()
+            )
+        
+        self._registrar_checkpoint(
+            parametros, EtapaCheckpoint.PDF_MESCLADO,
+            arquivo_fatura=arquivo_fatura, dados_extraidos=dados_extraidos
+        )
+        if parametros.upload_assincrono:
+            # O orquestrador entrega o PDF à fila de storage; o navegador não espera a rede
+            url_s3 = None
+            dados_especificos = {"upload_pendente": True}
+        else:
+            with self.medir_etapa("upload"):
+                artefato = obter_armazem_artefatos().armazenar(arquivo_fatura, self.file_manager)
+            url_s3 = artefato.url
+            dados_especificos = {"artefato": artefato.como_dict()}
+            self._registrar_checkpoint(
+                parametros, EtapaCheckpoint.UPLOAD_CONCLUIDO,
+                url_s3=url_s3, artefato=artefato.como_dict()
+            )
+        
+        return ResultadoSaidaPadrao(
+            sucesso=True,
+            status=StatusExecucao.SUCESSO,
+            mensagem=mensagem,
+            arquivo_baixado=arquivo_fatura,
+            url_s3=url_s3,
+            dados_extraidos=dados_extraidos,
+            tempo_execucao_segundos=(datetime.now() - timestamp_inicio).total_seconds(),
+            timestamp_inicio=timestamp_inicio,
+            timestamp_fim=datetime.now(),
+            logs_execucao=[f"Fatura baixada: {arquivo_fatura}"],
+            dados_especificos=dados_especificos
+        )
+    
+    def _retomar_download(
+        self,
+        parametros: ParametrosEntradaPadrao,
+        timestamp_inicio: datetime,
+        mesclar: Optional[Callable[[List[str], Dict[str, Any]], Optional[str]]] = None,
+        mensagem: str = "Download da fatura realizado com sucesso"
+    ) -> Optional[ResultadoSaidaPadrao]:
+        """
+        Retoma a execução a partir do último checkpoint do processo
+        
+        Returns:
+            ResultadoSaidaPadrao ou None quando não há etapa retomável
+            (o fluxo segue completo pelo portal)
+        """
+        checkpoint = obter_repositorio_checkpoints().obter(parametros.id_processo)
+        if checkpoint is None:
+            return None
+        
+        dados = checkpoint.dados
+        dados_extraidos = dados.get("dados_extraidos") or {}
+        etapa = checkpoint.etapa_concluida
+        if etapa == EtapaCheckpoint.ARQUIVOS_BAIXADOS and mesclar is None:
+            return None
+        
+        self.logger.info(f"Retomando processo {parametros.id_processo} após a etapa {etapa.value}")
+        if self.contexto:
+            self.diretorio_execucao = self.file_manager.preparar_diretorio_execucao(parametros.id_processo)
+        
+        if etapa == EtapaCheckpoint.UPLOAD_CONCLUIDO:
+            resultado = ResultadoSaidaPadrao(
+                sucesso=True,
+                status=StatusExecucao.SUCESSO,
+                mensagem=mensagem,
+                arquivo_baixado=dados.get("arquivo_fatura"),
+                url_s3=dados["url_s3"],
+                dados_extraidos=dados_extraidos,
+                dados_especificos={"artefato": dados["artefato"]} if dados.get("artefato") else {},
+                tempo_execucao_segundos=(datetime.now() - timestamp_inicio).total_seconds(),
+                timestamp_inicio=timestamp_inicio,
+                timestamp_fim=datetime.now()
+            )
+        elif etapa == EtapaCheckpoint.PDF_MESCLADO:
+            resultado = self._finalizar_download(
+                parametros, timestamp_inicio, dados_extraidos,
+                arquivo_fatura=dados["arquivo_fatura"], mensagem=mensagem
+            )
+        else:
+            resultado = self._finalizar_download(
+                parametros, timestamp_inicio, dados_extraidos,
+                arquivos=dados["arquivos"], mesclar=mesclar, mensagem=mensagem
+            )
+        
+        resultado.dados_especificos["retomado_apos"] = etapa.value
+        return resultado
+    
     def _log_operacao(self, operacao: str, parametros: ParametrosEntradaPadrao, resultado: ResultadoSaidaPadrao):
         """
         Registra log padronizado da operação
@@ -116,48 +670,132 @@ class RPABase(ABC):
         =======================
         """)
 
+# Módulo e classe de cada RPA, importados apenas no primeiro uso
+RPAS_DISPONIVEIS: Dict[str, Tuple[str, str]] = {
+    "EMB": (".embratel_rpa", "EmbratelRPA"),
+    "DIG": (".digitalnet_rpa", "DigitalnetRPA"),
+    "AZU": (".azuton_rpa", "AzutonRPA"),
+    "VIV": (".vivo_rpa", "VivoRPA"),
+    "OI": (".oi_rpa", "OiRPA"),
+    "SAT": (".sat_rpa", "SatRPA"),
+}
+
+# Nomes alternativos aceitos para cada código
+ALIASES_RPA: Dict[str, str] = {
+    "EMBRATEL": "EMB",
+    "DIGITALNET": "DIG",
+    "AZUTON": "AZU",
+    "VIVO": "VIV",
+}
+
+class RegistroRPAs:
+    """
+    Registro preguiçoso de RPAs: mapeia códigos/aliases para fábricas
+    
+    O módulo do RPA (selenium, bs4, PyPDF2...) só é importado e a instância
+    só é criada na primeira execução daquela operadora. Aliases compartilham
+    a mesma instância.
+    """
+    
+    def __init__(self, operadoras_habilitadas: Optional[Iterable[str]] = None):
+        self.logger = logging.getLogger("RegistroRPAs")
+        self._fabricas: Dict[str, Callable[[], RPABase]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._instancias: Dict[str, RPABase] = {}
+        self._lock = threading.Lock()
+        self._habilitadas = (
+            {self._normalizar(codigo) for codigo in operadoras_habilitadas}
+            if operadoras_habilitadas else None
+        )
+    
+    def _normalizar(self, codigo: str) -> str:
+        codigo = codigo.strip().upper()
+        return ALIASES_RPA.get(codigo, codigo)
+    
+    def registrar(self, codigo: str, fabrica: Callable[[], RPABase], aliases: Iterable[str] = ()):
+        """Registra fábrica do RPA, respeitando as operadoras habilitadas no worker"""
+        codigo = codigo.upper()
+        if self._habilitadas is not None and codigo not in self._habilitadas:
+            return
+        self._fabricas[codigo] = fabrica
+        for alias in aliases:
+            self._aliases[alias.upper()] = codigo
+    
+    def codigo_canonico(self, codigo: str) -> Optional[str]:
+        """Resolve alias para o código registrado"""
+        codigo = codigo.upper()
+        codigo = self._aliases.get(codigo, codigo)
+        return codigo if codigo in self._fabricas else None
+    
+    def __contains__(self, codigo: str) -> bool:
+        return self.codigo_canonico(codigo) is not None
+    
+    def __getitem__(self, codigo: str) -> RPABase:
+        return self.obter(codigo)
+    
+    def obter(self, codigo: str) -> RPABase:
+        """Retorna a instância do RPA, criando-a no primeiro uso"""
+        canonico = self.codigo_canonico(codigo)
+        if canonico is None:
+            raise KeyError(codigo)
+        
+        instancia = self._instancias.get(canonico)
+        if instancia is None:
+            with self._lock:
+                instancia = self._instancias.get(canonico)
+                if instancia is None:
+                    instancia = self._fabricas[canonico]()
+                    self._instancias[canonico] = instancia
+                    self.logger.info(f"RPA {canonico} carregado")
+        return instancia
+    
+    def codigos(self) -> List[str]:
+        """Códigos e aliases registrados"""
+        return list(self._fabricas.keys()) + list(self._aliases.keys())
+    
+    def carregados(self) -> List[str]:
+        """Códigos cujos RPAs já foram instanciados"""
+        return list(self._instancias.keys())
+
+def _fabrica_rpa(modulo: str, classe: str) -> Callable[[], RPABase]:
+    """Fábrica que importa o módulo do RPA somente quando chamada"""
+    def _criar() -> RPABase:
+        return getattr(importlib.import_module(modulo, package=__package__), classe)()
+    return _criar
+
+def _operadoras_do_worker() -> Optional[List[str]]:
+    """Operadoras atendidas pelo worker (RPA_OPERADORAS_WORKER=EMB,DIG,SAT); None = todas"""
+    valor = os.getenv("RPA_OPERADORAS_WORKER", "").strip()
+    return [codigo for codigo in valor.split(",") if codigo.strip()] if valor else None
+
 class ConcentradorRPA:
     """
     Concentrador central de RPAs seguindo padrão do manual da BGTELECOM
     Responsável por direcionar operações baseadas no filtro/operadora
     """
     
-    def __init__(self):
+    def __init__(self, operadoras_habilitadas: Optional[Iterable[str]] = None):
         self.logger = logging.getLogger("ConcentradorRPA")
-        self.rpas_registrados: Dict[str, RPABase] = {}
+        self.rpas_registrados = RegistroRPAs(operadoras_habilitadas or _operadoras_do_worker())
         self._registrar_rpas_disponiveis()
     
     def _registrar_rpas_disponiveis(self) -> None:
         """
-        Registra todos os RPAs disponíveis no sistema
-        Preservando 100% do código legado conforme manual
+        Registra as fábricas dos RPAs disponíveis no sistema
+        Os módulos são importados apenas na primeira execução de cada operadora
         """
-        try:
-            # Import dos RPAs legados adaptados
-            from .embratel_rpa import EmbratelRPA
-            from .digitalnet_rpa import DigitalnetRPA
-            from .azuton_rpa import AzutonRPA
-            from .vivo_rpa import VivoRPA
-            from .oi_rpa import OiRPA
-            from .sat_rpa import SatRPA
-            
-            self.rpas_registrados = {
-                "EMB": EmbratelRPA(),
-                "EMBRATEL": EmbratelRPA(),
-                "DIG": DigitalnetRPA(),
-                "DIGITALNET": DigitalnetRPA(),
-                "AZU": AzutonRPA(),
-                "AZUTON": AzutonRPA(),
-                "VIV": VivoRPA(),
-                "VIVO": VivoRPA(),
-                "OI": OiRPA(),
-                "SAT": SatRPA(),
-            }
-            
-            self.logger.info(f"RPAs registrados: {list(self.rpas_registrados.keys())}")
-            
-        except ImportError as e:
-            self.logger.warning(f"Alguns RPAs não puderam ser importados: {e}")
+        aliases_por_codigo: Dict[str, List[str]] = {}
+        for alias, codigo in ALIASES_RPA.items():
+            aliases_por_codigo.setdefault(codigo, []).append(alias)
+        
+        for codigo, (modulo, classe) in RPAS_DISPONIVEIS.items():
+            self.rpas_registrados.registrar(
+                codigo,
+                _fabrica_rpa(modulo, classe),
+                aliases_por_codigo.get(codigo, [])
+            )
+        
+        self.logger.info(f"RPAs registrados: {self.rpas_registrados.codigos()}")
     
     def executar_operacao(self, operacao: TipoOperacao, parametros: ParametrosEntradaPadrao) -> ResultadoSaidaPadrao:
         """
@@ -171,6 +809,7 @@ class ConcentradorRPA:
             ResultadoSaidaPadrao: Resultado da execução
         """
         timestamp_inicio = datetime.now()
+        disjuntor = obter_disjuntor()
         
         try:
             # Determina qual RPA usar baseado na operação
@@ -185,14 +824,7 @@ class ConcentradorRPA:
                     timestamp_fim=datetime.now()
                 )
             
-            rpa = self.rpas_registrados[codigo_rpa]
-            
-            # Executa a operação baseada no tipo
-            if operacao == TipoOperacao.DOWNLOAD_FATURA:
-                resultado = rpa.executar_download(parametros)
-            elif operacao == TipoOperacao.UPLOAD_SAT:
-                resultado = rpa.executar_upload_sat(parametros)
-            else:
+            if operacao not in (TipoOperacao.DOWNLOAD_FATURA, TipoOperacao.UPLOAD_SAT):
                 return ResultadoSaidaPadrao(
                     sucesso=False,
                     status=StatusExecucao.ERRO,
@@ -201,6 +833,36 @@ class ConcentradorRPA:
                     timestamp_fim=datetime.now()
                 )
             
+            codigo_rpa = self.rpas_registrados.codigo_canonico(codigo_rpa)
+            rpa = self.rpas_registrados[codigo_rpa]
+            
+            # Portal fora do ar ou sem vagas: adia sem abrir navegador
+            vaga, resultado_adiado = self._reservar_execucao(codigo_rpa, timestamp_inicio)
+            if resultado_adiado:
+                return resultado_adiado
+            
+            # Executa a operação baseada no tipo
+            resultado = None
+            try:
+                if operacao == TipoOperacao.DOWNLOAD_FATURA:
+                    resultado = rpa.executar_download(parametros)
+                else:
+                    resultado = rpa.executar_upload_sat(parametros)
+            except ExecucaoCancelada as e:
+                resultado = self._resultado_cancelado(str(e), timestamp_inicio)
+            except Exception as e:
+                resultado = ResultadoSaidaPadrao(
+                    sucesso=False,
+                    status=StatusExecucao.ERRO,
+                    mensagem=f"Erro interno: {str(e)}",
+                    timestamp_inicio=timestamp_inicio,
+                    classe_falha=classificar_excecao(e).value
+                )
+            finally:
+                obter_limitador_concorrencia().liberar(vaga, self._resultado_observado(resultado))
+            if resultado.status != StatusExecucao.CANCELADO:
+                disjuntor.registrar_resultado(codigo_rpa, resultado)
+            
             # Garante timestamps
             resultado.timestamp_inicio = resultado.timestamp_inicio or timestamp_inicio
             resultado.timestamp_fim = resultado.timestamp_fim or datetime.now()
@@ -220,6 +882,201 @@ class ConcentradorRPA:
                 timestamp_fim=datetime.now()
             )
     
+    def executar_operacoes_concorrentes(
+        self,
+        operacao: TipoOperacao,
+        lista_parametros: List[ParametrosEntradaPadrao],
+        max_workers: Optional[int] = None
+    ) -> List[ResultadoSaidaPadrao]:
+        """
+        Executa várias operações em paralelo no mesmo processo
+        
+        Cada thread usa o próprio contexto de execução e um navegador do pool,
+        então a quantidade de threads deve acompanhar RPA_POOL_TAMANHO.
+        
+        Returns:
+            List[ResultadoSaidaPadrao]: Resultados na mesma ordem dos parâmetros
+        """
+        if not lista_parametros:
+            return []
+        
+        max_workers = max_workers or int(os.getenv("RPA_EXECUCOES_CONCORRENTES", "2"))
+        max_workers = max(1, min(max_workers, len(lista_parametros)))
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rpa") as executor:
+            return list(executor.map(
+                lambda parametros: self.executar_operacao(operacao, parametros),
+                lista_parametros
+            ))
+    
+    def executar_lote(
+        self,
+        operacao: TipoOperacao,
+        lista_parametros: List[ParametrosEntradaPadrao]
+    ) -> List[ResultadoSaidaPadrao]:
+        """
+        Executa download em lote para processos que compartilham a credencial do portal
+        
+        Args:
+            operacao: Deve ser TipoOperacao.DOWNLOAD_FATURA_LOTE
+            lista_parametros: Parâmetros de cada processo (mesma operadora, usuário e senha)
+            
+        Returns:
+            List[ResultadoSaidaPadrao]: Um resultado por processo, na mesma ordem
+        """
+        timestamp_inicio = datetime.now()
+        
+        def _erro_para_todos(mensagem: str) -> List[ResultadoSaidaPadrao]:
+            return [
+                ResultadoSaidaPadrao(
+                    sucesso=False,
+                    status=StatusExecucao.ERRO,
+                    mensagem=mensagem,
+                    timestamp_inicio=timestamp_inicio,
+                    timestamp_fim=datetime.now()
+                )
+                for _ in lista_parametros
+            ]
+        
+        if not lista_parametros:
+            return []
+        
+        if operacao != TipoOperacao.DOWNLOAD_FATURA_LOTE:
+            return _erro_para_todos(f"Operação não suportada em lote: {operacao.value}")
+        
+        credenciais = {
+            (p.operadora_codigo.upper(), p.usuario, p.senha) for p in lista_parametros
+        }
+        if len(credenciais) > 1:
+            return _erro_para_todos("Lote deve conter processos de uma única credencial de portal")
+        if len(lista_parametros) > 1 and not (lista_parametros[0].usuario or "").strip():
+            return _erro_para_todos("Lote exige credencial de portal (processos sem login seguem individualmente)")
+        
+        codigo_rpa = self.rpas_registrados.codigo_canonico(lista_parametros[0].operadora_codigo)
+        if codigo_rpa is None:
+            return _erro_para_todos(f"RPA não encontrado para código: {lista_parametros[0].operadora_codigo.upper()}")
+        
+        disjuntor = obter_disjuntor()
+        try:
+            rpa = self.rpas_registrados[codigo_rpa]
+        except Exception as e:
+            self.logger.error(f"Erro ao carregar RPA {codigo_rpa}: {e}")
+            return _erro_para_todos(f"Erro interno: {str(e)}")
+        
+        vaga, resultado_adiado = self._reservar_execucao(codigo_rpa, timestamp_inicio)
+        if resultado_adiado:
+            return [resultado_adiado for _ in lista_parametros]
+        
+        try:
+            resultados = rpa.executar_download_lote(lista_parametros)
+        except ExecucaoCancelada as e:
+            # RPA sem resultados parciais (executar_download_lote completa o lote cancelado)
+            obter_limitador_concorrencia().liberar(vaga)
+            return [self._resultado_cancelado(str(e), timestamp_inicio) for _ in lista_parametros]
+        except Exception as e:
+            self.logger.error(f"Erro na execução RPA em lote: {e}")
+            resultados = _erro_para_todos(f"Erro interno: {str(e)}")
+            for resultado in resultados:
+                resultado.classe_falha = classificar_excecao(e).value
+            obter_limitador_concorrencia().liberar(vaga, resultados[0])
+            disjuntor.registrar_resultado(codigo_rpa, resultados[0])
+            return resultados
+        
+        if len(resultados) != len(lista_parametros):
+            self.logger.error("RPA retornou quantidade de resultados diferente do lote")
+            resultados = _erro_para_todos("Resultado do lote inconsistente")
+            obter_limitador_concorrencia().liberar(vaga, resultados[0])
+            disjuntor.registrar_resultado(codigo_rpa, resultados[0])
+            return resultados
+        
+        # O lote é uma única sessão no portal: conta como uma execução
+        # para o disjuntor e ocupa uma única vaga no limitador
+        observados = [resultado for resultado in resultados if self._resultado_observado(resultado)]
+        representativo = next(
+            (resultado for resultado in observados if resultado.sucesso),
+            observados[0] if observados else None
+        )
+        obter_limitador_concorrencia().liberar(vaga, representativo, execucoes=len(observados))
+        if representativo is not None:
+            disjuntor.registrar_resultado(codigo_rpa, representativo)
+        
+        for parametros, resultado in zip(lista_parametros, resultados):
+            resultado.timestamp_inicio = resultado.timestamp_inicio or timestamp_inicio
+            resultado.timestamp_fim = resultado.timestamp_fim or datetime.now()
+            rpa._log_operacao(operacao.value, parametros, resultado)
+        
+        return resultados
+    
+    def _resultado_cancelado(self, mensagem: str, timestamp_inicio: datetime) -> ResultadoSaidaPadrao:
+        """Resultado de execução interrompida por cancelamento (não conta para disjuntor/limitador)"""
+        self.logger.info(mensagem)
+        return ResultadoSaidaPadrao(
+            sucesso=False,
+            status=StatusExecucao.CANCELADO,
+            mensagem=mensagem,
+            timestamp_inicio=timestamp_inicio,
+            timestamp_fim=datetime.now()
+        )
+    
+    @staticmethod
+    def _resultado_observado(resultado: Optional[ResultadoSaidaPadrao]) -> Optional[ResultadoSaidaPadrao]:
+        """Resultado usado para ajustar o limite do portal (cancelamentos não dizem nada sobre ele)"""
+        if resultado is None or resultado.status == StatusExecucao.CANCELADO:
+            return None
+        return resultado
+    
+    def _resultado_adiado(
+        self,
+        codigo_rpa: str,
+        timestamp_inicio: datetime,
+        mensagem: Optional[str] = None,
+        segundos: Optional[float] = None,
+        adiado_por: str = ADIADO_DISJUNTOR
+    ) -> ResultadoSaidaPadrao:
+        """Resultado para execuções adiadas (disjuntor aberto ou portal sem vagas)"""
+        if segundos is None:
+            segundos = obter_disjuntor().segundos_para_sondagem(codigo_rpa)
+        mensagem = mensagem or f"Portal {codigo_rpa} indisponível: execução adiada"
+        self.logger.warning(mensagem)
+        return ResultadoSaidaPadrao(
+            sucesso=False,
+            status=StatusExecucao.ADIADO,
+            mensagem=mensagem,
+            timestamp_inicio=timestamp_inicio,
+            timestamp_fim=datetime.now(),
+            dados_especificos={"adiar_por_segundos": segundos},
+            adiado_por=adiado_por
+        )
+    
+    def _reservar_execucao(self, codigo_rpa: str, timestamp_inicio: datetime):
+        """
+        Reserva vaga no limitador do portal e passa pelo disjuntor
+        
+        Returns:
+            Tupla (vaga, resultado_adiado): vaga para liberar ao final ou
+            resultado ADIADO quando a execução não deve abrir o navegador
+        """
+        disjuntor = obter_disjuntor()
+        if disjuntor.estado(codigo_rpa) == EstadoDisjuntor.ABERTO:
+            return None, self._resultado_adiado(codigo_rpa, timestamp_inicio)
+        
+        limitador = obter_limitador_concorrencia()
+        vaga = limitador.adquirir(codigo_rpa)
+        if vaga is None:
+            return None, self._resultado_adiado(
+                codigo_rpa,
+                timestamp_inicio,
+                mensagem=f"Limite de execuções simultâneas do portal {codigo_rpa} atingido: execução adiada",
+                segundos=float(os.getenv("RPA_LIMITE_ADIAMENTO_SEGUNDOS", "60")),
+                adiado_por=ADIADO_LIMITADOR
+            )
+        
+        # Com a vaga garantida, consome a sondagem do disjuntor semi-aberto
+        if not disjuntor.permitir(codigo_rpa):
+            limitador.liberar(vaga)
+            return None, self._resultado_adiado(codigo_rpa, timestamp_inicio)
+        return vaga, None
+    
     def listar_rpas_disponiveis(self) -> List[str]:
         """
         Lista todos os RPAs registrados no concentrador
@@ -227,7 +1084,7 @@ class ConcentradorRPA:
         Returns:
             List[str]: Lista de códigos de RPAs disponíveis
         """
-        return list(self.rpas_registrados.keys())
+        return self.rpas_registrados.codigos()
     
     def verificar_rpa_disponivel(self, codigo_operadora: str) -> bool:
         """
@@ -7,7 +7,6 @@ Data: 29/05/2025
 
 import os
 from datetime import datetime
-from time import sleep
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
@@ -16,10 +15,12 @@ from .rpa_base import (
     RPABase, 
     ParametrosEntradaPadrao, 
     ResultadoSaidaPadrao, 
-    StatusExecucao
+    StatusExecucao,
+    etapa_rpa
 )
 from ..utils.selenium_driver import SeleniumDriver
 from ..utils.file_manager import FileManager
+from ..utils import esperas
 
 class SatRPA(RPABase):
     """
@@ -29,16 +30,20 @@ class SatRPA(RPABase):
     
     def __init__(self):
         super().__init__()
-        self.driver_manager = SeleniumDriver()
         self.file_manager = FileManager()
-        self.driver = None
-        self.wait = None
         
         # Configurações SAT (serão obtidas de variáveis de ambiente)
         self.url_sat = os.getenv("URLSAT", "")
         self.login_sat = os.getenv("LOGINSAT", "")
         self.senha_sat = os.getenv("SENHASAT", "")
     
+    def _criar_driver_manager(self):
+        return SeleniumDriver(perfil=self._perfil_navegador())
+
+    def operadora_metricas(self, parametros: ParametrosEntradaPadrao) -> str:
+        # operadora_codigo é a operadora da fatura; o portal medido é sempre o SAT
+        return "SAT"
+
     def executar_download(self, parametros: ParametrosEntradaPadrao) -> ResultadoSaidaPadrao:
         """
         SAT não executa download, apenas upload
@@ -55,14 +60,20 @@ class SatRPA(RPABase):
         """
         Executa upload de fatura para o SAT preservando lógica legada
         """
+        with self.contexto_execucao(parametros) as contexto:
+            return contexto.anexar_metricas(self._executar_upload_sat(parametros))
+    
+    def _executar_upload_sat(self, parametros: ParametrosEntradaPadrao) -> ResultadoSaidaPadrao:
+        """Fluxo de upload dentro do contexto da execução"""
         timestamp_inicio = datetime.now()
         
         try:
             self.logger.info(f"Iniciando upload SAT para cliente {parametros.id_cliente}")
             
             # Inicializa driver
-            self.driver = self.driver_manager.obter_driver()
-            self.wait = self.driver_manager.obter_wait(self.driver)
+            with self.medir_etapa("navegador"):
+                self.driver = self.driver_manager.obter_driver()
+                self.wait = self.driver_manager.obter_wait(self.driver)
             
             # Execução da lógica legada preservada
             success = self._executar_processo_sat(parametros)
@@ -95,9 +106,6 @@ class SatRPA(RPABase):
                 timestamp_inicio=timestamp_inicio,
                 timestamp_fim=datetime.now()
             )
-        finally:
-            if self.driver:
-                self.driver.quit()
     
     # ========== MÉTODOS LEGADOS PRESERVADOS 100% ==========
     
@@ -106,36 +114,38 @@ class SatRPA(RPABase):
         try:
             locators = self._obter_localizadores_sat()
             
-            self.logger.info("Executando o processo de login SAT")
-            self.logger.info(f"Acessando a URL: {self.url_sat}")
-            self.driver.get(self.url_sat)
+            with self.medir_etapa("login"):
+                self.logger.info("Executando o processo de login SAT")
+                self.logger.info(f"Acessando a URL: {self.url_sat}")
+                self.driver.get(self.url_sat)
 
-            self.logger.info("Preenchendo o campo de login")
-            self._enviar_texto(locators.login_page.login, self.login_sat)
+                self.logger.info("Preenchendo o campo de login")
+                self._enviar_texto(locators.login_page.login, self.login_sat)
 
-            self.logger.info("Preenchendo o campo de senha")
-            self._enviar_texto(locators.login_page.senha, self.senha_sat)
+                self.logger.info("Preenchendo o campo de senha")
+                self._enviar_texto(locators.login_page.senha, self.senha_sat)
 
-            self.logger.info("Clicando no botão de entrar")
-            self._clicar(locators.login_page.entrar)
+                self.logger.info("Clicando no botão de entrar")
+                self._clicar(locators.login_page.entrar)
 
-            self.logger.info("Acessando o menu de clientes")
-            self._clicar(locators.menu_link.menu_clientes)
+            with self.medir_etapa("busca_cliente"):
+                self.logger.info("Acessando o menu de clientes")
+                self._clicar(locators.menu_link.menu_clientes)
 
-            self.logger.info(f"Pesquisando cliente com filtro: {parametros.nome_sat}")
-            self._enviar_texto(locators.cliente_page.pesquisa_cliente, parametros.nome_sat)
+                self.logger.info(f"Pesquisando cliente com filtro: {parametros.nome_sat}")
+                self._enviar_texto(locators.cliente_page.pesquisa_cliente, parametros.nome_sat)
             
-            # Pressionar Enter para pesquisar
-            elemento_pesquisa = self.driver.find_element(By.XPATH, locators.cliente_page.pesquisa_cliente)
-            elemento_pesquisa.send_keys(Keys.ENTER)
+                # Pressionar Enter para pesquisar
+                elemento_pesquisa = self.driver.find_element(By.XPATH, locators.cliente_page.pesquisa_cliente)
+                elemento_pesquisa.send_keys(Keys.ENTER)
 
-            # Verificar se a grid filtrou apenas 1 cliente
-            if self._verificar_grid_sem_registros(locators):
-                self.logger.error("GRID SEM REGISTROS. Nenhum cliente encontrado")
-                return False
+                # Verificar se a grid filtrou apenas 1 cliente
+                if self._verificar_grid_sem_registros(locators):
+                    self.logger.error("GRID SEM REGISTROS. Nenhum cliente encontrado")
+                    return False
 
-            self.logger.info("Cliente encontrado. Clicando no botão de fatura")
-            self._clicar(locators.cliente_page.botao_fatura)
+                self.logger.info("Cliente encontrado. Clicando no botão de fatura")
+                self._clicar(locators.cliente_page.botao_fatura)
 
             self.logger.info("Aguardando o botão 'Adicionar Fatura' ficar clicável")
             if self._aguardar_elemento_clicavel(locators.fatura_page.botao_adicionar):
@@ -163,7 +173,8 @@ class SatRPA(RPABase):
     def _verificar_grid_sem_registros(self, locators) -> bool:
         """Verifica se a grid retornou sem registros"""
         try:
-            sleep(5)
+            # Aguarda a pesquisa da grid terminar (antes sleep(5) fixo)
+            esperas.aguardar_rede_ociosa(self.driver, timeout=10)
             elemento_sem_registros = self.driver.find_element(
                 By.XPATH, locators.cliente_page.grid_sem_registros
             )
@@ -171,6 +182,7 @@ class SatRPA(RPABase):
         except:
             return False
 
+    @etapa_rpa("formulario")
     def _preencher_formulario_fatura(self, locators, parametros: ParametrosEntradaPadrao, file_path: str) -> bool:
         """Preenche o formulário de fatura no SAT"""
         try:
@@ -204,7 +216,7 @@ class SatRPA(RPABase):
 
             self.logger.info("Clicando no botão 'Cadastrar'")
             self._clicar(locators.fatura_page.botao_cadastrar)
-            sleep(3)
+            esperas.aguardar_rede_ociosa(self.driver, timeout=10)
             
             return True
 
@@ -0,0 +1,171 @@
+"""
+Timeouts adaptativos por operadora e etapa
+Mantém janelas das latências das execuções bem-sucedidas e deriva delas os
+timeouts das esperas de cada etapa e os limites de tempo das tasks Celery
+(percentil × fator, entre piso e teto)
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .metricas_etapas import ETAPA_NAO_MEDIDA, _percentil
+from ..utils.redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "rpa:latencias:"
+
+# Duração total da execução (base dos limites das tasks)
+ETAPA_TOTAL = "total"
+
+# Timeout padrão das esperas do SeleniumDriver, referência para a escala das demais esperas
+TIMEOUT_ESPERA_PADRAO = 30.0
+
+
+def _env_float(nome: str, padrao: float) -> float:
+    try:
+        return float(os.getenv(nome, str(padrao)))
+    except ValueError:
+        return padrao
+
+
+@dataclass(frozen=True)
+class ConfiguracaoTimeouts:
+    """Parâmetros do cálculo (variáveis RPA_TIMEOUT_*)"""
+    fator: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_FATOR", 3.0))
+    percentil: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_PERCENTIL", 0.99))
+    min_amostras: int = field(default_factory=lambda: int(_env_float("RPA_TIMEOUT_MIN_AMOSTRAS", 20)))
+    janela: int = field(default_factory=lambda: int(_env_float("RPA_TIMEOUT_JANELA", 500)))
+    espera_minima: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_ESPERA_MINIMA_SEGUNDOS", 5))
+    espera_maxima: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_ESPERA_MAXIMA_SEGUNDOS", 180))
+    task_minima: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_TASK_MINIMA_SEGUNDOS", 300))
+    # Teto + folga não deve passar da duração da vaga do limitador (RPA_LIMITE_RESERVA_SEGUNDOS)
+    task_maxima: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_TASK_MAXIMA_SEGUNDOS", 2400))
+    folga_hard: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_TASK_FOLGA_HARD_SEGUNDOS", 300))
+    cache_segundos: float = field(default_factory=lambda: _env_float("RPA_TIMEOUT_CACHE_SEGUNDOS", 60))
+
+
+class TimeoutsAdaptativos:
+    """
+    Janelas de latência por (operadora, etapa) compartilhadas no Redis
+
+    Apenas execuções bem-sucedidas alimentam as janelas: falhas por timeout
+    inflariam os percentis justamente dos portais quebrados. Enquanto uma
+    etapa não tem `min_amostras`, os timeouts fixos do código são mantidos.
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoTimeouts] = None):
+        self.configuracao = configuracao or ConfiguracaoTimeouts()
+        self._local: Dict[str, Deque[float]] = {}
+        self._cache: Dict[str, Tuple[float, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(operadora: str, etapa: str) -> str:
+        return f"{PREFIXO_CHAVE}{operadora.upper()}:{etapa}"
+
+    # ---- Amostras ----
+
+    def registrar(self, operadora: str, etapa: str, segundos: float):
+        """Inclui uma latência na janela da etapa"""
+        chave = self._chave(operadora, etapa)
+        with self._lock:
+            janela = self._local.setdefault(chave, deque(maxlen=self.configuracao.janela))
+            janela.append(segundos)
+            self._cache.pop(chave, None)
+
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return
+        try:
+            pipeline = cliente.pipeline()
+            pipeline.lpush(chave, round(segundos, 3))
+            pipeline.ltrim(chave, 0, self.configuracao.janela - 1)
+            pipeline.expire(chave, 30 * 24 * 3600)
+            pipeline.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao registrar latência no Redis: {e}")
+
+    def registrar_metricas(self, operadora: str, metricas_etapas: Dict[str, Any]):
+        """Registra as etapas e a duração total de uma execução bem-sucedida (ver metricas_etapas)"""
+        for etapa, dados in (metricas_etapas.get("etapas") or {}).items():
+            if etapa != ETAPA_NAO_MEDIDA:
+                self.registrar(operadora, etapa, dados.get("segundos", 0.0))
+        if metricas_etapas.get("total_segundos"):
+            self.registrar(operadora, ETAPA_TOTAL, metricas_etapas["total_segundos"])
+
+    def _amostras(self, chave: str) -> List[float]:
+        cliente = obter_cliente_redis()
+        if cliente is not None:
+            try:
+                return [float(valor) for valor in cliente.lrange(chave, 0, -1)]
+            except Exception as e:
+                logger.warning(f"Erro ao ler latências do Redis, usando janela local: {e}")
+        with self._lock:
+            return list(self._local.get(chave, ()))
+
+    def percentil(self, operadora: str, etapa: str) -> Optional[float]:
+        """Percentil configurado da etapa (None sem amostras suficientes)"""
+        chave = self._chave(operadora, etapa)
+        agora = time.monotonic()
+        with self._lock:
+            em_cache = self._cache.get(chave)
+        if em_cache and agora - em_cache[0] < self.configuracao.cache_segundos:
+            return em_cache[1]
+
+        amostras = self._amostras(chave)
+        valor = None
+        if len(amostras) >= self.configuracao.min_amostras:
+            valor = _percentil(amostras, self.configuracao.percentil)
+        with self._lock:
+            self._cache[chave] = (agora, valor)
+        return valor
+
+    # ---- Timeouts derivados ----
+
+    def timeout_espera(self, operadora: str, etapa: str) -> Optional[float]:
+        """Timeout das esperas da etapa (None mantém os timeouts fixos)"""
+        percentil = self.percentil(operadora, etapa)
+        if percentil is None:
+            return None
+        configuracao = self.configuracao
+        return min(max(percentil * configuracao.fator, configuracao.espera_minima), configuracao.espera_maxima)
+
+    def limites_task(self, operadora: str, quantidade: int = 1) -> Optional[Tuple[int, int]]:
+        """
+        Limites (soft, hard) em segundos da task com `quantidade` execuções
+
+        Returns:
+            None sem histórico suficiente (valem os limites globais do Celery)
+        """
+        percentil = self.percentil(operadora, ETAPA_TOTAL)
+        if percentil is None:
+            return None
+        configuracao = self.configuracao
+        soft = min(max(percentil * configuracao.fator * max(1, quantidade), configuracao.task_minima), configuracao.task_maxima)
+        return int(soft), int(soft + configuracao.folga_hard)
+
+    def processos_por_task(self, operadora: str) -> Optional[int]:
+        """Execuções que cabem no teto de tempo de uma task de lote (None sem histórico)"""
+        percentil = self.percentil(operadora, ETAPA_TOTAL)
+        if percentil is None:
+            return None
+        configuracao = self.configuracao
+        return max(1, int(configuracao.task_maxima // max(percentil * configuracao.fator, 1.0)))
+
+
+# Instância do processo
+_timeouts: Optional[TimeoutsAdaptativos] = None
+
+
+def obter_timeouts_adaptativos() -> TimeoutsAdaptativos:
+    """Retorna os timeouts adaptativos do processo"""
+    global _timeouts
+    if _timeouts is None:
+        _timeouts = TimeoutsAdaptativos()
+    return _timeouts
@@ -3,6 +3,7 @@ RPA da Vivo - Implementação específica
 Baseado no arquivo vivo.py existente
 """
 
+import os
 import time
 from typing import Dict, List, Any
 from selenium.webdriver.common.by import By
@@ -10,16 +11,29 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from .rpa_base import RPABase
+from ..utils import esperas
+from ..utils.extracao_dom import CampoExtracao, EspecificacaoExtracao, extrair_do_driver, xpath_classe
 from models.cliente import Cliente
 
+# Listagem de faturas: itens sem algum dos campos são ignorados
+ESPEC_FATURAS_VIVO = EspecificacaoExtracao(
+    linhas=f"//*[{xpath_classe('fatura-item')}]",
+    campos=(
+        CampoExtracao("numero", f".//*[{xpath_classe('numero-fatura')}]", obrigatorio=True),
+        CampoExtracao("valor", f".//*[{xpath_classe('valor-fatura')}]", obrigatorio=True),
+        CampoExtracao("vencimento", f".//*[{xpath_classe('data-vencimento')}]", obrigatorio=True),
+        CampoExtracao("url_download", f".//*[{xpath_classe('link-download')}]", "href", obrigatorio=True),
+    )
+)
+
 
 class VivoRPA(RPABase):
     """RPA específico para a operadora Vivo"""
     
     def __init__(self):
         super().__init__("VIVO")
-        self.portal_url = "https://empresas.vivo.com.br"
-        self.login_url = "https://empresas.vivo.com.br/login"
+        self.portal_url = os.getenv("VIVO_PORTAL_URL", "https://empresas.vivo.com.br")
+        self.login_url = f"{self.portal_url}/login"
     
     def fazer_login(self, login: str, senha: str) -> bool:
         """Faz login no portal da Vivo"""
@@ -28,7 +42,6 @@ class VivoRPA(RPABase):
             
             # Navegar para página de login
             self.driver.get(self.login_url)
-            self.aguardar(3)
             
             # Preencher campos de login
             campo_login = WebDriverWait(self.driver, 10).until(
@@ -42,11 +55,12 @@ class VivoRPA(RPABase):
             campo_senha.send_keys(senha)
             
             # Clicar no botão de login
+            url_login = self.driver.current_url
             botao_login = self.driver.find_element(By.XPATH, "//button[@type='submit']")
             botao_login.click()
             
             # Aguardar redirecionamento
-            self.aguardar(5)
+            esperas.aguardar_mudanca_url(self.driver, url_login, timeout=15)
             
             # Verificar se login foi bem-sucedido
             if "dashboard" in self.driver.current_url.lower() or "home" in self.driver.current_url.lower():
@@ -69,7 +83,7 @@ class VivoRPA(RPABase):
             
             # Navegar para seção de faturas
             self.driver.get(f"{self.portal_url}/faturas")
-            self.aguardar(3)
+            esperas.aguardar_rede_ociosa(self.driver, timeout=10)
             
             # Aplicar filtro por período se necessário
             if cliente.filtro:
@@ -85,24 +99,19 @@ class VivoRPA(RPABase):
             # Clicar em buscar
             botao_buscar = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Buscar')]")
             botao_buscar.click()
-            self.aguardar(3)
+            esperas.aguardar_rede_ociosa(self.driver, timeout=10)
             
-            # Buscar faturas na página
-            elementos_faturas = self.driver.find_elements(By.CLASS_NAME, "fatura-item")
+            # Todas as faturas da página em um único execute_script
+            itens_faturas = extrair_do_driver(self.driver, ESPEC_FATURAS_VIVO)
             
-            for elemento in elementos_faturas:
+            for item in itens_faturas:
                 try:
-                    # Extrair dados da fatura
-                    numero = elemento.find_element(By.CLASS_NAME, "numero-fatura").text
-                    valor = elemento.find_element(By.CLASS_NAME, "valor-fatura").text
-                    vencimento = elemento.find_element(By.CLASS_NAME, "data-vencimento").text
-                    link_download = elemento.find_element(By.CLASS_NAME, "link-download").get_attribute("href")
-                    
+                    numero = item["numero"]
                     fatura = {
                         "numero": numero,
-                        "valor": self._extrair_valor(valor),
-                        "vencimento": self._extrair_data(vencimento),
-                        "url_download": link_download,
+                        "valor": self._extrair_valor(item["valor"]),
+                        "vencimento": self._extrair_data(item["vencimento"]),
+                        "url_download": item["url_download"],
                         "mes_ano": mes_ano,
                         "operadora": "VIVO"
                     }
@@ -126,31 +135,24 @@ class VivoRPA(RPABase):
         try:
             self.logger.info(f"Baixando fatura {dados_fatura['numero']}")
             
+            # Diretório exclusivo da execução (downloads simultâneos não se confundem)
+            parametros = self.contexto.parametros if self.contexto else None
+            self.diretorio_execucao = self.file_manager.preparar_diretorio_execucao(
+                parametros.id_processo if parametros else f"{cliente.hash_unico}_{dados_fatura['numero']}"
+            )
+            if self.driver_manager is not None:
+                self.driver_manager.definir_diretorio_download(self.diretorio_execucao)
+            
             # Navegar para URL de download
             self.driver.get(dados_fatura["url_download"])
-            self.aguardar(2)
-            
-            # Aguardar download completar
-            download_dir = self.file_manager.get_download_dir()
-            arquivo_baixado = None
-            
-            # Aguardar arquivo aparecer na pasta de download
-            for tentativa in range(30):  # 30 segundos de timeout
-                arquivos = self.file_manager.listar_arquivos_download()
-                for arquivo in arquivos:
-                    if arquivo.endswith('.pdf') and dados_fatura['numero'] in arquivo:
-                        arquivo_baixado = arquivo
-                        break
-                
-                if arquivo_baixado:
-                    break
-                    
-                self.aguardar(1)
+            
+            # Aguardar download completar (retorna assim que o arquivo parcial some)
+            arquivo_baixado = self.file_manager.aguardar_download(self.diretorio_execucao, timeout=30)
             
             if arquivo_baixado:
                 # Renomear arquivo com padrão consistente
                 nome_final = f"{cliente.hash_unico}_{dados_fatura['mes_ano']}_VIVO.pdf"
-                caminho_final = self.file_manager.renomear_arquivo(arquivo_baixado, nome_final)
+                caminho_final = self.file_manager.renomear_arquivo(arquivo_baixado, nome_final, self.diretorio_execucao)
                 
                 self.logger.info(f"Fatura baixada: {caminho_final}")
                 return caminho_final
@@ -149,6 +149,7 @@ class AgendamentoService:
                     # Preparar dados de acesso
                     dados_acesso = {
                         "url_portal": operadora.url_portal or "",
+                        "configuracao_navegador": operadora.configuracao_navegador or "",
                         "usuario": cliente.login_portal or "",
                         "senha": cliente.senha_portal or "",
                         "cpf": cliente.cpf,
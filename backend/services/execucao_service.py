@@ -5,6 +5,7 @@ Desenvolvido por: Tiago Pereira Ramos
 """
 
 import uuid
+import json
 import logging
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -16,6 +17,7 @@ from ..models.processo import (
     Execucao, Processo, Cliente, Operadora,
     StatusExecucao, TipoExecucao
 )
+from ..rpa.metricas_etapas import agregar_metricas_por_operadora
 
 logger = logging.getLogger(__name__)
 
@@ -332,6 +334,49 @@ class ExecucaoService:
             logger.error(f"Erro ao obter estatísticas de execuções: {str(e)}")
             raise
 
+    @staticmethod
+    def obter_metricas_etapas_por_operadora(
+        data_inicio: datetime = None,
+        data_fim: datetime = None,
+        operadora_codigo: str = None
+    ) -> Dict[str, Any]:
+        """Tempo gasto por etapa (login, navegação, download, merge, upload) agregado por operadora"""
+        try:
+            with get_db_session() as db:
+                query = db.query(Execucao.operadora_codigo, Execucao.metricas_etapas).filter(
+                    Execucao.metricas_etapas.isnot(None)
+                )
+                
+                if data_inicio:
+                    query = query.filter(Execucao.data_inicio >= data_inicio)
+                
+                if data_fim:
+                    query = query.filter(Execucao.data_inicio <= data_fim)
+                
+                if operadora_codigo:
+                    query = query.filter(Execucao.operadora_codigo == operadora_codigo.upper())
+                
+                registros = []
+                for codigo, metricas in query.all():
+                    try:
+                        registros.append((codigo, json.loads(metricas)))
+                    except (TypeError, ValueError):
+                        logger.warning(f"Métricas de etapas inválidas para operadora {codigo}")
+                
+                return {
+                    "sucesso": True,
+                    "operadoras": agregar_metricas_por_operadora(registros),
+                    "periodo": {
+                        "data_inicio": data_inicio.isoformat() if data_inicio else None,
+                        "data_fim": data_fim.isoformat() if data_fim else None
+                    },
+                    "timestamp": datetime.now().isoformat()
+                }
+                
+        except Exception as e:
+            logger.error(f"Erro ao obter métricas de etapas: {str(e)}")
+            raise
+
     @staticmethod
     def cancelar_execucao(execucao_id: str, motivo: str = None) -> Dict[str, Any]:
         """Cancela uma execução em andamento"""
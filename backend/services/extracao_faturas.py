@@ -0,0 +1,379 @@
+"""
+Extração de dados das faturas PDF (valor, vencimento, linha digitável)
+Lê a camada de texto dos PDFs baixados com templates de regex por operadora,
+fora do caminho crítico do navegador, em pool de processos e com cache por
+hash do conteúdo
+
+Uso (backlog de um mês):
+    python -m backend.services.extracao_faturas --mes 2025-05
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.artefatos import chave_processo, digest_arquivo
+from ..utils.cliente_storage import obter_cliente_storage
+from ..utils.redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CACHE = "rpa:extracao:"
+
+# Entradas do cache em memória (fallback sem Redis) antes de descartá-lo
+MAX_CACHE_LOCAL = 10000
+
+# Incrementar ao alterar os templates invalida o cache de extrações anteriores
+VERSAO_TEMPLATES = 1
+
+_VALOR = r"R?\$?\s*(\d{1,3}(?:\.\d{3})*,\d{2})"
+_DATA = r"(\d{2}[/.-]\d{2}[/.-]\d{4})"
+_LINHA_BOLETO = r"(\d{5}\.?\d{5}\s*\d{5}\.?\d{6}\s*\d{5}\.?\d{6}\s*\d\s*\d{14})"
+_LINHA_ARRECADACAO = r"(\d{11}-?\d\s*\d{11}-?\d\s*\d{11}-?\d\s*\d{11}-?\d)"
+
+
+@dataclass(frozen=True)
+class TemplateExtracao:
+    """Expressões tentadas em ordem; o primeiro grupo de cada uma é o valor"""
+    valor: Tuple[str, ...] = ()
+    vencimento: Tuple[str, ...] = ()
+    linha_digitavel: Tuple[str, ...] = ()
+
+
+TEMPLATE_PADRAO = TemplateExtracao(
+    valor=(
+        rf"(?:total\s+a\s+pagar|valor\s+a\s+pagar|valor\s+total|valor\s+do\s+documento)\s*:?\s*{_VALOR}",
+    ),
+    vencimento=(rf"venc(?:imento|\.)\s*(?:em)?\s*:?\s*{_DATA}",),
+    linha_digitavel=(_LINHA_BOLETO, _LINHA_ARRECADACAO),
+)
+
+# Rótulos específicos de cada layout, tentados antes do template padrão
+TEMPLATES_OPERADORAS: Dict[str, TemplateExtracao] = {
+    "EMB": TemplateExtracao(
+        valor=(rf"total\s+desta\s+fatura\s*:?\s*{_VALOR}",),
+        vencimento=(rf"data\s+de\s+vencimento\s*:?\s*{_DATA}",),
+    ),
+    "DIG": TemplateExtracao(
+        valor=(rf"valor\s+da\s+fatura\s*:?\s*{_VALOR}",),
+    ),
+    "VIV": TemplateExtracao(
+        valor=(rf"total\s+a\s+pagar\s+da\s+conta\s*:?\s*{_VALOR}",),
+    ),
+    "OI": TemplateExtracao(
+        valor=(rf"valor\s+cobrado\s*:?\s*{_VALOR}",),
+    ),
+}
+
+
+def _template(operadora: str) -> Tuple[TemplateExtracao, ...]:
+    especifico = TEMPLATES_OPERADORAS.get((operadora or "").upper())
+    return (especifico, TEMPLATE_PADRAO) if especifico else (TEMPLATE_PADRAO,)
+
+
+def _buscar(texto: str, padroes: Iterable[str]) -> Optional[str]:
+    for padrao in padroes:
+        encontrado = re.search(padrao, texto, re.IGNORECASE)
+        if encontrado:
+            return encontrado.group(1)
+    return None
+
+
+def aplicar_template(texto: str, operadora: str) -> Dict[str, Any]:
+    """
+    Extrai os campos do texto da fatura
+
+    Returns:
+        {"valor": float | None, "vencimento": "dd/mm/aaaa" | None,
+         "linha_digitavel": só dígitos | None}
+    """
+    templates = _template(operadora)
+    valor = _buscar(texto, (p for template in templates for p in template.valor))
+    vencimento = _buscar(texto, (p for template in templates for p in template.vencimento))
+    linha = _buscar(texto, (p for template in templates for p in template.linha_digitavel))
+    return {
+        "valor": float(valor.replace(".", "").replace(",", ".")) if valor else None,
+        "vencimento": re.sub(r"[.-]", "/", vencimento) if vencimento else None,
+        "linha_digitavel": re.sub(r"\D", "", linha) if linha else None,
+    }
+
+
+def extrair_texto_pdf(caminho: str) -> Tuple[str, int]:
+    """Texto de todas as páginas e quantidade de páginas"""
+    from PyPDF2 import PdfReader
+
+    leitor = PdfReader(caminho)
+    if leitor.is_encrypted:
+        leitor.decrypt("")
+    return "\n".join(pagina.extract_text() or "" for pagina in leitor.pages), len(leitor.pages)
+
+
+def extrair_arquivo(caminho: str, operadora: str) -> Dict[str, Any]:
+    """Extração de um PDF (executada nos processos do pool)"""
+    texto, paginas = extrair_texto_pdf(caminho)
+    dados = aplicar_template(texto, operadora)
+    dados["paginas"] = paginas
+    return dados
+
+
+@dataclass
+class EstatisticasExtracao:
+    """Vazão de um lote de extrações"""
+    arquivos: int = 0
+    extraidos: int = 0
+    cache: int = 0
+    falhas: int = 0
+    processos: int = 0
+    segundos: float = 0.0
+    campos_encontrados: Dict[str, int] = field(default_factory=lambda: {"valor": 0, "vencimento": 0, "linha_digitavel": 0})
+
+    @property
+    def arquivos_por_segundo(self) -> float:
+        return self.arquivos / self.segundos if self.segundos else 0.0
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {
+            "arquivos": self.arquivos,
+            "extraidos": self.extraidos,
+            "cache": self.cache,
+            "falhas": self.falhas,
+            "processos": self.processos,
+            "segundos": round(self.segundos, 3),
+            "arquivos_por_segundo": round(self.arquivos_por_segundo, 2),
+            "campos_encontrados": dict(self.campos_encontrados),
+        }
+
+
+class ExtratorFaturas:
+    """
+    Extração em pool de processos com cache por hash do PDF
+
+    O cache fica no Redis (compartilhado entre workers) com fallback em
+    memória; reenvios da mesma fatura não são processados de novo.
+    """
+
+    def __init__(self, max_processos: Optional[int] = None, ttl_cache_segundos: Optional[int] = None):
+        self.max_processos = max_processos or int(os.getenv("RPA_EXTRACAO_PROCESSOS", str(os.cpu_count() or 1)))
+        self.ttl_cache_segundos = ttl_cache_segundos or int(os.getenv("RPA_EXTRACAO_CACHE_TTL_SEGUNDOS", str(90 * 24 * 3600)))
+        self._cache_local: Dict[str, Dict[str, Any]] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # ---- Cache ----
+
+    @staticmethod
+    def _chave(hash_pdf: str, operadora: str) -> str:
+        return f"{PREFIXO_CACHE}v{VERSAO_TEMPLATES}:{(operadora or '').upper()}:{hash_pdf}"
+
+    def _obter_cache(self, chave: str) -> Optional[Dict[str, Any]]:
+        cliente = obter_cliente_redis()
+        if cliente is not None:
+            try:
+                valor = cliente.get(chave)
+                if valor:
+                    return json.loads(valor)
+            except Exception as e:
+                logger.warning(f"Erro ao ler cache de extração: {e}")
+        return self._cache_local.get(chave)
+
+    def _salvar_cache(self, chave: str, dados: Dict[str, Any]):
+        if len(self._cache_local) >= MAX_CACHE_LOCAL:
+            self._cache_local.clear()
+        self._cache_local[chave] = dados
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return
+        try:
+            cliente.set(chave, json.dumps(dados), ex=self.ttl_cache_segundos)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache de extração: {e}")
+
+    # ---- Extração ----
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_processos)
+            return self._executor
+
+    def extrair(self, caminho: str, operadora: str) -> Dict[str, Any]:
+        """Extração de uma fatura no processo atual (tasks Celery, que não podem criar processos filhos)"""
+        chave = self._chave(digest_arquivo(caminho), operadora)
+        dados = self._obter_cache(chave)
+        if dados is None:
+            dados = extrair_arquivo(caminho, operadora)
+            self._salvar_cache(chave, dados)
+        return dados
+
+    def extrair_lote(self, itens: Iterable[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], EstatisticasExtracao]:
+        """
+        Extrai várias faturas em paralelo
+
+        Args:
+            itens: Pares (caminho do PDF, código da operadora)
+
+        Returns:
+            (resultados na mesma ordem, com "erro" nas falhas; estatísticas de vazão)
+        """
+        itens = list(itens)
+        estatisticas = EstatisticasExtracao(arquivos=len(itens), processos=self.max_processos)
+        inicio = time.perf_counter()
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(itens)
+        pendentes = []
+
+        for indice, (caminho, operadora) in enumerate(itens):
+            try:
+                chave = self._chave(digest_arquivo(caminho), operadora)
+            except OSError as e:
+                resultados[indice] = {"erro": str(e)}
+                continue
+            dados = self._obter_cache(chave)
+            if dados is not None:
+                resultados[indice] = dados
+                estatisticas.cache += 1
+            else:
+                pendentes.append((indice, chave, self._pool().submit(extrair_arquivo, caminho, operadora)))
+
+        for indice, chave, futuro in pendentes:
+            try:
+                dados = futuro.result()
+            except Exception as e:
+                logger.warning(f"Erro ao extrair {itens[indice][0]}: {e}")
+                resultados[indice] = {"erro": str(e)}
+                continue
+            self._salvar_cache(chave, dados)
+            resultados[indice] = dados
+            estatisticas.extraidos += 1
+
+        for dados in resultados:
+            if "erro" in dados:
+                estatisticas.falhas += 1
+                continue
+            for campo in estatisticas.campos_encontrados:
+                if dados.get(campo) is not None:
+                    estatisticas.campos_encontrados[campo] += 1
+        estatisticas.segundos = time.perf_counter() - inicio
+        return resultados, estatisticas
+
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def aplicar_dados_processo(processo, dados: Dict[str, Any]) -> bool:
+    """Preenche valor/vencimento/linha digitável ainda vazios do processo"""
+    alterado = False
+    if processo.valor_fatura is None and dados.get("valor") is not None:
+        processo.valor_fatura = dados["valor"]
+        alterado = True
+    if processo.data_vencimento is None and dados.get("vencimento"):
+        processo.data_vencimento = datetime.strptime(dados["vencimento"], "%d/%m/%Y")
+        alterado = True
+    if not processo.linha_digitavel and dados.get("linha_digitavel"):
+        processo.linha_digitavel = dados["linha_digitavel"]
+        alterado = True
+    return alterado
+
+
+def localizar_pdf_processo(processo_id: str) -> Optional[str]:
+    """PDF final mais recente no diretório de execução do processo (faturas fora do storage)"""
+    from ..utils.downloads import caminho_diretorio_execucao
+
+    diretorio = caminho_diretorio_execucao(processo_id)
+    try:
+        pdfs = [entrada for entrada in os.scandir(diretorio) if entrada.name.lower().endswith(".pdf")]
+    except OSError:
+        return None
+    return max(pdfs, key=lambda entrada: entrada.stat().st_mtime).path if pdfs else None
+
+
+def obter_pdf_processo(db, processo_id: str, diretorio: str) -> Optional[str]:
+    """
+    PDF da fatura do processo para extração
+
+    A fatura armazenada é copiada do object store para `diretorio` (os
+    diretórios de execução são removidos após o upload); as que não foram
+    ao storage são lidas do diretório de execução local.
+    """
+    chave = chave_processo(db, processo_id)
+    if not chave:
+        return localizar_pdf_processo(processo_id)
+    destino = os.path.join(diretorio, f"{processo_id}{os.path.splitext(chave)[1]}")
+    try:
+        return obter_cliente_storage().baixar_arquivo(chave, destino)
+    except Exception as e:
+        logger.warning(f"Erro ao ler a fatura do processo {processo_id} no storage: {e}")
+        return None
+
+
+def extrair_backlog(mes_ano: str, extrator: Optional[ExtratorFaturas] = None) -> Dict[str, Any]:
+    """Extrai as faturas baixadas do mês que ainda não têm valor ou vencimento"""
+    from ..models.database import get_db_session
+    from ..models.processo import Processo
+
+    extrator = extrator or obter_extrator_faturas()
+    with get_db_session() as db, tempfile.TemporaryDirectory(prefix="backlog_faturas_") as diretorio:
+        processos = db.query(Processo).filter(
+            Processo.mes_ano == mes_ano,
+            (Processo.valor_fatura.is_(None)) | (Processo.data_vencimento.is_(None))
+        ).all()
+
+        itens, alvos = [], []
+        for processo in processos:
+            arquivo = obter_pdf_processo(db, processo.id, diretorio)
+            if arquivo:
+                itens.append((arquivo, processo.cliente.operadora.codigo))
+                alvos.append(processo)
+
+        resultados, estatisticas = extrator.extrair_lote(itens)
+        atualizados = sum(
+            1 for processo, dados in zip(alvos, resultados)
+            if "erro" not in dados and aplicar_dados_processo(processo, dados)
+        )
+        db.commit()
+
+    resumo = estatisticas.como_dict()
+    resumo.update({"mes_ano": mes_ano, "processos_sem_dados": len(processos), "atualizados": atualizados})
+    logger.info(f"Extração do backlog {mes_ano}: {resumo}")
+    return resumo
+
+
+# Instância do processo
+_extrator: Optional[ExtratorFaturas] = None
+
+
+def obter_extrator_faturas() -> ExtratorFaturas:
+    """Retorna o extrator de faturas do processo"""
+    global _extrator
+    if _extrator is None:
+        _extrator = ExtratorFaturas()
+    return _extrator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrai valor/vencimento das faturas baixadas de um mês")
+    parser.add_argument("--mes", default=datetime.now().strftime("%Y-%m"), help="Mês no formato AAAA-MM")
+    parser.add_argument("--processos", type=int, default=None, help="Processos do pool (padrão: núcleos)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    extrator = ExtratorFaturas(max_processos=args.processos)
+    try:
+        print(json.dumps(extrair_backlog(args.mes, extrator), indent=2, ensure_ascii=False))
+    finally:
+        extrator.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -99,7 +99,7 @@ class OperadoraService:
                 # Campos que podem ser atualizados
                 campos_permitidos = [
                     'nome', 'codigo', 'possui_rpa', 'url_portal', 
-                    'instrucoes_acesso', 'status_ativo'
+                    'instrucoes_acesso', 'status_ativo', 'configuracao_navegador'
                 ]
                 
                 # Verificar unicidade se nome ou código foram alterados
@@ -6,18 +6,30 @@ Data: 29/05/2025
 """
 
 import os
+import json
+import random
 import logging
+import threading
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from celery import Celery
+from celery.exceptions import Retry
 from celery.result import AsyncResult
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready, worker_shutdown
 
 from ..rpa.rpa_base import (
+    ALIASES_RPA,
     concentrador_rpa, 
     TipoOperacao, 
     ParametrosEntradaPadrao,
-    StatusExecucao
+    StatusExecucao,
+    ADIADO_LIMITADOR
 )
+from ..rpa.checkpoint import obter_repositorio_checkpoints
+from ..rpa.timeouts_adaptativos import obter_timeouts_adaptativos
+from ..utils.artefatos import registrar_artefato_processo
+from ..utils.cancelamento import ativar_cancelamento, obter_registro_cancelamentos
+from ..utils.spool_uploads import obter_spool_uploads
 
 # Configuração do Celery
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -40,6 +52,8 @@ celery_app.conf.update(
     task_time_limit=30 * 60,  # 30 minutos
     task_soft_time_limit=25 * 60,  # 25 minutos
     worker_prefetch_multiplier=1,
+    # "threads" executa várias tasks por processo (RPAs isolam estado por contexto)
+    worker_pool=os.getenv("RPA_WORKER_POOL", "prefork"),
     task_acks_late=True,
     worker_disable_rate_limits=False,
     task_compression="gzip",
@@ -48,8 +62,353 @@ celery_app.conf.update(
 
 logger = logging.getLogger(__name__)
 
+# Máximo de processos da mesma credencial executados em uma única task de lote
+TAMANHO_MAXIMO_LOTE = int(os.getenv("RPA_LOTE_MAX_PROCESSOS", "20"))
+# Duração estimada de um processo do lote enquanto a operadora não tem histórico de latências
+SEGUNDOS_POR_PROCESSO_LOTE = int(os.getenv("RPA_LOTE_SEGUNDOS_POR_PROCESSO", "90"))
+# O lote é encerrado esta folga antes do soft_time_limit, para registrar os processos concluídos
+MARGEM_PRAZO_LOTE = int(os.getenv("RPA_LOTE_MARGEM_SEGUNDOS", "120"))
+
+# Reagendamentos de uma execução adiada pelo disjuntor antes de registrá-la como erro.
+# Adiamentos do limitador (portal saudável, mas sem vagas) não têm limite.
+MAX_ADIAMENTOS = int(os.getenv("RPA_MAX_ADIAMENTOS", "12"))
+
+# Upload das faturas fora da task do navegador (opcional). RPA_SPOOL_UPLOADS deve estar num
+# volume visto por todos os workers que consomem a fila; sem RPA_FILA_UPLOAD vale a fila padrão.
+# Com fila própria, os workers de storage são iniciados com:
+#   celery -A backend.services.orquestrador_celery worker -Q rpa_storage -P threads -c 16
+UPLOAD_ASSINCRONO = os.getenv("RPA_UPLOAD_ASSINCRONO", "0") == "1"
+FILA_UPLOAD = os.getenv("RPA_FILA_UPLOAD") or None
+MAX_TENTATIVAS_UPLOAD = int(os.getenv("RPA_UPLOAD_MAX_TENTATIVAS", "8"))
+# Entradas do spool mais antigas que isso são reenfileiradas (mensagem perdida)
+IDADE_REENFILEIRAR_UPLOAD = int(os.getenv("RPA_UPLOAD_REENFILEIRAR_SEGUNDOS", "1800"))
+
+# Extração de valor/vencimento/linha digitável do PDF após o download
+EXTRACAO_FATURAS = os.getenv("RPA_EXTRACAO_FATURAS", "1") != "0"
+
+celery_app.conf.beat_schedule = {
+    "reenfileirar-uploads-pendentes": {
+        "task": "reenfileirar_uploads_pendentes",
+        "schedule": max(60, IDADE_REENFILEIRAR_UPLOAD // 2),
+        "options": {"queue": FILA_UPLOAD} if FILA_UPLOAD else {},
+    },
+}
+
+# === CICLO DE VIDA DO WORKER ===
+
+def _recolher_navegadores_orfaos():
+    """Encerra navegadores de workers mortos sem finalizar o driver (time limit, revoke)"""
+    from ..utils.selenium_driver import obter_supervisor_navegadores
+    
+    try:
+        encerrados = obter_supervisor_navegadores().recolher_orfaos()
+        if encerrados:
+            logger.warning(f"{encerrados} processo(s) de navegador órfão(s) encerrado(s)")
+    except Exception as e:
+        logger.warning(f"Erro ao recolher navegadores órfãos: {e}")
+
+@worker_ready.connect
+def _ao_iniciar_worker(**kwargs):
+    _recolher_navegadores_orfaos()
+
+@worker_process_init.connect
+def _ao_iniciar_processo_worker(**kwargs):
+    from ..utils.cliente_storage import redefinir_cliente_storage
+    
+    # Conexões do object store abertas antes do fork não são compartilháveis
+    redefinir_cliente_storage()
+    # Em thread: a inicialização do processo filho tem tempo limitado pelo Celery
+    threading.Thread(target=_recolher_navegadores_orfaos, name="recolher-navegadores", daemon=True).start()
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _ao_encerrar_worker(**kwargs):
+    """Finaliza os pools, qualquer navegador ainda registrado por este processo e as capturas pendentes"""
+    from ..utils.pool_navegadores import encerrar_pools_navegadores
+    from ..utils.selenium_driver import obter_supervisor_navegadores
+    
+    try:
+        encerrar_pools_navegadores()
+        obter_supervisor_navegadores().recolher_orfaos(incluir_processo_atual=True)
+    except Exception as e:
+        logger.warning(f"Erro ao encerrar navegadores do worker: {e}")
+    
+    from ..utils.captura_debug import obter_captura_debug
+    
+    # Capturas de falha ainda na fila de compressão/upload
+    if not obter_captura_debug().aguardar(timeout=float(os.getenv("RPA_DEBUG_ESPERA_ENCERRAMENTO", "10"))):
+        logger.warning("Encerrando worker com capturas de debug pendentes")
+
 # === TASKS CELERY PARA EXECUÇÃO DOS RPAS ===
 
+def _reagendar_se_adiado(task, resultado) -> None:
+    """
+    Reagenda a task quando o disjuntor ou o limitador da operadora adiou a execução
+    
+    O atraso cobre o tempo até a sondagem do portal (ou a espera por vaga), com
+    dispersão para que as tasks adiadas não retornem todas ao mesmo tempo. Só o
+    disjuntor esgota os reagendamentos: o limitador apenas indica portal ocupado.
+    """
+    if resultado.status != StatusExecucao.ADIADO:
+        return
+    
+    componente = resultado.adiado_por or "disjuntor"
+    countdown = resultado.dados_especificos.get("adiar_por_segundos", 0) + random.uniform(5, 60)
+    logger.info(f"Execução adiada pelo {componente} - Task: {task.request.id}, nova tentativa em {countdown:.0f}s")
+    # max_retries=None voltaria ao limite padrão da task: o limitador sempre libera mais uma
+    max_retries = task.request.retries + 1 if componente == ADIADO_LIMITADOR else MAX_ADIAMENTOS
+    raise task.retry(countdown=countdown, max_retries=max_retries)
+
+def _montar_parametros_download(processo_id: str, operadora_codigo: str, parametros_cliente: Dict[str, Any]) -> ParametrosEntradaPadrao:
+    """Monta parâmetros padronizados de download a partir dos dados do cliente"""
+    return ParametrosEntradaPadrao(
+        id_processo=processo_id,
+        id_cliente=parametros_cliente.get("cliente_hash", ""),
+        operadora_codigo=operadora_codigo,
+        url_portal=parametros_cliente.get("url_portal", ""),
+        usuario=parametros_cliente.get("login_portal", ""),
+        senha=parametros_cliente.get("senha_portal", ""),
+        cpf=parametros_cliente.get("cpf"),
+        filtro=parametros_cliente.get("filtro"),
+        nome_sat=parametros_cliente.get("nome_sat", ""),
+        dados_sat=parametros_cliente.get("dados_sat", ""),
+        unidade=parametros_cliente.get("unidade", ""),
+        servico=parametros_cliente.get("servico", ""),
+        configuracao_navegador=parametros_cliente.get("configuracao_navegador") or "",
+        upload_assincrono=UPLOAD_ASSINCRONO
+    )
+
+def _serializar_metricas(resultado) -> Optional[str]:
+    """Métricas por etapa do resultado no formato da coluna Execucao.metricas_etapas"""
+    return json.dumps(resultado.metricas_etapas) if resultado.metricas_etapas else None
+
+def _limites_task(operadora_codigo: str, quantidade: int = 1) -> Dict[str, int]:
+    """
+    soft_time_limit/time_limit da task derivados das latências da operadora
+    
+    Vazio sem histórico suficiente: valem os limites globais do Celery.
+    """
+    codigo = operadora_codigo.strip().upper()
+    try:
+        limites = obter_timeouts_adaptativos().limites_task(ALIASES_RPA.get(codigo, codigo), quantidade)
+    except Exception as e:
+        logger.warning(f"Erro ao calcular limites adaptativos da task: {e}")
+        return {}
+    if limites is None:
+        return {}
+    return {"soft_time_limit": limites[0], "time_limit": limites[1]}
+
+def _tamanho_lote(operadora_codigo: str) -> int:
+    """Processos por task de lote cujo download cabe no limite de tempo da task"""
+    codigo = operadora_codigo.strip().upper()
+    try:
+        tamanho = obter_timeouts_adaptativos().processos_por_task(ALIASES_RPA.get(codigo, codigo))
+    except Exception as e:
+        logger.warning(f"Erro ao calcular tamanho adaptativo do lote: {e}")
+        tamanho = None
+    if tamanho is None:
+        tamanho = int((celery_app.conf.task_soft_time_limit - MARGEM_PRAZO_LOTE) // SEGUNDOS_POR_PROCESSO_LOTE)
+    return max(1, min(TAMANHO_MAXIMO_LOTE, tamanho))
+
+def _prazo_lote(task) -> Optional[float]:
+    """
+    Segundos que a task de lote pode usar antes do soft_time_limit
+    
+    O lote para no prazo como um cancelamento: os processos concluídos são
+    registrados e os demais voltam a aguardar download. No pool de threads,
+    que não aplica time limits, o prazo é o único limite do lote.
+    """
+    limites = getattr(task.request, "timelimit", None) or (None, None)
+    soft = limites[1] or celery_app.conf.task_soft_time_limit
+    if not soft:
+        return None
+    return max(float(soft) - MARGEM_PRAZO_LOTE, float(soft) / 2)
+
+def _cancelada(resultado) -> bool:
+    """Execução interrompida por cancelamento cooperativo (cancelar_execucao)"""
+    return resultado.status == StatusExecucao.CANCELADO
+
+def _aplicar_fatura_armazenada(db, processo, url_s3: Optional[str], artefato: Optional[Dict[str, Any]],
+                               dados_extraidos: Optional[Dict[str, Any]]) -> bool:
+    """
+    Marca a fatura como baixada depois que o PDF está no storage
+    
+    Returns:
+        False quando o digest é o mesmo do download anterior (nada novo a extrair)
+    """
+    from ..models.processo import StatusProcesso
+    
+    processo.status_processo = StatusProcesso.FATURA_BAIXADA.value
+    processo.caminho_s3_fatura = url_s3
+    fatura_alterada = True
+    if artefato:
+        fatura_alterada = registrar_artefato_processo(
+            db, processo.id, artefato["digest"], artefato["chave"], artefato.get("tamanho", 0)
+        )
+    if dados_extraidos:
+        processo.valor_fatura = dados_extraidos.get("valor_fatura")
+        processo.data_vencimento = dados_extraidos.get("data_vencimento")
+    return fatura_alterada
+
+def _registrar_resultado_download(processo_id: str, resultado) -> None:
+    """Atualiza processo e execução no banco com o resultado do download"""
+    from ..models.database import get_db_session
+    from ..models.processo import Processo, Execucao, StatusProcesso, StatusExecucao
+    
+    cancelada = _cancelada(resultado)
+    upload_pendente = resultado.sucesso and bool(resultado.dados_especificos.get("upload_pendente"))
+    fatura_alterada = True
+    with get_db_session() as db:
+        # Buscar processo
+        processo = db.query(Processo).filter(Processo.id == processo_id).first()
+        if processo:
+            if cancelada:
+                # Processo permanece aguardando download
+                pass
+            elif upload_pendente:
+                # Entrega durável antes de mudar o status: o spool sobrevive à perda da mensagem
+                obter_spool_uploads().depositar(processo_id, resultado.arquivo_baixado, resultado.dados_extraidos)
+                processo.status_processo = StatusProcesso.UPLOAD_PENDENTE.value
+            elif resultado.sucesso:
+                fatura_alterada = _aplicar_fatura_armazenada(
+                    db, processo, resultado.url_s3,
+                    resultado.dados_especificos.get("artefato"), resultado.dados_extraidos
+                )
+            else:
+                processo.status_processo = StatusProcesso.ERRO.value
+            
+            # Atualizar execução
+            execucao = db.query(Execucao).filter(
+                Execucao.processo_id == processo_id,
+                Execucao.status_execucao == StatusExecucao.EXECUTANDO.value
+            ).first()
+            
+            if execucao and cancelada:
+                execucao.status_execucao = StatusExecucao.CANCELADA.value
+                execucao.data_fim = resultado.timestamp_fim
+                execucao.mensagem_log = resultado.mensagem
+            elif execucao:
+                execucao.status_execucao = StatusExecucao.CONCLUIDO.value if resultado.sucesso else StatusExecucao.FALHOU.value
+                execucao.data_fim = resultado.timestamp_fim
+                execucao.resultado_saida = {
+                    "sucesso": resultado.sucesso,
+                    "arquivo_baixado": resultado.arquivo_baixado,
+                    "url_s3": resultado.url_s3,
+                    "upload_pendente": upload_pendente,
+                    "dados_extraidos": resultado.dados_extraidos,
+                    "tempo_execucao": resultado.tempo_execucao_segundos
+                }
+                execucao.mensagem_log = resultado.mensagem
+                execucao.detalhes_erro = {"logs": resultado.logs_execucao} if not resultado.sucesso else None
+                execucao.metricas_etapas = _serializar_metricas(resultado)
+            
+            db.commit()
+        else:
+            upload_pendente = False
+    
+    if upload_pendente:
+        # Checkpoint mantido até o upload: um novo download retoma do PDF mesclado
+        _agendar_upload(processo_id)
+    elif resultado.sucesso:
+        # Resultado persistido: novas execuções do processo não devem retomar deste ponto
+        obter_repositorio_checkpoints().remover(processo_id)
+        chave = (resultado.dados_especificos.get("artefato") or {}).get("chave")
+        if chave is None:
+            # Fatura fora do storage: o PDF local é a única cópia e permanece no diretório
+            if fatura_alterada and EXTRACAO_FATURAS and resultado.arquivo_baixado:
+                _extrair_dados_fatura(processo_id, resultado.arquivo_baixado)
+        else:
+            if fatura_alterada:
+                # Lida do storage, a fatura pode ser extraída em qualquer worker
+                _agendar_extracao(processo_id, chave)
+            _limpar_diretorio_execucao(processo_id)
+
+def _agendar_upload(processo_id: str) -> None:
+    """Enfileira o upload na fila de storage (falhas ficam no spool para reenfileirar)"""
+    try:
+        enviar_fatura_storage_rpa.apply_async(
+            kwargs={"processo_id": processo_id}, queue=FILA_UPLOAD
+        )
+    except Exception as e:
+        logger.warning(f"Erro ao agendar upload da fatura - Processo: {processo_id}, Erro: {e}")
+
+def _agendar_extracao(processo_id: str, chave: Optional[str]) -> None:
+    """Extração de valor/vencimento da fatura armazenada em task própria, fora da sessão do navegador"""
+    if not chave or not EXTRACAO_FATURAS:
+        return
+    try:
+        extrair_dados_fatura_rpa.apply_async(
+            kwargs={"processo_id": processo_id, "chave": chave},
+            queue=os.getenv("RPA_FILA_EXTRACAO") or None
+        )
+    except Exception as e:
+        logger.warning(f"Erro ao agendar extração da fatura - Processo: {processo_id}, Erro: {e}")
+
+def _extrair_dados_processo(processo, arquivo: str):
+    """
+    Extrai valor, vencimento e linha digitável do PDF e preenche os campos vazios do processo
+    
+    Returns:
+        (dados extraídos, True se algum campo do processo foi preenchido)
+    """
+    from .extracao_faturas import aplicar_dados_processo, obter_extrator_faturas
+    
+    dados = obter_extrator_faturas().extrair(arquivo, processo.cliente.operadora.codigo)
+    return dados, aplicar_dados_processo(processo, dados)
+
+def _extrair_dados_fatura(processo_id: str, arquivo: str) -> Dict[str, Any]:
+    """Extrai os dados do PDF local e grava os campos vazios do processo"""
+    from ..models.database import get_db_session
+    from ..models.processo import Processo
+    
+    with get_db_session() as db:
+        processo = db.query(Processo).filter(Processo.id == processo_id).first()
+        if not processo:
+            return {"processo_id": processo_id, "atualizado": False}
+        dados, atualizado = _extrair_dados_processo(processo, arquivo)
+        db.commit()
+    
+    logger.info(f"Extração da fatura concluída - Processo: {processo_id}, Dados: {dados}")
+    return {"processo_id": processo_id, "atualizado": atualizado, "dados": dados}
+
+def _limpar_diretorio_execucao(processo_id: str) -> None:
+    """
+    Remove o diretório de download da execução depois que a fatura foi armazenada
+    
+    Em um worker de outro host o diretório não existe aqui; o do navegador é
+    removido por FileManager.limpar_downloads_antigos.
+    """
+    from ..utils.downloads import caminho_diretorio_execucao
+    from ..utils.file_manager import FileManager
+    
+    FileManager().limpar_diretorio_execucao(str(caminho_diretorio_execucao(processo_id)))
+
+def _registrar_erro_download(processo_id: str, erro: Exception, task_id: str) -> None:
+    """Marca processo e execução como erro após exceção na task"""
+    try:
+        from ..models.database import get_db_session
+        from ..models.processo import Processo, Execucao, StatusProcesso, StatusExecucao
+        
+        with get_db_session() as db:
+            processo = db.query(Processo).filter(Processo.id == processo_id).first()
+            if processo:
+                processo.status_processo = StatusProcesso.ERRO.value
+            
+            execucao = db.query(Execucao).filter(
+                Execucao.processo_id == processo_id,
+                Execucao.status_execucao == StatusExecucao.EXECUTANDO.value
+            ).first()
+            
+            if execucao:
+                execucao.status_execucao = StatusExecucao.FALHOU.value
+                execucao.data_fim = datetime.now()
+                execucao.mensagem_log = f"Erro na execução: {str(erro)}"
+                execucao.detalhes_erro = {"erro": str(erro), "task_id": task_id}
+            
+            db.commit()
+    except Exception as db_error:
+        logger.error(f"Erro ao atualizar banco após falha: {str(db_error)}")
+
 @celery_app.task(bind=True, name="executar_download_fatura_rpa")
 def executar_download_fatura_rpa(self, processo_id: str, operadora_codigo: str, parametros_cliente: Dict[str, Any]):
     """
@@ -58,108 +417,184 @@ def executar_download_fatura_rpa(self, processo_id: str, operadora_codigo: str,
     logger.info(f"Iniciando download RPA - Processo: {processo_id}, Operadora: {operadora_codigo}")
     
     try:
-        # Importar o concentrador RPA
-        from ..rpa.rpa_base import concentrador_rpa, TipoOperacao, ParametrosEntradaPadrao
-        
         # Preparar parâmetros padronizados
-        parametros_entrada = ParametrosEntradaPadrao(
-            id_processo=processo_id,
-            id_cliente=parametros_cliente.get("cliente_hash", ""),
-            operadora_codigo=operadora_codigo,
-            url_portal=parametros_cliente.get("url_portal", ""),
-            usuario=parametros_cliente.get("login_portal", ""),
-            senha=parametros_cliente.get("senha_portal", ""),
-            cpf=parametros_cliente.get("cpf"),
-            filtro=parametros_cliente.get("filtro"),
-            nome_sat=parametros_cliente.get("nome_sat", ""),
-            dados_sat=parametros_cliente.get("dados_sat", ""),
-            unidade=parametros_cliente.get("unidade", ""),
-            servico=parametros_cliente.get("servico", "")
-        )
+        parametros_entrada = _montar_parametros_download(processo_id, operadora_codigo, parametros_cliente)
         
         # Executar RPA através do concentrador
-        resultado = concentrador_rpa.executar_operacao(
-            operacao=TipoOperacao.DOWNLOAD_FATURA,
-            parametros=parametros_entrada
-        )
+        with ativar_cancelamento(self.request.id):
+            resultado = concentrador_rpa.executar_operacao(
+                operacao=TipoOperacao.DOWNLOAD_FATURA,
+                parametros=parametros_entrada
+            )
+        _reagendar_se_adiado(self, resultado)
         
         # Atualizar processo no banco de dados
-        from ..models.database import get_db_session
-        from ..models.processo import Processo, Execucao, StatusProcesso, StatusExecucao
-        
-        with get_db_session() as db:
-            # Buscar processo
-            processo = db.query(Processo).filter(Processo.id == processo_id).first()
-            if processo:
-                if resultado.sucesso:
-                    processo.status_processo = StatusProcesso.FATURA_BAIXADA.value
-                    processo.caminho_s3_fatura = resultado.url_s3
-                    if resultado.dados_extraidos:
-                        processo.valor_fatura = resultado.dados_extraidos.get("valor_fatura")
-                        processo.data_vencimento = resultado.dados_extraidos.get("data_vencimento")
-                else:
-                    processo.status_processo = StatusProcesso.ERRO.value
-                
-                # Atualizar execução
-                execucao = db.query(Execucao).filter(
-                    Execucao.processo_id == processo_id,
-                    Execucao.status_execucao == StatusExecucao.EXECUTANDO.value
-                ).first()
-                
-                if execucao:
-                    execucao.status_execucao = StatusExecucao.CONCLUIDO.value if resultado.sucesso else StatusExecucao.FALHOU.value
-                    execucao.data_fim = resultado.timestamp_fim
-                    execucao.resultado_saida = {
-                        "sucesso": resultado.sucesso,
-                        "arquivo_baixado": resultado.arquivo_baixado,
-                        "url_s3": resultado.url_s3,
-                        "dados_extraidos": resultado.dados_extraidos,
-                        "tempo_execucao": resultado.tempo_execucao_segundos
-                    }
-                    execucao.mensagem_log = resultado.mensagem
-                    execucao.detalhes_erro = {"logs": resultado.logs_execucao} if not resultado.sucesso else None
-                
-                db.commit()
+        _registrar_resultado_download(processo_id, resultado)
         
         logger.info(f"Download RPA concluído - Processo: {processo_id}, Sucesso: {resultado.sucesso}")
         return {
             "processo_id": processo_id,
             "sucesso": resultado.sucesso,
+            "cancelada": _cancelada(resultado),
             "mensagem": resultado.mensagem,
             "arquivo_baixado": resultado.arquivo_baixado
         }
         
+    except Retry:
+        raise
     except Exception as e:
         logger.error(f"Erro no download RPA - Processo: {processo_id}, Erro: {str(e)}")
         
         # Atualizar processo como erro
-        try:
-            from ..models.database import get_db_session
-            from ..models.processo import Processo, Execucao, StatusProcesso, StatusExecucao
-            
-            with get_db_session() as db:
-                processo = db.query(Processo).filter(Processo.id == processo_id).first()
-                if processo:
-                    processo.status_processo = StatusProcesso.ERRO.value
-                
-                execucao = db.query(Execucao).filter(
-                    Execucao.processo_id == processo_id,
-                    Execucao.status_execucao == StatusExecucao.EXECUTANDO.value
-                ).first()
-                
-                if execucao:
-                    execucao.status_execucao = StatusExecucao.FALHOU.value
-                    execucao.data_fim = datetime.now()
-                    execucao.mensagem_log = f"Erro na execução: {str(e)}"
-                    execucao.detalhes_erro = {"erro": str(e), "task_id": self.request.id}
-                
-                db.commit()
-        except Exception as db_error:
-            logger.error(f"Erro ao atualizar banco após falha: {str(db_error)}")
+        _registrar_erro_download(processo_id, e, self.request.id)
         
         # Re-lançar a exceção para o Celery
         raise
 
+@celery_app.task(bind=True, name="executar_download_lote_rpa")
+def executar_download_lote_rpa(self, operadora_codigo: str, itens: List[Dict[str, Any]]):
+    """
+    Task Celery para baixar em uma única sessão de portal as faturas
+    de todos os processos que compartilham a mesma credencial
+    
+    Args:
+        operadora_codigo: Código da operadora
+        itens: Lista de {"processo_id": ..., "parametros_cliente": {...}}
+    """
+    processos_ids = [item["processo_id"] for item in itens]
+    logger.info(f"Iniciando download em lote - Operadora: {operadora_codigo}, Processos: {len(itens)}")
+    
+    try:
+        lista_parametros = [
+            _montar_parametros_download(item["processo_id"], operadora_codigo, item["parametros_cliente"])
+            for item in itens
+        ]
+        
+        with ativar_cancelamento(self.request.id, prazo_segundos=_prazo_lote(self)):
+            resultados = concentrador_rpa.executar_lote(
+                TipoOperacao.DOWNLOAD_FATURA_LOTE,
+                lista_parametros
+            )
+        # Disjuntor e limitador avaliados uma vez para o lote: todos adiados ou nenhum
+        if resultados:
+            _reagendar_se_adiado(self, resultados[0])
+    except Retry:
+        raise
+    except Exception as e:
+        logger.error(f"Erro no download em lote - Operadora: {operadora_codigo}, Erro: {str(e)}")
+        for processo_id in processos_ids:
+            _registrar_erro_download(processo_id, e, self.request.id)
+        raise
+    
+    retorno = []
+    for processo_id, resultado in zip(processos_ids, resultados):
+        try:
+            _registrar_resultado_download(processo_id, resultado)
+        except Exception as e:
+            logger.error(f"Erro ao registrar resultado - Processo: {processo_id}, Erro: {str(e)}")
+        retorno.append({
+            "processo_id": processo_id,
+            "sucesso": resultado.sucesso,
+            "cancelada": _cancelada(resultado),
+            "mensagem": resultado.mensagem,
+            "arquivo_baixado": resultado.arquivo_baixado
+        })
+    
+    logger.info(
+        f"Download em lote concluído - Operadora: {operadora_codigo}, "
+        f"Sucessos: {sum(1 for r in retorno if r['sucesso'])}/{len(retorno)}"
+    )
+    return retorno
+
+@celery_app.task(bind=True, name="extrair_dados_fatura_rpa")
+def extrair_dados_fatura_rpa(self, processo_id: str, chave: Optional[str] = None, arquivo: Optional[str] = None):
+    """
+    Task Celery que extrai valor, vencimento e linha digitável da fatura
+    armazenada e preenche os campos ainda vazios do processo
+    
+    O PDF é lido do object store, não do disco do worker que fez o download:
+    a task pode rodar em qualquer host. Sem `chave` (mensagens que traziam o
+    caminho local em `arquivo`, hoje ignorado), usa o artefato do processo.
+    """
+    from ..models.database import get_db_session
+    from ..utils.artefatos import chave_processo, copia_local_artefato
+    
+    if not chave:
+        with get_db_session() as db:
+            chave = chave_processo(db, processo_id)
+        if not chave:
+            logger.warning(f"Fatura do processo {processo_id} não está no storage: extração ignorada")
+            return {"processo_id": processo_id, "atualizado": False}
+    
+    with copia_local_artefato(chave) as copia:
+        return _extrair_dados_fatura(processo_id, copia)
+
+@celery_app.task(bind=True, name="enviar_fatura_storage_rpa", max_retries=MAX_TENTATIVAS_UPLOAD)
+def enviar_fatura_storage_rpa(self, processo_id: str):
+    """
+    Task Celery da fila de storage: envia a fatura deixada no spool pelo
+    download e só então marca o processo como FATURA_BAIXADA
+    """
+    from ..models.database import get_db_session
+    from ..models.processo import Processo, StatusProcesso
+    from ..utils.artefatos import obter_armazem_artefatos
+    
+    spool = obter_spool_uploads()
+    entrada = spool.obter(processo_id)
+    if entrada is None:
+        # Entrega repetida de um upload já registrado, ou spool que este worker não enxerga
+        with get_db_session() as db:
+            processo = db.query(Processo).filter(Processo.id == processo_id).first()
+            pendente = processo is not None and processo.status_processo == StatusProcesso.UPLOAD_PENDENTE.value
+        if pendente:
+            logger.warning(
+                f"Fatura do processo {processo_id} ausente do spool {spool.diretorio}: "
+                f"RPA_SPOOL_UPLOADS precisa ser compartilhado com os workers de download"
+            )
+        return {"processo_id": processo_id, "enviado": False}
+    
+    try:
+        artefato = obter_armazem_artefatos().armazenar(entrada.arquivo)
+    except Exception as e:
+        logger.warning(f"Erro no upload da fatura - Processo: {processo_id}, Erro: {e}")
+        raise self.retry(exc=e, countdown=min(600, 30 * 2 ** self.request.retries))
+    
+    with get_db_session() as db:
+        processo = db.query(Processo).filter(Processo.id == processo_id).first()
+        if processo and processo.status_processo == StatusProcesso.UPLOAD_PENDENTE.value:
+            fatura_alterada = _aplicar_fatura_armazenada(
+                db, processo, artefato.url, artefato.como_dict(), entrada.dados_extraidos
+            )
+            db.commit()
+            if fatura_alterada and EXTRACAO_FATURAS:
+                # Extrai da cópia do spool antes de concluí-la (o arquivo da
+                # execução fica no worker do navegador)
+                try:
+                    _extrair_dados_processo(processo, entrada.arquivo)
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Erro na extração da fatura - Processo: {processo_id}, Erro: {e}")
+        else:
+            logger.warning(f"Processo {processo_id} não aguarda mais o upload; status mantido")
+    
+    spool.concluir(processo_id)
+    obter_repositorio_checkpoints().remover(processo_id)
+    _limpar_diretorio_execucao(processo_id)
+    
+    logger.info(f"Upload da fatura concluído - Processo: {processo_id}, URL: {artefato.url}")
+    return {"processo_id": processo_id, "enviado": artefato.enviado, "url_s3": artefato.url}
+
+@celery_app.task(name="reenfileirar_uploads_pendentes")
+def reenfileirar_uploads_pendentes():
+    """Reenfileira entradas antigas do spool cuja mensagem de upload se perdeu"""
+    entradas = obter_spool_uploads().pendentes(IDADE_REENFILEIRAR_UPLOAD)
+    for entrada in entradas:
+        _agendar_upload(entrada.id_processo)
+    if entradas:
+        logger.warning(f"{len(entradas)} upload(s) pendente(s) reenfileirado(s) a partir do spool")
+    return {"reenfileirados": len(entradas)}
+
 @celery_app.task(bind=True, name="executar_upload_sat_rpa")
 def executar_upload_sat_rpa(self, processo_id: str, parametros_sat: Dict[str, Any]):
     """
@@ -185,10 +620,13 @@ def executar_upload_sat_rpa(self, processo_id: str, parametros_sat: Dict[str, An
         )
         
         # Executar RPA através do concentrador
-        resultado = concentrador_rpa.executar_operacao(
-            operacao=TipoOperacao.UPLOAD_SAT,
-            parametros=parametros_entrada
-        )
+        with ativar_cancelamento(self.request.id):
+            resultado = concentrador_rpa.executar_operacao(
+                operacao=TipoOperacao.UPLOAD_SAT,
+                parametros=parametros_entrada
+            )
+        _reagendar_se_adiado(self, resultado)
+        cancelada = _cancelada(resultado)
         
         # Atualizar processo no banco de dados
         from ..models.database import get_db_session
@@ -198,7 +636,10 @@ def executar_upload_sat_rpa(self, processo_id: str, parametros_sat: Dict[str, An
             # Buscar processo
             processo = db.query(Processo).filter(Processo.id == processo_id).first()
             if processo:
-                if resultado.sucesso:
+                if cancelada:
+                    # Processo permanece aguardando envio
+                    pass
+                elif resultado.sucesso:
                     processo.status_processo = StatusProcesso.ENVIADA_SAT.value
                     processo.enviado_para_sat = True
                     processo.data_envio_sat = resultado.timestamp_fim
@@ -209,7 +650,11 @@ def executar_upload_sat_rpa(self, processo_id: str, parametros_sat: Dict[str, An
                 execucao = Execucao(
                     processo_id=processo_id,
                     tipo_execucao=TipoExecucao.UPLOAD_SAT.value,
-                    status_execucao=StatusExecucao.CONCLUIDO.value if resultado.sucesso else StatusExecucao.FALHOU.value,
+                    status_execucao=(
+                        StatusExecucao.CANCELADA.value if cancelada
+                        else StatusExecucao.CONCLUIDO.value if resultado.sucesso
+                        else StatusExecucao.FALHOU.value
+                    ),
                     parametros_entrada=parametros_sat,
                     resultado_saida={
                         "sucesso": resultado.sucesso,
@@ -219,7 +664,8 @@ def executar_upload_sat_rpa(self, processo_id: str, parametros_sat: Dict[str, An
                     data_inicio=resultado.timestamp_inicio,
                     data_fim=resultado.timestamp_fim,
                     mensagem_log=resultado.mensagem,
-                    detalhes_erro={"logs": resultado.logs_execucao} if not resultado.sucesso else None
+                    detalhes_erro={"logs": resultado.logs_execucao} if not resultado.sucesso else None,
+                    metricas_etapas=_serializar_metricas(resultado)
                 )
                 db.add(execucao)
                 db.commit()
@@ -228,13 +674,44 @@ def executar_upload_sat_rpa(self, processo_id: str, parametros_sat: Dict[str, An
         return {
             "processo_id": processo_id,
             "sucesso": resultado.sucesso,
+            "cancelada": cancelada,
             "mensagem": resultado.mensagem
         }
         
+    except Retry:
+        raise
     except Exception as e:
         logger.error(f"Erro no upload SAT - Processo: {processo_id}, Erro: {str(e)}")
         raise
 
+def _agrupar_por_credencial(itens: List[Dict[str, Any]], tamanho_lote: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Divide os processos da operadora em lotes que compartilham a credencial do portal
+    
+    Processos sem login não são agrupados: credencial vazia não identifica uma
+    sessão comum no portal, e cada um segue em uma task individual.
+    
+    Returns:
+        Lotes de até `tamanho_lote` itens (padrão TAMANHO_MAXIMO_LOTE; ver _tamanho_lote)
+    """
+    tamanho_lote = tamanho_lote or TAMANHO_MAXIMO_LOTE
+    grupos: Dict[tuple, List[Dict[str, Any]]] = {}
+    lotes = []
+    for item in itens:
+        parametros_cliente = item["parametros_cliente"]
+        login = (parametros_cliente.get("login_portal") or "").strip()
+        if not login:
+            lotes.append([item])
+            continue
+        grupos.setdefault((login, parametros_cliente.get("senha_portal")), []).append(item)
+    
+    for itens_grupo in grupos.values():
+        lotes.extend(
+            itens_grupo[i:i + tamanho_lote]
+            for i in range(0, len(itens_grupo), tamanho_lote)
+        )
+    return lotes
+
 @celery_app.task(bind=True, name="processar_operadora_completa")
 def processar_operadora_completa(self, operadora_codigo: str, mes_ano: str = None):
     """
@@ -269,11 +746,13 @@ def processar_operadora_completa(self, operadora_codigo: str, mes_ano: str = Non
                 Processo.status_processo == StatusProcesso.AGUARDANDO_DOWNLOAD.value
             ).all()
             
+            itens_processos = []
             for processo in processos:
                 # Preparar parâmetros do cliente
                 parametros_cliente = {
                     "cliente_hash": processo.cliente.hash_unico,
                     "url_portal": operadora.url_portal,
+                    "configuracao_navegador": operadora.configuracao_navegador,
                     "login_portal": processo.cliente.login_portal,
                     "senha_portal": processo.cliente.senha_portal,
                     "cpf": processo.cliente.cpf,
@@ -283,14 +762,29 @@ def processar_operadora_completa(self, operadora_codigo: str, mes_ano: str = Non
                     "unidade": processo.cliente.unidade,
                     "servico": processo.cliente.servico
                 }
-                
-                # Executar download assíncrono
-                executar_download_fatura_rpa.delay(
-                    processo_id=str(processo.id),
-                    operadora_codigo=operadora_codigo,
-                    parametros_cliente=parametros_cliente
-                )
-                processos_executados += 1
+                itens_processos.append({
+                    "processo_id": str(processo.id),
+                    "parametros_cliente": parametros_cliente
+                })
+            
+            for itens in _agrupar_por_credencial(itens_processos, _tamanho_lote(operadora_codigo)):
+                if len(itens) > 1:
+                    # Mesma credencial: um login e um navegador para todo o lote
+                    executar_download_lote_rpa.apply_async(
+                        kwargs={"operadora_codigo": operadora_codigo, "itens": itens},
+                        **_limites_task(operadora_codigo, len(itens))
+                    )
+                else:
+                    # Executar download assíncrono
+                    executar_download_fatura_rpa.apply_async(
+                        kwargs={
+                            "processo_id": itens[0]["processo_id"],
+                            "operadora_codigo": operadora_codigo,
+                            "parametros_cliente": itens[0]["parametros_cliente"]
+                        },
+                        **_limites_task(operadora_codigo)
+                    )
+                processos_executados += len(itens)
         
         logger.info(f"Processamento iniciado - Operadora: {operadora_codigo}, Processos: {processos_executados}")
         return {
@@ -344,10 +838,14 @@ class OrquestradorRPA:
             nome_sat=dados_acesso.get("nome_sat", ""),
             dados_sat=dados_acesso.get("dados_sat", ""),
             unidade=dados_acesso.get("unidade", ""),
-            servico=dados_acesso.get("servico", "")
+            servico=dados_acesso.get("servico", ""),
+            configuracao_navegador=dados_acesso.get("configuracao_navegador") or ""
         )
         
-        task = executar_download_rpa_task.delay(parametros.__dict__)
+        task = executar_download_rpa_task.apply_async(
+            args=(parametros.__dict__,),
+            **_limites_task(operadora_codigo)
+        )
         logger.info(f"Download iniciado - Task ID: {task.id}, Processo: {processo_id}")
         return task.id
     
@@ -381,7 +879,10 @@ class OrquestradorRPA:
             servico=dados_cliente.get("servico", "")
         )
         
-        task = executar_upload_sat_task.delay(parametros.__dict__)
+        task = executar_upload_sat_task.apply_async(
+            args=(parametros.__dict__,),
+            **_limites_task("SAT")
+        )
         logger.info(f"Upload SAT iniciado - Task ID: {task.id}, Processo: {processo_id}")
         return task.id
     
@@ -427,6 +928,10 @@ class OrquestradorRPA:
         """
         Cancela uma execução em andamento
         
+        A task em andamento encerra na próxima espera/etapa do RPA, registra a
+        execução como cancelada e devolve o navegador ao pool; o revoke (sem
+        terminate) impede apenas que tasks ainda na fila comecem.
+        
         Args:
             task_id: ID da task
             
@@ -434,7 +939,8 @@ class OrquestradorRPA:
             bool: True se cancelada com sucesso
         """
         try:
-            self.celery.control.revoke(task_id, terminate=True)
+            obter_registro_cancelamentos().solicitar(task_id)
+            self.celery.control.revoke(task_id)
             logger.info(f"Execução cancelada - Task ID: {task_id}")
             return True
         except Exception as e:
@@ -495,10 +1001,12 @@ def executar_download_rpa_task(self, parametros_dict: Dict[str, Any]):
         )
         
         # Executa através do concentrador
-        resultado = concentrador_rpa.executar_operacao(
-            TipoOperacao.DOWNLOAD_FATURA,
-            parametros
-        )
+        with ativar_cancelamento(self.request.id):
+            resultado = concentrador_rpa.executar_operacao(
+                TipoOperacao.DOWNLOAD_FATURA,
+                parametros
+            )
+        _reagendar_se_adiado(self, resultado)
         
         # Atualiza progresso
         self.update_state(
@@ -520,6 +1028,8 @@ def executar_download_rpa_task(self, parametros_dict: Dict[str, Any]):
             "logs_execucao": resultado.logs_execucao
         }
         
+    except Retry:
+        raise
     except Exception as e:
         logger.error(f"Erro na task de download: {e}")
         self.update_state(
@@ -550,10 +1060,12 @@ def executar_upload_sat_task(self, parametros_dict: Dict[str, Any]):
         )
         
         # Executa através do concentrador
-        resultado = concentrador_rpa.executar_operacao(
-            TipoOperacao.UPLOAD_SAT,
-            parametros
-        )
+        with ativar_cancelamento(self.request.id):
+            resultado = concentrador_rpa.executar_operacao(
+                TipoOperacao.UPLOAD_SAT,
+                parametros
+            )
+        _reagendar_se_adiado(self, resultado)
         
         # Atualiza progresso
         self.update_state(
@@ -572,6 +1084,8 @@ def executar_upload_sat_task(self, parametros_dict: Dict[str, Any]):
             "logs_execucao": resultado.logs_execucao
         }
         
+    except Retry:
+        raise
     except Exception as e:
         logger.error(f"Erro na task de upload SAT: {e}")
         self.update_state(
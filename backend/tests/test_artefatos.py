@@ -0,0 +1,120 @@
+"""
+Testes do armazenamento de artefatos endereçado por conteúdo
+Valida a chave por digest e o upload evitado para conteúdo já armazenado
+"""
+
+import sys
+import os
+import hashlib
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils import artefatos
+from backend.utils.artefatos import ArmazemArtefatos, chave_artefato
+from backend.utils.cliente_storage import ClienteStorageMemoria, ConfiguracaoStorage
+
+
+class StorageFalso:
+    """Object store remoto simulado: guarda apenas as chaves gravadas"""
+
+    def __init__(self, bucket="faturas-rpa"):
+        self.configuracao = ConfiguracaoStorage(endpoint="minio:9000", bucket=bucket)
+        self.chaves = set()
+
+    def existe(self, chave):
+        return chave in self.chaves
+
+
+@pytest.fixture(autouse=True)
+def storage(monkeypatch):
+    storage = StorageFalso()
+    monkeypatch.setattr(artefatos, "obter_cliente_redis", lambda: None)
+    monkeypatch.setattr(artefatos, "obter_cliente_storage", lambda: storage)
+    return storage
+
+
+class FileManagerFalso:
+    def __init__(self):
+        self.uploads = []
+
+    def upload_arquivo(self, arquivo_local, chave=None):
+        self.uploads.append(chave)
+        artefatos.obter_cliente_storage().chaves.add(chave)
+        return f"s3://bucket/{chave}"
+
+
+def test_retry_do_mesmo_pdf_nao_reenvia(tmp_path):
+    file_manager = FileManagerFalso()
+    armazem = ArmazemArtefatos(file_manager)
+    primeiro = tmp_path / "fatura.pdf"
+    retry = tmp_path / "fatura_retry.pdf"
+    primeiro.write_bytes(b"%PDF fatura")
+    retry.write_bytes(b"%PDF fatura")
+
+    artefato = armazem.armazenar(str(primeiro))
+    repetido = armazem.armazenar(str(retry))
+
+    digest = hashlib.sha256(b"%PDF fatura").hexdigest()
+    assert artefato.enviado and not repetido.enviado
+    assert artefato.chave == repetido.chave == f"artefatos/sha256/{digest[:2]}/{digest}.pdf"
+    assert repetido.url == artefato.url
+    assert file_manager.uploads == [artefato.chave]
+
+
+def test_conteudo_novo_gera_novo_objeto(tmp_path):
+    file_manager = FileManagerFalso()
+    armazem = ArmazemArtefatos()
+    arquivo = tmp_path / "fatura.pdf"
+    arquivo.write_bytes(b"%PDF maio")
+    maio = armazem.armazenar(str(arquivo), file_manager)
+    arquivo.write_bytes(b"%PDF maio corrigida")
+    corrigida = armazem.armazenar(str(arquivo), file_manager)
+
+    assert maio.digest != corrigida.digest
+    assert file_manager.uploads == [maio.chave, corrigida.chave]
+    assert chave_artefato(corrigida.digest, ".PDF") == corrigida.chave
+
+
+def test_objeto_removido_do_storage_e_reenviado(tmp_path, storage):
+    file_manager = FileManagerFalso()
+    armazem = ArmazemArtefatos(file_manager)
+    arquivo = tmp_path / "fatura.pdf"
+    arquivo.write_bytes(b"%PDF fatura")
+    artefato = armazem.armazenar(str(arquivo))
+
+    storage.chaves.clear()
+    reenviado = armazem.armazenar(str(arquivo))
+
+    assert reenviado.enviado
+    assert file_manager.uploads == [artefato.chave, artefato.chave]
+
+
+def test_indice_separado_por_bucket(tmp_path, monkeypatch):
+    file_manager = FileManagerFalso()
+    armazem = ArmazemArtefatos(file_manager)
+    arquivo = tmp_path / "fatura.pdf"
+    arquivo.write_bytes(b"%PDF fatura")
+    armazem.armazenar(str(arquivo))
+
+    outro_bucket = StorageFalso(bucket="faturas-homologacao")
+    monkeypatch.setattr(artefatos, "obter_cliente_storage", lambda: outro_bucket)
+
+    assert armazem.armazenar(str(arquivo)).enviado
+    assert len(file_manager.uploads) == 2
+
+
+def test_upload_para_storage_em_memoria_nao_e_indexado(tmp_path, monkeypatch):
+    class FileManagerMemoria:
+        def upload_arquivo(self, arquivo_local, chave=None):
+            return memoria.enviar_arquivo(arquivo_local, chave).url
+
+    memoria = ClienteStorageMemoria()
+    monkeypatch.setattr(artefatos, "obter_cliente_storage", lambda: memoria)
+    armazem = ArmazemArtefatos(FileManagerMemoria())
+    arquivo = tmp_path / "fatura.pdf"
+    arquivo.write_bytes(b"%PDF fatura")
+
+    artefato = armazem.armazenar(str(arquivo))
+
+    assert armazem.consultar(artefato.digest) is None
@@ -0,0 +1,176 @@
+"""
+Testes do cancelamento cooperativo das execuções
+Valida a flag por task, a interrupção nas esperas e a devolução do navegador
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils import cancelamento, esperas
+from backend.utils.cancelamento import (
+    ExecucaoCancelada,
+    RegistroCancelamentos,
+    SoftTimeLimitExceeded,
+    ativar_cancelamento,
+    verificar_cancelamento,
+)
+from backend.rpa.rpa_base import (
+    RPABase,
+    ConcentradorRPA,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+    TipoOperacao,
+)
+
+
+@pytest.fixture(autouse=True)
+def registro(monkeypatch):
+    registro = RegistroCancelamentos()
+    monkeypatch.setattr(cancelamento, "obter_cliente_redis", lambda: None)
+    monkeypatch.setattr(cancelamento, "_registro", registro)
+    monkeypatch.setattr(cancelamento, "INTERVALO_VERIFICACAO", 0)
+    return registro
+
+
+class DriverManagerFalso:
+    def __init__(self):
+        self.liberado = False
+
+    def obter_driver(self):
+        return object()
+
+    def liberar_driver(self):
+        self.liberado = True
+
+
+class RPACancelavel(RPABase):
+    def __init__(self):
+        super().__init__()
+        self.gerenciador = DriverManagerFalso()
+        self.etapas_concluidas = []
+
+    def _criar_driver_manager(self):
+        return self.gerenciador
+
+    def executar_download(self, parametros):
+        with self.contexto_execucao(parametros) as contexto:
+            try:
+                self.driver = self.driver_manager.obter_driver()
+                for etapa in ("login", "busca", "download"):
+                    with self.medir_etapa(etapa):
+                        if etapa == "busca":
+                            cancelamento.obter_registro_cancelamentos().solicitar("task-1")
+                        esperas.aguardar(0.01)
+                    self.etapas_concluidas.append(etapa)
+                resultado = ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+            except Exception as e:
+                resultado = ResultadoSaidaPadrao(sucesso=False, status=StatusExecucao.ERRO, mensagem=str(e))
+            return contexto.anexar_metricas(resultado)
+
+    def executar_upload_sat(self, parametros):
+        raise NotImplementedError
+
+
+def test_sem_task_ativa_nao_verifica(registro):
+    registro.solicitar("task-1")
+    verificar_cancelamento()
+
+
+def test_flag_da_task_interrompe_e_e_removida_ao_sair(registro):
+    with ativar_cancelamento("task-1"):
+        verificar_cancelamento()
+        registro.solicitar("task-1")
+        with pytest.raises(ExecucaoCancelada):
+            verificar_cancelamento()
+    assert not registro.cancelado("task-1")
+
+
+def test_prazo_da_task_interrompe_como_cancelamento(registro):
+    with ativar_cancelamento("task-1", prazo_segundos=0.01):
+        verificar_cancelamento()
+        time.sleep(0.02)
+        with pytest.raises(ExecucaoCancelada, match="prazo"):
+            verificar_cancelamento()
+
+
+def test_espera_condicional_interrompida(registro):
+    registro.solicitar("task-1")
+    inicio = time.monotonic()
+
+    with ativar_cancelamento("task-1"):
+        with pytest.raises(ExecucaoCancelada):
+            esperas.aguardar_condicao(object(), lambda driver: False, timeout=5)
+    assert time.monotonic() - inicio < 1
+
+
+def test_concentrador_devolve_navegador_e_retorna_cancelado():
+    concentrador = ConcentradorRPA(operadoras_habilitadas=["FAKE"])
+    rpa = RPACancelavel()
+    concentrador.rpas_registrados.registrar("FAKE", lambda: rpa)
+    parametros = ParametrosEntradaPadrao(
+        id_processo="1", id_cliente="1", operadora_codigo="FAKE",
+        url_portal="http://localhost", usuario="u", senha="s"
+    )
+
+    with ativar_cancelamento("task-1"):
+        resultado = concentrador.executar_operacao(TipoOperacao.DOWNLOAD_FATURA, parametros)
+
+    assert resultado.status == StatusExecucao.CANCELADO
+    assert not resultado.sucesso
+    assert rpa.etapas_concluidas == ["login"]
+    assert rpa.gerenciador.liberado
+    assert rpa.contexto is None
+
+
+def test_lote_cancelado_preserva_processos_concluidos():
+    class RPALote(RPACancelavel):
+        def executar_download(self, parametros):
+            if parametros.id_processo == "2":
+                cancelamento.obter_registro_cancelamentos().solicitar("task-1")
+                verificar_cancelamento()
+            return ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+
+    concentrador = ConcentradorRPA(operadoras_habilitadas=["FAKE"])
+    concentrador.rpas_registrados.registrar("FAKE", RPALote)
+    lote = [
+        ParametrosEntradaPadrao(
+            id_processo=str(indice), id_cliente="1", operadora_codigo="FAKE",
+            url_portal="http://localhost", usuario="u", senha="s"
+        )
+        for indice in (1, 2, 3)
+    ]
+
+    with ativar_cancelamento("task-1"):
+        resultados = concentrador.executar_lote(TipoOperacao.DOWNLOAD_FATURA_LOTE, lote)
+
+    assert [resultado.status for resultado in resultados] == [
+        StatusExecucao.SUCESSO, StatusExecucao.CANCELADO, StatusExecucao.CANCELADO
+    ]
+
+
+def test_soft_time_limit_encerra_lote_com_processos_concluidos():
+    class RPALote(RPACancelavel):
+        def executar_download(self, parametros):
+            if parametros.id_processo == "2":
+                raise SoftTimeLimitExceeded()
+            return ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+
+    lote = [
+        ParametrosEntradaPadrao(
+            id_processo=str(indice), id_cliente="1", operadora_codigo="FAKE",
+            url_portal="http://localhost", usuario="u", senha="s"
+        )
+        for indice in (1, 2, 3)
+    ]
+
+    resultados = RPALote().executar_download_lote(lote)
+
+    assert [resultado.status for resultado in resultados] == [
+        StatusExecucao.SUCESSO, StatusExecucao.CANCELADO, StatusExecucao.CANCELADO
+    ]
+    assert "soft_time_limit" in resultados[1].mensagem
@@ -0,0 +1,87 @@
+"""
+Testes da captura de debug das execuções com falha
+Usa driver falso para validar arquivos gerados, buffer circular e integração com o contexto
+"""
+
+import sys
+import os
+import gzip
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils import captura_debug
+from backend.utils.captura_debug import CapturaDebug
+from backend.rpa.rpa_base import ContextoExecucao, ResultadoSaidaPadrao, StatusExecucao
+
+
+class DriverFalso:
+    current_url = "https://portal.exemplo/fatura"
+    title = "Faturas"
+    page_source = "<html><body>erro no portal</body></html>"
+
+    def __init__(self):
+        self.screenshots = 0
+
+    def get_screenshot_as_png(self):
+        self.screenshots += 1
+        return b"\x89PNG\r\n\x1a\n" + b"0" * 2048
+
+    def get_log(self, tipo):
+        raise Exception("log não suportado")
+
+
+@pytest.fixture
+def captura(tmp_path, monkeypatch):
+    enviados = []
+    instancia = CapturaDebug(diretorio=str(tmp_path), max_capturas=3, enviar=lambda caminho, chave: enviados.append(chave))
+    instancia.codec_imagem, instancia.codec_texto = "png", "gz"
+    instancia.enviados = enviados
+    monkeypatch.setattr(captura_debug, "_captura", instancia)
+    return instancia
+
+
+def test_captura_grava_arquivos_comprimidos_e_envia(captura, tmp_path):
+    chaves = captura.capturar(DriverFalso(), "EMB_10", etapa="login", erro=ValueError("botão ausente"))
+    assert captura.aguardar(timeout=5)
+
+    assert sorted(os.path.basename(chave) for chave in chaves) == ["contexto.json.gz", "dom.html.gz", "tela.png"]
+    assert sorted(captura.enviados) == sorted(chaves)
+    pasta = next(tmp_path.iterdir())
+    contexto = json.loads(gzip.decompress((pasta / "contexto.json.gz").read_bytes()))
+    assert contexto["etapa"] == "login"
+    assert "botão ausente" in contexto["erro"]
+    assert contexto["console"] == []
+    assert b"erro no portal" in gzip.decompress((pasta / "dom.html.gz").read_bytes())
+
+
+def test_buffer_circular_remove_capturas_antigas(captura, tmp_path):
+    for indice in range(5):
+        captura.capturar(DriverFalso(), f"EMB_{indice}")
+    assert captura.aguardar(timeout=5)
+
+    pastas = sorted(pasta.name for pasta in tmp_path.iterdir())
+    assert len(pastas) == 3
+    assert pastas[-1].endswith("EMB_4")
+
+
+def test_contexto_captura_apenas_na_falha(captura):
+    driver = DriverFalso()
+    contexto = ContextoExecucao(driver=driver)
+
+    with contexto.medir_etapa("login"):
+        pass
+    sucesso = contexto.anexar_metricas(ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok"))
+    assert driver.screenshots == 0
+    assert sucesso.screenshots_debug == []
+
+    with pytest.raises(RuntimeError):
+        with contexto.medir_etapa("download"):
+            with contexto.medir_etapa("documentos"):
+                raise RuntimeError("falha")
+    falha = contexto.anexar_metricas(ResultadoSaidaPadrao(sucesso=False, status=StatusExecucao.ERRO, mensagem="falha"))
+
+    assert driver.screenshots == 1
+    assert len(falha.screenshots_debug) == 3
+    assert captura.aguardar(timeout=5)
@@ -0,0 +1,149 @@
+"""
+Testes dos checkpoints de etapas das execuções RPA
+Valida a retomada a partir da última etapa concluída
+"""
+
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.rpa.checkpoint import EtapaCheckpoint, RepositorioCheckpoints
+from backend.rpa.rpa_base import (
+    RPABase,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+)
+
+
+@pytest.fixture(autouse=True)
+def diretorio_downloads(tmp_path, monkeypatch):
+    monkeypatch.setenv("RPA_DOWNLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr("backend.rpa.checkpoint._repositorio", RepositorioCheckpoints())
+    return tmp_path
+
+
+class FileManagerFalso:
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.uploads = []
+
+    def preparar_diretorio_execucao(self, id_processo):
+        return str(self.diretorio)
+
+    def upload_arquivo(self, arquivo_local, chave=None):
+        self.uploads.append(arquivo_local)
+        return f"s3://faturas/{os.path.basename(arquivo_local)}"
+
+
+class RPAFalso(RPABase):
+    def __init__(self, diretorio):
+        super().__init__()
+        self.file_manager = FileManagerFalso(diretorio)
+        self.mesclagens = 0
+
+    def mesclar(self, arquivos, dados):
+        self.mesclagens += 1
+        destino = os.path.join(os.path.dirname(arquivos[0]), f"fatura_{dados['vencimento']}.pdf")
+        with open(destino, "wb") as arquivo:
+            arquivo.write(b"%PDF")
+        return destino
+
+    def executar_download(self, parametros):
+        with self.contexto_execucao(parametros):
+            timestamp_inicio = datetime.now()
+            resultado = self._retomar_download(parametros, timestamp_inicio, mesclar=self.mesclar)
+            if resultado:
+                return resultado
+            # Portal: não deve ser acessado quando há etapa retomável
+            return ResultadoSaidaPadrao(sucesso=False, status=StatusExecucao.ERRO, mensagem="portal")
+
+    def executar_upload_sat(self, parametros):
+        raise NotImplementedError
+
+
+def criar_parametros():
+    return ParametrosEntradaPadrao(
+        id_processo="proc-1",
+        id_cliente="cli-1",
+        operadora_codigo="FAKE",
+        url_portal="http://localhost",
+        usuario="usuario",
+        senha="senha",
+    )
+
+
+def criar_documentos(diretorio):
+    caminhos = []
+    for nome in ("fatura.pdf", "boleto.pdf"):
+        caminho = diretorio / nome
+        caminho.write_bytes(b"%PDF")
+        caminhos.append(str(caminho))
+    return caminhos
+
+
+def test_checkpoint_acumula_dados_entre_etapas():
+    repositorio = RepositorioCheckpoints()
+    repositorio.salvar("proc-1", EtapaCheckpoint.LOGIN)
+    repositorio.salvar("proc-1", EtapaCheckpoint.FATURA_LOCALIZADA, dados_extraidos={"vencimento": "10-05"})
+    checkpoint = repositorio.salvar("proc-1", EtapaCheckpoint.ARQUIVOS_BAIXADOS, arquivos=["a.pdf"])
+
+    assert checkpoint.etapa_concluida == EtapaCheckpoint.ARQUIVOS_BAIXADOS
+    assert checkpoint.dados == {"dados_extraidos": {"vencimento": "10-05"}, "arquivos": ["a.pdf"]}
+    assert checkpoint.concluiu(EtapaCheckpoint.LOGIN)
+    assert not checkpoint.concluiu(EtapaCheckpoint.PDF_MESCLADO)
+
+
+def test_etapas_de_navegacao_nao_sao_retomadas():
+    repositorio = RepositorioCheckpoints()
+    repositorio.salvar("proc-1", EtapaCheckpoint.FATURA_LOCALIZADA)
+
+    assert repositorio.obter("proc-1") is None
+
+
+def test_recua_quando_artefato_nao_existe(diretorio_downloads):
+    repositorio = RepositorioCheckpoints()
+    arquivos = criar_documentos(diretorio_downloads)
+    repositorio.salvar("proc-1", EtapaCheckpoint.ARQUIVOS_BAIXADOS, arquivos=arquivos)
+    repositorio.salvar("proc-1", EtapaCheckpoint.PDF_MESCLADO, arquivo_fatura=str(diretorio_downloads / "removido.pdf"))
+
+    checkpoint = repositorio.obter("proc-1")
+
+    assert checkpoint.etapa_concluida == EtapaCheckpoint.ARQUIVOS_BAIXADOS
+
+
+def test_checkpoint_expirado_e_descartado(monkeypatch):
+    repositorio = RepositorioCheckpoints(ttl_segundos=60)
+    repositorio.salvar("proc-1", EtapaCheckpoint.UPLOAD_CONCLUIDO, url_s3="s3://x")
+    monkeypatch.setattr("backend.rpa.checkpoint.time.time", lambda: 10 ** 12)
+
+    assert repositorio.obter("proc-1") is None
+    assert repositorio._ler("proc-1") is None
+
+
+def test_retry_retoma_da_mesclagem_sem_portal(diretorio_downloads):
+    rpa = RPAFalso(diretorio_downloads)
+    parametros = criar_parametros()
+    arquivos = criar_documentos(diretorio_downloads)
+    rpa._registrar_checkpoint(
+        parametros, EtapaCheckpoint.ARQUIVOS_BAIXADOS,
+        arquivos=arquivos, dados_extraidos={"vencimento": "10-05"}
+    )
+
+    resultado = rpa.executar_download(parametros)
+
+    assert resultado.sucesso
+    assert resultado.dados_especificos["retomado_apos"] == "arquivos_baixados"
+    assert resultado.url_s3 == "s3://faturas/fatura_10-05.pdf"
+    assert rpa.mesclagens == 1
+
+    # Nova tentativa após o upload reaproveita a URL sem mesclar nem reenviar
+    resultado = rpa.executar_download(parametros)
+
+    assert resultado.sucesso
+    assert resultado.dados_especificos["retomado_apos"] == "upload_concluido"
+    assert rpa.mesclagens == 1
+    assert len(rpa.file_manager.uploads) == 1
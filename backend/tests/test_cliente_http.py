@@ -0,0 +1,89 @@
+"""
+Testes do cliente HTTP do modo API contra servidor local (stub de portal)
+"""
+
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils.cliente_http import ClienteHTTP
+from backend.utils.sessao_portal import SessaoPortal
+
+ATRASO_PDF = 0.3
+
+
+class PortalStub(BaseHTTPRequestHandler):
+    falhas_restantes = 0
+    headers_recebidos = []
+
+    def do_GET(self):
+        PortalStub.headers_recebidos.append(dict(self.headers))
+
+        if self.path == "/instavel" and PortalStub.falhas_restantes > 0:
+            PortalStub.falhas_restantes -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        if self.path.endswith("/pdf") or self.path.startswith("/invoices/fiscal-documents"):
+            time.sleep(ATRASO_PDF)
+            corpo = f"%PDF-1.4 {self.path}".encode()
+            tipo = "application/pdf"
+        else:
+            corpo = b'{"data": [{"id": "123", "dueDate": "2025-06-10"}]}'
+            tipo = "application/json"
+
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def portal():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), PortalStub)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    PortalStub.headers_recebidos = []
+    yield f"http://127.0.0.1:{servidor.server_port}"
+    servidor.shutdown()
+
+
+def test_baixar_varios_em_paralelo_preserva_ordem(portal):
+    cliente = ClienteHTTP(max_concorrencia=4)
+    urls = [f"{portal}/invoices/{i}/pdf" for i in range(4)]
+
+    inicio = time.monotonic()
+    conteudos = cliente.baixar_varios(urls)
+    duracao = time.monotonic() - inicio
+
+    assert [c.decode().split(" ")[1] for c in conteudos] == [f"/invoices/{i}/pdf" for i in range(4)]
+    assert duracao < ATRASO_PDF * 3
+
+
+def test_aplica_token_da_sessao(portal):
+    cliente = ClienteHTTP()
+    cliente.aplicar_sessao_portal(SessaoPortal(operadora="DIG", token="eyJ.abc.def"))
+
+    assert cliente.obter_json(f"{portal}/invoices")["data"][0]["id"] == "123"
+    assert PortalStub.headers_recebidos[-1]["authorization"] == "Bearer eyJ.abc.def"
+
+    cliente.fechar()
+    cliente.obter_json(f"{portal}/invoices")
+    assert "authorization" not in PortalStub.headers_recebidos[-1]
+
+
+def test_repete_requisicao_em_erro_temporario(portal):
+    PortalStub.falhas_restantes = 2
+    cliente = ClienteHTTP()
+
+    assert cliente.obter_json(f"{portal}/instavel")["data"]
@@ -0,0 +1,113 @@
+"""
+Testes do cliente do object store
+Usa o object store em memória: ETag multipart, novas tentativas,
+verificação de checksum e limite de uploads paralelos
+"""
+
+import sys
+import os
+import time
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils.cliente_storage import (
+    PARTE_MINIMA,
+    ClienteStorageMemoria,
+    ConfiguracaoStorage,
+    assinar_arquivo,
+)
+
+
+def configuracao(**valores):
+    return ConfiguracaoStorage(**{"backoff_segundos": 0, "parte_bytes": PARTE_MINIMA, **valores})
+
+
+def test_pdf_grande_em_partes_com_etag_multipart(tmp_path):
+    arquivo = tmp_path / "fatura_mesclada.pdf"
+    arquivo.write_bytes(os.urandom(2 * PARTE_MINIMA + 1024))
+    cliente = ClienteStorageMemoria(configuracao(endpoint="minio:9000", bucket="faturas-rpa"))
+
+    objeto = cliente.enviar_arquivo(str(arquivo), "faturas/2025-05/fatura.pdf")
+
+    assert objeto.etag.endswith("-3")
+    assert objeto.tamanho == arquivo.stat().st_size
+    assert cliente.objetos["faturas/2025-05/fatura.pdf"][0] == arquivo.read_bytes()
+    assert objeto.url == "http://minio:9000/faturas-rpa/faturas/2025-05/fatura.pdf"
+
+
+def test_falha_de_rede_repetida_com_backoff(tmp_path):
+    arquivo = tmp_path / "fatura.pdf"
+    arquivo.write_bytes(b"%PDF fatura")
+
+    objeto = ClienteStorageMemoria(configuracao(tentativas=3), falhas_injetadas=2).enviar_arquivo(str(arquivo), "f.pdf")
+    assert objeto.tentativas == 3
+
+    with pytest.raises(ConnectionError):
+        ClienteStorageMemoria(configuracao(tentativas=3), falhas_injetadas=3).enviar_arquivo(str(arquivo), "f.pdf")
+
+    cliente = ClienteStorageMemoria(configuracao(tentativas=3))
+    with pytest.raises(FileNotFoundError):
+        cliente.enviar_arquivo(str(tmp_path / "inexistente.pdf"), "f.pdf")
+    assert cliente.gravacoes == 0
+
+
+class StorageCorrompido(ClienteStorageMemoria):
+    """Grava o primeiro objeto truncado, como uma conexão interrompida"""
+
+    def _gravar(self, caminho, chave, assinatura, content_type):
+        etag = super()._gravar(caminho, chave, assinatura, content_type)
+        if self.gravacoes == 1:
+            conteudo, etag_objeto, metadados = self.objetos[chave]
+            self.objetos[chave] = (conteudo[:-1], etag_objeto, metadados)
+        return etag
+
+
+def test_checksum_divergente_refaz_upload(tmp_path):
+    arquivo = tmp_path / "fatura.pdf"
+    arquivo.write_bytes(b"%PDF fatura completa")
+    cliente = StorageCorrompido(configuracao())
+
+    objeto = cliente.enviar_arquivo(str(arquivo), "f.pdf")
+
+    assert objeto.tentativas == 2
+    assert objeto.sha256 == assinar_arquivo(str(arquivo), PARTE_MINIMA).sha256
+    assert cliente.objetos["f.pdf"][0] == arquivo.read_bytes()
+
+
+class StorageConcorrencia(ClienteStorageMemoria):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ativos = 0
+        self.maximo_ativos = 0
+        self._contador = threading.Lock()
+
+    def _gravar(self, caminho, chave, assinatura, content_type):
+        with self._contador:
+            self.ativos += 1
+            self.maximo_ativos = max(self.maximo_ativos, self.ativos)
+        try:
+            return super()._gravar(caminho, chave, assinatura, content_type)
+        finally:
+            with self._contador:
+                self.ativos -= 1
+
+
+def test_uploads_paralelos_limitados(tmp_path):
+    itens = []
+    for indice in range(12):
+        arquivo = tmp_path / f"fatura_{indice}.pdf"
+        arquivo.write_bytes(b"%PDF " + str(indice).encode())
+        itens.append((str(arquivo), f"faturas/{indice}.pdf"))
+    itens.append((str(tmp_path / "inexistente.pdf"), "faturas/x.pdf"))
+    cliente = StorageConcorrencia(configuracao(uploads_paralelos=4), latencia_segundos=0.05)
+
+    inicio = time.monotonic()
+    resultados = cliente.enviar_varios(itens)
+    cliente.encerrar()
+
+    assert [resultado.chave for resultado in resultados[:12]] == [chave for _, chave in itens[:12]]
+    assert isinstance(resultados[12], FileNotFoundError)
+    assert cliente.maximo_ativos <= 4
+    assert time.monotonic() - inicio < 12 * 0.05
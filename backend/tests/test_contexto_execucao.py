@@ -0,0 +1,129 @@
+"""
+Testes do contexto de execução dos RPAs
+Valida o isolamento de estado entre execuções concorrentes da mesma instância
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils import esperas
+from backend.rpa.rpa_base import (
+    RPABase,
+    ConcentradorRPA,
+    EstadoExecucao,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+    TipoOperacao,
+)
+
+
+class DriverManagerFalso:
+    def __init__(self):
+        self.liberado = False
+
+    def obter_driver(self):
+        return object()
+
+    def liberar_driver(self):
+        self.liberado = True
+
+
+class RPAFalso(RPABase):
+    vencimento = EstadoExecucao()
+
+    def __init__(self):
+        super().__init__()
+        self.gerenciadores = []
+
+    def _criar_driver_manager(self):
+        gerenciador = DriverManagerFalso()
+        self.gerenciadores.append(gerenciador)
+        return gerenciador
+
+    def executar_download(self, parametros):
+        with self.contexto_execucao(parametros):
+            self.driver = self.driver_manager.obter_driver()
+            driver = self.driver
+            self.vencimento = parametros.filtro
+            time.sleep(0.02)
+            return ResultadoSaidaPadrao(
+                sucesso=self.driver is driver,
+                status=StatusExecucao.SUCESSO,
+                mensagem="ok",
+                dados_extraidos={"vencimento": self.vencimento}
+            )
+
+    def executar_upload_sat(self, parametros):
+        raise NotImplementedError
+
+
+def criar_parametros(indice):
+    return ParametrosEntradaPadrao(
+        id_processo=str(indice),
+        id_cliente=str(indice),
+        operadora_codigo="FAKE",
+        url_portal="http://localhost",
+        usuario="usuario",
+        senha="senha",
+        filtro=f"vencimento-{indice}",
+    )
+
+
+def test_estado_isolado_entre_threads():
+    rpa = RPAFalso()
+    resultados = {}
+
+    def executar(indice):
+        resultados[indice] = rpa.executar_download(criar_parametros(indice))
+
+    threads = [threading.Thread(target=executar, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for indice, resultado in resultados.items():
+        assert resultado.sucesso
+        assert resultado.dados_extraidos["vencimento"] == f"vencimento-{indice}"
+    assert all(gerenciador.liberado for gerenciador in rpa.gerenciadores)
+
+
+def test_estado_fora_de_execucao():
+    rpa = RPAFalso()
+
+    assert rpa.contexto is None
+    assert rpa.driver is None
+    with pytest.raises(RuntimeError):
+        rpa.vencimento = "01/01/2025"
+
+
+def test_concentrador_executa_concorrentemente():
+    concentrador = ConcentradorRPA(operadoras_habilitadas=["FAKE"])
+    concentrador.rpas_registrados.registrar("FAKE", RPAFalso)
+
+    parametros = [criar_parametros(i) for i in range(6)]
+    resultados = concentrador.executar_operacoes_concorrentes(
+        TipoOperacao.DOWNLOAD_FATURA, parametros, max_workers=3
+    )
+
+    assert [r.dados_extraidos["vencimento"] for r in resultados] == [p.filtro for p in parametros]
+
+
+def test_metricas_de_esperas_no_resultado():
+    rpa = RPAFalso()
+
+    with rpa.contexto_execucao(criar_parametros(1)) as contexto:
+        with contexto.medir_etapa("login"):
+            esperas.aguardar(0.01)
+        resultado = contexto.anexar_metricas(
+            ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+        )
+
+    assert resultado.dados_especificos["esperas"]["etapas"]["login"]["sleep"] > 0
+    assert resultado.dados_especificos["tempos_etapas"]["login"] >= 0.01
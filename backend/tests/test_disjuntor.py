@@ -0,0 +1,229 @@
+"""
+Testes do disjuntor (circuit breaker) por operadora
+Valida abertura por falhas do portal, sondagem única e adiamento no concentrador
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.rpa.disjuntor import (
+    ClasseFalha,
+    DisjuntorOperadoras,
+    EstadoDisjuntor,
+    classificar_falha,
+)
+from backend.rpa.rpa_base import (
+    ConcentradorRPA,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+    TipoOperacao,
+)
+
+
+def falha_portal():
+    return ResultadoSaidaPadrao(
+        sucesso=False,
+        status=StatusExecucao.ERRO,
+        mensagem="Erro interno",
+        classe_falha=ClasseFalha.PORTAL_INDISPONIVEL.value
+    )
+
+
+def sucesso():
+    return ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+
+
+@pytest.fixture
+def disjuntor(monkeypatch):
+    disjuntor = DisjuntorOperadoras(limiar_falhas=3, janela_segundos=60, tempo_aberto_segundos=30)
+    monkeypatch.setattr("backend.rpa.disjuntor._disjuntor", disjuntor)
+    return disjuntor
+
+
+def abrir(disjuntor, operadora="EMB"):
+    for _ in range(disjuntor.limiar_falhas):
+        disjuntor.registrar_resultado(operadora, falha_portal())
+
+
+def vencer_tempo_aberto(disjuntor, monkeypatch):
+    atraso = disjuntor.segundos_para_sondagem("EMB") + 1
+    relogio = time.time
+    monkeypatch.setattr("backend.rpa.disjuntor.time.time", lambda: relogio() + atraso)
+
+
+def test_classificacao_por_mensagem():
+    resultado = ResultadoSaidaPadrao(
+        sucesso=False,
+        status=StatusExecucao.ERRO,
+        mensagem="Erro interno: Message: Reached error page: about:neterror?e=dnsNotFound"
+    )
+    assert classificar_falha(resultado) == ClasseFalha.PORTAL_INDISPONIVEL
+    resultado.mensagem = "Erro ao realizar login. Verifique as credenciais"
+    assert classificar_falha(resultado) == ClasseFalha.AUTENTICACAO
+    assert classificar_falha(sucesso()) is None
+
+
+def test_abre_apenas_com_falhas_do_portal(disjuntor):
+    credencial = ResultadoSaidaPadrao(
+        sucesso=False, status=StatusExecucao.ERRO, mensagem="x",
+        classe_falha=ClasseFalha.AUTENTICACAO.value
+    )
+    for _ in range(5):
+        disjuntor.registrar_resultado("EMB", credencial)
+    assert disjuntor.estado("EMB") == EstadoDisjuntor.FECHADO
+
+    abrir(disjuntor)
+
+    assert disjuntor.estado("EMB") == EstadoDisjuntor.ABERTO
+    assert not disjuntor.permitir("EMB")
+    assert disjuntor.permitir("DIG")
+
+
+def test_sondagem_unica_fecha_com_sucesso(disjuntor, monkeypatch):
+    abrir(disjuntor)
+    vencer_tempo_aberto(disjuntor, monkeypatch)
+
+    assert disjuntor.estado("EMB") == EstadoDisjuntor.SEMI_ABERTO
+    assert disjuntor.permitir("EMB")
+    assert not disjuntor.permitir("EMB")
+
+    disjuntor.registrar_resultado("EMB", sucesso())
+
+    assert disjuntor.estado("EMB") == EstadoDisjuntor.FECHADO
+    assert disjuntor.permitir("EMB")
+
+
+def test_sondagem_com_falha_reabre(disjuntor, monkeypatch):
+    abrir(disjuntor)
+    vencer_tempo_aberto(disjuntor, monkeypatch)
+    assert disjuntor.permitir("EMB")
+
+    disjuntor.registrar_resultado("EMB", falha_portal())
+
+    assert disjuntor.estado("EMB") == EstadoDisjuntor.ABERTO
+
+
+def test_concentrador_adia_sem_executar_rpa(disjuntor):
+    chamadas = []
+
+    class RPAContador:
+        def executar_download(self, parametros):
+            chamadas.append(parametros)
+            return falha_portal()
+
+        def _log_operacao(self, *args):
+            pass
+
+    concentrador = ConcentradorRPA()
+    concentrador.rpas_registrados.registrar("EMB", RPAContador)
+    parametros = ParametrosEntradaPadrao(
+        id_processo="1", id_cliente="1", operadora_codigo="EMB",
+        url_portal="http://localhost", usuario="u", senha="s"
+    )
+
+    for _ in range(disjuntor.limiar_falhas):
+        concentrador.executar_operacao(TipoOperacao.DOWNLOAD_FATURA, parametros)
+    resultado = concentrador.executar_operacao(TipoOperacao.DOWNLOAD_FATURA, parametros)
+
+    assert len(chamadas) == disjuntor.limiar_falhas
+    assert resultado.status == StatusExecucao.ADIADO
+    assert resultado.dados_especificos["adiar_por_segundos"] > 0
+
+
+def test_captcha_nao_zera_sequencia_de_falhas(disjuntor):
+    captcha = ResultadoSaidaPadrao(
+        sucesso=False, status=StatusExecucao.ERRO, mensagem="x",
+        classe_falha=ClasseFalha.CAPTCHA.value
+    )
+    for _ in range(disjuntor.limiar_falhas - 1):
+        disjuntor.registrar_resultado("EMB", falha_portal())
+        disjuntor.registrar_resultado("EMB", captcha)
+
+    disjuntor.registrar_resultado("EMB", falha_portal())
+
+    assert disjuntor.estado("EMB") == EstadoDisjuntor.ABERTO
+
+
+class DriverForaDoAr:
+    """Navegador cujo portal não responde ou devolve página de erro"""
+
+    def __init__(self, erro_navegacao=None):
+        self.erro_navegacao = erro_navegacao
+        self.title = "502 Bad Gateway"
+        self.page_source = "<html><body>502 Bad Gateway</body></html>"
+
+    def get(self, url):
+        if self.erro_navegacao:
+            raise self.erro_navegacao
+
+    def find_element(self, by, valor):
+        from selenium.common.exceptions import NoSuchElementException
+        raise NoSuchElementException(valor)
+
+
+class GerenciadorDriverFalso:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def obter_driver(self):
+        return self.driver
+
+    def obter_wait(self, driver):
+        return None
+
+    def definir_diretorio_download(self, diretorio):
+        pass
+
+    def liberar_driver(self):
+        pass
+
+
+class FileManagerFalso:
+    def preparar_diretorio_execucao(self, id_processo):
+        return "/tmp"
+
+
+@pytest.mark.parametrize("erro_navegacao", [
+    "timeout", "pagina_de_erro", "formulario_ausente",
+])
+def test_portal_digitalnet_fora_do_ar_abre_disjuntor(disjuntor, monkeypatch, erro_navegacao):
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from backend.rpa.checkpoint import RepositorioCheckpoints
+    from backend.rpa.digitalnet_rpa import DigitalnetRPA
+
+    monkeypatch.setattr("backend.rpa.checkpoint._repositorio", RepositorioCheckpoints())
+    monkeypatch.setattr("backend.rpa.checkpoint.obter_cliente_redis", lambda: None)
+    monkeypatch.setattr("backend.utils.sessao_portal.obter_cliente_redis", lambda: None)
+    driver = DriverForaDoAr({
+        "timeout": TimeoutException("timeout carregando página"),
+        "pagina_de_erro": WebDriverException("Reached error page: about:neterror?e=connectionFailure"),
+        "formulario_ausente": None,
+    }[erro_navegacao])
+
+    class DigitalnetForaDoAr(DigitalnetRPA):
+        def __init__(self):
+            super().__init__()
+            self.file_manager = FileManagerFalso()
+
+        def _criar_driver_manager(self):
+            return GerenciadorDriverFalso(driver)
+
+    concentrador = ConcentradorRPA()
+    concentrador.rpas_registrados.registrar("DIG", DigitalnetForaDoAr)
+    parametros = ParametrosEntradaPadrao(
+        id_processo="1", id_cliente="1", operadora_codigo="DIG",
+        url_portal="http://localhost", usuario="u", senha="s"
+    )
+
+    resultados = [
+        concentrador.executar_operacao(TipoOperacao.DOWNLOAD_FATURA, parametros)
+        for _ in range(disjuntor.limiar_falhas)
+    ]
+
+    assert all(r.classe_falha != ClasseFalha.AUTENTICACAO.value for r in resultados)
+    assert disjuntor.estado("DIG") == EstadoDisjuntor.ABERTO
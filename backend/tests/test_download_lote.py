@@ -0,0 +1,219 @@
+"""
+Testes do download em lote por credencial do portal
+Valida a validação do lote no concentrador, a vaga/registro únicos por lote
+e o agrupamento dos processos no orquestrador
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from types import SimpleNamespace
+
+import pytest
+
+from backend.rpa.disjuntor import DisjuntorOperadoras
+from backend.rpa.limitador_concorrencia import LimitadorConcorrencia
+from backend.rpa.rpa_base import (
+    ADIADO_DISJUNTOR,
+    ADIADO_LIMITADOR,
+    ConcentradorRPA,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+    TipoOperacao,
+)
+
+
+@pytest.fixture
+def contadores(monkeypatch):
+    """Disjuntor e limitador isolados, contando vagas e registros"""
+    contadores = {"vagas": 0, "registros": 0}
+    limitador = LimitadorConcorrencia(espera_maxima_segundos=0, intervalo_espera=0.01)
+    disjuntor = DisjuntorOperadoras(limiar_falhas=3, janela_segundos=60, tempo_aberto_segundos=30)
+    adquirir, registrar = limitador.adquirir, disjuntor.registrar_resultado
+
+    def adquirir_contando(*args, **kwargs):
+        contadores["vagas"] += 1
+        return adquirir(*args, **kwargs)
+
+    def registrar_contando(*args, **kwargs):
+        contadores["registros"] += 1
+        return registrar(*args, **kwargs)
+
+    monkeypatch.setattr(limitador, "adquirir", adquirir_contando)
+    monkeypatch.setattr(disjuntor, "registrar_resultado", registrar_contando)
+    monkeypatch.setattr("backend.rpa.limitador_concorrencia._limitador", limitador)
+    monkeypatch.setattr("backend.rpa.disjuntor._disjuntor", disjuntor)
+    return contadores
+
+
+class RPALote:
+    def __init__(self, resultados=None):
+        self.lotes = []
+        self.resultados = resultados
+
+    def executar_download_lote(self, lista_parametros):
+        self.lotes.append([parametros.id_processo for parametros in lista_parametros])
+        if self.resultados is not None:
+            return self.resultados
+        return [
+            ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+            for _ in lista_parametros
+        ]
+
+    def _log_operacao(self, *args):
+        pass
+
+
+def criar_concentrador(rpa):
+    concentrador = ConcentradorRPA(operadoras_habilitadas=["EMB"])
+    concentrador.rpas_registrados.registrar("EMB", lambda: rpa)
+    return concentrador
+
+
+def criar_parametros(id_processo, usuario="u", senha="s"):
+    return ParametrosEntradaPadrao(
+        id_processo=id_processo, id_cliente="1", operadora_codigo="EMB",
+        url_portal="http://localhost", usuario=usuario, senha=senha
+    )
+
+
+def test_lote_ocupa_uma_vaga_e_um_registro_no_disjuntor(contadores):
+    rpa = RPALote()
+
+    resultados = criar_concentrador(rpa).executar_lote(
+        TipoOperacao.DOWNLOAD_FATURA_LOTE, [criar_parametros(str(i)) for i in range(3)]
+    )
+
+    assert all(resultado.sucesso for resultado in resultados)
+    assert rpa.lotes == [["0", "1", "2"]]
+    assert contadores == {"vagas": 1, "registros": 1}
+
+
+def test_lote_com_credenciais_misturadas_e_recusado(contadores):
+    rpa = RPALote()
+
+    resultados = criar_concentrador(rpa).executar_lote(
+        TipoOperacao.DOWNLOAD_FATURA_LOTE, [criar_parametros("1"), criar_parametros("2", usuario="outro")]
+    )
+
+    assert [resultado.status for resultado in resultados] == [StatusExecucao.ERRO] * 2
+    assert "única credencial" in resultados[0].mensagem
+    assert rpa.lotes == []
+    assert contadores == {"vagas": 0, "registros": 0}
+
+
+def test_lote_sem_login_e_recusado(contadores):
+    rpa = RPALote()
+
+    resultados = criar_concentrador(rpa).executar_lote(
+        TipoOperacao.DOWNLOAD_FATURA_LOTE, [criar_parametros("1", usuario=""), criar_parametros("2", usuario="")]
+    )
+
+    assert not any(resultado.sucesso for resultado in resultados)
+    assert rpa.lotes == []
+
+
+def test_quantidade_de_resultados_diferente_do_lote(contadores):
+    rpa = RPALote(resultados=[ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")])
+
+    resultados = criar_concentrador(rpa).executar_lote(
+        TipoOperacao.DOWNLOAD_FATURA_LOTE, [criar_parametros("1"), criar_parametros("2")]
+    )
+
+    assert len(resultados) == 2
+    assert all(resultado.mensagem == "Resultado do lote inconsistente" for resultado in resultados)
+    assert contadores == {"vagas": 1, "registros": 1}
+
+
+def criar_item(processo_id, login, senha="s"):
+    return {"processo_id": processo_id, "parametros_cliente": {"login_portal": login, "senha_portal": senha}}
+
+
+def test_agrupamento_por_credencial(monkeypatch):
+    orquestrador = pytest.importorskip("backend.services.orquestrador_celery")
+    monkeypatch.setattr(orquestrador, "TAMANHO_MAXIMO_LOTE", 2)
+    itens = [
+        criar_item("1", "a"), criar_item("2", "a"), criar_item("3", "a"),
+        criar_item("4", "b"), criar_item("5", "a", senha="outra"),
+        criar_item("6", None), criar_item("7", ""), criar_item("8", "  "),
+    ]
+
+    lotes = [[item["processo_id"] for item in lote] for lote in orquestrador._agrupar_por_credencial(itens)]
+
+    assert sorted(lotes) == [["1", "2"], ["3"], ["4"], ["5"], ["6"], ["7"], ["8"]]
+
+
+def test_tamanho_do_lote_cabe_no_limite_da_task(monkeypatch):
+    orquestrador = pytest.importorskip("backend.services.orquestrador_celery")
+    monkeypatch.setattr(orquestrador, "obter_timeouts_adaptativos", lambda: SimpleNamespace(processos_por_task=lambda operadora: None))
+
+    # Sem histórico: (25 min de soft_time_limit - 120s de margem) / 90s por processo
+    assert orquestrador._tamanho_lote("EMB") == 15
+    assert orquestrador._prazo_lote(SimpleNamespace(request=SimpleNamespace(timelimit=(None, 600)))) == 480
+
+    monkeypatch.setattr(orquestrador, "obter_timeouts_adaptativos", lambda: SimpleNamespace(processos_por_task=lambda operadora: 40))
+    assert orquestrador._tamanho_lote("EMB") == orquestrador.TAMANHO_MAXIMO_LOTE
+
+
+def test_task_de_lote_registra_um_resultado_por_processo(monkeypatch):
+    orquestrador = pytest.importorskip("backend.services.orquestrador_celery")
+    executados, registrados = [], []
+
+    class ConcentradorFalso:
+        def executar_lote(self, operacao, lista_parametros):
+            executados.append([parametros.id_processo for parametros in lista_parametros])
+            return [
+                ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok"),
+                ResultadoSaidaPadrao(sucesso=False, status=StatusExecucao.CANCELADO, mensagem="cancelada"),
+            ]
+
+    monkeypatch.setattr(orquestrador, "concentrador_rpa", ConcentradorFalso())
+    monkeypatch.setattr(
+        orquestrador, "_registrar_resultado_download",
+        lambda processo_id, resultado: registrados.append((processo_id, resultado.status))
+    )
+
+    retorno = orquestrador.executar_download_lote_rpa.run("EMB", [criar_item("1", "a"), criar_item("2", "a")])
+
+    assert executados == [["1", "2"]]
+    assert registrados == [("1", StatusExecucao.SUCESSO), ("2", StatusExecucao.CANCELADO)]
+    assert [item["cancelada"] for item in retorno] == [False, True]
+
+
+def test_lote_adiado_pelo_limitador_informa_o_componente(contadores, monkeypatch):
+    rpa = RPALote()
+    monkeypatch.setattr("backend.rpa.limitador_concorrencia._limitador.adquirir", lambda *args, **kwargs: None)
+
+    resultados = criar_concentrador(rpa).executar_lote(
+        TipoOperacao.DOWNLOAD_FATURA_LOTE, [criar_parametros("1"), criar_parametros("2")]
+    )
+
+    assert [resultado.status for resultado in resultados] == [StatusExecucao.ADIADO] * 2
+    assert resultados[0].adiado_por == ADIADO_LIMITADOR
+    assert rpa.lotes == []
+
+
+@pytest.mark.parametrize("adiado_por, limite", [(ADIADO_LIMITADOR, 31), (ADIADO_DISJUNTOR, 12)])
+def test_adiamento_do_limitador_nao_esgota_reagendamentos(monkeypatch, adiado_por, limite):
+    orquestrador = pytest.importorskip("backend.services.orquestrador_celery")
+    from celery.exceptions import Retry
+    monkeypatch.setattr(orquestrador, "MAX_ADIAMENTOS", 12)
+    reagendamentos = []
+
+    class TaskFalsa:
+        request = SimpleNamespace(id="t1", retries=30)
+
+        def retry(self, countdown=None, max_retries=None):
+            reagendamentos.append(max_retries)
+            return Retry(when=countdown)
+
+    adiado = ResultadoSaidaPadrao(
+        sucesso=False, status=StatusExecucao.ADIADO, mensagem="adiada",
+        dados_especificos={"adiar_por_segundos": 60}, adiado_por=adiado_por
+    )
+
+    with pytest.raises(Retry):
+        orquestrador._reagendar_se_adiado(TaskFalsa(), adiado)
+    assert reagendamentos == [limite]
@@ -0,0 +1,66 @@
+"""
+Testes dos diretórios de download por execução
+e da espera de conclusão de downloads
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils.downloads import aguardar_download, criar_diretorio_execucao
+
+
+def test_diretorio_exclusivo_por_processo(tmp_path, monkeypatch):
+    monkeypatch.setenv("RPA_DOWNLOAD_DIR", str(tmp_path))
+
+    dir_a = criar_diretorio_execucao("proc-1")
+    dir_b = criar_diretorio_execucao("proc/2")
+
+    assert dir_a != dir_b
+    assert os.path.isdir(dir_a) and os.path.isdir(dir_b)
+    assert os.path.dirname(dir_b) == os.path.join(str(tmp_path), "execucoes")
+
+
+def test_limpeza_remove_apenas_o_diretorio_da_execucao(tmp_path, monkeypatch):
+    from backend.utils.file_manager import FileManager
+
+    monkeypatch.setenv("RPA_DOWNLOAD_DIR", str(tmp_path))
+    file_manager = FileManager()
+    diretorio = file_manager.preparar_diretorio_execucao("proc-1")
+    open(os.path.join(diretorio, "fatura.pdf"), "wb").close()
+
+    file_manager.limpar_diretorio_execucao(file_manager.get_download_dir())
+    file_manager.limpar_diretorio_execucao(diretorio)
+
+    assert not os.path.exists(diretorio)
+    assert os.path.isdir(str(tmp_path))
+
+
+def test_aguarda_fim_do_arquivo_parcial(tmp_path):
+    (tmp_path / "fatura.pdf").write_bytes(b"%PDF-1.4 parcial")
+    (tmp_path / "fatura.pdf.part").write_bytes(b"x")
+
+    def concluir():
+        time.sleep(0.2)
+        os.remove(tmp_path / "fatura.pdf.part")
+
+    thread = threading.Thread(target=concluir)
+    thread.start()
+    inicio = time.monotonic()
+    arquivo = aguardar_download(str(tmp_path), timeout=5)
+    thread.join()
+
+    assert arquivo == str(tmp_path / "fatura.pdf")
+    assert time.monotonic() - inicio < 1
+
+
+def test_filtra_por_padrao_e_ignora_vazios(tmp_path):
+    (tmp_path / "outro.pdf").write_bytes(b"%PDF")
+    (tmp_path / "123_vazio.pdf").write_bytes(b"")
+
+    assert aguardar_download(str(tmp_path), padrao="123", timeout=0.3) is None
+
+    (tmp_path / "123_fatura.pdf").write_bytes(b"%PDF")
+    assert aguardar_download(str(tmp_path), padrao="123", timeout=1) == str(tmp_path / "123_fatura.pdf")
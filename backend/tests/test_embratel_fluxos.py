@@ -0,0 +1,293 @@
+"""
+Testes dos fluxos da Embratel com navegador simulado
+Valida o lote (retomada por checkpoint antes de abrir o portal) e a captura
+dos documentos da fatura em abas com renderização paralela
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from backend.rpa.checkpoint import EtapaCheckpoint, RepositorioCheckpoints, obter_repositorio_checkpoints
+from backend.rpa.embratel_rpa import EmbratelRPA
+from backend.rpa.rpa_base import ParametrosEntradaPadrao, ResultadoSaidaPadrao, StatusExecucao
+
+
+@pytest.fixture(autouse=True)
+def diretorio_downloads(tmp_path, monkeypatch):
+    monkeypatch.setenv("RPA_DOWNLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr("backend.rpa.checkpoint._repositorio", RepositorioCheckpoints())
+    monkeypatch.setattr("backend.rpa.checkpoint.obter_cliente_redis", lambda: None)
+    return tmp_path
+
+
+class SwitchToFalso:
+    def window(self, handle):
+        pass
+
+
+class DriverFalso:
+    current_url = "http://localhost/area-logada"
+    current_window_handle = "principal"
+    window_handles = ["principal"]
+
+    def __init__(self):
+        self.switch_to = SwitchToFalso()
+        self.navegacoes = []
+
+    def get(self, url):
+        self.navegacoes.append(url)
+
+
+class GerenciadorDriverFalso:
+    def __init__(self):
+        self.drivers = []
+
+    def obter_driver(self):
+        self.drivers.append(DriverFalso())
+        return self.drivers[-1]
+
+    def obter_wait(self, driver):
+        return None
+
+    def liberar_driver(self):
+        pass
+
+
+class FileManagerFalso:
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+
+    def preparar_diretorio_execucao(self, id_processo):
+        return str(self.diretorio)
+
+
+class EmbratelFalso(EmbratelRPA):
+    def __init__(self, diretorio):
+        super().__init__()
+        self.file_manager = FileManagerFalso(diretorio)
+        self.gerenciador = GerenciadorDriverFalso()
+        self.logins = 0
+        self.baixados = []
+        self.checkpoints = []
+
+    def _criar_driver_manager(self):
+        return self.gerenciador
+
+    def _autenticar(self, parametros):
+        self.logins += 1
+        self.window_id = self.driver.current_window_handle
+
+    def _registrar_checkpoint(self, parametros, etapa, **dados):
+        self.checkpoints.append((parametros.id_processo, etapa))
+        super()._registrar_checkpoint(parametros, etapa, **dados)
+
+    def _baixar_fatura_autenticado(self, parametros, timestamp_inicio):
+        self.baixados.append(parametros.id_processo)
+        return ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="portal")
+
+
+def criar_parametros(id_processo):
+    return ParametrosEntradaPadrao(
+        id_processo=id_processo, id_cliente="cli-1", operadora_codigo="EMBRATEL",
+        url_portal="http://localhost", usuario="u", senha="s"
+    )
+
+
+def concluir_upload(id_processo):
+    obter_repositorio_checkpoints().salvar(id_processo, EtapaCheckpoint.UPLOAD_CONCLUIDO, url_s3=f"s3://{id_processo}")
+
+
+def test_lote_retoma_concluidos_e_abre_portal_para_pendentes(tmp_path):
+    concluir_upload("proc-1")
+    rpa = EmbratelFalso(tmp_path)
+
+    resultados = rpa.executar_download_lote([criar_parametros("proc-1"), criar_parametros("proc-2")])
+
+    assert [resultado.sucesso for resultado in resultados] == [True, True]
+    assert resultados[0].url_s3 == "s3://proc-1"
+    assert resultados[1].mensagem == "portal"
+    assert rpa.baixados == ["proc-2"]
+    assert rpa.logins == 1
+    assert ("proc-2", EtapaCheckpoint.LOGIN) in rpa.checkpoints
+    assert ("proc-1", EtapaCheckpoint.LOGIN) not in rpa.checkpoints
+
+
+def test_lote_totalmente_retomado_nao_abre_portal(tmp_path):
+    concluir_upload("proc-1")
+    concluir_upload("proc-2")
+    rpa = EmbratelFalso(tmp_path)
+
+    resultados = rpa.executar_download_lote([criar_parametros("proc-1"), criar_parametros("proc-2")])
+
+    assert [resultado.url_s3 for resultado in resultados] == ["s3://proc-1", "s3://proc-2"]
+    assert rpa.gerenciador.drivers == []
+    assert rpa.logins == 0
+
+
+def test_contexto_acompanha_o_processo_de_cada_item(tmp_path):
+    class EmbratelContexto(EmbratelFalso):
+        def _baixar_fatura_autenticado(self, parametros, timestamp_inicio):
+            self.baixados.append(self.contexto.parametros.id_processo)
+            return ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="portal")
+
+    rpa = EmbratelContexto(tmp_path)
+
+    rpa.executar_download_lote([criar_parametros(f"proc-{i}") for i in (1, 2, 3)])
+
+    assert rpa.baixados == ["proc-1", "proc-2", "proc-3"]
+
+
+def test_lote_cancelado_mantem_faturas_ja_baixadas(tmp_path):
+    from backend.utils.cancelamento import ExecucaoCancelada
+
+    class EmbratelCancelado(EmbratelFalso):
+        def _baixar_fatura_autenticado(self, parametros, timestamp_inicio):
+            if parametros.id_processo == "proc-2":
+                raise ExecucaoCancelada("Execução task-1 cancelada")
+            return super()._baixar_fatura_autenticado(parametros, timestamp_inicio)
+
+    rpa = EmbratelCancelado(tmp_path)
+
+    resultados = rpa.executar_download_lote([criar_parametros(f"proc-{i}") for i in (1, 2, 3)])
+
+    assert [resultado.status for resultado in resultados] == [
+        StatusExecucao.SUCESSO, StatusExecucao.CANCELADO, StatusExecucao.CANCELADO
+    ]
+    assert rpa.baixados == ["proc-1"]
+
+
+# ---- Documentos da fatura: abas, HTML e renderização paralela ----
+
+class NavegadorDocumentos:
+    """
+    Portal simulado: cada clique em documento abre uma aba nova.
+    Os handles são devolvidos fora da ordem de abertura, como no Chrome.
+    """
+
+    def __init__(self, tipos_nf=("ICMS", "ISS")):
+        from backend.rpa import embratel_rpa
+
+        self.paginas = {"principal": "<html>área logada</html>"}
+        self.atual = "principal"
+        self.abertas = 0
+        self.switch_to = self
+        self.documentos = {xpath: documento for documento, xpath, _ in embratel_rpa.DOCUMENTOS_FATURA}
+        self.documentos[embratel_rpa.XPATH_AREA_NF] = "Nota Fiscal"
+        self.documentos.update({xpath: documento for documento, _, xpath in embratel_rpa.DOCUMENTOS_NF})
+        self.nfs_disponiveis = {xpath for _, tipo, xpath in embratel_rpa.DOCUMENTOS_NF if tipo in tipos_nf}
+
+    @property
+    def window_handles(self):
+        handles = list(self.paginas)
+        return handles[:1] + handles[1:][::-1]
+
+    @property
+    def current_window_handle(self):
+        return self.atual
+
+    @property
+    def page_source(self):
+        return self.paginas[self.atual]
+
+    def window(self, handle):
+        self.atual = handle
+
+    def close(self):
+        del self.paginas[self.atual]
+
+    def find_elements(self, by, xpath):
+        return [object()] if self.paginas.get(self.atual) == "<html>Nota Fiscal</html>" and xpath in self.nfs_disponiveis else []
+
+    def clicar(self, xpath):
+        self.abertas += 1
+        self.paginas[f"aba-{self.abertas}"] = f"<html>{self.documentos[xpath]}</html>"
+
+
+class EmbratelDocumentos(EmbratelRPA):
+    def __init__(self, diretorio, falhar_em=None):
+        super().__init__()
+        self.diretorio_execucao_teste = str(diretorio)
+        self.falhar_em = falhar_em
+
+    def _clicar_elemento_por_xpath(self, xpath, info):
+        self.driver.clicar(xpath)
+
+    def _html_para_pdf(self, html_content, file_name, css=False):
+        if os.path.basename(file_name) == self.falhar_em:
+            raise OSError("wkhtmltopdf terminou com erro")
+        with open(file_name, "w") as arquivo:
+            arquivo.write(f"{html_content}|css={css}")
+        return True
+
+
+@pytest.fixture
+def documentos(monkeypatch, tmp_path):
+    monkeypatch.setattr("backend.rpa.embratel_rpa.esperas.aguardar_rede_ociosa", lambda driver, *args, **kwargs: True)
+
+    def executar(tipos_nf=("ICMS", "ISS"), falhar_em=None):
+        rpa = EmbratelDocumentos(tmp_path, falhar_em)
+        driver = NavegadorDocumentos(tipos_nf)
+        with rpa.contexto_execucao():
+            rpa.driver = driver
+            rpa.window_id = "principal"
+            rpa.diretorio_execucao = str(tmp_path)
+            arquivos = rpa._baixando_all_docs()
+        return driver, [os.path.basename(arquivo) for arquivo in arquivos]
+
+    return executar
+
+
+def test_documentos_na_ordem_do_pdf_e_abas_fechadas(documentos, tmp_path):
+    driver, arquivos = documentos()
+
+    assert arquivos == ["Fatura.pdf", "Boleto.pdf", "NF_ICMS.pdf", "NF_ISS.pdf"]
+    # Cada PDF recebe o HTML da própria aba, mesmo com handles fora de ordem
+    for nome in arquivos:
+        conteudo = (tmp_path / nome).read_text()
+        assert conteudo.startswith(f"<html>{nome}</html>")
+    assert (tmp_path / "Fatura.pdf").read_text().endswith("css=True")
+    assert driver.window_handles == ["principal"]
+    assert driver.current_window_handle == "principal"
+
+
+@pytest.mark.parametrize("tipos_nf, esperados", [
+    (("ISS",), ["Fatura.pdf", "Boleto.pdf", "NF_ISS.pdf"]),
+    (("ICMS",), ["Fatura.pdf", "Boleto.pdf", "NF_ICMS.pdf"]),
+    ((), ["Fatura.pdf", "Boleto.pdf"]),
+])
+def test_nf_ausente_nao_gera_documento(documentos, tipos_nf, esperados):
+    driver, arquivos = documentos(tipos_nf)
+
+    assert arquivos == esperados
+    assert driver.window_handles == ["principal"]
+
+
+def test_falha_de_renderizacao_descarta_apenas_o_documento(documentos, tmp_path):
+    driver, arquivos = documentos(falhar_em="Boleto.pdf")
+
+    assert arquivos == ["Fatura.pdf", "NF_ICMS.pdf", "NF_ISS.pdf"]
+    assert not (tmp_path / "Boleto.pdf").exists()
+
+
+def test_soft_time_limit_encerra_lote_sem_perder_faturas(tmp_path):
+    from backend.utils.cancelamento import SoftTimeLimitExceeded
+
+    class EmbratelSemTempo(EmbratelFalso):
+        def _baixar_fatura_autenticado(self, parametros, timestamp_inicio):
+            if parametros.id_processo == "proc-2":
+                raise SoftTimeLimitExceeded()
+            return super()._baixar_fatura_autenticado(parametros, timestamp_inicio)
+
+    rpa = EmbratelSemTempo(tmp_path)
+
+    resultados = rpa.executar_download_lote([criar_parametros(f"proc-{i}") for i in (1, 2, 3)])
+
+    assert [resultado.status for resultado in resultados] == [
+        StatusExecucao.SUCESSO, StatusExecucao.CANCELADO, StatusExecucao.CANCELADO
+    ]
+    assert rpa.baixados == ["proc-1"]
@@ -0,0 +1,61 @@
+"""
+Testes das esperas condicionais e do relatório de sleeps x esperas
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from backend.utils import esperas
+from backend.utils.esperas import MedidorEsperas, ativar_medidor
+
+
+class DriverFalso:
+    def __init__(self):
+        self.window_handles = ["principal"]
+        self.current_url = "https://portal/login"
+
+
+def test_medidor_separa_sleep_e_espera_por_etapa():
+    medidor = MedidorEsperas()
+    driver = DriverFalso()
+
+    with ativar_medidor(medidor):
+        medidor.etapa_atual = "login"
+        esperas.aguardar(0.01)
+        medidor.etapa_atual = "download"
+        esperas.aguardar_condicao(driver, lambda d: True)
+        esperas.aguardar_condicao(driver, lambda d: False, timeout=0.05)
+
+    relatorio = medidor.relatorio()
+    assert relatorio["etapas"]["login"]["sleep"] > 0
+    assert relatorio["etapas"]["download"]["quantidade"] == 2
+    assert relatorio["etapas"]["download"]["timeouts"] == 1
+    assert relatorio["sleep_total"] >= 0.01
+
+
+def test_sem_medidor_ativo_nao_registra():
+    assert esperas.medidor_ativo() is None
+    esperas.aguardar(0)
+
+
+def test_aguardar_nova_aba_e_mudanca_url():
+    driver = DriverFalso()
+    anteriores = list(driver.window_handles)
+
+    def abrir():
+        driver.window_handles = driver.window_handles + ["documento"]
+        driver.current_url = "https://portal/home"
+
+    threading.Timer(0.05, abrir).start()
+    assert esperas.aguardar_nova_aba(driver, anteriores, timeout=2) == "documento"
+    assert esperas.aguardar_mudanca_url(driver, "https://portal/login", timeout=2) == "https://portal/home"
+
+
+def test_aguardar_inicio_download(tmp_path):
+    (tmp_path / "antigo.pdf").write_bytes(b"x")
+
+    threading.Timer(0.05, lambda: (tmp_path / "fatura.pdf.part").write_bytes(b"")).start()
+    assert esperas.aguardar_inicio_download(str(tmp_path), ["antigo.pdf"], timeout=2) == "fatura.pdf.part"
+    assert esperas.aguardar_inicio_download(str(tmp_path), os.listdir(tmp_path), timeout=0.1) is None
@@ -0,0 +1,69 @@
+"""
+Testes da extração declarativa de listagens
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils.extracao_dom import (
+    CampoExtracao,
+    EspecificacaoExtracao,
+    extrair_do_driver,
+    extrair_de_html,
+    xpath_classe,
+)
+
+ESPEC = EspecificacaoExtracao(
+    linhas=f"//div[{xpath_classe('fatura-item')}]",
+    campos=(
+        CampoExtracao("numero", f".//span[{xpath_classe('numero')}]", obrigatorio=True),
+        CampoExtracao("link", ".//a", "href"),
+    )
+)
+
+HTML = """
+<html><body>
+  <div class="fatura-item"><span class="numero"> 123 </span><a href="/pdf/123">baixar</a></div>
+  <div class="fatura-item destaque"><span class="numero">456</span></div>
+  <div class="fatura-item"><span class="outro">sem número</span></div>
+</body></html>
+"""
+
+
+class DriverFalso:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.chamadas = []
+
+    def execute_script(self, script, *args):
+        self.chamadas.append(args)
+        return self.linhas
+
+
+def test_extrai_todas_as_linhas_em_uma_chamada():
+    driver = DriverFalso([
+        {"numero": "123", "link": "https://portal/pdf/123"},
+        {"numero": None, "link": None},
+        {"numero": "456", "link": None},
+    ])
+
+    itens = extrair_do_driver(driver, ESPEC)
+
+    assert len(driver.chamadas) == 1
+    assert driver.chamadas[0][0]["campos"][1] == {"nome": "link", "xpath": ".//a", "atributo": "href"}
+    assert [item["numero"] for item in itens] == ["123", "456"]
+    assert [item["_indice"] for item in itens] == [0, 2]
+    assert ESPEC.xpath_linha(2).endswith(")[3]")
+
+
+def test_extrai_de_snapshot_html():
+    pytest.importorskip("lxml")
+
+    itens = extrair_de_html(HTML, ESPEC, url_base="https://portal")
+
+    assert itens[0] == {"numero": "123", "link": "https://portal/pdf/123", "_indice": 0}
+    assert itens[1]["numero"] == "456" and itens[1]["link"] is None
+    assert len(itens) == 2
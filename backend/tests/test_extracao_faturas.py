@@ -0,0 +1,91 @@
+"""
+Testes da extração de dados das faturas PDF
+Valida os templates por operadora, o pool de processos e o cache por hash
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.services import extracao_faturas
+from backend.services.extracao_faturas import ExtratorFaturas, aplicar_template
+from backend.benchmarks.simulador_portais import gerar_pdf
+
+TEXTO_FATURA = (
+    "Fatura de servicos Total a pagar R$ 1.234,56 Vencimento: 10/06/2025 "
+    "23790.12345 60000.123456 78901.234567 8 90000000012345"
+)
+
+
+@pytest.fixture(autouse=True)
+def sem_redis(monkeypatch):
+    monkeypatch.setattr(extracao_faturas, "obter_cliente_redis", lambda: None)
+
+
+def test_template_padrao_extrai_campos():
+    dados = aplicar_template(TEXTO_FATURA, "AZU")
+
+    assert dados == {
+        "valor": 1234.56,
+        "vencimento": "10/06/2025",
+        "linha_digitavel": "23790123456000012345678901234567890000000012345",
+    }
+
+
+def test_template_da_operadora_tem_prioridade():
+    texto = "Valor total R$ 10,00 Total desta fatura: R$ 99,90 Data de vencimento 05.07.2025"
+
+    assert aplicar_template(texto, "EMB")["valor"] == 99.90
+    assert aplicar_template(texto, "EMB")["vencimento"] == "05/07/2025"
+    assert aplicar_template(texto, "DIG")["valor"] == 10.00
+
+
+def test_lote_em_processos_usa_cache_na_segunda_passada(tmp_path):
+    pytest.importorskip("PyPDF2")
+    itens = []
+    for indice in range(3):
+        caminho = tmp_path / f"fatura_{indice}.pdf"
+        caminho.write_bytes(gerar_pdf(TEXTO_FATURA.replace("10/06", f"1{indice}/06")))
+        itens.append((str(caminho), "VIV"))
+    itens.append((str(tmp_path / "inexistente.pdf"), "VIV"))
+
+    extrator = ExtratorFaturas(max_processos=2)
+    try:
+        resultados, estatisticas = extrator.extrair_lote(itens)
+        assert [dados.get("vencimento") for dados in resultados[:3]] == ["10/06/2025", "11/06/2025", "12/06/2025"]
+        assert "erro" in resultados[3]
+        assert (estatisticas.extraidos, estatisticas.falhas) == (3, 1)
+
+        _, estatisticas = extrator.extrair_lote(itens[:3])
+        assert (estatisticas.cache, estatisticas.extraidos) == (3, 0)
+    finally:
+        extrator.encerrar()
+
+
+def test_backlog_le_fatura_armazenada_e_local_sem_artefato(tmp_path, monkeypatch):
+    from backend.utils.cliente_storage import ClienteStorageMemoria
+    from backend.utils.downloads import caminho_diretorio_execucao
+
+    monkeypatch.setenv("RPA_DOWNLOAD_DIR", str(tmp_path / "downloads"))
+    storage = ClienteStorageMemoria()
+    armazenada = tmp_path / "armazenada.pdf"
+    armazenada.write_bytes(b"%PDF armazenada")
+    storage.enviar_arquivo(str(armazenada), "artefatos/sha256/ab/abc.pdf")
+    monkeypatch.setattr(extracao_faturas, "obter_cliente_storage", lambda: storage)
+    monkeypatch.setattr(
+        extracao_faturas, "chave_processo",
+        lambda db, processo_id: "artefatos/sha256/ab/abc.pdf" if processo_id == "proc-1" else None
+    )
+    local = caminho_diretorio_execucao("proc-2") / "fatura.pdf"
+    local.parent.mkdir(parents=True)
+    local.write_bytes(b"%PDF local")
+    copias = tmp_path / "copias"
+    copias.mkdir()
+
+    copia = extracao_faturas.obter_pdf_processo(None, "proc-1", str(copias))
+
+    assert open(copia, "rb").read() == b"%PDF armazenada"
+    assert extracao_faturas.obter_pdf_processo(None, "proc-2", str(copias)) == str(local)
+    assert extracao_faturas.obter_pdf_processo(None, "proc-3", str(copias)) is None
@@ -0,0 +1,112 @@
+"""
+Testes do limitador adaptativo de concorrência por operadora
+Valida vagas, ajuste AIMD e adiamento no concentrador
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.rpa.disjuntor import ClasseFalha
+from backend.rpa.limitador_concorrencia import LimitadorConcorrencia, obter_configuracao_limite
+from backend.rpa.rpa_base import (
+    ConcentradorRPA,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+    TipoOperacao,
+)
+
+
+def sucesso():
+    return ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+
+
+def falha(classe):
+    return ResultadoSaidaPadrao(sucesso=False, status=StatusExecucao.ERRO, mensagem="x", classe_falha=classe.value)
+
+
+@pytest.fixture
+def limitador(monkeypatch):
+    limitador = LimitadorConcorrencia(espera_maxima_segundos=0, intervalo_espera=0.01)
+    monkeypatch.setattr("backend.rpa.limitador_concorrencia._limitador", limitador)
+    return limitador
+
+
+def test_respeita_limite_inicial(limitador):
+    inicial = int(obter_configuracao_limite("EMB").inicial)
+    vagas = [limitador.tentar_adquirir("EMB") for _ in range(inicial)]
+
+    assert all(vagas)
+    assert limitador.tentar_adquirir("EMB") is None
+    assert limitador.em_uso("EMB") == inicial
+
+    limitador.liberar(vagas[0])
+
+    assert limitador.tentar_adquirir("EMB") is not None
+
+
+def test_aumento_aditivo_e_reducao_multiplicativa(limitador):
+    configuracao = obter_configuracao_limite("DIG")
+    for _ in range(20):
+        limitador.liberar(limitador.tentar_adquirir("DIG"), sucesso())
+    aumentado = limitador.limite_atual("DIG")
+    assert configuracao.inicial < aumentado <= configuracao.maximo
+
+    limitador.liberar(limitador.tentar_adquirir("DIG"), falha(ClasseFalha.CAPTCHA))
+    assert limitador.limite_atual("DIG") == pytest.approx(aumentado * configuracao.fator_reducao)
+
+    # Falhas simultâneas reduzem uma única vez por intervalo
+    limitador.liberar(limitador.tentar_adquirir("DIG"), falha(ClasseFalha.TIMEOUT))
+    assert limitador.limite_atual("DIG") == pytest.approx(aumentado * configuracao.fator_reducao)
+
+
+def test_falha_de_credencial_nao_ajusta(limitador):
+    inicial = limitador.limite_atual("VIV")
+    limitador.liberar(limitador.tentar_adquirir("VIV"), falha(ClasseFalha.AUTENTICACAO))
+
+    assert limitador.limite_atual("VIV") == inicial
+
+
+def test_reserva_vencida_libera_vaga(monkeypatch):
+    limitador = LimitadorConcorrencia(duracao_reserva_segundos=1)
+    inicial = int(obter_configuracao_limite("SAT").inicial)
+    for _ in range(inicial):
+        limitador.tentar_adquirir("SAT")
+    assert limitador.tentar_adquirir("SAT") is None
+
+    relogio = time.time
+    monkeypatch.setattr("backend.rpa.limitador_concorrencia.time.time", lambda: relogio() + 5)
+
+    assert limitador.tentar_adquirir("SAT") is not None
+
+
+def test_concentrador_adia_sem_vaga(limitador, monkeypatch):
+    monkeypatch.setattr("backend.rpa.disjuntor._disjuntor", None)
+
+    class RPASucesso:
+        def executar_download(self, parametros):
+            return sucesso()
+
+        def _log_operacao(self, *args):
+            pass
+
+    concentrador = ConcentradorRPA()
+    concentrador.rpas_registrados.registrar("EMB", RPASucesso)
+    parametros = ParametrosEntradaPadrao(
+        id_processo="1", id_cliente="1", operadora_codigo="EMB",
+        url_portal="http://localhost", usuario="u", senha="s"
+    )
+
+    assert concentrador.executar_operacao(TipoOperacao.DOWNLOAD_FATURA, parametros).sucesso
+    assert limitador.em_uso("EMB") == 0
+
+    for _ in range(int(limitador.limite_atual("EMB"))):
+        limitador.tentar_adquirir("EMB")
+    resultado = concentrador.executar_operacao(TipoOperacao.DOWNLOAD_FATURA, parametros)
+
+    assert resultado.status == StatusExecucao.ADIADO
+    assert "Limite de execuções simultâneas" in resultado.mensagem
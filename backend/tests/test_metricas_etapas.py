@@ -0,0 +1,91 @@
+"""
+Testes das métricas de tempo por etapa
+Valida o decorator de etapa, o campo metricas_etapas do resultado e a agregação por operadora
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils import esperas
+from backend.rpa.metricas_etapas import ETAPA_NAO_MEDIDA, agregar_metricas_por_operadora
+from backend.rpa.rpa_base import (
+    RPABase,
+    ParametrosEntradaPadrao,
+    ResultadoSaidaPadrao,
+    StatusExecucao,
+    etapa_rpa,
+)
+
+
+class RPAEtapas(RPABase):
+    @etapa_rpa("login")
+    def login(self):
+        esperas.aguardar(0.01)
+        return True
+
+    def executar_download(self, parametros):
+        with self.contexto_execucao(parametros) as contexto:
+            self.login()
+            self.login()
+            with self.medir_etapa("download"):
+                pass
+            return contexto.anexar_metricas(
+                ResultadoSaidaPadrao(sucesso=True, status=StatusExecucao.SUCESSO, mensagem="ok")
+            )
+
+    def executar_upload_sat(self, parametros):
+        raise NotImplementedError
+
+
+def criar_parametros():
+    return ParametrosEntradaPadrao(
+        id_processo="1", id_cliente="1", operadora_codigo="EMB",
+        url_portal="http://localhost", usuario="u", senha="s"
+    )
+
+
+def test_decorator_registra_etapa_no_resultado():
+    rpa = RPAEtapas()
+
+    resultado = rpa.executar_download(criar_parametros())
+    etapas = resultado.metricas_etapas["etapas"]
+
+    assert etapas["login"]["chamadas"] == 2
+    assert etapas["login"]["segundos"] >= 0.02
+    assert etapas["login"]["sleep"] >= 0.02
+    assert etapas["download"]["chamadas"] == 1
+    assert resultado.metricas_etapas["total_segundos"] >= etapas["login"]["segundos"]
+
+
+def test_etapa_sem_contexto_nao_mede():
+    assert RPAEtapas().login() is True
+
+
+def test_agregacao_por_operadora():
+    def metricas(login, download):
+        return {
+            "total_segundos": login + download,
+            "etapas": {
+                "login": {"segundos": login, "sleep": 1.0, "espera": 0.0},
+                "download": {"segundos": download, "sleep": 0.0, "espera": 2.0},
+            },
+        }
+
+    agregado = agregar_metricas_por_operadora([
+        ("EMB", metricas(10, 30)),
+        ("EMB", metricas(20, 40)),
+        ("DIG", metricas(1, 2)),
+        ("DIG", None),
+    ])
+
+    embratel = agregado["EMB"]
+    assert embratel["execucoes"] == 2
+    assert list(embratel["etapas"]) == ["download", "login"]
+    assert embratel["etapas"]["login"]["p50_segundos"] == pytest.approx(15)
+    assert embratel["etapas"]["download"]["espera_segundos"] == pytest.approx(4)
+    assert embratel["etapas"]["download"]["participacao_percentual"] == pytest.approx(70)
+    assert agregado["DIG"]["execucoes"] == 1
+    assert ETAPA_NAO_MEDIDA not in embratel["etapas"]
@@ -0,0 +1,49 @@
+"""
+Testes da montagem de PDFs a partir de fluxos de bytes
+Usa os PDFs gerados pelo simulador de portais
+"""
+
+import sys
+import os
+import io
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils.montagem_pdf import DocumentoPDF, montar_pdf
+from backend.benchmarks.simulador_portais import gerar_pdf, gerar_pdf_protegido
+
+
+def test_documento_unico_copiado_sem_interpretar(tmp_path):
+    conteudo = gerar_pdf("fatura", tamanho_kb=64)
+    destino = tmp_path / "fatura.pdf"
+
+    assert montar_pdf([conteudo], str(destino)) == 1
+    assert destino.read_bytes() == conteudo
+    assert not (tmp_path / "fatura.pdf.parcial").exists()
+
+
+def test_mescla_bytes_arquivo_e_protegido_em_fluxo(tmp_path):
+    PyPDF2 = pytest.importorskip("PyPDF2")
+    arquivo = tmp_path / "nota.pdf"
+    arquivo.write_bytes(gerar_pdf("nota fiscal"))
+    destino = io.BytesIO()
+
+    montar_pdf([
+        DocumentoPDF(gerar_pdf_protegido("fatura", "000"), senha="000"),
+        str(arquivo),
+        gerar_pdf("boleto"),
+    ], destino)
+
+    leitor = PyPDF2.PdfReader(io.BytesIO(destino.getvalue()))
+    assert len(leitor.pages) == 3
+    assert not leitor.is_encrypted
+
+
+def test_falha_nao_deixa_arquivo_parcial(tmp_path):
+    pytest.importorskip("PyPDF2")
+    destino = tmp_path / "fatura.pdf"
+
+    with pytest.raises(Exception):
+        montar_pdf([gerar_pdf("fatura"), b"nao e pdf"], str(destino))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,55 @@
+"""
+Testes dos perfis de navegador por portal
+"""
+
+import sys
+import os
+import base64
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from selenium.webdriver.firefox.options import Options
+
+from backend.utils.perfis_navegador import obter_perfil, PERFIL_PADRAO, PerfilNavegador
+from backend.utils.pool_navegadores import obter_pool_navegadores
+from backend.utils.selenium_driver import SeleniumDriver
+
+
+def test_perfil_da_operadora_com_ajustes_cadastrados():
+    perfil = obter_perfil("emb", '{"largura": 1024, "padroes_bloqueados": ["*cdn.exemplo.com*"], "desconhecido": 1}')
+
+    assert perfil.estrategia_carregamento == "eager"
+    assert perfil.bloquear_imagens
+    assert perfil.largura == 1024
+    assert perfil.padroes_bloqueados == ("*cdn.exemplo.com*",)
+
+
+def test_configuracao_invalida_mantem_perfil_padrao():
+    assert obter_perfil("XYZ", "{json inválido") == PERFIL_PADRAO
+    assert obter_perfil("XYZ", {"estrategia_carregamento": "rapida"}).estrategia_carregamento == "normal"
+
+
+def test_script_pac_bloqueia_padroes():
+    perfil = PerfilNavegador(padroes_bloqueados=("*hotjar.com*",))
+    script = base64.b64decode(perfil.script_pac().split(",", 1)[1]).decode()
+
+    assert 'shExpMatch(url, "*hotjar.com*")' in script
+    assert PerfilNavegador(padroes_bloqueados=()).script_pac() is None
+
+
+def test_preferencias_firefox_do_perfil():
+    driver = SeleniumDriver(perfil=obter_perfil("EMB"), usar_pool=False)
+    options = Options()
+    driver._aplicar_perfil_firefox(options)
+
+    assert options.page_load_strategy == "eager"
+    assert options.preferences["permissions.default.image"] == 2
+    assert options.preferences["network.proxy.type"] == 2
+    assert "--width=1366" in options.arguments
+
+
+def test_pool_separado_por_perfil():
+    pool_embratel = obter_pool_navegadores("firefox", True, obter_perfil("EMB"))
+
+    assert pool_embratel is obter_pool_navegadores("firefox", True, obter_perfil("EMB"))
+    assert pool_embratel is not obter_pool_navegadores("firefox", True, obter_perfil("SAT"))
+    assert pool_embratel.configuracao.perfil.bloquear_imagens
@@ -0,0 +1,155 @@
+"""
+Testes do pool de navegadores
+Usa navegadores falsos para validar empréstimo, devolução e reciclagem
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils.pool_navegadores import PoolNavegadores, ConfiguracaoPool
+from backend.utils.selenium_driver import UsoProcessos
+
+
+class NavegadorFalso:
+    def __init__(self, rss_mb=100.0):
+        self.rss_mb = rss_mb
+        self.cpu_percentual = 0.0
+        self.ativo = True
+        self.resets = 0
+        self.finalizado = False
+
+    def esta_ativo(self):
+        return self.ativo
+
+    def resetar_sessao(self):
+        self.resets += 1
+
+    def obter_rss_mb(self):
+        return self.rss_mb
+
+    def obter_uso_processos(self):
+        return UsoProcessos(rss_mb=self.rss_mb, cpu_percentual=self.cpu_percentual, processos=2)
+
+    def finalizar(self):
+        self.finalizado = True
+
+
+def criar_pool(**kwargs):
+    criados = []
+
+    def fabrica():
+        navegador = NavegadorFalso()
+        criados.append(navegador)
+        return navegador
+
+    configuracao = ConfiguracaoPool(
+        tamanho=kwargs.get("tamanho", 2),
+        max_usos=kwargs.get("max_usos", 10),
+        max_rss_mb=kwargs.get("max_rss_mb", 1000),
+        timeout_aquisicao=kwargs.get("timeout_aquisicao", 1),
+    )
+    return PoolNavegadores(configuracao, fabrica=fabrica), criados
+
+
+def test_reutiliza_navegador_devolvido():
+    pool, criados = criar_pool()
+
+    navegador = pool.adquirir()
+    pool.devolver(navegador)
+    navegador_2 = pool.adquirir()
+
+    assert navegador_2 is navegador
+    assert navegador.resets == 1
+    assert len(criados) == 1
+
+
+def test_aquecer_cria_navegadores_ate_tamanho():
+    pool, criados = criar_pool(tamanho=3)
+
+    assert pool.aquecer() == 3
+    assert pool.estatisticas()["livres"] == 3
+    assert len(criados) == 3
+
+
+def test_recicla_apos_max_usos():
+    pool, criados = criar_pool(max_usos=2)
+
+    navegador = pool.adquirir()
+    pool.devolver(navegador)
+    navegador = pool.adquirir()
+    pool.devolver(navegador)
+
+    assert navegador.finalizado
+    assert pool.estatisticas()["reciclados"] == 1
+    assert pool.adquirir() is not navegador
+
+
+def test_recicla_acima_do_rss():
+    pool, _ = criar_pool(max_rss_mb=500)
+
+    navegador = pool.adquirir()
+    navegador.rss_mb = 900
+    pool.devolver(navegador)
+
+    assert navegador.finalizado
+    assert pool.estatisticas()["total"] == 0
+
+
+def test_recicla_navegador_ocioso_com_cpu_alta():
+    pool, criados = criar_pool()
+
+    navegador = pool.adquirir()
+    navegador.cpu_percentual = 300
+    pool.devolver(navegador)
+
+    assert not navegador.finalizado
+    assert pool.adquirir() is not navegador
+    assert navegador.finalizado
+    assert pool.estatisticas()["reciclados"] == 1
+    assert len(criados) == 2
+
+
+def test_descarta_navegador_inativo():
+    pool, criados = criar_pool()
+
+    navegador = pool.adquirir()
+    pool.devolver(navegador)
+    navegador.ativo = False
+
+    novo = pool.adquirir()
+    assert novo is not navegador
+    assert navegador.finalizado
+    assert len(criados) == 2
+
+
+def test_descarta_quando_limpeza_falha():
+    pool, _ = criar_pool()
+
+    navegador = pool.adquirir()
+    navegador.resetar_sessao = lambda: (_ for _ in ()).throw(RuntimeError("sem acesso"))
+    pool.devolver(navegador)
+
+    assert navegador.finalizado
+    assert pool.estatisticas()["livres"] == 0
+
+
+def test_timeout_quando_pool_esgotado():
+    pool, _ = criar_pool(tamanho=1)
+
+    pool.adquirir()
+    with pytest.raises(TimeoutError):
+        pool.adquirir(timeout=0.05)
+
+
+def test_aguarda_devolucao_de_outra_thread():
+    pool, _ = criar_pool(tamanho=1)
+    navegador = pool.adquirir()
+
+    timer = threading.Timer(0.05, pool.devolver, args=(navegador,))
+    timer.start()
+    assert pool.adquirir(timeout=2) is navegador
+    timer.join()
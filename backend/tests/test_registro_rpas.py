@@ -0,0 +1,73 @@
+"""
+Testes do registro preguiçoso de RPAs
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.rpa.rpa_base import RegistroRPAs, ConcentradorRPA
+
+
+def criar_registro(habilitadas=None):
+    criados = []
+
+    def fabrica():
+        instancia = object()
+        criados.append(instancia)
+        return instancia
+
+    registro = RegistroRPAs(habilitadas)
+    registro.registrar("EMB", fabrica, ["EMBRATEL"])
+    registro.registrar("DIG", fabrica, ["DIGITALNET"])
+    return registro, criados
+
+
+def test_instancia_apenas_no_primeiro_uso():
+    registro, criados = criar_registro()
+
+    assert "EMB" in registro
+    assert criados == []
+
+    rpa = registro["EMB"]
+    assert registro["emb"] is rpa
+    assert len(criados) == 1
+    assert registro.carregados() == ["EMB"]
+
+
+def test_alias_compartilha_instancia():
+    registro, criados = criar_registro()
+
+    assert registro["EMBRATEL"] is registro["EMB"]
+    assert len(criados) == 1
+
+
+def test_filtra_operadoras_do_worker():
+    registro, _ = criar_registro(habilitadas=["digitalnet"])
+
+    assert "DIG" in registro
+    assert "EMB" not in registro
+    assert "EMBRATEL" not in registro
+    with pytest.raises(KeyError):
+        registro["EMB"]
+
+
+def test_concentrador_nao_importa_rpas_na_inicializacao(monkeypatch):
+    # Outros testes da sessão podem já ter importado o módulo
+    monkeypatch.delitem(sys.modules, "backend.rpa.embratel_rpa", raising=False)
+    concentrador = ConcentradorRPA()
+
+    assert "VIVO" in concentrador.listar_rpas_disponiveis()
+    assert concentrador.verificar_rpa_disponivel("sat")
+    assert concentrador.rpas_registrados.carregados() == []
+    assert "backend.rpa.embratel_rpa" not in sys.modules
+
+
+def test_concentrador_respeita_variavel_de_ambiente(monkeypatch):
+    monkeypatch.setenv("RPA_OPERADORAS_WORKER", "EMB, SAT")
+    concentrador = ConcentradorRPA()
+
+    assert concentrador.verificar_rpa_disponivel("EMBRATEL")
+    assert not concentrador.verificar_rpa_disponivel("VIV")
@@ -0,0 +1,161 @@
+"""
+Testes do cache de sessões autenticadas dos portais
+Valida expiração pelo token, invalidação da sessão recusada, novo login
+e o armazenamento cifrado no Redis
+"""
+
+import sys
+import os
+import json
+import time
+import base64
+import hashlib
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.rpa.rpa_base import RPABase, ParametrosEntradaPadrao
+from backend.utils.sessao_portal import CacheSessoesPortal, SessaoPortal
+
+
+def criar_jwt(expira_em):
+    def parte(dados):
+        return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+    return f"{parte({'alg': 'HS256'})}.{parte({'exp': expira_em})}.assinatura"
+
+
+class RedisFalso:
+    def __init__(self):
+        self.valores = {}
+
+    def get(self, chave):
+        return self.valores.get(chave)
+
+    def setex(self, chave, ttl, valor):
+        self.valores[chave] = valor
+
+    def delete(self, chave):
+        self.valores.pop(chave, None)
+
+
+@pytest.fixture
+def redis_falso(monkeypatch):
+    redis_falso = RedisFalso()
+    monkeypatch.setattr("backend.utils.sessao_portal.obter_cliente_redis", lambda: redis_falso)
+    return redis_falso
+
+
+@pytest.fixture
+def cache(monkeypatch, redis_falso):
+    pytest.importorskip("cryptography")
+    cache = CacheSessoesPortal(segredo="segredo-do-servidor")
+    monkeypatch.setattr("backend.utils.sessao_portal._cache_sessoes", cache)
+    return cache
+
+
+def test_sessao_expira_com_o_token(cache, monkeypatch):
+    expiracao = time.time() + 120
+    cache.salvar(SessaoPortal(operadora="EMB", token=criar_jwt(expiracao)), "login", "senha")
+
+    assert cache.obter("EMB", "login", "senha").expira_em == pytest.approx(expiracao - 30)
+
+    relogio = time.time
+    monkeypatch.setattr("backend.utils.sessao_portal.time.time", lambda: relogio() + 100)
+    assert cache.obter("EMB", "login", "senha") is None
+
+
+def test_token_ja_expirado_nao_e_armazenado(cache, redis_falso):
+    cache.salvar(SessaoPortal(operadora="EMB", token=criar_jwt(time.time() + 10)), "login", "senha")
+
+    assert cache.obter("EMB", "login", "senha") is None
+    assert redis_falso.valores == {}
+
+
+def test_redis_recebe_chave_hmac_e_sessao_cifrada(cache, redis_falso):
+    token = criar_jwt(time.time() + 600)
+    cache.salvar(SessaoPortal(operadora="EMB", token=token, cookies=[{"name": "JSESSIONID", "value": "abc"}]), "login", "senha")
+
+    chave, valor = next(iter(redis_falso.valores.items()))
+    assert chave != "rpa:sessao:" + hashlib.sha256(b"EMB|login|senha").hexdigest()
+    assert token not in valor and "JSESSIONID" not in valor
+
+    # Outro worker com o mesmo segredo lê a sessão; com outro segredo, não
+    assert CacheSessoesPortal(segredo="segredo-do-servidor").obter("EMB", "login", "senha").token == token
+    assert CacheSessoesPortal(segredo="outro-segredo").obter("EMB", "login", "senha") is None
+
+
+def test_sem_segredo_sessao_fica_na_memoria(redis_falso, monkeypatch):
+    monkeypatch.delenv("RPA_SESSAO_SEGREDO", raising=False)
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+    cache = CacheSessoesPortal()
+
+    cache.salvar(SessaoPortal(operadora="EMB", token=criar_jwt(time.time() + 600)), "login", "senha")
+
+    assert cache.obter("EMB", "login", "senha") is not None
+    assert redis_falso.valores == {}
+
+
+class DriverFalso:
+    current_url = "http://localhost/area-logada"
+
+    def __init__(self, token):
+        self.token = token
+
+    def execute_script(self, script, *args):
+        return {"auth": self.token}
+
+    def get_cookies(self):
+        return [{"name": "sessao", "value": self.token}]
+
+    def get(self, url):
+        pass
+
+    def delete_all_cookies(self):
+        pass
+
+    def add_cookie(self, cookie):
+        pass
+
+
+class RPAFalso(RPABase):
+    def executar_download(self, parametros):
+        raise NotImplementedError
+
+    def executar_upload_sat(self, parametros):
+        raise NotImplementedError
+
+
+def autenticar(driver, sessao_valida):
+    logins = []
+    parametros = ParametrosEntradaPadrao(
+        id_processo="1", id_cliente="1", operadora_codigo="EMB",
+        url_portal="http://localhost", usuario="login", senha="senha"
+    )
+    autenticado = RPAFalso()._login_com_sessao(driver, parametros, lambda: logins.append(1), sessao_valida)
+    return autenticado, len(logins)
+
+
+def test_sem_sessao_em_cache_faz_login_e_captura(cache):
+    token = criar_jwt(time.time() + 600)
+
+    assert autenticar(DriverFalso(token), lambda: True) == (True, 1)
+    assert cache.obter("EMB", "login", "senha").token == token
+    # Próxima execução da mesma credencial reaproveita a sessão
+    assert autenticar(DriverFalso(token), lambda: True) == (True, 0)
+
+
+def test_sessao_recusada_e_invalidada_e_refaz_login(cache):
+    cache.salvar(SessaoPortal(operadora="EMB", token=criar_jwt(time.time() + 600)), "login", "senha")
+    novo_token = criar_jwt(time.time() + 900)
+    # A sessão em cache é recusada pelo portal; após o login a área logada carrega
+    respostas = iter([False, True])
+
+    assert autenticar(DriverFalso(novo_token), lambda: next(respostas)) == (True, 1)
+    assert cache.obter("EMB", "login", "senha").token == novo_token
+
+
+def test_sessao_recusada_e_login_falho_nao_deixa_sessao(cache):
+    cache.salvar(SessaoPortal(operadora="EMB", token=criar_jwt(time.time() + 600)), "login", "senha")
+
+    assert autenticar(DriverFalso(criar_jwt(time.time() + 900)), lambda: False) == (False, 1)
+    assert cache.obter("EMB", "login", "senha") is None
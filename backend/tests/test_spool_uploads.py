@@ -0,0 +1,275 @@
+"""
+Testes da entrega assíncrona das faturas para a fila de storage
+Valida o spool durável e o download que libera o navegador sem fazer upload
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.rpa.checkpoint import EtapaCheckpoint, RepositorioCheckpoints, obter_repositorio_checkpoints
+from backend.rpa.rpa_base import RPABase, ParametrosEntradaPadrao
+from backend.utils.downloads import caminho_diretorio_execucao
+from backend.utils.spool_uploads import SpoolUploads
+
+
+@pytest.fixture(autouse=True)
+def diretorio_downloads(tmp_path, monkeypatch):
+    monkeypatch.setenv("RPA_DOWNLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr("backend.rpa.checkpoint._repositorio", RepositorioCheckpoints())
+    monkeypatch.setattr("backend.rpa.checkpoint.obter_cliente_redis", lambda: None)
+    return tmp_path
+
+
+def test_spool_entrega_duravel_e_conclusao(tmp_path):
+    fatura = tmp_path / "fatura.pdf"
+    fatura.write_bytes(b"%PDF fatura")
+    spool = SpoolUploads(str(tmp_path / "spool"))
+
+    spool.depositar("proc/1", str(fatura), {"valor_fatura": 10.5})
+    # O spool não depende do arquivo da execução (limpeza do diretório)
+    fatura.unlink()
+
+    entrada = SpoolUploads(str(tmp_path / "spool")).obter("proc/1")
+    assert entrada.id_processo == "proc/1"
+    assert entrada.dados_extraidos == {"valor_fatura": 10.5}
+    with open(entrada.arquivo, "rb") as arquivo:
+        assert arquivo.read() == b"%PDF fatura"
+    assert [e.id_processo for e in spool.pendentes()] == ["proc/1"]
+    assert spool.pendentes(idade_minima_segundos=3600) == []
+
+    spool.concluir("proc/1")
+    assert spool.obter("proc/1") is None
+    assert spool.pendentes() == []
+
+
+class FileManagerFalso:
+    def __init__(self):
+        self.uploads = []
+
+    def upload_arquivo(self, arquivo_local, chave=None):
+        self.uploads.append(arquivo_local)
+        return f"s3://{chave}"
+
+
+class RPAFalso(RPABase):
+    def __init__(self):
+        super().__init__()
+        self.file_manager = FileManagerFalso()
+
+    def executar_download(self, parametros):
+        raise NotImplementedError
+
+    def executar_upload_sat(self, parametros):
+        raise NotImplementedError
+
+
+def test_download_com_upload_assincrono_nao_envia(tmp_path):
+    fatura = tmp_path / "fatura.pdf"
+    fatura.write_bytes(b"%PDF " + str(time.time()).encode())
+    parametros = ParametrosEntradaPadrao(
+        id_processo="proc-1", id_cliente="cli-1", operadora_codigo="FAKE",
+        url_portal="http://localhost", usuario="u", senha="s", upload_assincrono=True
+    )
+    rpa = RPAFalso()
+
+    resultado = rpa._finalizar_download(parametros, datetime.now(), {}, arquivo_fatura=str(fatura))
+
+    assert resultado.sucesso
+    assert resultado.url_s3 is None
+    assert resultado.dados_especificos == {"upload_pendente": True}
+    assert rpa.file_manager.uploads == []
+    # Nova tentativa do download retoma do PDF mesclado até o upload ser registrado
+    assert obter_repositorio_checkpoints().obter("proc-1").etapa_concluida == EtapaCheckpoint.PDF_MESCLADO
+
+
+# ---- Task da fila de storage (banco substituído por uma sessão em memória) ----
+
+class ProcessoFalso:
+    id = None
+
+    def __init__(self, status):
+        self.status_processo = status
+        self.caminho_s3_fatura = None
+        self.valor_fatura = None
+        self.data_vencimento = None
+
+
+class SessaoFalsa:
+    def __init__(self, processo):
+        self.processo = processo
+        self.commits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def query(self, modelo):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.processo
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class ArmazemFalso:
+    def __init__(self, falhas=0):
+        self.falhas = falhas
+        self.enviados = []
+
+    def armazenar(self, caminho, file_manager=None, digest=None):
+        from backend.utils.artefatos import Artefato
+
+        if self.falhas:
+            self.falhas -= 1
+            raise ConnectionError("storage indisponível")
+        self.enviados.append(caminho)
+        return Artefato(digest="d" * 64, chave="artefatos/fatura.pdf", url="s3://artefatos/fatura.pdf", tamanho=4, enviado=True)
+
+
+@pytest.fixture
+def orquestrador(monkeypatch, tmp_path):
+    import types
+    from enum import Enum
+
+    orquestrador = pytest.importorskip("backend.services.orquestrador_celery")
+    StatusProcesso = Enum("StatusProcesso", {"UPLOAD_PENDENTE": "upload_pendente", "FATURA_BAIXADA": "fatura_baixada"})
+    processo = ProcessoFalso(StatusProcesso.UPLOAD_PENDENTE.value)
+    sessao = SessaoFalsa(processo)
+    monkeypatch.setitem(sys.modules, "backend.models.database", types.SimpleNamespace(get_db_session=lambda: sessao))
+    monkeypatch.setitem(sys.modules, "backend.models.processo", types.SimpleNamespace(
+        Processo=ProcessoFalso, StatusProcesso=StatusProcesso
+    ))
+
+    spool = SpoolUploads(str(tmp_path / "spool"))
+    armazem = ArmazemFalso()
+    extraidos, agendados = [], []
+    monkeypatch.setattr(orquestrador, "obter_spool_uploads", lambda: spool)
+    monkeypatch.setattr("backend.utils.artefatos.obter_armazem_artefatos", lambda: armazem)
+    monkeypatch.setattr(orquestrador, "registrar_artefato_processo", lambda *args, **kwargs: True)
+    monkeypatch.setattr(orquestrador, "EXTRACAO_FATURAS", True)
+    monkeypatch.setattr(
+        orquestrador, "_extrair_dados_processo",
+        lambda processo, arquivo: extraidos.append((arquivo, os.path.exists(arquivo))) or ({}, False)
+    )
+    monkeypatch.setattr(orquestrador, "_agendar_upload", agendados.append)
+
+    fatura = caminho_diretorio_execucao("proc-1") / "fatura.pdf"
+    fatura.parent.mkdir(parents=True)
+    fatura.write_bytes(b"%PDF")
+    spool.depositar("proc-1", str(fatura), {"valor_fatura": 10.5})
+    return types.SimpleNamespace(
+        modulo=orquestrador, processo=processo, sessao=sessao, spool=spool, armazem=armazem,
+        extraidos=extraidos, agendados=agendados, StatusProcesso=StatusProcesso
+    )
+
+
+def test_upload_marca_fatura_baixada_e_extrai_da_copia_do_spool(orquestrador):
+    copia = orquestrador.spool.obter("proc-1").arquivo
+
+    retorno = orquestrador.modulo.enviar_fatura_storage_rpa.run("proc-1")
+
+    assert retorno == {"processo_id": "proc-1", "enviado": True, "url_s3": "s3://artefatos/fatura.pdf"}
+    assert orquestrador.processo.status_processo == orquestrador.StatusProcesso.FATURA_BAIXADA.value
+    assert orquestrador.processo.caminho_s3_fatura == "s3://artefatos/fatura.pdf"
+    assert orquestrador.processo.valor_fatura == 10.5
+    # A extração lê a cópia do spool enquanto ela ainda existe
+    assert orquestrador.extraidos == [(copia, True)]
+    assert orquestrador.spool.obter("proc-1") is None
+    # Fatura armazenada: o diretório da execução é removido
+    assert not caminho_diretorio_execucao("proc-1").exists()
+
+
+def test_erro_no_storage_agenda_nova_tentativa_e_mantem_spool(orquestrador, monkeypatch):
+    from celery.exceptions import Retry
+
+    tarefa = orquestrador.modulo.enviar_fatura_storage_rpa
+    orquestrador.armazem.falhas = 1
+    tentativas = []
+
+    def retry(exc=None, countdown=None):
+        tentativas.append((exc, countdown))
+        return Retry(exc=exc, when=countdown)
+
+    monkeypatch.setattr(tarefa, "retry", retry)
+
+    with pytest.raises(Retry):
+        tarefa.run("proc-1")
+
+    assert isinstance(tentativas[0][0], ConnectionError)
+    assert orquestrador.processo.status_processo == orquestrador.StatusProcesso.UPLOAD_PENDENTE.value
+    assert orquestrador.spool.obter("proc-1") is not None
+
+    tarefa.run("proc-1")
+    assert orquestrador.processo.status_processo == orquestrador.StatusProcesso.FATURA_BAIXADA.value
+
+
+def test_entrega_repetida_apos_concluir_nao_reenvia(orquestrador):
+    tarefa = orquestrador.modulo.enviar_fatura_storage_rpa
+    tarefa.run("proc-1")
+
+    retorno = tarefa.run("proc-1")
+
+    assert retorno == {"processo_id": "proc-1", "enviado": False}
+    assert len(orquestrador.armazem.enviados) == 1
+    assert len(orquestrador.extraidos) == 1
+
+
+def test_reenfileira_apenas_uploads_antigos(orquestrador, monkeypatch):
+    tarefa = orquestrador.modulo.reenfileirar_uploads_pendentes
+
+    monkeypatch.setattr(orquestrador.modulo, "IDADE_REENFILEIRAR_UPLOAD", 3600)
+    assert tarefa.run() == {"reenfileirados": 0}
+
+    monkeypatch.setattr(orquestrador.modulo, "IDADE_REENFILEIRAR_UPLOAD", 0)
+    assert tarefa.run() == {"reenfileirados": 1}
+    assert orquestrador.agendados == ["proc-1"]
+
+
+def test_extracao_le_a_fatura_do_storage_em_qualquer_worker(orquestrador, monkeypatch, tmp_path):
+    from backend.utils.cliente_storage import ClienteStorageMemoria
+
+    storage = ClienteStorageMemoria()
+    fatura = tmp_path / "armazenada.pdf"
+    fatura.write_bytes(b"%PDF armazenada")
+    storage.enviar_arquivo(str(fatura), "artefatos/sha256/ab/abc.pdf")
+    monkeypatch.setattr("backend.utils.artefatos.obter_cliente_storage", lambda: storage)
+    lidos = []
+    monkeypatch.setattr(
+        orquestrador.modulo, "_extrair_dados_processo",
+        lambda processo, arquivo: lidos.append(open(arquivo, "rb").read()) or ({"valor_fatura": 1.0}, True)
+    )
+
+    # Mensagem antiga com o caminho de outro host: o objeto armazenado é lido no lugar dele
+    retorno = orquestrador.modulo.extrair_dados_fatura_rpa.run(
+        "proc-1", chave="artefatos/sha256/ab/abc.pdf", arquivo="/outro-host/fatura.pdf"
+    )
+
+    assert retorno["atualizado"] and lidos == [b"%PDF armazenada"]
+    # O diretório da execução pertence ao host do download e não é tocado aqui
+    assert caminho_diretorio_execucao("proc-1").exists()
+
+
+def test_spool_inacessivel_avisa_e_mantem_upload_pendente(orquestrador, caplog):
+    orquestrador.spool.concluir("proc-1")
+
+    with caplog.at_level("WARNING"):
+        retorno = orquestrador.modulo.enviar_fatura_storage_rpa.run("proc-1")
+
+    assert retorno == {"processo_id": "proc-1", "enviado": False}
+    assert orquestrador.processo.status_processo == orquestrador.StatusProcesso.UPLOAD_PENDENTE.value
+    assert "ausente do spool" in caplog.text
@@ -0,0 +1,81 @@
+"""
+Testes do supervisor de processos de navegador
+Usa processos `sleep` no lugar de geckodriver/Firefox para validar registro,
+medição e recolhimento de órfãos
+"""
+
+import sys
+import os
+import json
+import subprocess
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+psutil = pytest.importorskip("psutil")
+
+from backend.utils.selenium_driver import SupervisorNavegadores
+
+
+@pytest.fixture
+def arvore():
+    """Processo 'driver' com um processo 'navegador' filho"""
+    driver = subprocess.Popen(["sh", "-c", "sleep 60 & wait"])
+    yield driver
+    if driver.poll() is None:
+        driver.kill()
+        driver.wait(timeout=5)
+
+
+def aguardar_filhos(pid):
+    processo = psutil.Process(pid)
+    for _ in range(50):
+        filhos = processo.children(recursive=True)
+        if filhos:
+            return filhos
+        time.sleep(0.05)
+    return []
+
+
+def test_registra_e_mede_arvore(tmp_path, arvore):
+    supervisor = SupervisorNavegadores(diretorio=str(tmp_path))
+    aguardar_filhos(arvore.pid)
+
+    supervisor.registrar(arvore.pid)
+    registro = json.loads((tmp_path / f"{arvore.pid}.json").read_text())
+    uso = supervisor.medir(arvore.pid)
+
+    assert registro["pid_dono"] == os.getpid()
+    assert len(registro["processos"]) == 2
+    assert uso.processos == 2
+    assert uso.rss_mb > 0
+
+
+def test_recolhe_arvore_de_worker_encerrado(tmp_path, arvore):
+    supervisor = SupervisorNavegadores(diretorio=str(tmp_path))
+    filhos = aguardar_filhos(arvore.pid)
+    supervisor.registrar(arvore.pid)
+
+    # Simula registro feito por um worker que já morreu
+    arquivo = tmp_path / f"{arvore.pid}.json"
+    registro = json.loads(arquivo.read_text())
+    registro["pid_dono"] = 0
+    arquivo.write_text(json.dumps(registro))
+
+    assert supervisor.recolher_orfaos() == 2
+    assert not arquivo.exists()
+    arvore.wait(timeout=5)
+    assert not any(filho.is_running() and filho.status() != psutil.STATUS_ZOMBIE for filho in filhos)
+
+
+def test_nao_recolhe_navegadores_de_worker_vivo(tmp_path, arvore):
+    supervisor = SupervisorNavegadores(diretorio=str(tmp_path))
+    aguardar_filhos(arvore.pid)
+    supervisor.registrar(arvore.pid)
+
+    assert supervisor.recolher_orfaos() == 0
+    assert arvore.poll() is None
+
+    assert supervisor.recolher_orfaos(incluir_processo_atual=True) == 2
+    assert arvore.wait(timeout=5) is not None
@@ -0,0 +1,84 @@
+"""
+Testes dos timeouts adaptativos por operadora e etapa
+Usa a janela local (sem Redis) para validar piso/teto, escala das esperas e limites das tasks
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import pytest
+
+from backend.utils import esperas
+from backend.rpa import timeouts_adaptativos as modulo
+from backend.rpa.timeouts_adaptativos import ConfiguracaoTimeouts, TimeoutsAdaptativos
+from backend.rpa.rpa_base import ContextoExecucao
+
+
+@pytest.fixture(autouse=True)
+def sem_redis(monkeypatch):
+    monkeypatch.setattr(modulo, "obter_cliente_redis", lambda: None)
+
+
+def criar_timeouts(**ajustes):
+    padrao = dict(
+        fator=3.0, percentil=0.99, min_amostras=5, janela=50,
+        espera_minima=5, espera_maxima=180, task_minima=300, task_maxima=2400,
+        folga_hard=300, cache_segundos=0,
+    )
+    padrao.update(ajustes)
+    return TimeoutsAdaptativos(ConfiguracaoTimeouts(**padrao))
+
+
+def test_sem_amostras_suficientes_mantem_timeouts_fixos():
+    timeouts = criar_timeouts()
+    for _ in range(4):
+        timeouts.registrar("EMB", "login", 4.0)
+
+    assert timeouts.timeout_espera("EMB", "login") is None
+    assert timeouts.limites_task("EMB") is None
+
+
+def test_timeout_espera_respeita_piso_e_teto():
+    timeouts = criar_timeouts()
+    for _ in range(10):
+        timeouts.registrar("EMB", "login", 4.0)
+        timeouts.registrar("EMB", "busca", 0.5)
+        timeouts.registrar("DIG", "login", 200.0)
+
+    assert timeouts.timeout_espera("EMB", "login") == pytest.approx(12.0)
+    assert timeouts.timeout_espera("EMB", "busca") == 5
+    assert timeouts.timeout_espera("DIG", "login") == 180
+    assert timeouts.timeout_espera("emb", "login") == pytest.approx(12.0)
+
+
+def test_limites_task_escalam_com_o_lote():
+    timeouts = criar_timeouts()
+    for _ in range(10):
+        timeouts.registrar_metricas("EMB", {"total_segundos": 60.0, "etapas": {"login": {"segundos": 10.0}}})
+
+    assert timeouts.limites_task("EMB") == (300, 600)
+    assert timeouts.limites_task("EMB", quantidade=5) == (900, 1200)
+    assert timeouts.limites_task("EMB", quantidade=50) == (2400, 2700)
+    # 60s × fator 3 por processo: 13 processos cabem no teto de 2400s
+    assert timeouts.processos_por_task("EMB") == 13
+    assert timeouts.processos_por_task("DIG") is None
+
+
+def test_etapa_aplica_timeout_no_wait_e_nas_esperas(monkeypatch):
+    timeouts = criar_timeouts()
+    for _ in range(10):
+        timeouts.registrar("EMB", "login", 20.0)
+    monkeypatch.setattr("backend.rpa.rpa_base.obter_timeouts_adaptativos", lambda: timeouts)
+
+    class Wait:
+        _timeout = 30
+
+    contexto = ContextoExecucao(operadora="EMB", wait=Wait(), esperas=esperas.MedidorEsperas())
+    with contexto.medir_etapa("login"):
+        assert contexto.wait._timeout == pytest.approx(60.0)
+        assert contexto.esperas.ajustar_timeout(10) == pytest.approx(20.0)
+        assert contexto.esperas.ajustar_timeout(0.5) == pytest.approx(1.0)
+    with contexto.medir_etapa("download"):
+        assert contexto.wait._timeout == 30
+        assert contexto.esperas.ajustar_timeout(10) == 10
@@ -1,13 +1,38 @@
 """
 Utilitários do sistema
+Importados sob demanda (selenium só é carregado quando o driver é usado)
 """
 
-from .selenium_driver import SeleniumDriver
-from .file_manager import FileManager
-from .logger import RPALogger
+import importlib
+
+_MODULOS = {
+    "SeleniumDriver": ".selenium_driver",
+    "FileManager": ".file_manager",
+    "RPALogger": ".logger",
+    "PoolNavegadores": ".pool_navegadores",
+    "obter_pool_navegadores": ".pool_navegadores",
+    "ClienteHTTP": ".cliente_http",
+    "CacheSessoesPortal": ".sessao_portal",
+    "SessaoPortal": ".sessao_portal",
+    "obter_cache_sessoes": ".sessao_portal",
+}
 
 __all__ = [
     "SeleniumDriver",
     "FileManager", 
-    "RPALogger"
-]
\ No newline at end of file
+    "RPALogger",
+    "PoolNavegadores",
+    "obter_pool_navegadores",
+    "CacheSessoesPortal",
+    "SessaoPortal",
+    "obter_cache_sessoes",
+    "ClienteHTTP"
+]
+
+
+def __getattr__(nome):
+    if nome in _MODULOS:
+        valor = getattr(importlib.import_module(_MODULOS[nome], __name__), nome)
+        globals()[nome] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
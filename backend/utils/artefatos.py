@@ -0,0 +1,251 @@
+"""
+Armazenamento de artefatos endereçado por conteúdo
+As faturas são gravadas no object store pela chave do SHA-256 do arquivo:
+reenvios e retries do mesmo PDF não geram novo upload, e a pergunta
+"a fatura mudou?" se resume a comparar digests
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .cliente_storage import ClienteStorageMemoria, obter_cliente_storage
+from .redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_OBJETO = "artefatos/sha256"
+PREFIXO_INDICE = "rpa:artefato:"
+
+# Digests conhecidos em memória (fallback sem Redis) antes de descartá-los
+MAX_INDICE_LOCAL = 50000
+
+# Validade das entradas do índice no Redis (os acertos também são conferidos no storage)
+TTL_INDICE = int(os.getenv("RPA_ARTEFATO_INDICE_TTL_SEGUNDOS", str(30 * 24 * 3600)))
+
+TIPO_FATURA = "fatura"
+
+
+def digest_arquivo(caminho: str) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def chave_artefato(digest: str, extensao: str = ".pdf") -> str:
+    """Chave do objeto: artefatos/sha256/<2 primeiros>/<digest><extensão>"""
+    return f"{PREFIXO_OBJETO}/{digest[:2]}/{digest}{extensao.lower()}"
+
+
+@dataclass
+class Artefato:
+    """Objeto gravado no object store"""
+    digest: str
+    chave: str
+    url: str
+    tamanho: int
+    enviado: bool = False  # False quando o digest já existia e o upload foi evitado
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {"digest": self.digest, "chave": self.chave, "tamanho": self.tamanho, "enviado": self.enviado}
+
+
+class ArmazemArtefatos:
+    """
+    Upload de arquivos por digest com índice de objetos já gravados
+
+    O índice fica no Redis (compartilhado entre workers, por endpoint e
+    bucket) com fallback em memória. Um acerto só evita o upload depois de
+    confirmado no storage, e uploads para o object store em memória não são
+    indexados. Dois workers que enviem o mesmo digest ao mesmo tempo gravam
+    o mesmo conteúdo na mesma chave, então a corrida é inofensiva.
+    """
+
+    def __init__(self, file_manager=None):
+        self._file_manager = file_manager
+        self._indice_local: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def file_manager(self):
+        if self._file_manager is None:
+            from .file_manager import FileManager
+            self._file_manager = FileManager()
+        return self._file_manager
+
+    @staticmethod
+    def _chave_indice(digest: str) -> str:
+        configuracao = obter_cliente_storage().configuracao
+        return f"{PREFIXO_INDICE}{configuracao.endpoint}/{configuracao.bucket}:{digest}"
+
+    def _consultar_indice(self, chave_indice: str) -> Optional[Dict[str, Any]]:
+        cliente = obter_cliente_redis()
+        if cliente is not None:
+            try:
+                valor = cliente.get(chave_indice)
+                if valor:
+                    return json.loads(valor)
+            except Exception as e:
+                logger.warning(f"Erro ao consultar índice de artefatos: {e}")
+        with self._lock:
+            return self._indice_local.get(chave_indice)
+
+    def _remover_indice(self, chave_indice: str):
+        with self._lock:
+            self._indice_local.pop(chave_indice, None)
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return
+        try:
+            cliente.delete(chave_indice)
+        except Exception as e:
+            logger.warning(f"Erro ao remover entrada do índice de artefatos: {e}")
+
+    def consultar(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Metadados do objeto já gravado para o digest, ou None (também se o objeto sumiu do storage)"""
+        chave_indice = self._chave_indice(digest)
+        dados = self._consultar_indice(chave_indice)
+        if not dados:
+            return None
+        try:
+            existe = obter_cliente_storage().existe(dados["chave"])
+        except Exception as e:
+            logger.warning(f"Erro ao confirmar artefato {digest[:12]} no storage: {e}")
+            return None
+        if not existe:
+            logger.warning(f"Artefato {digest[:12]} indexado mas ausente do storage: entrada removida")
+            self._remover_indice(chave_indice)
+            return None
+        return dados
+
+    def _indexar(self, artefato: Artefato):
+        if isinstance(obter_cliente_storage(), ClienteStorageMemoria):
+            # Objetos em memória somem com o processo: indexá-los evitaria o upload real
+            return
+        chave_indice = self._chave_indice(artefato.digest)
+        dados = {"chave": artefato.chave, "url": artefato.url, "tamanho": artefato.tamanho}
+        with self._lock:
+            if len(self._indice_local) >= MAX_INDICE_LOCAL:
+                self._indice_local.clear()
+            self._indice_local[chave_indice] = dados
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return
+        try:
+            cliente.set(chave_indice, json.dumps(dados), ex=TTL_INDICE)
+        except Exception as e:
+            logger.warning(f"Erro ao gravar índice de artefatos: {e}")
+
+    def armazenar(self, caminho: str, file_manager=None, digest: Optional[str] = None) -> Artefato:
+        """
+        Grava o arquivo na chave do seu digest, se ainda não existir
+
+        Args:
+            caminho: Arquivo local
+            file_manager: FileManager do RPA que fará o upload (padrão: o do armazém)
+            digest: SHA-256 já calculado (evita reler o arquivo)
+        """
+        digest = digest or digest_arquivo(caminho)
+        existente = self.consultar(digest)
+        if existente:
+            logger.info(f"Artefato {digest[:12]} já armazenado: upload de {os.path.basename(caminho)} evitado")
+            return Artefato(digest=digest, chave=existente["chave"], url=existente["url"],
+                            tamanho=existente.get("tamanho", 0))
+
+        chave = chave_artefato(digest, os.path.splitext(caminho)[1] or ".pdf")
+        url = (file_manager or self.file_manager).upload_arquivo(caminho, chave)
+        artefato = Artefato(digest=digest, chave=chave, url=url,
+                            tamanho=os.path.getsize(caminho), enviado=True)
+        self._indexar(artefato)
+        return artefato
+
+
+def registrar_artefato_processo(db, processo_id: str, digest: str, chave: str, tamanho: int = 0,
+                                tipo_documento: str = TIPO_FATURA) -> bool:
+    """
+    Aponta (processo, tipo de documento) para o digest no índice de metadados
+
+    Returns:
+        True quando o documento é novo ou mudou de conteúdo
+    """
+    from ..models.artefato import ArtefatoFatura
+
+    registro = db.query(ArtefatoFatura).filter(
+        ArtefatoFatura.processo_id == processo_id,
+        ArtefatoFatura.tipo_documento == tipo_documento
+    ).first()
+    if registro is None:
+        db.add(ArtefatoFatura(processo_id=processo_id, tipo_documento=tipo_documento,
+                              digest=digest, chave=chave, tamanho=tamanho))
+        return True
+    if registro.digest == digest:
+        return False
+    registro.digest = digest
+    registro.chave = chave
+    registro.tamanho = tamanho
+    registro.data_atualizacao = datetime.now()
+    return True
+
+
+def digest_processo(db, processo_id: str, tipo_documento: str = TIPO_FATURA) -> Optional[str]:
+    """Digest atual do documento do processo (None se ainda não armazenado)"""
+    from ..models.artefato import ArtefatoFatura
+
+    registro = db.query(ArtefatoFatura.digest).filter(
+        ArtefatoFatura.processo_id == processo_id,
+        ArtefatoFatura.tipo_documento == tipo_documento
+    ).first()
+    return registro[0] if registro else None
+
+
+def chave_processo(db, processo_id: str, tipo_documento: str = TIPO_FATURA) -> Optional[str]:
+    """Chave do objeto do documento do processo (None se ainda não armazenado)"""
+    from ..models.artefato import ArtefatoFatura
+
+    registro = db.query(ArtefatoFatura.chave).filter(
+        ArtefatoFatura.processo_id == processo_id,
+        ArtefatoFatura.tipo_documento == tipo_documento
+    ).first()
+    return registro[0] if registro else None
+
+
+@contextmanager
+def copia_local_artefato(chave: str):
+    """
+    Cópia temporária do objeto armazenado, removida na saída
+
+    Permite ler a fatura em qualquer worker, sem depender do disco do
+    host que fez o download.
+    """
+    descritor, caminho = tempfile.mkstemp(prefix="artefato_", suffix=os.path.splitext(chave)[1])
+    os.close(descritor)
+    try:
+        obter_cliente_storage().baixar_arquivo(chave, caminho)
+        yield caminho
+    finally:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+# Instância do processo
+_armazem: Optional[ArmazemArtefatos] = None
+
+
+def obter_armazem_artefatos() -> ArmazemArtefatos:
+    """Retorna o armazém de artefatos do processo"""
+    global _armazem
+    if _armazem is None:
+        _armazem = ArmazemArtefatos()
+    return _armazem
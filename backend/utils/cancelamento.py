@@ -0,0 +1,140 @@
+"""
+Cancelamento cooperativo das execuções de RPA
+O pedido é uma flag no Redis por task; as esperas e etapas do RPA verificam
+a flag e encerram a execução sem matar o processo do worker
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Set
+
+from .redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "rpa:cancelamento:"
+
+# Intervalo mínimo entre consultas da flag pela mesma execução
+INTERVALO_VERIFICACAO = float(os.getenv("RPA_CANCELAMENTO_INTERVALO", "1"))
+
+
+class ExecucaoCancelada(BaseException):
+    """
+    Execução cancelada pelo operador
+
+    Deriva de BaseException para atravessar os `except Exception` dos fluxos
+    dos RPAs; os context managers (contexto da execução, pool) continuam
+    liberando navegador e recursos normalmente.
+    """
+
+
+try:
+    from celery.exceptions import SoftTimeLimitExceeded
+except ImportError:  # RPAs executados fora do worker Celery
+    class SoftTimeLimitExceeded(Exception):
+        """Substituto quando o Celery não está instalado (nunca é lançado)"""
+
+
+class RegistroCancelamentos:
+    """Pedidos de cancelamento por task_id (Redis, com fallback em memória)"""
+
+    def __init__(self, ttl_segundos: Optional[int] = None):
+        self.ttl_segundos = ttl_segundos or int(os.getenv("RPA_CANCELAMENTO_TTL_SEGUNDOS", "3600"))
+        self._local: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def solicitar(self, task_id: str):
+        """Registra o pedido de cancelamento da task"""
+        with self._lock:
+            self._local.add(task_id)
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return
+        try:
+            cliente.set(f"{PREFIXO_CHAVE}{task_id}", "1", ex=self.ttl_segundos)
+        except Exception as e:
+            logger.warning(f"Erro ao registrar cancelamento no Redis: {e}")
+
+    def cancelado(self, task_id: str) -> bool:
+        with self._lock:
+            if task_id in self._local:
+                return True
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return False
+        try:
+            return bool(cliente.exists(f"{PREFIXO_CHAVE}{task_id}"))
+        except Exception as e:
+            logger.warning(f"Erro ao consultar cancelamento no Redis: {e}")
+            return False
+
+    def limpar(self, task_id: str):
+        with self._lock:
+            self._local.discard(task_id)
+        cliente = obter_cliente_redis()
+        if cliente is None:
+            return
+        try:
+            cliente.delete(f"{PREFIXO_CHAVE}{task_id}")
+        except Exception as e:
+            logger.warning(f"Erro ao remover cancelamento do Redis: {e}")
+
+
+# Instância do processo
+_registro: Optional[RegistroCancelamentos] = None
+
+
+def obter_registro_cancelamentos() -> RegistroCancelamentos:
+    """Retorna o registro de cancelamentos do processo"""
+    global _registro
+    if _registro is None:
+        _registro = RegistroCancelamentos()
+    return _registro
+
+
+_local = threading.local()
+
+
+@contextmanager
+def ativar_cancelamento(task_id: Optional[str], prazo_segundos: Optional[float] = None):
+    """
+    Associa a task à thread atual; as verificações passam a consultar o seu pedido
+
+    Com `prazo_segundos`, a execução também é encerrada como cancelada ao fim
+    do prazo (antes do soft_time_limit, para que a task registre o que concluiu).
+    """
+    anterior = getattr(_local, "estado", None)
+    _local.estado = {
+        "task_id": task_id,
+        "verificado_em": 0.0,
+        "prazo": time.monotonic() + prazo_segundos if prazo_segundos else None
+    } if task_id else None
+    try:
+        yield
+    finally:
+        _local.estado = anterior
+        if task_id:
+            obter_registro_cancelamentos().limpar(task_id)
+
+
+def verificar_cancelamento():
+    """
+    Lança ExecucaoCancelada se a task da thread atual foi cancelada ou esgotou o prazo
+
+    A consulta ao Redis acontece no máximo uma vez por INTERVALO_VERIFICACAO;
+    sem task ativa não há custo.
+    """
+    estado = getattr(_local, "estado", None)
+    if estado is None:
+        return
+    agora = time.monotonic()
+    if estado["prazo"] is not None and agora >= estado["prazo"]:
+        raise ExecucaoCancelada(f"Execução {estado['task_id']} interrompida: prazo da task esgotado")
+    if agora - estado["verificado_em"] < INTERVALO_VERIFICACAO:
+        return
+    estado["verificado_em"] = agora
+    if obter_registro_cancelamentos().cancelado(estado["task_id"]):
+        raise ExecucaoCancelada(f"Execução {estado['task_id']} cancelada")
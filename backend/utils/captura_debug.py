@@ -0,0 +1,240 @@
+"""
+Captura de depuração das execuções com falha
+Tira screenshot, DOM e logs do console no momento da falha e entrega a
+compressão, a gravação local (buffer circular limitado) e o upload a uma
+thread em segundo plano, sem atrasar o retorno da task
+"""
+
+import os
+import io
+import re
+import gzip
+import json
+import queue
+import shutil
+import logging
+import threading
+import traceback
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_PADRAO = "/tmp/rpa_debug"
+
+
+def captura_habilitada() -> bool:
+    """Captura ligada por padrão (RPA_DEBUG_CAPTURA=0 desliga)"""
+    return os.getenv("RPA_DEBUG_CAPTURA", "1") != "0"
+
+
+def _codec_imagem() -> str:
+    """WebP quando Pillow está instalado; senão mantém o PNG do driver"""
+    try:
+        import PIL.Image  # noqa: F401
+        return "webp"
+    except ImportError:
+        return "png"
+
+
+def _codec_texto() -> str:
+    """zstd quando zstandard está instalado; senão gzip"""
+    try:
+        import zstandard  # noqa: F401
+        return "zst"
+    except ImportError:
+        return "gz"
+
+
+def _comprimir_imagem(png: bytes, codec: str, qualidade: int) -> bytes:
+    if codec != "webp":
+        return png
+    from PIL import Image
+
+    saida = io.BytesIO()
+    with Image.open(io.BytesIO(png)) as imagem:
+        imagem.save(saida, format="WEBP", quality=qualidade, method=4)
+    return saida.getvalue()
+
+
+def _comprimir_texto(texto: str, codec: str) -> bytes:
+    dados = texto.encode("utf-8", errors="replace")
+    if codec == "zst":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(dados)
+    return gzip.compress(dados, compresslevel=6)
+
+
+class CapturaDebug:
+    """
+    Capturas de falha com processamento assíncrono
+
+    A parte síncrona se limita a ler screenshot, DOM e console do driver
+    (que será devolvido ao pool logo em seguida). As capturas ficam em
+    `<diretorio>/<captura>/` e as mais antigas são removidas ao exceder
+    `max_capturas` ou `max_mb`. Se a fila encher, a captura é descartada.
+    """
+
+    def __init__(
+        self,
+        diretorio: Optional[str] = None,
+        max_capturas: Optional[int] = None,
+        max_mb: Optional[float] = None,
+        enviar: Optional[Callable[[str, str], Any]] = None
+    ):
+        self.diretorio = Path(diretorio or os.getenv("RPA_DEBUG_DIR", DIRETORIO_PADRAO))
+        self.max_capturas = max_capturas or int(os.getenv("RPA_DEBUG_MAX_CAPTURAS", "100"))
+        self.max_mb = max_mb or float(os.getenv("RPA_DEBUG_MAX_MB", "200"))
+        self.qualidade_webp = int(os.getenv("RPA_DEBUG_QUALIDADE_WEBP", "60"))
+        self.tamanho_fila = int(os.getenv("RPA_DEBUG_FILA", "50"))
+        self._enviar = enviar if enviar is not None else self._enviar_storage
+        self.codec_imagem = _codec_imagem()
+        self.codec_texto = _codec_texto()
+        self._lock = threading.Lock()
+        self._ocioso = threading.Condition(self._lock)
+        self._pendentes = 0
+        self._pid: Optional[int] = None
+        self._fila: Optional[queue.Queue] = None
+
+    # ---- Captura (síncrona) ----
+
+    def capturar(
+        self,
+        driver,
+        identificacao: str,
+        etapa: Optional[str] = None,
+        erro: Optional[BaseException] = None
+    ) -> List[str]:
+        """
+        Lê o estado do navegador e agenda o processamento
+
+        Returns:
+            Chaves no storage dos arquivos da captura (vazio se descartada)
+        """
+        nome = datetime.now().strftime("%Y%m%d%H%M%S%f_") + re.sub(r"[^\w.-]", "_", identificacao)
+        metadados: Dict[str, Any] = {
+            "identificacao": identificacao,
+            "etapa": etapa,
+            "capturado_em": datetime.now().isoformat(),
+            "erro": repr(erro) if erro is not None else None,
+            "traceback": "".join(traceback.format_exception(type(erro), erro, erro.__traceback__)) if erro else None,
+            "url": self._ler(driver, lambda: driver.current_url),
+            "titulo": self._ler(driver, lambda: driver.title),
+            "console": self._ler(driver, lambda: driver.get_log("browser")) or [],
+        }
+        screenshot = self._ler(driver, driver.get_screenshot_as_png)
+        dom = self._ler(driver, lambda: driver.page_source)
+
+        arquivos: List[Tuple[str, str, Any]] = [
+            (f"contexto.json.{self.codec_texto}", "json", json.dumps(metadados, ensure_ascii=False, default=str)),
+        ]
+        if screenshot:
+            arquivos.append((f"tela.{self.codec_imagem}", "imagem", screenshot))
+        if dom:
+            arquivos.append((f"dom.html.{self.codec_texto}", "texto", dom))
+
+        if not self._enfileirar((nome, arquivos)):
+            logger.warning(f"Fila de capturas de debug cheia, captura {nome} descartada")
+            return []
+        return [self._chave(nome, arquivo) for arquivo, _, _ in arquivos]
+
+    @staticmethod
+    def _ler(driver, leitura: Callable[[], Any]) -> Any:
+        try:
+            return leitura()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _chave(nome: str, arquivo: str) -> str:
+        return f"debug/{nome[:4]}-{nome[4:6]}/{nome}/{arquivo}"
+
+    # ---- Processamento (segundo plano) ----
+
+    def _enfileirar(self, item) -> bool:
+        with self._lock:
+            # Processo filho (fork do worker Celery) precisa da sua própria thread
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pendentes = 0
+                self._fila = queue.Queue(maxsize=self.tamanho_fila)
+                threading.Thread(target=self._consumir, args=(self._fila,), name="captura-debug", daemon=True).start()
+            try:
+                self._fila.put_nowait(item)
+            except queue.Full:
+                return False
+            self._pendentes += 1
+            return True
+
+    def _consumir(self, fila: queue.Queue):
+        while True:
+            nome, arquivos = fila.get()
+            try:
+                self._processar(nome, arquivos)
+            except Exception as e:
+                logger.error(f"Erro ao processar captura de debug {nome}: {e}")
+            finally:
+                with self._lock:
+                    self._pendentes -= 1
+                    self._ocioso.notify_all()
+
+    def _processar(self, nome: str, arquivos: List[Tuple[str, str, Any]]):
+        destino = self.diretorio / nome
+        destino.mkdir(parents=True, exist_ok=True)
+        for arquivo, tipo, conteudo in arquivos:
+            if tipo == "imagem":
+                dados = _comprimir_imagem(conteudo, self.codec_imagem, self.qualidade_webp)
+            else:
+                dados = _comprimir_texto(conteudo, self.codec_texto)
+            (destino / arquivo).write_bytes(dados)
+        self._aplicar_limites()
+
+        for arquivo, _, _ in arquivos:
+            try:
+                self._enviar(str(destino / arquivo), self._chave(nome, arquivo))
+            except Exception as e:
+                # A cópia local continua no buffer circular
+                logger.warning(f"Erro no upload da captura {nome}/{arquivo}: {e}")
+
+    def _aplicar_limites(self):
+        """Remove as capturas mais antigas além dos limites de quantidade e tamanho"""
+        capturas = sorted(caminho for caminho in self.diretorio.iterdir() if caminho.is_dir())
+        tamanhos = {caminho: self._tamanho(caminho) for caminho in capturas}
+        limite_bytes = self.max_mb * 1024 * 1024
+        total = sum(tamanhos.values())
+        while capturas and (len(capturas) > self.max_capturas or total > limite_bytes):
+            antiga = capturas.pop(0)
+            total -= tamanhos[antiga]
+            shutil.rmtree(antiga, ignore_errors=True)
+
+    @staticmethod
+    def _tamanho(caminho: Path) -> int:
+        # Outro processo do worker pode estar gravando/removendo a mesma pasta
+        try:
+            return sum(arquivo.stat().st_size for arquivo in caminho.iterdir())
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _enviar_storage(caminho: str, chave: str):
+        from .file_manager import FileManager
+
+        FileManager().upload_arquivo(caminho, chave)
+
+    def aguardar(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda o processamento das capturas pendentes (testes e encerramento do worker)"""
+        with self._lock:
+            return self._ocioso.wait_for(lambda: self._pendentes == 0, timeout)
+
+
+# Instância do processo
+_captura: Optional[CapturaDebug] = None
+
+
+def obter_captura_debug() -> CapturaDebug:
+    """Retorna o capturador de debug do processo"""
+    global _captura
+    if _captura is None:
+        _captura = CapturaDebug()
+    return _captura
@@ -0,0 +1,94 @@
+"""
+Cliente HTTP com pool de conexões keep-alive para APIs dos portais
+Usado pelo modo API dos RPAs (token obtido pelo navegador ou pelo cache de sessões)
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+_adaptador = None
+_adaptador_lock = threading.Lock()
+
+
+def _obter_adaptador() -> HTTPAdapter:
+    """
+    Adaptador compartilhado pelo processo
+
+    Todas as instâncias de ClienteHTTP montam o mesmo adaptador, de modo que
+    as conexões TCP/TLS com os portais são reaproveitadas entre execuções
+    enquanto cookies e headers continuam isolados por sessão.
+    """
+    global _adaptador
+    with _adaptador_lock:
+        if _adaptador is None:
+            tamanho_pool = int(os.getenv("RPA_HTTP_POOL_TAMANHO", "20"))
+            _adaptador = HTTPAdapter(
+                pool_connections=tamanho_pool,
+                pool_maxsize=tamanho_pool,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET", "HEAD"]),
+                    raise_on_status=False
+                )
+            )
+        return _adaptador
+
+
+class ClienteHTTP:
+    """Sessão HTTP isolada sobre o pool de conexões compartilhado"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: float = 30, max_concorrencia: int = 4):
+        self.timeout = timeout
+        self.max_concorrencia = max_concorrencia
+        self.session = requests.Session()
+        adaptador = _obter_adaptador()
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+        if headers:
+            self.session.headers.update(headers)
+
+    def aplicar_sessao_portal(self, sessao):
+        """Aplica cookies e bearer token de uma SessaoPortal"""
+        from .sessao_portal import obter_cache_sessoes
+        obter_cache_sessoes().aplicar_em_requests(self.session, sessao)
+
+    def obter_json(self, url: str, **kwargs) -> Any:
+        """GET retornando JSON"""
+        resposta = self.session.get(url, timeout=kwargs.pop("timeout", self.timeout), **kwargs)
+        resposta.raise_for_status()
+        return resposta.json()
+
+    def baixar(self, url: str, **kwargs) -> bytes:
+        """GET retornando o conteúdo binário"""
+        resposta = self.session.get(url, timeout=kwargs.pop("timeout", self.timeout), **kwargs)
+        resposta.raise_for_status()
+        return resposta.content
+
+    def baixar_varios(self, urls: List[str]) -> List[bytes]:
+        """
+        Baixa vários arquivos em paralelo
+
+        Returns:
+            Conteúdos na mesma ordem das URLs (a primeira falha é propagada)
+        """
+        if len(urls) <= 1:
+            return [self.baixar(url) for url in urls]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concorrencia, len(urls))) as executor:
+            return list(executor.map(self.baixar, urls))
+
+    def fechar(self):
+        """Descarta cookies/headers da sessão (o pool de conexões permanece ativo)"""
+        self.session.cookies.clear()
+        self.session.headers.pop("authorization", None)
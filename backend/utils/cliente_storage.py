@@ -0,0 +1,395 @@
+"""
+Cliente do object store (MinIO/S3) para as faturas e artefatos dos RPAs
+Pool de conexões compartilhado pelo processo, upload multipart em fluxo para
+PDFs grandes, uploads paralelos limitados, novas tentativas com backoff e
+verificação do checksum do objeto gravado
+"""
+
+import os
+import time
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .esperas import aguardar
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Menor parte aceita pelo S3 em uploads multipart (exceto a última)
+PARTE_MINIMA = 5 * MB
+
+# Códigos S3 que indicam falha temporária do servidor
+CODIGOS_TRANSITORIOS = {"InternalError", "SlowDown", "ServiceUnavailable", "RequestTimeout", "OperationAborted"}
+
+METADADO_SHA256 = "sha256"
+
+
+@dataclass(frozen=True)
+class ConfiguracaoStorage:
+    """Parâmetros do object store (variáveis MINIO_* e STORAGE_*)"""
+    endpoint: str = field(default_factory=lambda: os.getenv("MINIO_ENDPOINT", "localhost:9000"))
+    access_key: str = field(default_factory=lambda: os.getenv("MINIO_ACCESS_KEY", "minioadmin"))
+    secret_key: str = field(default_factory=lambda: os.getenv("MINIO_SECRET_KEY", "minioadmin"))
+    bucket: str = field(default_factory=lambda: os.getenv("BUCKET_NAME", "faturas-rpa"))
+    seguro: bool = field(default_factory=lambda: os.getenv("MINIO_SECURE", "0") == "1")
+    regiao: Optional[str] = field(default_factory=lambda: os.getenv("MINIO_REGION") or None)
+    conexoes: int = field(default_factory=lambda: int(os.getenv("STORAGE_POOL_CONEXOES", "32")))
+    parte_bytes: int = field(default_factory=lambda: max(PARTE_MINIMA, int(os.getenv("STORAGE_PARTE_MB", "16")) * MB))
+    uploads_paralelos: int = field(default_factory=lambda: int(os.getenv("STORAGE_UPLOADS_PARALELOS", "8")))
+    tentativas: int = field(default_factory=lambda: int(os.getenv("STORAGE_TENTATIVAS", "4")))
+    backoff_segundos: float = field(default_factory=lambda: float(os.getenv("STORAGE_BACKOFF_SEGUNDOS", "0.5")))
+    backoff_maximo_segundos: float = field(default_factory=lambda: float(os.getenv("STORAGE_BACKOFF_MAXIMO_SEGUNDOS", "10")))
+    timeout_segundos: float = field(default_factory=lambda: float(os.getenv("STORAGE_TIMEOUT_SEGUNDOS", "60")))
+
+
+@dataclass
+class ObjetoArmazenado:
+    """Objeto gravado e verificado no bucket"""
+    chave: str
+    url: str
+    tamanho: int
+    sha256: str
+    etag: str
+    tentativas: int = 1
+
+
+@dataclass
+class _Assinatura:
+    """Tamanho e checksums calculados numa única leitura do arquivo"""
+    tamanho: int
+    sha256: str
+    etag: str  # ETag esperado do S3: md5 (parte única) ou md5 dos md5 das partes + "-N"
+
+
+class ErroChecksum(Exception):
+    """Objeto gravado difere do arquivo local (o upload é refeito)"""
+
+
+def assinar_arquivo(caminho: str, parte_bytes: int) -> _Assinatura:
+    """Calcula sha256 e o ETag que o S3 deve devolver para o particionamento informado"""
+    sha256 = hashlib.sha256()
+    md5_partes = []
+    tamanho = 0
+    with open(caminho, "rb") as arquivo:
+        for parte in iter(lambda: arquivo.read(parte_bytes), b""):
+            sha256.update(parte)
+            md5_partes.append(hashlib.md5(parte))
+            tamanho += len(parte)
+    if len(md5_partes) <= 1:
+        etag = md5_partes[0].hexdigest() if md5_partes else hashlib.md5(b"").hexdigest()
+    else:
+        combinado = hashlib.md5(b"".join(md5.digest() for md5 in md5_partes))
+        etag = f"{combinado.hexdigest()}-{len(md5_partes)}"
+    return _Assinatura(tamanho=tamanho, sha256=sha256.hexdigest(), etag=etag)
+
+
+def _transitorio(erro: BaseException) -> bool:
+    """Falhas que justificam nova tentativa (rede, servidor ocupado, checksum divergente)"""
+    if isinstance(erro, (ErroChecksum, ConnectionError, TimeoutError)):
+        return True
+    codigo = getattr(erro, "code", None)
+    if isinstance(codigo, str):
+        return codigo in CODIGOS_TRANSITORIOS
+    # Erros de transporte do urllib3 (MaxRetryError, ProtocolError...)
+    return type(erro).__module__.startswith("urllib3")
+
+
+class ClienteStorageBase:
+    """
+    Lógica comum de upload: assinatura, novas tentativas, verificação e lote
+
+    Subclasses implementam _gravar (PUT do objeto) e _consultar (HEAD).
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoStorage] = None):
+        self.configuracao = configuracao or ConfiguracaoStorage()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # ---- Operações do backend ----
+
+    def _gravar(self, caminho: str, chave: str, assinatura: _Assinatura, content_type: str) -> str:
+        """Grava o objeto e retorna o ETag"""
+        raise NotImplementedError
+
+    def _consultar(self, chave: str) -> Optional[Tuple[int, str, Optional[str]]]:
+        """(tamanho, etag, sha256 dos metadados) ou None se o objeto não existe"""
+        raise NotImplementedError
+
+    def _ler(self, chave: str, destino: str):
+        """Grava o conteúdo do objeto no arquivo local `destino`"""
+        raise NotImplementedError
+
+    # ---- API ----
+
+    def url(self, chave: str) -> str:
+        esquema = "https" if self.configuracao.seguro else "http"
+        return f"{esquema}://{self.configuracao.endpoint}/{self.configuracao.bucket}/{chave}"
+
+    def existe(self, chave: str) -> bool:
+        return self._consultar(chave) is not None
+
+    def baixar_arquivo(self, chave: str, destino: str) -> str:
+        """Copia o objeto para o arquivo local `destino` e retorna o caminho"""
+        self._ler(chave, destino)
+        return destino
+
+    def _verificar(self, chave: str, assinatura: _Assinatura, etag: str):
+        """Confere tamanho, sha256 e ETag do objeto gravado com o arquivo local"""
+        consulta = self._consultar(chave)
+        if consulta is None:
+            raise ErroChecksum(f"Objeto {chave} não encontrado após o upload")
+        tamanho, etag_remoto, sha256_remoto = consulta
+        if tamanho != assinatura.tamanho:
+            raise ErroChecksum(f"Tamanho divergente em {chave}: {tamanho} != {assinatura.tamanho}")
+        if sha256_remoto and sha256_remoto != assinatura.sha256:
+            raise ErroChecksum(f"sha256 divergente em {chave}")
+        etag_remoto = (etag_remoto or etag or "").strip('"')
+        # ETag diferente do md5 também ocorre com criptografia no servidor (SSE-KMS)
+        if etag_remoto and etag_remoto != assinatura.etag and not sha256_remoto:
+            raise ErroChecksum(f"ETag divergente em {chave}: {etag_remoto} != {assinatura.etag}")
+
+    def enviar_arquivo(self, caminho: str, chave: str, content_type: str = "application/pdf") -> ObjetoArmazenado:
+        """
+        Envia o arquivo e confirma que o objeto gravado é idêntico ao local
+
+        Falhas transitórias (rede, 5xx, SlowDown, checksum divergente) são
+        repetidas com backoff exponencial e jitter.
+        """
+        configuracao = self.configuracao
+        assinatura = assinar_arquivo(caminho, configuracao.parte_bytes)
+        for tentativa in range(1, configuracao.tentativas + 1):
+            try:
+                etag = self._gravar(caminho, chave, assinatura, content_type)
+                self._verificar(chave, assinatura, etag)
+                return ObjetoArmazenado(
+                    chave=chave, url=self.url(chave), tamanho=assinatura.tamanho,
+                    sha256=assinatura.sha256, etag=assinatura.etag, tentativas=tentativa
+                )
+            except Exception as e:
+                if tentativa >= configuracao.tentativas or not _transitorio(e):
+                    raise
+                espera = min(configuracao.backoff_maximo_segundos, configuracao.backoff_segundos * 2 ** (tentativa - 1))
+                espera *= random.uniform(0.5, 1.0)
+                logger.warning(f"Upload de {chave} falhou (tentativa {tentativa}): {e}. Nova tentativa em {espera:.1f}s")
+                aguardar(espera)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.configuracao.uploads_paralelos,
+                    thread_name_prefix="upload-storage"
+                )
+            return self._executor
+
+    def enviar_varios(self, itens: Iterable[Tuple[str, str]],
+                      content_type: str = "application/pdf") -> List[Union[ObjetoArmazenado, Exception]]:
+        """
+        Envia vários arquivos em paralelo (no máximo uploads_paralelos por vez)
+
+        Args:
+            itens: Pares (caminho local, chave)
+
+        Returns:
+            ObjetoArmazenado ou a exceção de cada item, na mesma ordem
+        """
+        futuros = [self._pool().submit(self.enviar_arquivo, caminho, chave, content_type) for caminho, chave in itens]
+        resultados: List[Union[ObjetoArmazenado, Exception]] = []
+        for futuro in futuros:
+            try:
+                resultados.append(futuro.result())
+            except Exception as e:
+                resultados.append(e)
+        return resultados
+
+    def encerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+class ClienteStorageMinio(ClienteStorageBase):
+    """
+    Cliente MinIO/S3 sobre um PoolManager urllib3 compartilhado pelas threads
+
+    put_object com part_size faz o upload multipart lendo o arquivo parte a
+    parte, sem carregar o PDF inteiro em memória.
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoStorage] = None):
+        super().__init__(configuracao)
+        self._minio = None
+        self._bucket_verificado = False
+
+    def _criar_pool_http(self):
+        import urllib3
+
+        opcoes = {}
+        if self.configuracao.seguro:
+            try:
+                import certifi
+                opcoes = {"cert_reqs": "CERT_REQUIRED", "ca_certs": certifi.where()}
+            except ImportError:
+                opcoes = {"cert_reqs": "CERT_REQUIRED"}
+        return urllib3.PoolManager(
+            num_pools=4,
+            maxsize=self.configuracao.conexoes,
+            block=True,
+            timeout=urllib3.Timeout(connect=10, read=self.configuracao.timeout_segundos),
+            # Repetições de PUT ficam com enviar_arquivo (o corpo precisa ser relido)
+            retries=urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                                  allowed_methods=frozenset(["GET", "HEAD"])),
+            **opcoes
+        )
+
+    @property
+    def minio(self):
+        with self._lock:
+            if self._minio is None:
+                from minio import Minio
+
+                self._minio = Minio(
+                    self.configuracao.endpoint,
+                    access_key=self.configuracao.access_key,
+                    secret_key=self.configuracao.secret_key,
+                    secure=self.configuracao.seguro,
+                    region=self.configuracao.regiao,
+                    http_client=self._criar_pool_http(),
+                )
+            return self._minio
+
+    def garantir_bucket(self):
+        if self._bucket_verificado:
+            return
+        bucket = self.configuracao.bucket
+        if not self.minio.bucket_exists(bucket):
+            try:
+                self.minio.make_bucket(bucket)
+            except Exception as e:
+                # Outro worker pode ter criado o bucket entre as duas chamadas
+                if getattr(e, "code", None) not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                    raise
+        self._bucket_verificado = True
+
+    def _gravar(self, caminho: str, chave: str, assinatura: _Assinatura, content_type: str) -> str:
+        self.garantir_bucket()
+        with open(caminho, "rb") as arquivo:
+            resultado = self.minio.put_object(
+                self.configuracao.bucket, chave, arquivo, assinatura.tamanho,
+                content_type=content_type,
+                metadata={METADADO_SHA256: assinatura.sha256},
+                part_size=self.configuracao.parte_bytes,
+            )
+        return resultado.etag
+
+    def _consultar(self, chave: str) -> Optional[Tuple[int, str, Optional[str]]]:
+        try:
+            objeto = self.minio.stat_object(self.configuracao.bucket, chave)
+        except Exception as e:
+            if getattr(e, "code", None) in ("NoSuchKey", "NoSuchObject", "NoSuchBucket"):
+                return None
+            raise
+        metadados = objeto.metadata or {}
+        return objeto.size, objeto.etag, metadados.get(f"x-amz-meta-{METADADO_SHA256}")
+
+    def _ler(self, chave: str, destino: str):
+        # GET em fluxo para o arquivo (repetições no PoolManager)
+        self.minio.fget_object(self.configuracao.bucket, chave, destino)
+
+
+class ClienteStorageMemoria(ClienteStorageBase):
+    """
+    Object store em memória com a mesma semântica de ETag do S3
+
+    Usado nos testes, nos benchmarks e quando o pacote minio não está
+    instalado (guarda apenas os max_objetos mais recentes).
+    falhas_injetadas e latencia_segundos simulam rede instável.
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoStorage] = None,
+                 latencia_segundos: float = 0.0, falhas_injetadas: int = 0, max_objetos: int = 1000):
+        super().__init__(configuracao)
+        self.latencia_segundos = latencia_segundos
+        self.falhas_injetadas = falhas_injetadas
+        self.max_objetos = max_objetos
+        self.objetos: Dict[str, Tuple[bytes, str, Dict[str, str]]] = {}
+        self.gravacoes = 0
+
+    def _gravar(self, caminho: str, chave: str, assinatura: _Assinatura, content_type: str) -> str:
+        if self.latencia_segundos:
+            time.sleep(self.latencia_segundos)
+        with self._lock:
+            if self.falhas_injetadas > 0:
+                self.falhas_injetadas -= 1
+                raise ConnectionError("Falha de rede simulada")
+            self.gravacoes += 1
+        with open(caminho, "rb") as arquivo:
+            conteudo = arquivo.read()
+        etag = assinar_arquivo(caminho, self.configuracao.parte_bytes).etag
+        with self._lock:
+            self.objetos.pop(chave, None)
+            if len(self.objetos) >= self.max_objetos:
+                del self.objetos[next(iter(self.objetos))]
+            self.objetos[chave] = (conteudo, etag, {METADADO_SHA256: assinatura.sha256})
+        return etag
+
+    def _consultar(self, chave: str) -> Optional[Tuple[int, str, Optional[str]]]:
+        with self._lock:
+            objeto = self.objetos.get(chave)
+        if objeto is None:
+            return None
+        conteudo, etag, metadados = objeto
+        return len(conteudo), etag, metadados.get(METADADO_SHA256)
+
+    def _ler(self, chave: str, destino: str):
+        with self._lock:
+            objeto = self.objetos.get(chave)
+        if objeto is None:
+            raise FileNotFoundError(f"Objeto {chave} não encontrado")
+        with open(destino, "wb") as arquivo:
+            arquivo.write(objeto[0])
+
+
+# Instância do processo
+_cliente: Optional[ClienteStorageBase] = None
+_cliente_lock = threading.Lock()
+
+
+def obter_cliente_storage() -> ClienteStorageBase:
+    """
+    Retorna o cliente de storage do processo
+
+    STORAGE_BACKEND=memoria força o object store em memória; sem o pacote
+    minio instalado ele também é usado (como o upload simulado anterior).
+    """
+    global _cliente
+    with _cliente_lock:
+        if _cliente is None:
+            backend = os.getenv("STORAGE_BACKEND", "minio").lower()
+            if backend == "minio":
+                try:
+                    import minio  # noqa: F401
+                    _cliente = ClienteStorageMinio()
+                except ImportError:
+                    logger.warning("Pacote minio não instalado: usando object store em memória")
+            if _cliente is None:
+                _cliente = ClienteStorageMemoria()
+        return _cliente
+
+
+def redefinir_cliente_storage():
+    """
+    Descarta o cliente herdado no fork (conexões e threads do pai não são
+    reaproveitáveis no filho); o próximo uso cria um novo
+    """
+    global _cliente, _cliente_lock
+    _cliente = None
+    _cliente_lock = threading.Lock()
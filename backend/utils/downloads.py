@@ -0,0 +1,167 @@
+"""
+Diretórios de download isolados por execução
+e espera de conclusão de downloads orientada a eventos
+"""
+
+import os
+import re
+import time
+import shutil
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Set
+
+from .cancelamento import verificar_cancelamento
+
+logger = logging.getLogger(__name__)
+
+# Sufixos de arquivos ainda em transferência (Firefox, Chrome, genéricos)
+SUFIXOS_PARCIAIS = (".part", ".crdownload", ".tmp", ".download", ".partial")
+
+INTERVALO_VERIFICACAO = 0.1
+
+
+def obter_diretorio_base_downloads() -> Path:
+    """Diretório raiz compartilhado de downloads do RPA"""
+    return Path(os.getenv("RPA_DOWNLOAD_DIR", str(Path.home() / "Downloads" / "RPA_DOWNLOADS")))
+
+
+def caminho_diretorio_execucao(id_processo: str) -> Path:
+    """Diretório de download da execução do processo (sem criá-lo)"""
+    nome = re.sub(r"[^A-Za-z0-9_.-]", "_", str(id_processo)) or "sem_processo"
+    return obter_diretorio_base_downloads() / "execucoes" / nome
+
+
+def criar_diretorio_execucao(id_processo: str) -> str:
+    """Cria diretório de download exclusivo para a execução do processo"""
+    diretorio = caminho_diretorio_execucao(id_processo)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    return str(diretorio)
+
+
+def remover_diretorio_execucao(diretorio: str):
+    """Remove diretório de execução e todo o seu conteúdo"""
+    shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def download_em_andamento(diretorio: str) -> bool:
+    """Indica se há arquivos parciais no diretório"""
+    try:
+        return any(nome.endswith(SUFIXOS_PARCIAIS) for nome in os.listdir(diretorio))
+    except OSError:
+        return False
+
+
+def _localizar_concluido(
+    diretorio: str,
+    padrao: Optional[str],
+    extensoes: Iterable[str],
+    ignorar: Set[str]
+) -> Optional[str]:
+    """Retorna o arquivo concluído mais recente que atende aos filtros"""
+    try:
+        nomes = os.listdir(diretorio)
+    except OSError:
+        return None
+
+    if any(nome.endswith(SUFIXOS_PARCIAIS) for nome in nomes):
+        return None
+
+    candidatos = []
+    for nome in nomes:
+        if nome in ignorar:
+            continue
+        if padrao and padrao not in nome:
+            continue
+        if extensoes and not nome.lower().endswith(tuple(extensoes)):
+            continue
+        caminho = os.path.join(diretorio, nome)
+        try:
+            stat = os.stat(caminho)
+        except OSError:
+            continue
+        if stat.st_size > 0:
+            candidatos.append((stat.st_mtime, caminho, stat.st_size))
+
+    if not candidatos:
+        return None
+    return max(candidatos)[1]
+
+
+class _ObservadorDiretorio:
+    """Observa eventos do diretório via inotify quando disponível"""
+
+    def __init__(self, diretorio: str):
+        self._inotify = None
+        try:
+            from inotify_simple import INotify, flags
+            self._inotify = INotify()
+            self._inotify.add_watch(
+                diretorio,
+                flags.CREATE | flags.MOVED_TO | flags.CLOSE_WRITE | flags.DELETE | flags.MOVED_FROM
+            )
+        except (ImportError, OSError):
+            self._inotify = None
+
+    def aguardar_evento(self, segundos: float):
+        """Bloqueia até um evento no diretório ou até o tempo informado"""
+        if self._inotify is not None:
+            self._inotify.read(timeout=int(segundos * 1000))
+        else:
+            time.sleep(segundos)
+
+    def fechar(self):
+        if self._inotify is not None:
+            self._inotify.close()
+
+
+def aguardar_download(
+    diretorio: str,
+    padrao: Optional[str] = None,
+    extensoes: Iterable[str] = (".pdf",),
+    timeout: float = 30,
+    estabilidade_segundos: float = 0.0,
+    ignorar: Optional[Set[str]] = None
+) -> Optional[str]:
+    """
+    Aguarda a conclusão de um download no diretório
+
+    Retorna assim que não houver arquivos parciais (.part/.crdownload) e
+    existir um arquivo não vazio compatível com o padrão. Com inotify
+    disponível reage aos eventos do diretório; caso contrário verifica
+    a cada 100 ms. `estabilidade_segundos` exige que o tamanho do arquivo
+    permaneça constante pelo período (navegadores sem arquivo parcial).
+
+    Returns:
+        Caminho do arquivo baixado ou None em caso de timeout
+    """
+    ignorar = ignorar or set()
+    limite = time.monotonic() + timeout
+    observador = _ObservadorDiretorio(diretorio)
+    ultimo_tamanho = None
+    estavel_desde = None
+
+    try:
+        while True:
+            verificar_cancelamento()
+            arquivo = _localizar_concluido(diretorio, padrao, extensoes, ignorar)
+
+            if arquivo:
+                if estabilidade_segundos <= 0:
+                    return arquivo
+
+                tamanho = os.path.getsize(arquivo)
+                agora = time.monotonic()
+                if tamanho != ultimo_tamanho:
+                    ultimo_tamanho, estavel_desde = tamanho, agora
+                elif agora - estavel_desde >= estabilidade_segundos:
+                    return arquivo
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                logger.warning(f"Timeout aguardando download em {diretorio}")
+                return None
+
+            observador.aguardar_evento(min(restante, INTERVALO_VERIFICACAO))
+    finally:
+        observador.fechar()
@@ -0,0 +1,295 @@
+"""
+Esperas condicionais para os fluxos RPA
+Substituem sleeps fixos e contabilizam o tempo ocioso de cada etapa
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException
+)
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .cancelamento import verificar_cancelamento
+from .downloads import SUFIXOS_PARCIAIS
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_PADRAO = 0.1
+
+# Instala contador de XHR/fetch pendentes na página (idempotente)
+SCRIPT_MONITOR_REDE = """
+if (!window.__rpaRede) {
+    window.__rpaRede = {pendentes: 0};
+    var rede = window.__rpaRede;
+    var enviar = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        rede.pendentes++;
+        this.addEventListener('loadend', function () { rede.pendentes--; });
+        return enviar.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var buscar = window.fetch;
+        window.fetch = function () {
+            rede.pendentes++;
+            return buscar.apply(this, arguments).finally(function () { rede.pendentes--; });
+        };
+    }
+}
+return [document.readyState, window.__rpaRede.pendentes,
+        performance.getEntriesByType('resource').length];
+"""
+
+
+class MedidorEsperas:
+    """
+    Acumula, por etapa, o tempo gasto em sleeps fixos e em esperas condicionais
+
+    O relatório permite identificar etapas em que o RPA fica ocioso
+    sem necessidade (sleep) ou aguardando o portal (espera).
+    """
+
+    def __init__(self):
+        self.etapa_atual: Optional[str] = None
+        # Escala dos timeouts da etapa atual (timeouts adaptativos) e seus limites
+        self.escala_timeout: Optional[float] = None
+        self.limites_timeout: Tuple[float, float] = (0.0, float("inf"))
+        self._registros: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo: str, segundos: float, timeout: bool = False):
+        """Registra uma espera do tipo 'sleep' ou 'espera'"""
+        etapa = self.etapa_atual or "geral"
+        with self._lock:
+            registro = self._registros.setdefault(
+                etapa, {"sleep": 0.0, "espera": 0.0, "quantidade": 0, "timeouts": 0}
+            )
+            registro[tipo] += segundos
+            registro["quantidade"] += 1
+            if timeout:
+                registro["timeouts"] += 1
+
+    def ajustar_timeout(self, timeout: float) -> float:
+        """Aplica a escala da etapa atual ao timeout fixo informado"""
+        if not self.escala_timeout:
+            return timeout
+        minimo, maximo = self.limites_timeout
+        return min(max(timeout * self.escala_timeout, min(timeout, minimo)), max(timeout, maximo))
+
+    def reiniciar(self):
+        with self._lock:
+            self._registros = {}
+
+    def relatorio(self) -> Dict[str, Any]:
+        """Totais de sleep/espera por etapa e gerais (segundos)"""
+        with self._lock:
+            etapas = {
+                etapa: {chave: round(valor, 3) for chave, valor in registro.items()}
+                for etapa, registro in self._registros.items()
+            }
+        return {
+            "sleep_total": round(sum(r["sleep"] for r in etapas.values()), 3),
+            "espera_total": round(sum(r["espera"] for r in etapas.values()), 3),
+            "etapas": etapas,
+        }
+
+
+_local = threading.local()
+
+
+def medidor_ativo() -> Optional[MedidorEsperas]:
+    """Medidor da execução em andamento na thread atual"""
+    return getattr(_local, "medidor", None)
+
+
+@contextmanager
+def ativar_medidor(medidor: MedidorEsperas):
+    """Direciona as esperas da thread atual para o medidor informado"""
+    anterior = medidor_ativo()
+    _local.medidor = medidor
+    try:
+        yield medidor
+    finally:
+        _local.medidor = anterior
+
+
+def _timeout(timeout: float) -> float:
+    medidor = medidor_ativo()
+    return medidor.ajustar_timeout(timeout) if medidor is not None else timeout
+
+
+def _registrar(tipo: str, inicio: float, timeout: bool = False):
+    medidor = medidor_ativo()
+    if medidor is not None:
+        medidor.registrar(tipo, time.monotonic() - inicio, timeout)
+
+
+def aguardar(segundos: float):
+    """Sleep fixo (contabilizado como tempo ocioso no relatório)"""
+    verificar_cancelamento()
+    inicio = time.monotonic()
+    time.sleep(segundos)
+    _registrar("sleep", inicio)
+    verificar_cancelamento()
+
+
+def aguardar_condicao(
+    driver,
+    condicao: Callable[[Any], Any],
+    timeout: float = 10,
+    descricao: str = "condição",
+    intervalo: float = INTERVALO_PADRAO
+) -> Any:
+    """
+    Aguarda até a condição retornar valor verdadeiro
+
+    Returns:
+        Valor retornado pela condição ou None em caso de timeout
+    """
+    timeout = _timeout(timeout)
+    inicio = time.monotonic()
+
+    def _condicao_cancelavel(drv):
+        verificar_cancelamento()
+        return condicao(drv)
+
+    try:
+        resultado = WebDriverWait(
+            driver, timeout, poll_frequency=intervalo,
+            ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+        ).until(_condicao_cancelavel)
+        _registrar("espera", inicio)
+        return resultado
+    except TimeoutException:
+        _registrar("espera", inicio, timeout=True)
+        logger.warning(f"Timeout ({timeout}s) aguardando {descricao}")
+        return None
+
+
+def aguardar_rede_ociosa(
+    driver,
+    timeout: float = 15,
+    ociosidade: float = 0.5,
+    intervalo: float = INTERVALO_PADRAO
+) -> bool:
+    """
+    Aguarda o documento carregar e a rede ficar sem requisições por `ociosidade` segundos
+
+    Considera XHR/fetch pendentes e novos recursos carregados pela página.
+    """
+    estado = {"assinatura": None, "desde": None}
+
+    def _ociosa(drv):
+        try:
+            pronto, pendentes, recursos = drv.execute_script(SCRIPT_MONITOR_REDE)
+        except WebDriverException:
+            # Página em transição: reinicia a contagem
+            estado["assinatura"] = None
+            return False
+
+        agora = time.monotonic()
+        assinatura = (pronto, pendentes, recursos)
+        if pronto != "complete" or pendentes > 0 or assinatura != estado["assinatura"]:
+            estado["assinatura"], estado["desde"] = assinatura, agora
+            return False
+        return agora - estado["desde"] >= ociosidade
+
+    return bool(aguardar_condicao(driver, _ociosa, timeout, "rede ociosa", intervalo))
+
+
+def aguardar_elemento_estavel(
+    driver,
+    localizador: Tuple[str, str],
+    timeout: float = 10,
+    com_texto: bool = False,
+    intervalo: float = 0.2
+):
+    """
+    Aguarda elemento visível cuja posição/tamanho não muda entre duas leituras
+
+    Args:
+        localizador: Tupla (By, valor)
+        com_texto: Exige também texto não vazio
+
+    Returns:
+        WebElement ou None em caso de timeout
+    """
+    estado = {"retangulo": None}
+
+    def _estavel(drv):
+        elemento = drv.find_element(*localizador)
+        if not elemento.is_displayed() or (com_texto and not elemento.text.strip()):
+            estado["retangulo"] = None
+            return False
+        retangulo = tuple(elemento.rect.items())
+        if retangulo != estado["retangulo"]:
+            estado["retangulo"] = retangulo
+            return False
+        return elemento
+
+    return aguardar_condicao(driver, _estavel, timeout, f"elemento estável {localizador[1]}", intervalo)
+
+
+def aguardar_mudanca_url(driver, url_anterior: str, timeout: float = 15) -> Optional[str]:
+    """Aguarda a navegação sair da URL informada e retorna a nova URL"""
+    return aguardar_condicao(
+        driver,
+        lambda drv: drv.current_url if drv.current_url != url_anterior else False,
+        timeout,
+        "mudança de URL"
+    )
+
+
+def aguardar_nova_aba(driver, handles_anteriores: Iterable[str], timeout: float = 15) -> Optional[str]:
+    """Aguarda a abertura de uma nova aba e retorna o seu handle"""
+    anteriores = set(handles_anteriores)
+
+    def _nova(drv):
+        novas = [handle for handle in drv.window_handles if handle not in anteriores]
+        return novas[-1] if novas else False
+
+    return aguardar_condicao(driver, _nova, timeout, "nova aba")
+
+
+def aguardar_inicio_download(
+    diretorio: str,
+    existentes: Optional[Iterable[str]] = None,
+    timeout: float = 15
+) -> Optional[str]:
+    """
+    Aguarda surgir no diretório um arquivo novo (parcial ou concluído)
+
+    Útil para distinguir "download não iniciou" de "download lento"
+    antes de aguardar a conclusão com downloads.aguardar_download.
+
+    Returns:
+        Nome do arquivo ou None em caso de timeout
+    """
+    existentes = set(existentes or ())
+    timeout = _timeout(timeout)
+    inicio = time.monotonic()
+    limite = inicio + timeout
+
+    while True:
+        verificar_cancelamento()
+        try:
+            novos = [nome for nome in os.listdir(diretorio) if nome not in existentes]
+        except OSError:
+            novos = []
+        if novos:
+            _registrar("espera", inicio)
+            parciais = [nome for nome in novos if nome.endswith(SUFIXOS_PARCIAIS)]
+            return (parciais or novos)[0]
+        if time.monotonic() >= limite:
+            _registrar("espera", inicio, timeout=True)
+            logger.warning(f"Download não iniciou em {timeout}s ({diretorio})")
+            return None
+        time.sleep(INTERVALO_PADRAO)
@@ -0,0 +1,131 @@
+"""
+Extração de dados de páginas em uma única chamada
+Especificação declarativa (XPath) por portal, executada no navegador via
+execute_script ou sobre um snapshot do HTML com lxml
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+
+# Executa a especificação no navegador e retorna as linhas como JSON
+SCRIPT_EXTRACAO = """
+var espec = arguments[0];
+function avaliar(xpath, contexto) {
+    return document.evaluate(xpath, contexto, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+}
+function valorDe(no, atributo) {
+    if (!no) { return null; }
+    if (atributo) {
+        if (atributo in no && typeof no[atributo] !== 'function') { return no[atributo]; }
+        return no.getAttribute ? no.getAttribute(atributo) : null;
+    }
+    return (no.textContent || '').replace(/\\s+/g, ' ').trim();
+}
+var linhas = avaliar(espec.linhas, document);
+var resultado = [];
+for (var i = 0; i < linhas.snapshotLength; i++) {
+    var linha = linhas.snapshotItem(i);
+    var item = {};
+    espec.campos.forEach(function (campo) {
+        var no = campo.xpath ? avaliar(campo.xpath, linha).snapshotItem(0) : linha;
+        item[campo.nome] = valorDe(no, campo.atributo);
+    });
+    resultado.push(item);
+}
+return resultado;
+"""
+
+
+def xpath_classe(classe: str) -> str:
+    """Predicado XPath equivalente ao seletor CSS .classe"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {classe} ')"
+
+
+@dataclass(frozen=True)
+class CampoExtracao:
+    """Campo extraído de cada linha"""
+    nome: str
+    xpath: str = ""  # Relativo à linha ("" = a própria linha)
+    atributo: Optional[str] = None  # None = texto normalizado
+    obrigatorio: bool = False
+
+
+@dataclass(frozen=True)
+class EspecificacaoExtracao:
+    """Linhas de uma listagem e os campos de cada linha"""
+    linhas: str
+    campos: Tuple[CampoExtracao, ...]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "linhas": self.linhas,
+            "campos": [
+                {"nome": campo.nome, "xpath": campo.xpath, "atributo": campo.atributo}
+                for campo in self.campos
+            ],
+        }
+
+    def xpath_linha(self, indice: int) -> str:
+        """XPath da linha na posição informada (para interagir após a extração)"""
+        return f"({self.linhas})[{indice + 1}]"
+
+
+def _filtrar(espec: EspecificacaoExtracao, itens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Mantém a posição original e descarta linhas sem campos obrigatórios"""
+    obrigatorios = [campo.nome for campo in espec.campos if campo.obrigatorio]
+    resultado = []
+    for indice, item in enumerate(itens):
+        if all(item.get(nome) for nome in obrigatorios):
+            item["_indice"] = indice
+            resultado.append(item)
+    return resultado
+
+
+def extrair_do_driver(driver, espec: EspecificacaoExtracao) -> List[Dict[str, Any]]:
+    """
+    Extrai todas as linhas com um único execute_script
+
+    Returns:
+        Lista de dicionários (campo -> valor) com a posição da linha em "_indice"
+    """
+    itens = driver.execute_script(SCRIPT_EXTRACAO, espec.to_dict()) or []
+    return _filtrar(espec, itens)
+
+
+def extrair_de_html(html: str, espec: EspecificacaoExtracao, url_base: str = "") -> List[Dict[str, Any]]:
+    """
+    Extrai as linhas de um snapshot do HTML (page_source) com lxml
+
+    Raises:
+        ImportError: lxml não instalado
+    """
+    from lxml import html as lxml_html
+
+    documento = lxml_html.fromstring(html)
+    itens = []
+    for linha in documento.xpath(espec.linhas):
+        item = {}
+        for campo in espec.campos:
+            nos = linha.xpath(campo.xpath) if campo.xpath else [linha]
+            no = nos[0] if nos else None
+            if no is None:
+                valor = None
+            elif campo.atributo:
+                valor = no.get(campo.atributo)
+                if valor and campo.atributo in ("href", "src") and url_base:
+                    valor = urljoin(url_base, valor)
+            else:
+                valor = " ".join(no.text_content().split())
+            item[campo.nome] = valor
+        itens.append(item)
+    return _filtrar(espec, itens)
+
+
+def extrair_valor_de_html(html: str, xpath: str) -> Optional[str]:
+    """Texto normalizado do primeiro nó do XPath no HTML"""
+    itens = extrair_de_html(html, EspecificacaoExtracao(linhas="/html", campos=(CampoExtracao("valor", xpath),)))
+    return itens[0]["valor"] if itens else None
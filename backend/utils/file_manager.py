@@ -5,10 +5,21 @@ Integração com MinIO/S3 e gerenciamento de downloads
 
 import os
 import shutil
+import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
+from .downloads import (
+    aguardar_download,
+    criar_diretorio_execucao,
+    obter_diretorio_base_downloads,
+    remover_diretorio_execucao
+)
+from .cliente_storage import obter_cliente_storage
+
+logger = logging.getLogger(__name__)
+
 
 class FileManager:
     """Gerenciador de arquivos para o sistema RPA"""
@@ -19,7 +30,7 @@ class FileManager:
     
     def _setup_download_directory(self) -> str:
         """Configura diretório de downloads"""
-        downloads_path = Path.home() / "Downloads" / "RPA_DOWNLOADS"
+        downloads_path = obter_diretorio_base_downloads()
         downloads_path.mkdir(parents=True, exist_ok=True)
         return str(downloads_path)
     
@@ -33,45 +44,68 @@ class FileManager:
         """Retorna diretório de downloads"""
         return self.download_dir
     
-    def listar_arquivos_download(self) -> List[str]:
+    def preparar_diretorio_execucao(self, id_processo: str) -> str:
+        """Cria diretório de download exclusivo da execução (por id_processo)"""
+        return criar_diretorio_execucao(id_processo)
+    
+    def limpar_diretorio_execucao(self, diretorio: str):
+        """Remove diretório de download da execução"""
+        if diretorio and os.path.abspath(diretorio) != os.path.abspath(self.download_dir):
+            remover_diretorio_execucao(diretorio)
+    
+    def aguardar_download(self, diretorio: Optional[str] = None, padrao: Optional[str] = None,
+                          timeout: float = 30) -> Optional[str]:
+        """Aguarda conclusão de download e retorna o caminho do arquivo"""
+        return aguardar_download(diretorio or self.download_dir, padrao=padrao, timeout=timeout)
+    
+    def listar_arquivos_download(self, diretorio: Optional[str] = None) -> List[str]:
         """Lista arquivos no diretório de download"""
+        diretorio = diretorio or self.download_dir
         try:
-            return [f for f in os.listdir(self.download_dir) 
-                   if os.path.isfile(os.path.join(self.download_dir, f))]
+            return [f for f in os.listdir(diretorio) 
+                   if os.path.isfile(os.path.join(diretorio, f))]
         except OSError:
             return []
     
-    def renomear_arquivo(self, arquivo_origem: str, novo_nome: str) -> str:
+    def renomear_arquivo(self, arquivo_origem: str, novo_nome: str, diretorio: Optional[str] = None) -> str:
         """Renomeia arquivo e retorna caminho completo"""
+        diretorio = diretorio or self.download_dir
         try:
-            # Se arquivo_origem é apenas nome, assumir que está no download_dir
+            # Se arquivo_origem é apenas nome, assumir que está no diretório de download
             if not os.path.dirname(arquivo_origem):
-                arquivo_origem = os.path.join(self.download_dir, arquivo_origem)
+                arquivo_origem = os.path.join(diretorio, arquivo_origem)
             
-            caminho_destino = os.path.join(self.download_dir, novo_nome)
+            caminho_destino = os.path.join(diretorio, novo_nome)
             shutil.move(arquivo_origem, caminho_destino)
             return caminho_destino
         except Exception as e:
             raise Exception(f"Erro ao renomear arquivo: {e}")
     
     def upload_to_s3(self, arquivo_local: str, cliente_hash: str, mes_ano: str) -> str:
-        """
-        Simula upload para S3/MinIO
-        Em produção, conectaria com o serviço real
-        """
+        """Envia o arquivo para faturas/<cliente_hash>/<mes_ano>/<nome> e retorna a URL"""
         try:
-            # Gerar URL simulada para S3
             nome_arquivo = os.path.basename(arquivo_local)
-            s3_key = f"faturas/{cliente_hash}/{mes_ano}/{nome_arquivo}"
-            s3_url = f"https://bucket-name.s3.amazonaws.com/{s3_key}"
-            
-            # Em ambiente de produção, aqui faria o upload real:
-            # self._upload_real_s3(arquivo_local, s3_key)
-            
-            return s3_url
+            return self.upload_arquivo(arquivo_local, f"faturas/{cliente_hash}/{mes_ano}/{nome_arquivo}")
         except Exception as e:
             raise Exception(f"Erro no upload S3: {e}")
     
+    def upload_arquivo(self, arquivo_local: str, chave: Optional[str] = None) -> str:
+        """
+        Envia o arquivo final da execução para o S3/MinIO e retorna a URL
+        Chave padrão: faturas/<AAAA-MM>/<nome do arquivo>
+        """
+        chave = chave or f"faturas/{datetime.now().strftime('%Y-%m')}/{os.path.basename(arquivo_local)}"
+        content_type = "application/pdf" if arquivo_local.lower().endswith(".pdf") else "application/octet-stream"
+        return obter_cliente_storage().enviar_arquivo(arquivo_local, chave, content_type).url
+    
+    def upload_arquivos(self, itens: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """Envia vários (arquivo, chave) em paralelo; None nos itens que falharam"""
+        resultados = obter_cliente_storage().enviar_varios(itens)
+        for (arquivo_local, _), resultado in zip(itens, resultados):
+            if isinstance(resultado, Exception):
+                logger.error(f"Erro no upload de {arquivo_local}: {resultado}")
+        return [None if isinstance(resultado, Exception) else resultado.url for resultado in resultados]
+    
     def validar_arquivo_pdf(self, caminho_arquivo: str) -> bool:
         """Valida se arquivo é PDF válido"""
         try:
@@ -106,6 +140,15 @@ class FileManager:
                     modificacao = datetime.fromtimestamp(os.path.getmtime(caminho_arquivo))
                     if (agora - modificacao).days > dias:
                         os.remove(caminho_arquivo)
+            
+            # Diretórios isolados por execução
+            execucoes_dir = os.path.join(self.download_dir, "execucoes")
+            if os.path.isdir(execucoes_dir):
+                for nome in os.listdir(execucoes_dir):
+                    caminho_dir = os.path.join(execucoes_dir, nome)
+                    modificacao = datetime.fromtimestamp(os.path.getmtime(caminho_dir))
+                    if (agora - modificacao).days > dias:
+                        remover_diretorio_execucao(caminho_dir)
         except Exception as e:
             print(f"Erro ao limpar downloads antigos: {e}")
     
@@ -0,0 +1,97 @@
+"""
+Montagem de faturas PDF a partir de fluxos de bytes
+Mescla respostas HTTP, downloads do navegador ou arquivos sem arquivos
+intermediários e grava o resultado direto no destino (arquivo ou fluxo)
+"""
+
+import io
+import os
+import shutil
+import logging
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# bytes (resposta HTTP), caminho (download do navegador) ou fluxo binário aberto
+FontePDF = Union[bytes, bytearray, memoryview, str, os.PathLike, BinaryIO]
+
+TAMANHO_BLOCO = 1024 * 1024
+
+
+@dataclass
+class DocumentoPDF:
+    """Documento a mesclar, com a senha quando protegido"""
+    fonte: FontePDF
+    senha: Optional[str] = None
+
+
+def _documento(item) -> DocumentoPDF:
+    return item if isinstance(item, DocumentoPDF) else DocumentoPDF(item)
+
+
+def _abrir(fonte: FontePDF) -> BinaryIO:
+    """Fluxo de leitura sobre a fonte sem copiar o conteúdo"""
+    if isinstance(fonte, (bytes, bytearray, memoryview)):
+        return io.BytesIO(fonte)
+    if isinstance(fonte, (str, os.PathLike)):
+        return open(fonte, "rb")
+    return fonte
+
+
+def _gravar(destino: Union[str, os.PathLike, BinaryIO], escrever):
+    """Grava no fluxo ou, para caminhos, em arquivo temporário renomeado ao final"""
+    if not isinstance(destino, (str, os.PathLike)):
+        escrever(destino)
+        return
+    parcial = f"{os.fspath(destino)}.parcial"
+    try:
+        with open(parcial, "wb") as arquivo:
+            escrever(arquivo)
+        os.replace(parcial, destino)
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+
+
+def montar_pdf(documentos: Iterable[Union[DocumentoPDF, FontePDF]], destino: Union[str, os.PathLike, BinaryIO]) -> int:
+    """
+    Mescla os documentos na ordem informada e grava no destino
+
+    Um único documento sem senha é copiado em blocos, sem interpretar o PDF.
+    Nos demais casos as páginas são anexadas com PdfWriter.append, que
+    reaproveita os objetos de cada documento em vez de copiar página a página.
+
+    Args:
+        documentos: Fontes (bytes, caminho ou fluxo) ou DocumentoPDF com senha
+        destino: Caminho do arquivo final ou fluxo binário (ex.: upload)
+
+    Returns:
+        Quantidade de documentos mesclados
+    """
+    documentos: List[DocumentoPDF] = [_documento(item) for item in documentos]
+    if not documentos:
+        raise ValueError("Nenhum documento para montar o PDF")
+
+    fluxos = [_abrir(documento.fonte) for documento in documentos]
+    try:
+        if len(documentos) == 1 and documentos[0].senha is None:
+            _gravar(destino, lambda saida: shutil.copyfileobj(fluxos[0], saida, TAMANHO_BLOCO))
+            return 1
+
+        from PyPDF2 import PdfReader, PdfWriter
+
+        escritor = PdfWriter()
+        for documento, fluxo in zip(documentos, fluxos):
+            leitor = PdfReader(fluxo)
+            if leitor.is_encrypted:
+                leitor.decrypt(documento.senha or "")
+            escritor.append(leitor)
+        _gravar(destino, escritor.write)
+        return len(documentos)
+    finally:
+        for documento, fluxo in zip(documentos, fluxos):
+            # Fluxos recebidos prontos pertencem a quem os abriu
+            if fluxo is not documento.fonte:
+                fluxo.close()
@@ -0,0 +1,143 @@
+"""
+Perfis de navegador por portal
+Estratégia de carregamento, bloqueio de recursos e viewport aplicados na inicialização
+"""
+
+import json
+import base64
+import logging
+from dataclasses import dataclass, fields, asdict, replace
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Scripts de análise/rastreamento comuns aos portais
+PADROES_RASTREADORES = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*hotjar.com*",
+    "*facebook.net*",
+    "*clarity.ms*",
+    "*newrelic.com*",
+    "*nr-data.net*",
+]
+
+# Recursos de fonte bloqueados quando bloquear_fontes=True (Chrome)
+PADROES_FONTES = ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*"]
+
+
+@dataclass(frozen=True)
+class PerfilNavegador:
+    """Configuração de carregamento do navegador para um portal"""
+    nome: str = "padrao"
+    estrategia_carregamento: str = "normal"
+    bloquear_imagens: bool = False
+    bloquear_fontes: bool = False
+    padroes_bloqueados: Tuple[str, ...] = tuple(PADROES_RASTREADORES)
+    desabilitar_animacoes: bool = True
+    largura: int = 1366
+    altura: int = 768
+
+    def chave(self) -> Tuple:
+        """Identifica navegadores compatíveis no pool"""
+        return tuple(getattr(self, campo.name) for campo in fields(self) if campo.name != "nome")
+
+    def to_dict(self) -> Dict[str, Any]:
+        dados = asdict(self)
+        dados["padroes_bloqueados"] = list(self.padroes_bloqueados)
+        return dados
+
+    def mesclar(self, ajustes: Dict[str, Any]) -> "PerfilNavegador":
+        """Retorna cópia com os campos informados sobrescritos (chaves desconhecidas são ignoradas)"""
+        validos = {campo.name for campo in fields(self)}
+        ajustes = {chave: valor for chave, valor in ajustes.items() if chave in validos}
+        if "padroes_bloqueados" in ajustes:
+            ajustes["padroes_bloqueados"] = tuple(ajustes["padroes_bloqueados"] or ())
+        if ajustes.get("estrategia_carregamento") not in (None, "normal", "eager", "none"):
+            logger.warning(f"Estratégia de carregamento inválida: {ajustes['estrategia_carregamento']}")
+            ajustes.pop("estrategia_carregamento")
+        return replace(self, **ajustes)
+
+    def padroes_efetivos(self) -> List[str]:
+        """Padrões de URL bloqueados, incluindo fontes quando configurado"""
+        padroes = list(self.padroes_bloqueados)
+        if self.bloquear_fontes:
+            padroes.extend(PADROES_FONTES)
+        return padroes
+
+    def script_pac(self) -> Optional[str]:
+        """
+        Proxy auto-config que recusa os hosts bloqueados (Firefox)
+
+        O Firefox não expõe bloqueio por URL via preferências; o PAC
+        direciona os padrões para uma porta fechada e o restante segue direto.
+        """
+        if not self.padroes_bloqueados:
+            return None
+        condicoes = " || ".join(f"shExpMatch(url, {json.dumps(padrao)})" for padrao in self.padroes_bloqueados)
+        script = (
+            "function FindProxyForURL(url, host) {"
+            f" if ({condicoes}) return 'PROXY 127.0.0.1:9';"
+            " return 'DIRECT'; }"
+        )
+        return "data:application/x-ns-proxy-autoconfig;base64," + base64.b64encode(script.encode()).decode()
+
+
+PERFIL_PADRAO = PerfilNavegador()
+
+# Perfis por código de operadora (ajustáveis pelo campo Operadora.configuracao_navegador)
+PERFIS_OPERADORAS: Dict[str, PerfilNavegador] = {
+    # Páginas ASP pesadas; HTML capturado via page_source, imagens não são usadas
+    "EMB": PerfilNavegador(
+        nome="EMB",
+        estrategia_carregamento="eager",
+        bloquear_imagens=True,
+        bloquear_fontes=True,
+    ),
+    # SPA: o conteúdo depende de XHR após o DOMContentLoaded (esperas explícitas)
+    "DIG": PerfilNavegador(
+        nome="DIG",
+        estrategia_carregamento="eager",
+        bloquear_fontes=True,
+    ),
+    "VIV": PerfilNavegador(
+        nome="VIV",
+        estrategia_carregamento="eager",
+        bloquear_imagens=True,
+        bloquear_fontes=True,
+    ),
+    # Formulários de upload: mantém carregamento completo
+    "SAT": PerfilNavegador(nome="SAT", bloquear_fontes=True),
+}
+
+
+def obter_perfil(
+    operadora_codigo: Optional[str] = None,
+    configuracao: Union[str, Dict[str, Any], None] = None
+) -> PerfilNavegador:
+    """
+    Resolve o perfil da operadora aplicando a configuração cadastrada
+
+    Args:
+        operadora_codigo: Código da operadora (EMB, DIG, ...)
+        configuracao: JSON (texto ou dict) do campo Operadora.configuracao_navegador
+
+    Returns:
+        PerfilNavegador resultante
+    """
+    perfil = PERFIS_OPERADORAS.get((operadora_codigo or "").upper(), PERFIL_PADRAO)
+
+    if configuracao:
+        if isinstance(configuracao, str):
+            try:
+                configuracao = json.loads(configuracao)
+            except ValueError as e:
+                logger.warning(f"Configuração de navegador inválida para {operadora_codigo}: {e}")
+                return perfil
+        if isinstance(configuracao, dict):
+            perfil = perfil.mesclar(configuracao)
+            if "nome" not in configuracao and operadora_codigo:
+                perfil = replace(perfil, nome=operadora_codigo.upper())
+
+    return perfil
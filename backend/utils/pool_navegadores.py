@@ -0,0 +1,302 @@
+"""
+Pool de navegadores pré-aquecidos por processo worker
+Evita o cold start do Firefox/Chrome a cada fatura baixada
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .perfis_navegador import PerfilNavegador, PERFIL_PADRAO
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(nome: str, padrao: int) -> int:
+    """Lê inteiro de variável de ambiente"""
+    try:
+        return int(os.getenv(nome, str(padrao)))
+    except ValueError:
+        return padrao
+
+
+@dataclass
+class ConfiguracaoPool:
+    """Configuração do pool de navegadores (variáveis RPA_POOL_*)"""
+    tamanho: int = field(default_factory=lambda: _env_int("RPA_POOL_TAMANHO", 2))
+    max_usos: int = field(default_factory=lambda: _env_int("RPA_POOL_MAX_USOS", 50))
+    max_rss_mb: int = field(default_factory=lambda: _env_int("RPA_POOL_MAX_RSS_MB", 1500))
+    # CPU média do navegador ocioso no pool (entre a devolução e o próximo empréstimo)
+    max_cpu_percentual: int = field(default_factory=lambda: _env_int("RPA_POOL_MAX_CPU_PERCENTUAL", 90))
+    timeout_aquisicao: int = field(default_factory=lambda: _env_int("RPA_POOL_TIMEOUT_AQUISICAO", 300))
+    browser: str = field(default_factory=lambda: os.getenv("RPA_BROWSER", "firefox"))
+    headless: bool = field(default_factory=lambda: os.getenv("RPA_HEADLESS", "true").lower() == "true")
+    perfil: Optional[PerfilNavegador] = None
+
+
+class PoolNavegadores:
+    """
+    Pool de drivers Selenium já inicializados
+
+    Os navegadores são emprestados às execuções RPA e devolvidos após
+    limpeza de cookies/storage. São reciclados ao atingir o número máximo
+    de usos ou os limites de memória (RSS) e de CPU ociosa medidos pelo
+    supervisor de processos (ver selenium_driver.SupervisorNavegadores).
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoPool] = None, fabrica: Optional[Callable] = None):
+        self.configuracao = configuracao or ConfiguracaoPool()
+        self._fabrica = fabrica or self._criar_navegador
+        self._condicao = threading.Condition()
+        self._livres: List = []
+        self._usos: Dict[int, int] = {}
+        self._total = 0
+        self._pid = os.getpid()
+        self._estatisticas = {"criados": 0, "reutilizados": 0, "reciclados": 0, "descartados": 0}
+
+    def _criar_navegador(self):
+        """Cria e inicializa um novo navegador (cold start)"""
+        from .selenium_driver import SeleniumDriver
+
+        navegador = SeleniumDriver(
+            headless=self.configuracao.headless,
+            browser=self.configuracao.browser,
+            usar_pool=False,
+            perfil=self.configuracao.perfil
+        )
+        navegador.inicializar()
+        return navegador
+
+    def _verificar_fork(self):
+        """Descarta o estado herdado do processo pai após fork do worker"""
+        if os.getpid() != self._pid:
+            with self._condicao:
+                self._pid = os.getpid()
+                self._livres = []
+                self._usos = {}
+                self._total = 0
+
+    def aquecer(self, quantidade: Optional[int] = None) -> int:
+        """Pré-inicializa navegadores até a quantidade informada (padrão: tamanho do pool)"""
+        self._verificar_fork()
+        alvo = min(quantidade or self.configuracao.tamanho, self.configuracao.tamanho)
+        criados = 0
+
+        while True:
+            with self._condicao:
+                if self._total >= alvo:
+                    break
+                self._total += 1
+
+            try:
+                navegador = self._fabrica()
+            except Exception as e:
+                with self._condicao:
+                    self._total -= 1
+                    self._condicao.notify()
+                logger.error(f"Erro ao aquecer navegador do pool: {e}")
+                break
+
+            with self._condicao:
+                self._usos[id(navegador)] = 0
+                self._livres.append(navegador)
+                self._estatisticas["criados"] += 1
+                self._condicao.notify()
+            criados += 1
+
+        return criados
+
+    def adquirir(self, timeout: Optional[float] = None):
+        """
+        Empresta um navegador do pool
+
+        Reutiliza um navegador livre, cria um novo se houver capacidade
+        ou aguarda a devolução de outro até o timeout.
+        """
+        self._verificar_fork()
+        timeout = self.configuracao.timeout_aquisicao if timeout is None else timeout
+        limite = time.monotonic() + timeout
+
+        while True:
+            navegador = None
+            with self._condicao:
+                while True:
+                    if self._livres:
+                        navegador = self._livres.pop()
+                        break
+                    if self._total < self.configuracao.tamanho:
+                        self._total += 1
+                        break
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        raise TimeoutError(
+                            f"Nenhum navegador disponível no pool após {timeout}s"
+                        )
+                    self._condicao.wait(restante)
+
+            if navegador is None:
+                try:
+                    navegador = self._fabrica()
+                except Exception:
+                    with self._condicao:
+                        self._total -= 1
+                        self._condicao.notify()
+                    raise
+
+                with self._condicao:
+                    self._usos[id(navegador)] = 1
+                    self._estatisticas["criados"] += 1
+                return navegador
+
+            # Navegador reutilizado: confirma que o processo ainda responde
+            if not navegador.esta_ativo():
+                logger.warning("Navegador do pool não responde, descartando")
+                self._descartar(navegador)
+                continue
+            
+            # Navegador parado no pool não deveria consumir CPU nem crescer em memória
+            motivo = self._excede_recursos(navegador, verificar_cpu=True)
+            if motivo:
+                logger.info(f"Reciclando navegador ocioso com {motivo}")
+                with self._condicao:
+                    self._estatisticas["reciclados"] += 1
+                self._descartar(navegador)
+                continue
+
+            with self._condicao:
+                self._usos[id(navegador)] = self._usos.get(id(navegador), 0) + 1
+                self._estatisticas["reutilizados"] += 1
+            return navegador
+
+    def devolver(self, navegador, descartar: bool = False):
+        """Devolve navegador ao pool após limpar a sessão"""
+        if os.getpid() != self._pid:
+            return
+
+        if descartar:
+            self._descartar(navegador)
+            return
+
+        if self._deve_reciclar(navegador):
+            with self._condicao:
+                self._estatisticas["reciclados"] += 1
+            self._descartar(navegador)
+            return
+
+        try:
+            navegador.resetar_sessao()
+        except Exception as e:
+            logger.warning(f"Falha ao limpar sessão do navegador, descartando: {e}")
+            self._descartar(navegador)
+            return
+
+        with self._condicao:
+            self._livres.append(navegador)
+            self._condicao.notify()
+
+    @contextmanager
+    def emprestar(self, timeout: Optional[float] = None) -> Iterator:
+        """Context manager para empréstimo de navegador"""
+        navegador = self.adquirir(timeout)
+        try:
+            yield navegador
+        finally:
+            self.devolver(navegador)
+
+    def _deve_reciclar(self, navegador) -> bool:
+        """Verifica limites de uso e memória do navegador"""
+        usos = self._usos.get(id(navegador), 0)
+        if self.configuracao.max_usos and usos >= self.configuracao.max_usos:
+            logger.info(f"Reciclando navegador após {usos} usos")
+            return True
+
+        # A CPU na devolução inclui o uso normal da execução; só a memória é avaliada
+        motivo = self._excede_recursos(navegador, verificar_cpu=False)
+        if motivo:
+            logger.info(f"Reciclando navegador com {motivo}")
+            return True
+
+        return False
+
+    def _excede_recursos(self, navegador, verificar_cpu: bool) -> Optional[str]:
+        """Limite de RSS/CPU excedido pelo navegador (a medição também inicia a janela de CPU)"""
+        if not self.configuracao.max_rss_mb and not self.configuracao.max_cpu_percentual:
+            return None
+
+        uso = navegador.obter_uso_processos()
+        if self.configuracao.max_rss_mb and uso.rss_mb > self.configuracao.max_rss_mb:
+            return f"{uso.rss_mb:.0f} MB de RSS"
+        if verificar_cpu and self.configuracao.max_cpu_percentual and uso.cpu_percentual > self.configuracao.max_cpu_percentual:
+            return f"{uso.cpu_percentual:.0f}% de CPU"
+        return None
+
+    def _descartar(self, navegador):
+        """Finaliza navegador e libera sua vaga no pool"""
+        try:
+            navegador.finalizar()
+        except Exception as e:
+            logger.warning(f"Erro ao finalizar navegador descartado: {e}")
+
+        with self._condicao:
+            self._usos.pop(id(navegador), None)
+            self._total = max(0, self._total - 1)
+            self._estatisticas["descartados"] += 1
+            self._condicao.notify()
+
+    def encerrar(self):
+        """Finaliza todos os navegadores livres do pool"""
+        with self._condicao:
+            livres, self._livres = self._livres, []
+
+        for navegador in livres:
+            self._descartar(navegador)
+
+    def estatisticas(self) -> Dict[str, int]:
+        """Retorna contadores do pool"""
+        with self._condicao:
+            return {
+                **self._estatisticas,
+                "total": self._total,
+                "livres": len(self._livres),
+                "emprestados": self._total - len(self._livres),
+            }
+
+
+# Pools por processo, indexados por (browser, headless, perfil)
+_pools: Dict[Tuple, PoolNavegadores] = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool_navegadores(
+    browser: str = "firefox",
+    headless: bool = True,
+    perfil: Optional[PerfilNavegador] = None
+) -> PoolNavegadores:
+    """
+    Retorna o pool de navegadores do processo atual para a configuração informada
+
+    O perfil é aplicado na inicialização do navegador, por isso portais
+    com perfis diferentes usam pools diferentes.
+    """
+    perfil = perfil or PERFIL_PADRAO
+    chave = (browser.lower(), headless, perfil.chave())
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            configuracao = ConfiguracaoPool(browser=browser.lower(), headless=headless, perfil=perfil)
+            pool = PoolNavegadores(configuracao)
+            _pools[chave] = pool
+        return pool
+
+
+def encerrar_pools_navegadores():
+    """Finaliza todos os pools do processo atual"""
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.encerrar()
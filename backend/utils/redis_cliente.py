@@ -0,0 +1,58 @@
+"""
+Conexão Redis compartilhada pelos utilitários de coordenação entre workers
+Retorna None quando o Redis não está disponível, permitindo fallback local
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_cliente = None
+_falha_em = 0.0
+_lock = threading.Lock()
+
+# Intervalo mínimo entre novas tentativas de conexão após falha
+INTERVALO_RECONEXAO = 30
+
+
+def obter_cliente_redis():
+    """
+    Retorna cliente Redis configurado por REDIS_URL
+
+    Returns:
+        Cliente redis.Redis ou None se o pacote/servidor estiver indisponível
+    """
+    global _cliente, _falha_em
+
+    if _cliente is not None:
+        return _cliente
+
+    with _lock:
+        if _cliente is not None:
+            return _cliente
+        if _falha_em and time.monotonic() - _falha_em < INTERVALO_RECONEXAO:
+            return None
+
+        try:
+            import redis
+        except ImportError:
+            _falha_em = time.monotonic()
+            return None
+
+        try:
+            cliente = redis.Redis.from_url(
+                os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                socket_timeout=2,
+                socket_connect_timeout=2,
+                decode_responses=True
+            )
+            cliente.ping()
+            _cliente = cliente
+            return _cliente
+        except Exception as e:
+            logger.warning(f"Redis indisponível, usando estado local: {e}")
+            _falha_em = time.monotonic()
+            return None
@@ -4,9 +4,14 @@ Integração com a estrutura de RPAs do sistema
 """
 
 import os
+import json
 import time
+import logging
+import tempfile
+import threading
 from contextlib import contextmanager
-from typing import List, Iterator, Optional
+from dataclasses import dataclass
+from typing import Dict, List, Iterator, Optional, Tuple
 from pathlib import Path
 
 from selenium import webdriver
@@ -22,9 +27,233 @@ from selenium.common.exceptions import (
     ElementNotInteractableException,
     NoSuchElementException,
     TimeoutException,
-    StaleElementReferenceException
+    StaleElementReferenceException,
+    WebDriverException
 )
 
+from .downloads import aguardar_download, obter_diretorio_base_downloads
+from . import esperas
+from .perfis_navegador import PerfilNavegador, PERFIL_PADRAO
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UsoProcessos:
+    """Consumo somado do driver (geckodriver/chromedriver) e dos processos do navegador"""
+    rss_mb: float = 0.0
+    cpu_percentual: float = 0.0
+    processos: int = 0
+
+
+class SupervisorNavegadores:
+    """
+    Acompanha a árvore de processos de cada navegador iniciado pelo worker
+
+    Cada driver inicializado é registrado em um arquivo (pid do dono, pids e
+    horários de criação dos processos). Quando o worker morre sem chamar
+    finalizar() (time limit, revoke com terminate), os processos ficam órfãos
+    e são encerrados por recolher_orfaos() na inicialização do próximo worker.
+    As medições de RSS/CPU alimentam a reciclagem do pool de navegadores.
+    Requer psutil; sem ele, medição e recolhimento ficam desativados.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None):
+        self.diretorio = Path(diretorio or os.getenv(
+            "RPA_REGISTRO_NAVEGADORES_DIR", os.path.join(tempfile.gettempdir(), "rpa_navegadores")
+        ))
+        # pid do driver -> (segundos de CPU da árvore, instante) da última medição
+        self._amostras_cpu: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _psutil():
+        try:
+            import psutil
+            return psutil
+        except ImportError:
+            return None
+
+    def _arvore(self, pid: int) -> list:
+        """Processo informado e todos os descendentes (psutil.Process)"""
+        psutil = self._psutil()
+        if psutil is None:
+            return []
+        try:
+            processo = psutil.Process(pid)
+            return [processo] + processo.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def _arquivo(self, pid_driver: int) -> Path:
+        return self.diretorio / f"{pid_driver}.json"
+
+    def registrar(self, pid_driver: Optional[int]):
+        """Registra a árvore de processos do driver recém-inicializado"""
+        processos = self._arvore(pid_driver) if pid_driver else []
+        if not processos:
+            return
+
+        psutil = self._psutil()
+        try:
+            dono = psutil.Process(os.getpid())
+            registro = {
+                "pid_dono": dono.pid,
+                "dono_criado_em": dono.create_time(),
+                "pid_driver": pid_driver,
+                "processos": [{"pid": p.pid, "criado_em": p.create_time()} for p in processos],
+            }
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            temporario = self._arquivo(pid_driver).with_suffix(".tmp")
+            temporario.write_text(json.dumps(registro))
+            temporario.replace(self._arquivo(pid_driver))
+        except (OSError, psutil.Error) as e:
+            logger.warning(f"Não foi possível registrar processos do navegador {pid_driver}: {e}")
+
+    def medir(self, pid_driver: Optional[int]) -> UsoProcessos:
+        """
+        RSS e CPU da árvore de processos do driver
+
+        A CPU é a média desde a medição anterior do mesmo driver
+        (0 na primeira medição).
+        """
+        processos = self._arvore(pid_driver) if pid_driver else []
+        if not processos:
+            return UsoProcessos()
+
+        psutil = self._psutil()
+        rss = 0
+        cpu_segundos = 0.0
+        vivos = 0
+        for processo in processos:
+            try:
+                rss += processo.memory_info().rss
+                tempos = processo.cpu_times()
+                cpu_segundos += tempos.user + tempos.system
+                vivos += 1
+            except psutil.Error:
+                # Processo encerrado entre a listagem e a leitura
+                continue
+
+        agora = time.monotonic()
+        with self._lock:
+            anterior = self._amostras_cpu.get(pid_driver)
+            self._amostras_cpu[pid_driver] = (cpu_segundos, agora)
+        cpu_percentual = 0.0
+        if anterior and agora > anterior[1]:
+            cpu_percentual = max(0.0, (cpu_segundos - anterior[0]) / (agora - anterior[1]) * 100)
+
+        return UsoProcessos(rss_mb=rss / (1024 * 1024), cpu_percentual=cpu_percentual, processos=vivos)
+
+    def encerrar_arvore(self, pid_driver: Optional[int]):
+        """Encerra processos remanescentes do driver (após quit) e remove o registro"""
+        if not pid_driver:
+            return
+        registro = self._ler(self._arquivo(pid_driver))
+        if registro:
+            self._encerrar_processos(registro)
+        self._remover(pid_driver)
+
+    def recolher_orfaos(self, incluir_processo_atual: bool = False) -> int:
+        """
+        Encerra navegadores cujo processo dono (worker) não existe mais
+
+        Args:
+            incluir_processo_atual: Também encerra os navegadores deste processo
+                (desligamento do worker)
+
+        Returns:
+            Quantidade de processos encerrados
+        """
+        if self._psutil() is None or not self.diretorio.exists():
+            return 0
+
+        encerrados = 0
+        for arquivo in self.diretorio.glob("*.json"):
+            registro = self._ler(arquivo)
+            if registro is None:
+                continue
+            proprio = registro.get("pid_dono") == os.getpid()
+            if proprio and not incluir_processo_atual:
+                continue
+            if not proprio and self._processo_vivo(registro.get("pid_dono"), registro.get("dono_criado_em")):
+                continue
+
+            quantidade = self._encerrar_processos(registro)
+            if quantidade:
+                logger.warning(
+                    f"Encerrados {quantidade} processo(s) de navegador órfão(s) "
+                    f"do worker {registro.get('pid_dono')}"
+                )
+            encerrados += quantidade
+            self._remover(registro.get("pid_driver"), arquivo)
+        return encerrados
+
+    def _processo_vivo(self, pid: Optional[int], criado_em: Optional[float]):
+        """Evita confundir um processo novo que reaproveitou o pid"""
+        psutil = self._psutil()
+        if not pid:
+            return False
+        try:
+            return abs(psutil.Process(pid).create_time() - (criado_em or 0)) < 1
+        except psutil.Error:
+            return False
+
+    def _encerrar_processos(self, registro: dict) -> int:
+        """Encerra os processos registrados ainda vivos e seus descendentes"""
+        psutil = self._psutil()
+        if psutil is None:
+            return 0
+
+        alvos = {}
+        for item in registro.get("processos", []):
+            if not self._processo_vivo(item.get("pid"), item.get("criado_em")):
+                continue
+            for processo in self._arvore(item["pid"]):
+                alvos[processo.pid] = processo
+        if not alvos:
+            return 0
+
+        for processo in alvos.values():
+            try:
+                processo.terminate()
+            except psutil.Error:
+                pass
+        _, restantes = psutil.wait_procs(list(alvos.values()), timeout=3)
+        for processo in restantes:
+            try:
+                processo.kill()
+            except psutil.Error:
+                pass
+        return len(alvos)
+
+    @staticmethod
+    def _ler(arquivo: Path) -> Optional[dict]:
+        try:
+            return json.loads(arquivo.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _remover(self, pid_driver: Optional[int], arquivo: Optional[Path] = None):
+        with self._lock:
+            self._amostras_cpu.pop(pid_driver, None)
+        try:
+            (arquivo or self._arquivo(pid_driver)).unlink()
+        except OSError:
+            pass
+
+
+# Instância do processo
+_supervisor: Optional[SupervisorNavegadores] = None
+
+
+def obter_supervisor_navegadores() -> SupervisorNavegadores:
+    """Retorna o supervisor de processos de navegador do processo"""
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = SupervisorNavegadores()
+    return _supervisor
+
 
 class SeleniumDriver:
     """
@@ -32,18 +261,29 @@ class SeleniumDriver:
     Compatível com a estrutura de RPAs do orquestrador
     """
     
-    def __init__(self, headless: bool = True, browser: str = "firefox"):
+    def __init__(
+        self,
+        headless: bool = True,
+        browser: str = "firefox",
+        usar_pool: Optional[bool] = None,
+        perfil: Optional[PerfilNavegador] = None
+    ):
         self.browser_type = browser
         self.headless = headless
+        self.perfil = perfil or PERFIL_PADRAO
         self._driver = None
         self._driver_wait = None
         self._original_timeout = 30
         self.download_dir = self._get_download_directory()
+        if usar_pool is None:
+            usar_pool = os.getenv("RPA_POOL_HABILITADO", "true").lower() == "true"
+        self.usar_pool = usar_pool
+        self._navegador_emprestado: Optional["SeleniumDriver"] = None
         
     def _get_download_directory(self) -> str:
         """Obtém diretório de download"""
-        downloads_dir = Path.home() / "Downloads" / "RPA_DOWNLOADS"
-        downloads_dir.mkdir(exist_ok=True)
+        downloads_dir = obter_diretorio_base_downloads()
+        downloads_dir.mkdir(parents=True, exist_ok=True)
         return str(downloads_dir)
     
     def inicializar(self):
@@ -53,8 +293,17 @@ class SeleniumDriver:
         else:
             self._inicializar_chrome()
             
+        obter_supervisor_navegadores().registrar(self.pid_driver)
         self._driver_wait = WebDriverWait(self._driver, self._original_timeout)
-        self._driver.maximize_window()
+        self._driver.set_window_size(self.perfil.largura, self.perfil.altura)
+    
+    @property
+    def pid_driver(self) -> Optional[int]:
+        """Pid do geckodriver/chromedriver (raiz da árvore de processos do navegador)"""
+        try:
+            return self._driver.service.process.pid
+        except AttributeError:
+            return None
         
     def _inicializar_firefox(self):
         """Inicializa Firefox com configurações da classe Browser legada"""
@@ -65,6 +314,8 @@ class SeleniumDriver:
             
         options.add_argument("--disable-dev-shm-usage")
         options.add_argument("--no-sandbox")
+        # Permite limpar cookies/storage de todas as origens ao devolver ao pool
+        options.add_argument("-remote-allow-system-access")
         
         # Configurações de download adaptadas
         options.set_preference("browser.download.folderList", 2)
@@ -76,6 +327,8 @@ class SeleniumDriver:
         options.set_preference("browser.download.useDownloadDir", True)
         options.set_preference("pdfjs.disabled", True)
         
+        self._aplicar_perfil_firefox(options)
+        
         # Tentar usar geckodriver do sistema ou instalar
         try:
             self._driver = webdriver.Firefox(options=options)
@@ -108,15 +361,166 @@ class SeleniumDriver:
             "download.prompt_for_download": False,
             "plugins.always_open_pdf_externally": True
         }
+        self._aplicar_perfil_chrome(options, prefs)
         options.add_experimental_option("prefs", prefs)
         
         self._driver = webdriver.Chrome(options=options)
+        
+        padroes = self.perfil.padroes_efetivos()
+        if padroes:
+            self._driver.execute_cdp_cmd("Network.enable", {})
+            self._driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": padroes})
+    
+    def _aplicar_perfil_firefox(self, options: Options):
+        """Estratégia de carregamento, bloqueios e viewport do perfil (Firefox)"""
+        perfil = self.perfil
+        options.page_load_strategy = perfil.estrategia_carregamento
+        options.add_argument(f"--width={perfil.largura}")
+        options.add_argument(f"--height={perfil.altura}")
+        
+        if perfil.bloquear_imagens:
+            options.set_preference("permissions.default.image", 2)
+        if perfil.bloquear_fontes:
+            options.set_preference("gfx.downloadable_fonts.enabled", False)
+            options.set_preference("browser.display.use_document_fonts", 0)
+        if perfil.desabilitar_animacoes:
+            options.set_preference("ui.prefersReducedMotion", 1)
+            options.set_preference("toolkit.cosmeticAnimations.enabled", False)
+            options.set_preference("image.animation_mode", "none")
+        
+        script_pac = perfil.script_pac()
+        if script_pac:
+            options.set_preference("network.proxy.type", 2)
+            options.set_preference("network.proxy.autoconfig_url", script_pac)
+    
+    def _aplicar_perfil_chrome(self, options: ChromeOptions, prefs: dict):
+        """Estratégia de carregamento, bloqueios e viewport do perfil (Chrome)"""
+        perfil = self.perfil
+        options.page_load_strategy = perfil.estrategia_carregamento
+        options.add_argument(f"--window-size={perfil.largura},{perfil.altura}")
+        
+        if perfil.bloquear_imagens:
+            prefs["profile.managed_default_content_settings.images"] = 2
+        if perfil.desabilitar_animacoes:
+            options.add_argument("--force-prefers-reduced-motion")
     
     def finalizar(self):
-        """Finaliza o driver"""
+        """Finaliza o driver e encerra processos do navegador que sobreviverem ao quit"""
         if self._driver:
-            self._driver.quit()
-            self._driver = None
+            pid_driver = self.pid_driver
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+                obter_supervisor_navegadores().encerrar_arvore(pid_driver)
+    
+    def obter_driver(self):
+        """
+        Obtém WebDriver pronto para uso
+        Com pool habilitado, empresta um navegador pré-aquecido do processo
+        """
+        if not self.usar_pool:
+            if not self._driver:
+                self.inicializar()
+            return self._driver
+        
+        if self._navegador_emprestado is None:
+            from .pool_navegadores import obter_pool_navegadores
+            pool = obter_pool_navegadores(self.browser_type, self.headless, self.perfil)
+            self._navegador_emprestado = pool.adquirir()
+        return self._navegador_emprestado._driver
+    
+    def obter_wait(self, driver=None, timeout: Optional[int] = None) -> WebDriverWait:
+        """Obtém WebDriverWait para o driver informado"""
+        return WebDriverWait(driver or self.obter_driver(), timeout or self._original_timeout)
+    
+    def liberar_driver(self, descartar: bool = False):
+        """Devolve o navegador ao pool ou finaliza o driver próprio"""
+        if self._navegador_emprestado is not None:
+            from .pool_navegadores import obter_pool_navegadores
+            navegador, self._navegador_emprestado = self._navegador_emprestado, None
+            pool = obter_pool_navegadores(self.browser_type, self.headless, self.perfil)
+            pool.devolver(navegador, descartar=descartar)
+        else:
+            self.finalizar()
+    
+    def esta_ativo(self) -> bool:
+        """Verifica se o navegador ainda responde"""
+        if not self._driver:
+            return False
+        try:
+            self._driver.current_window_handle
+            return True
+        except Exception:
+            return False
+    
+    def resetar_sessao(self):
+        """
+        Limpa cookies, storage e abas extras antes de reutilizar o navegador
+        Lança exceção se a limpeza completa não puder ser garantida
+        """
+        handles = self._driver.window_handles
+        origens = set()
+        for handle in handles:
+            self._driver.switch_to.window(handle)
+            try:
+                origens.add(self._driver.execute_script("return window.location.origin;"))
+                self._driver.execute_script(
+                    "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+                )
+                self._driver.delete_all_cookies()
+            except WebDriverException:
+                # Páginas internas (about:blank) não aceitam limpeza por origem
+                pass
+        
+        for handle in handles[1:]:
+            self._driver.switch_to.window(handle)
+            self._driver.close()
+        self._driver.switch_to.window(handles[0])
+        
+        if self.browser_type.lower() == "firefox":
+            self._limpar_dados_firefox()
+        else:
+            self._limpar_dados_chrome(origens)
+        
+        self._driver.get("about:blank")
+        self._driver_wait = WebDriverWait(self._driver, self._original_timeout)
+        
+        diretorio_padrao = self._get_download_directory()
+        if self.download_dir != diretorio_padrao:
+            self.definir_diretorio_download(diretorio_padrao)
+    
+    def _limpar_dados_firefox(self):
+        """Remove cookies e storage de todas as origens via contexto privilegiado"""
+        with self._driver.context(self._driver.CONTEXT_CHROME):
+            self._driver.execute_async_script("""
+                const callback = arguments[arguments.length - 1];
+                Services.clearData.deleteData(
+                    Ci.nsIClearDataService.CLEAR_COOKIES |
+                    Ci.nsIClearDataService.CLEAR_DOM_STORAGES |
+                    Ci.nsIClearDataService.CLEAR_AUTH_TOKENS |
+                    Ci.nsIClearDataService.CLEAR_AUTH_CACHE,
+                    () => callback(true)
+                );
+            """)
+    
+    def _limpar_dados_chrome(self, origens):
+        """Remove cookies e storage via Chrome DevTools Protocol"""
+        self._driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origem in origens:
+            if origem and origem.startswith("http"):
+                self._driver.execute_cdp_cmd(
+                    "Storage.clearDataForOrigin",
+                    {"origin": origem, "storageTypes": "all"}
+                )
+    
+    def obter_uso_processos(self) -> UsoProcessos:
+        """RSS e CPU do driver e dos processos do navegador"""
+        return obter_supervisor_navegadores().medir(self.pid_driver)
+    
+    def obter_rss_mb(self) -> float:
+        """Memória residente (MB) do driver e dos processos do navegador"""
+        return self.obter_uso_processos().rss_mb
     
     def get(self, url: str):
         """Navega para URL"""
@@ -186,16 +590,43 @@ class SeleniumDriver:
         select.select_by_visible_text(option)
     
     def wait_for_download(self, filename_pattern: str, timeout: int = 30) -> Optional[str]:
-        """Aguarda download de arquivo"""
-        start_time = time.time()
+        """Aguarda download de arquivo no diretório da execução"""
+        return aguardar_download(
+            self.download_dir,
+            padrao=filename_pattern,
+            extensoes=(),
+            timeout=timeout
+        )
+    
+    def definir_diretorio_download(self, diretorio: str):
+        """
+        Redireciona os downloads do navegador em uso para o diretório informado
+        Permite isolar os arquivos de execuções concorrentes no mesmo host
+        """
+        alvo = self._navegador_emprestado or self
+        self.download_dir = diretorio
+        alvo.download_dir = diretorio
         
-        while time.time() - start_time < timeout:
-            for file in os.listdir(self.download_dir):
-                if filename_pattern in file and not file.endswith('.tmp'):
-                    return os.path.join(self.download_dir, file)
-            time.sleep(1)
+        if not alvo._driver:
+            return
         
-        return None
+        try:
+            if alvo.browser_type.lower() == "firefox":
+                with alvo._driver.context(alvo._driver.CONTEXT_CHROME):
+                    alvo._driver.execute_script(
+                        """
+                        Services.prefs.setIntPref("browser.download.folderList", 2);
+                        Services.prefs.setStringPref("browser.download.dir", arguments[0]);
+                        """,
+                        diretorio
+                    )
+            else:
+                alvo._driver.execute_cdp_cmd(
+                    "Page.setDownloadBehavior",
+                    {"behavior": "allow", "downloadPath": diretorio}
+                )
+        except WebDriverException as e:
+            logger.warning(f"Não foi possível redirecionar downloads para {diretorio}: {e}")
     
     def execute_script(self, script: str, *args):
         """Executa JavaScript"""
@@ -230,5 +661,5 @@ class SeleniumDriver:
             self._driver.switch_to.default_content()
     
     def aguardar(self, segundos: int):
-        """Aguarda tempo especificado"""
-        time.sleep(segundos)
\ No newline at end of file
+        """Aguarda tempo especificado (prefira as esperas condicionais de utils.esperas)"""
+        esperas.aguardar(segundos)
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Cache de sessões autenticadas dos portais das operadoras
+Evita repetir o login quando vários clientes compartilham a mesma credencial
+"""
+
+import os
+import re
+import json
+import time
+import hmac
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .redis_cliente import obter_cliente_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CHAVE = "rpa:sessao:"
+PADRAO_JWT = re.compile(r"eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+")
+
+
+@dataclass
+class SessaoPortal:
+    """Estado de autenticação capturado após login bem-sucedido"""
+    operadora: str
+    cookies: List[Dict[str, Any]] = field(default_factory=list)
+    local_storage: Dict[str, str] = field(default_factory=dict)
+    token: Optional[str] = None
+    url_pos_login: Optional[str] = None
+    capturada_em: float = field(default_factory=time.time)
+    expira_em: float = 0.0
+
+    def expirada(self) -> bool:
+        return time.time() >= self.expira_em
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> "SessaoPortal":
+        return cls(**dados)
+
+
+def _expiracao_token(token: Optional[str]) -> Optional[float]:
+    """Lê o campo exp de um JWT sem validar assinatura"""
+    if not token:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return None
+
+
+def _extrair_token(local_storage: Dict[str, str], chave_token: Optional[str] = None) -> Optional[str]:
+    """Localiza bearer token no localStorage (chave explícita ou primeiro JWT)"""
+    if chave_token and local_storage.get(chave_token):
+        encontrado = PADRAO_JWT.search(local_storage[chave_token])
+        return encontrado.group(0) if encontrado else local_storage[chave_token]
+
+    for valor in local_storage.values():
+        encontrado = PADRAO_JWT.search(valor or "")
+        if encontrado:
+            return encontrado.group(0)
+    return None
+
+
+def _criar_cifra(segredo: bytes):
+    """Fernet derivado do segredo (None sem o pacote cryptography)"""
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        return None
+    return Fernet(base64.urlsafe_b64encode(hashlib.sha256(b"rpa:sessao:cifra|" + segredo).digest()))
+
+
+class CacheSessoesPortal:
+    """
+    Armazena sessões por operadora + credencial
+
+    Usa Redis quando disponível (compartilhado entre workers) e memória
+    local como fallback. A chave é um HMAC de operadora, login e senha com
+    o segredo do servidor (RPA_SESSAO_SEGREDO ou SECRET_KEY): a troca de
+    credencial invalida a sessão e a chave não permite testar senhas.
+
+    Cookies e tokens vão ao Redis cifrados (Fernet, pacote cryptography).
+    Sem o segredo configurado ou sem o pacote, as sessões ficam apenas na
+    memória do processo. O Redis deve ainda assim ser restrito aos workers.
+    """
+
+    def __init__(self, ttl_segundos: Optional[int] = None, segredo: Optional[str] = None):
+        self.ttl_segundos = ttl_segundos or int(os.getenv("RPA_SESSAO_TTL_SEGUNDOS", "1200"))
+        self._local: Dict[str, SessaoPortal] = {}
+        self._lock = threading.Lock()
+
+        segredo = segredo or os.getenv("RPA_SESSAO_SEGREDO") or os.getenv("SECRET_KEY")
+        self._segredo = segredo.encode("utf-8") if segredo else secrets.token_bytes(32)
+        self._cifra = _criar_cifra(self._segredo) if segredo else None
+        if self._cifra is None:
+            logger.warning(
+                "Cache de sessões sem segredo configurado ou sem cryptography: "
+                "sessões mantidas apenas na memória do processo"
+            )
+
+    def _chave(self, operadora: str, login: str, senha: str = "") -> str:
+        bruto = f"{operadora.upper()}|{login}|{senha}".encode("utf-8")
+        return PREFIXO_CHAVE + hmac.new(self._segredo, bruto, hashlib.sha256).hexdigest()
+
+    def _redis(self):
+        """Cliente Redis para sessões (None quando não podem ser cifradas)"""
+        return obter_cliente_redis() if self._cifra is not None else None
+
+    def obter(self, operadora: str, login: str, senha: str = "") -> Optional[SessaoPortal]:
+        """Retorna sessão válida (não expirada) ou None"""
+        chave = self._chave(operadora, login, senha)
+        sessao = None
+
+        redis_cliente = self._redis()
+        if redis_cliente is not None:
+            try:
+                cifrado = redis_cliente.get(chave)
+                if cifrado:
+                    bruto = self._cifra.decrypt(cifrado.encode("ascii") if isinstance(cifrado, str) else cifrado)
+                    sessao = SessaoPortal.from_dict(json.loads(bruto))
+            except Exception as e:
+                logger.warning(f"Erro ao ler sessão do Redis: {e}")
+
+        if sessao is None:
+            with self._lock:
+                sessao = self._local.get(chave)
+
+        if sessao is None or sessao.expirada():
+            return None
+        return sessao
+
+    def salvar(self, sessao: SessaoPortal, login: str, senha: str = ""):
+        """Armazena sessão respeitando o TTL e a expiração do token"""
+        expira_em = time.time() + self.ttl_segundos
+        expiracao_token = _expiracao_token(sessao.token)
+        if expiracao_token:
+            expira_em = min(expira_em, expiracao_token - 30)
+        sessao.expira_em = expira_em
+
+        ttl = int(expira_em - time.time())
+        if ttl <= 0:
+            return
+
+        chave = self._chave(sessao.operadora, login, senha)
+        with self._lock:
+            self._local[chave] = sessao
+
+        redis_cliente = self._redis()
+        if redis_cliente is not None:
+            try:
+                cifrado = self._cifra.encrypt(json.dumps(sessao.to_dict()).encode("utf-8"))
+                redis_cliente.setex(chave, ttl, cifrado.decode("ascii"))
+            except Exception as e:
+                logger.warning(f"Erro ao gravar sessão no Redis: {e}")
+
+    def invalidar(self, operadora: str, login: str, senha: str = ""):
+        """Remove sessão do cache (ex.: portal rejeitou os cookies)"""
+        chave = self._chave(operadora, login, senha)
+        with self._lock:
+            self._local.pop(chave, None)
+
+        redis_cliente = self._redis()
+        if redis_cliente is not None:
+            try:
+                redis_cliente.delete(chave)
+            except Exception as e:
+                logger.warning(f"Erro ao remover sessão do Redis: {e}")
+
+    def capturar_do_driver(self, driver, operadora: str, chave_token: Optional[str] = None) -> SessaoPortal:
+        """Captura cookies, localStorage e bearer token do navegador logado"""
+        local_storage = driver.execute_script(
+            "var itens = {};"
+            "for (var i = 0; i < window.localStorage.length; i++) {"
+            "  var k = window.localStorage.key(i); itens[k] = window.localStorage.getItem(k);"
+            "}"
+            "return itens;"
+        ) or {}
+
+        return SessaoPortal(
+            operadora=operadora.upper(),
+            cookies=driver.get_cookies(),
+            local_storage=local_storage,
+            token=_extrair_token(local_storage, chave_token),
+            url_pos_login=driver.current_url,
+        )
+
+    def aplicar_no_driver(self, driver, sessao: SessaoPortal, url_portal: str):
+        """Injeta a sessão no navegador e abre a página pós-login"""
+        partes = urlparse(sessao.url_pos_login or url_portal)
+        driver.get(f"{partes.scheme}://{partes.netloc}/")
+        driver.delete_all_cookies()
+
+        for cookie in sessao.cookies:
+            cookie = {k: v for k, v in cookie.items() if k in ("name", "value", "path", "domain", "secure", "httpOnly", "expiry")}
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logger.debug(f"Cookie {cookie.get('name')} não aplicado: {e}")
+
+        if sessao.local_storage:
+            driver.execute_script(
+                "var itens = arguments[0];"
+                "Object.keys(itens).forEach(function (k) { window.localStorage.setItem(k, itens[k]); });",
+                sessao.local_storage
+            )
+
+        driver.get(sessao.url_pos_login or url_portal)
+
+    def aplicar_em_requests(self, session, sessao: SessaoPortal):
+        """Injeta cookies e bearer token em um requests.Session"""
+        for cookie in sessao.cookies:
+            session.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie.get("domain"),
+                path=cookie.get("path", "/")
+            )
+        if sessao.token:
+            session.headers["authorization"] = f"Bearer {sessao.token}"
+
+
+# Instância do processo
+_cache_sessoes: Optional[CacheSessoesPortal] = None
+
+
+def obter_cache_sessoes() -> CacheSessoesPortal:
+    """Retorna o cache de sessões do processo"""
+    global _cache_sessoes
+    if _cache_sessoes is None:
+        _cache_sessoes = CacheSessoesPortal()
+    return _cache_sessoes
@@ -0,0 +1,139 @@
+"""
+Spool de uploads pendentes
+Entrega durável da fatura baixada para a fila de storage: o arquivo e um
+manifesto são gravados em disco antes de a task de upload ser enfileirada,
+de modo que uma mensagem perdida pode ser reenfileirada a partir do spool
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from .downloads import obter_diretorio_base_downloads
+
+logger = logging.getLogger(__name__)
+
+NOME_MANIFESTO = "manifesto.json"
+
+
+@dataclass
+class EntradaSpool:
+    """Fatura aguardando upload"""
+    id_processo: str
+    arquivo: str  # Cópia no spool (enviada ao storage)
+    arquivo_origem: str  # Arquivo no diretório da execução (informativo: pode já ter sido limpo)
+    dados_extraidos: Dict[str, Any] = field(default_factory=dict)
+    criado_em: float = field(default_factory=time.time)
+
+
+def _gravar_duravel(caminho: str, conteudo: bytes):
+    """Grava em arquivo temporário com fsync e renomeia (o manifesto nunca fica parcial)"""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(conteudo)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+class SpoolUploads:
+    """
+    Diretório <spool>/<id_processo>/ com a fatura e o manifesto
+
+    Em produção RPA_SPOOL_UPLOADS deve apontar para um volume visto pelos
+    workers de navegador e pelos workers de storage.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None):
+        self.diretorio = diretorio or os.getenv("RPA_SPOOL_UPLOADS") or str(
+            obter_diretorio_base_downloads() / "spool_uploads"
+        )
+
+    def _pasta(self, id_processo: str) -> str:
+        return os.path.join(self.diretorio, re.sub(r"[^A-Za-z0-9_.-]", "_", str(id_processo)) or "sem_processo")
+
+    def depositar(self, id_processo: str, arquivo: str, dados_extraidos: Optional[Dict[str, Any]] = None) -> EntradaSpool:
+        """
+        Coloca a fatura no spool (hard link quando no mesmo volume, senão cópia)
+
+        Returns:
+            Entrada gravada; o upload pode ser enfileirado com segurança
+        """
+        pasta = self._pasta(id_processo)
+        os.makedirs(pasta, exist_ok=True)
+        destino = os.path.join(pasta, os.path.basename(arquivo))
+        if os.path.abspath(destino) != os.path.abspath(arquivo):
+            parcial = f"{destino}.parcial"
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            try:
+                os.link(arquivo, parcial)
+            except OSError:
+                shutil.copyfile(arquivo, parcial)
+                with open(parcial, "rb+") as copia:
+                    os.fsync(copia.fileno())
+            os.replace(parcial, destino)
+
+        entrada = EntradaSpool(
+            id_processo=str(id_processo),
+            arquivo=destino,
+            arquivo_origem=arquivo,
+            dados_extraidos=dict(dados_extraidos or {}),
+        )
+        _gravar_duravel(
+            os.path.join(pasta, NOME_MANIFESTO),
+            json.dumps(asdict(entrada), default=str).encode("utf-8")
+        )
+        logger.info(f"Fatura do processo {id_processo} depositada no spool de uploads")
+        return entrada
+
+    def obter(self, id_processo: str) -> Optional[EntradaSpool]:
+        """Entrada pendente do processo (None se já concluída ou incompleta)"""
+        caminho = os.path.join(self._pasta(id_processo), NOME_MANIFESTO)
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                entrada = EntradaSpool(**json.load(arquivo))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning(f"Manifesto inválido no spool do processo {id_processo}: {e}")
+            return None
+        if not os.path.exists(entrada.arquivo):
+            logger.warning(f"Arquivo do spool ausente para o processo {id_processo}: {entrada.arquivo}")
+            return None
+        return entrada
+
+    def concluir(self, id_processo: str):
+        """Remove a entrada após o upload ser registrado no banco"""
+        shutil.rmtree(self._pasta(id_processo), ignore_errors=True)
+
+    def pendentes(self, idade_minima_segundos: float = 0) -> List[EntradaSpool]:
+        """Entradas mais antigas que idade_minima_segundos (para reenfileirar)"""
+        try:
+            nomes = os.listdir(self.diretorio)
+        except OSError:
+            return []
+        limite = time.time() - idade_minima_segundos
+        entradas = []
+        for nome in nomes:
+            entrada = self.obter(nome)
+            if entrada and entrada.criado_em <= limite:
+                entradas.append(entrada)
+        return entradas
+
+
+# Instância do processo
+_spool: Optional[SpoolUploads] = None
+
+
+def obter_spool_uploads() -> SpoolUploads:
+    """Retorna o spool de uploads do processo"""
+    global _spool
+    if _spool is None:
+        _spool = SpoolUploads()
+    return _spool